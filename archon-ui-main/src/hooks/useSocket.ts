@@ -3,7 +3,7 @@ import { io, Socket } from 'socket.io-client';
 import type { SearchResult } from '../services/api';
 
 interface UploadProgress { docId: string; status: string; error?: string }
-export interface SearchCompleted { query: string; results: SearchResult[] }
+export interface SearchCompleted { query: string; results: SearchResult[]; total?: number; truncated?: boolean }
 interface ServerToClient { 'document:upload_progress': (d: UploadProgress) => void; 'search:completed': (d: SearchCompleted) => void; 'user:join': (d:{userId:string})=>void; 'user:leave': (d:{userId:string})=>void }
 interface ClientToServer { project_join: (d:{projectId:string})=>void; project_leave: (d:{projectId:string})=>void }
 
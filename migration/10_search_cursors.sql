@@ -0,0 +1,219 @@
+-- =====================================================
+-- Keyset pagination for search results
+-- =====================================================
+-- Search functions return each document as JSONB with
+-- the cosine distance it was ranked by, ordered by
+-- (distance, id). Passing the last distance and id of a
+-- page as after_distance / after_id continues after it
+-- instead of re-ranking the earlier pages.
+--
+-- On the index path the keyset condition is applied inside
+-- the candidate scan. Deep pages over an HNSW index rely on
+-- hnsw.iterative_scan (pgvector 0.8+) to keep the scan going
+-- past ef_search rows.
+-- =====================================================
+
+DROP FUNCTION IF EXISTS match_documents(VECTOR, INT, FLOAT, UUID[], UUID[], JSONPATH, BOOLEAN, INT, INT, INT);
+DROP FUNCTION IF EXISTS match_documents_quantized(BIT, VECTOR, INT, INT, FLOAT, UUID[], UUID[], JSONPATH, BOOLEAN, INT, INT);
+DROP FUNCTION IF EXISTS match_documents_reduced(VECTOR, INT, FLOAT, UUID[], UUID[], JSONPATH, BOOLEAN, INT, INT, INT);
+
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    threshold FLOAT DEFAULT 0,
+    source_ids UUID[] DEFAULT NULL,
+    project_ids UUID[] DEFAULT NULL,
+    metadata_match JSONPATH DEFAULT NULL,
+    prefilter BOOLEAN DEFAULT FALSE,
+    candidate_count INT DEFAULT 5,
+    ef_search INT DEFAULT NULL,
+    probes INT DEFAULT NULL,
+    after_distance FLOAT DEFAULT NULL,
+    after_id UUID DEFAULT NULL
+)
+RETURNS SETOF JSONB
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+    PERFORM apply_search_params(ef_search, probes);
+    IF prefilter THEN
+        RETURN QUERY
+        WITH filtered AS MATERIALIZED (
+            SELECT d.*
+            FROM documents d
+            WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+              AND (project_ids IS NULL OR d.source_id IN (
+                    SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+              AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+        ),
+        scored AS (
+            SELECT f, f.id, e.embedding <=> query_embedding AS distance
+            FROM filtered f
+            JOIN embeddings e ON e.doc_id = f.id
+        )
+        SELECT to_jsonb(s.f) || jsonb_build_object('distance', s.distance)
+        FROM scored s
+        WHERE 1 - s.distance >= threshold
+          AND (after_distance IS NULL OR (s.distance, s.id) > (after_distance, after_id))
+        ORDER BY s.distance, s.id
+        LIMIT match_count;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT e.doc_id, e.embedding <=> query_embedding AS distance
+            FROM embeddings e
+            WHERE after_distance IS NULL
+               OR (e.embedding <=> query_embedding, e.doc_id) > (after_distance, after_id)
+            ORDER BY e.embedding <=> query_embedding
+            LIMIT greatest(candidate_count, match_count)
+        )
+        SELECT to_jsonb(d) || jsonb_build_object('distance', c.distance)
+        FROM candidates c
+        JOIN documents d ON d.id = c.doc_id
+        WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+          AND (project_ids IS NULL OR d.source_id IN (
+                SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+          AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+          AND 1 - c.distance >= threshold
+        ORDER BY c.distance, d.id
+        LIMIT match_count;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_documents_quantized(
+    query_bits BIT(1536),
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    candidate_count INT DEFAULT 50,
+    threshold FLOAT DEFAULT 0,
+    source_ids UUID[] DEFAULT NULL,
+    project_ids UUID[] DEFAULT NULL,
+    metadata_match JSONPATH DEFAULT NULL,
+    prefilter BOOLEAN DEFAULT FALSE,
+    ef_search INT DEFAULT NULL,
+    probes INT DEFAULT NULL,
+    after_distance FLOAT DEFAULT NULL,
+    after_id UUID DEFAULT NULL
+)
+RETURNS SETOF JSONB
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+    PERFORM apply_search_params(ef_search, probes);
+    IF prefilter THEN
+        -- Few rows match, so rescore all of them in full precision.
+        RETURN QUERY
+        WITH filtered AS MATERIALIZED (
+            SELECT d.*
+            FROM documents d
+            WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+              AND (project_ids IS NULL OR d.source_id IN (
+                    SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+              AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+        ),
+        scored AS (
+            SELECT f, f.id, e.embedding <=> query_embedding AS distance
+            FROM filtered f
+            JOIN embeddings e ON e.doc_id = f.id
+        )
+        SELECT to_jsonb(s.f) || jsonb_build_object('distance', s.distance)
+        FROM scored s
+        WHERE 1 - s.distance >= threshold
+          AND (after_distance IS NULL OR (s.distance, s.id) > (after_distance, after_id))
+        ORDER BY s.distance, s.id
+        LIMIT match_count;
+    ELSE
+        -- The Hamming shortlist is re-read for every page, but only rows
+        -- after the cursor are rescored and returned.
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT e.doc_id, e.embedding <=> query_embedding AS distance
+            FROM (
+                SELECT e.doc_id, e.embedding
+                FROM embeddings e
+                WHERE e.embedding_bits IS NOT NULL
+                ORDER BY e.embedding_bits <~> query_bits
+                LIMIT candidate_count
+            ) e
+        )
+        SELECT to_jsonb(d) || jsonb_build_object('distance', c.distance)
+        FROM candidates c
+        JOIN documents d ON d.id = c.doc_id
+        WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+          AND (project_ids IS NULL OR d.source_id IN (
+                SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+          AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+          AND 1 - c.distance >= threshold
+          AND (after_distance IS NULL OR (c.distance, d.id) > (after_distance, after_id))
+        ORDER BY c.distance, d.id
+        LIMIT match_count;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_documents_reduced(
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    threshold FLOAT DEFAULT 0,
+    source_ids UUID[] DEFAULT NULL,
+    project_ids UUID[] DEFAULT NULL,
+    metadata_match JSONPATH DEFAULT NULL,
+    prefilter BOOLEAN DEFAULT FALSE,
+    candidate_count INT DEFAULT 5,
+    ef_search INT DEFAULT NULL,
+    probes INT DEFAULT NULL,
+    after_distance FLOAT DEFAULT NULL,
+    after_id UUID DEFAULT NULL
+)
+RETURNS SETOF JSONB
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+    PERFORM apply_search_params(ef_search, probes);
+    IF prefilter THEN
+        RETURN QUERY
+        WITH filtered AS MATERIALIZED (
+            SELECT d.*
+            FROM documents d
+            WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+              AND (project_ids IS NULL OR d.source_id IN (
+                    SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+              AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+        ),
+        scored AS (
+            SELECT f, f.id, e.embedding_reduced <=> query_embedding AS distance
+            FROM filtered f
+            JOIN embeddings e ON e.doc_id = f.id
+            WHERE e.embedding_reduced IS NOT NULL
+        )
+        SELECT to_jsonb(s.f) || jsonb_build_object('distance', s.distance)
+        FROM scored s
+        WHERE 1 - s.distance >= threshold
+          AND (after_distance IS NULL OR (s.distance, s.id) > (after_distance, after_id))
+        ORDER BY s.distance, s.id
+        LIMIT match_count;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT e.doc_id, e.embedding_reduced <=> query_embedding AS distance
+            FROM embeddings e
+            WHERE e.embedding_reduced IS NOT NULL
+              AND (after_distance IS NULL
+                   OR (e.embedding_reduced <=> query_embedding, e.doc_id) > (after_distance, after_id))
+            ORDER BY e.embedding_reduced <=> query_embedding
+            LIMIT greatest(candidate_count, match_count)
+        )
+        SELECT to_jsonb(d) || jsonb_build_object('distance', c.distance)
+        FROM candidates c
+        JOIN documents d ON d.id = c.doc_id
+        WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+          AND (project_ids IS NULL OR d.source_id IN (
+                SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+          AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+          AND 1 - c.distance >= threshold
+        ORDER BY c.distance, d.id
+        LIMIT match_count;
+    END IF;
+END;
+$$;
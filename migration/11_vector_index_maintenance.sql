@@ -0,0 +1,183 @@
+-- =====================================================
+-- Vector index maintenance
+-- =====================================================
+-- ivfflat indexes created on empty tables keep the default
+-- lists = 100 whatever the table grows to. The maintenance
+-- job (INDEX_MAINTENANCE_INTERVAL) reads vector_index_stats(),
+-- rebuilds indexes whose lists no longer fit the row count,
+-- or migrates them to HNSW, and reports build progress from
+-- vector_index_build_progress(). ivfflat centroids are trained
+-- on the rows present at build time, so the row count of each
+-- rebuild is kept in vector_index_builds and an index is also
+-- rebuilt once its table has grown past that by a factor.
+--
+-- Rebuilds use CREATE INDEX CONCURRENTLY and swap the new
+-- index in by name, so reads and writes are never blocked.
+-- CONCURRENTLY cannot run inside a transaction block, which
+-- every RPC call is, so run_index_maintenance() executes
+-- the statement over a separate dblink connection through
+-- the index_maintenance foreign server. Point the server at
+-- this database and map the function owner to a role
+-- without a statement timeout:
+--
+--   ALTER SERVER index_maintenance OPTIONS (SET host 'localhost');
+--   CREATE USER MAPPING FOR postgres SERVER index_maintenance
+--     OPTIONS (user '...', password '...');
+--
+-- The password stays in the user mapping, which only its
+-- owner and superusers can read. run_index_maintenance()
+-- takes an action and index names rather than SQL, builds
+-- the statement itself and only touches the ivfflat and
+-- HNSW indexes listed by vector_index_stats(). Only
+-- service_role may call it.
+-- =====================================================
+
+CREATE EXTENSION IF NOT EXISTS dblink;
+
+CREATE SERVER IF NOT EXISTS index_maintenance
+    FOREIGN DATA WRAPPER dblink_fdw
+    OPTIONS (dbname 'postgres');
+
+CREATE TABLE IF NOT EXISTS vector_index_builds (
+    index_name TEXT PRIMARY KEY,
+    table_rows BIGINT NOT NULL,
+    built_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION vector_index_stats()
+RETURNS TABLE (
+    table_name TEXT,
+    column_name TEXT,
+    index_name TEXT,
+    method TEXT,
+    opclass TEXT,
+    lists INT,
+    is_valid BOOLEAN,
+    table_rows BIGINT,
+    index_bytes BIGINT,
+    built_rows BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        t.relname::text,
+        a.attname::text,
+        c.relname::text,
+        am.amname::text,
+        oc.opcname::text,
+        (SELECT o.option_value::int
+           FROM pg_options_to_table(c.reloptions) o
+          WHERE o.option_name = 'lists'),
+        i.indisvalid,
+        GREATEST(t.reltuples::bigint, COALESCE(s.n_live_tup, 0)),
+        pg_relation_size(c.oid),
+        b.table_rows
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_class t ON t.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_am am ON am.oid = c.relam
+    JOIN pg_opclass oc ON oc.oid = i.indclass[0]
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0]
+    LEFT JOIN pg_stat_user_tables s ON s.relid = t.oid
+    LEFT JOIN vector_index_builds b ON b.index_name = c.relname
+    WHERE n.nspname = 'public'
+      AND am.amname IN ('ivfflat', 'hnsw')
+    ORDER BY t.relname, c.relname
+$$;
+
+CREATE OR REPLACE FUNCTION vector_index_build_progress()
+RETURNS TABLE (
+    index_name TEXT,
+    table_name TEXT,
+    phase TEXT,
+    blocks_done BIGINT,
+    blocks_total BIGINT,
+    tuples_done BIGINT,
+    tuples_total BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        ic.relname::text,
+        tc.relname::text,
+        p.phase,
+        p.blocks_done,
+        p.blocks_total,
+        p.tuples_done,
+        p.tuples_total
+    FROM pg_stat_progress_create_index p
+    JOIN pg_class tc ON tc.oid = p.relid
+    LEFT JOIN pg_class ic ON ic.oid = p.index_relid
+$$;
+
+DROP FUNCTION IF EXISTS run_index_maintenance(TEXT);
+
+CREATE OR REPLACE FUNCTION run_index_maintenance(
+    action TEXT,
+    index_name TEXT,
+    new_name TEXT DEFAULT NULL,
+    method TEXT DEFAULT NULL,
+    lists INT DEFAULT NULL,
+    m INT DEFAULT NULL,
+    ef_construction INT DEFAULT NULL
+)
+RETURNS VOID
+LANGUAGE plpgsql VOLATILE SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    target RECORD;
+    statement TEXT;
+BEGIN
+    SELECT s.table_name, s.column_name, s.opclass INTO target
+    FROM vector_index_stats() s
+    WHERE s.index_name = run_index_maintenance.index_name;
+
+    IF NOT FOUND THEN
+        -- Dropping an index that is already gone is a no-op, as with IF EXISTS.
+        IF action = 'drop'
+           AND to_regclass(format('public.%I', run_index_maintenance.index_name)) IS NULL THEN
+            RETURN;
+        END IF;
+        RAISE EXCEPTION 'not a vector index: %', run_index_maintenance.index_name;
+    END IF;
+
+    IF action IN ('create', 'rename') AND new_name IS NULL THEN
+        RAISE EXCEPTION 'action % needs new_name', action;
+    END IF;
+
+    IF action = 'create' THEN
+        IF method = 'ivfflat' AND lists > 0 THEN
+            statement := format(
+                'CREATE INDEX CONCURRENTLY %I ON public.%I USING ivfflat (%I %I) WITH (lists = %s)',
+                new_name, target.table_name, target.column_name, target.opclass, lists
+            );
+        ELSIF method = 'hnsw' AND m > 0 AND ef_construction > 0 THEN
+            statement := format(
+                'CREATE INDEX CONCURRENTLY %I ON public.%I USING hnsw (%I %I) '
+                'WITH (m = %s, ef_construction = %s)',
+                new_name, target.table_name, target.column_name, target.opclass,
+                m, ef_construction
+            );
+        ELSE
+            RAISE EXCEPTION 'invalid index parameters for method %', method;
+        END IF;
+    ELSIF action = 'drop' THEN
+        statement := format('DROP INDEX CONCURRENTLY IF EXISTS public.%I', run_index_maintenance.index_name);
+    ELSIF action = 'reindex' THEN
+        statement := format('REINDEX INDEX CONCURRENTLY public.%I', run_index_maintenance.index_name);
+    ELSIF action = 'rename' THEN
+        statement := format('ALTER INDEX public.%I RENAME TO %I', run_index_maintenance.index_name, new_name);
+    ELSE
+        RAISE EXCEPTION 'unknown index maintenance action: %', action;
+    END IF;
+    PERFORM dblink_exec('index_maintenance', statement);
+END;
+$$;
+
+REVOKE ALL ON FUNCTION run_index_maintenance(TEXT, TEXT, TEXT, TEXT, INT, INT, INT)
+    FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION run_index_maintenance(TEXT, TEXT, TEXT, TEXT, INT, INT, INT)
+    TO service_role;
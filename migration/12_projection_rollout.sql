@@ -0,0 +1,48 @@
+-- =====================================================
+-- Staged projection rollout
+-- =====================================================
+-- A newly fitted projection is stored inactive next to the
+-- active one. Searches keep using the active projection
+-- while update_reduced_embeddings() backfills the reduced
+-- column in batches, and activate_projection() swaps the
+-- new projection in once every row has been projected.
+-- =====================================================
+
+ALTER TABLE embedding_projections
+    ADD COLUMN IF NOT EXISTS active BOOLEAN NOT NULL DEFAULT true;
+
+ALTER TABLE embedding_projections DROP CONSTRAINT IF EXISTS embedding_projections_pkey;
+
+ALTER TABLE embedding_projections ADD PRIMARY KEY (model, active);
+
+CREATE OR REPLACE FUNCTION update_reduced_embeddings(updates JSONB)
+RETURNS INT
+LANGUAGE sql VOLATILE
+AS $$
+    WITH updated AS (
+        UPDATE embeddings e
+        SET embedding_reduced = (u->>'embedding')::vector
+        FROM jsonb_array_elements(updates) u
+        WHERE e.doc_id = (u->>'doc_id')::uuid
+        RETURNING 1
+    )
+    SELECT count(*)::int FROM updated;
+$$;
+
+CREATE OR REPLACE FUNCTION activate_projection(projection_model TEXT)
+RETURNS BOOLEAN
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM embedding_projections
+        WHERE model = projection_model AND NOT active
+    ) THEN
+        RETURN false;
+    END IF;
+    DELETE FROM embedding_projections WHERE model = projection_model AND active;
+    UPDATE embedding_projections SET active = true
+    WHERE model = projection_model AND NOT active;
+    RETURN true;
+END;
+$$;
@@ -0,0 +1,29 @@
+-- =====================================================
+-- Atomic embedding replacement
+-- =====================================================
+-- Re-embedding an updated document swaps its embeddings
+-- row. Deleting and inserting through two REST calls left
+-- the document without a vector whenever the insert
+-- failed, so both run here in one transaction. The row
+-- carries whichever optional columns (reduced vector,
+-- quantized codes) the writer fills in.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION replace_embedding(embedding_row JSONB)
+RETURNS VOID
+LANGUAGE plpgsql VOLATILE
+AS $$
+DECLARE
+    columns TEXT;
+BEGIN
+    SELECT string_agg(format('%I', key), ', ')
+    INTO columns
+    FROM jsonb_object_keys(embedding_row) AS key;
+
+    DELETE FROM embeddings WHERE doc_id = (embedding_row->>'doc_id')::uuid;
+    EXECUTE format(
+        'INSERT INTO embeddings (%s) SELECT %s FROM jsonb_populate_record(NULL::embeddings, $1)',
+        columns, columns
+    ) USING embedding_row;
+END;
+$$;
@@ -0,0 +1,35 @@
+-- =====================================================
+-- Projection versions
+-- =====================================================
+-- Every embeddings row records the version of the
+-- projection its reduced vector was computed with, and
+-- the projection table records the version of each stored
+-- projection. A rollout re-projects the rows that do not
+-- carry the new version (rows inserted behind its cursor,
+-- rows written with the previous basis, rows stored before
+-- any projection existed) before and after activation.
+-- Workers compare the active version against their cached
+-- projection instead of trusting it for a fixed time.
+-- =====================================================
+
+ALTER TABLE embedding_projections
+    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS projection_version BIGINT;
+
+DROP FUNCTION IF EXISTS update_reduced_embeddings(JSONB);
+
+CREATE OR REPLACE FUNCTION update_reduced_embeddings(updates JSONB, reduced_version BIGINT)
+RETURNS INT
+LANGUAGE sql VOLATILE
+AS $$
+    WITH updated AS (
+        UPDATE embeddings e
+        SET embedding_reduced = (u->>'embedding')::vector,
+            projection_version = reduced_version
+        FROM jsonb_array_elements(updates) u
+        WHERE e.doc_id = (u->>'doc_id')::uuid
+        RETURNING 1
+    )
+    SELECT count(*)::int FROM updated;
+$$;
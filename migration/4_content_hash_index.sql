@@ -0,0 +1,20 @@
+-- =====================================================
+-- Content-addressed deduplication index
+-- =====================================================
+-- Maps the SHA-256 of normalized document content to the
+-- document that first produced it and its embedding, so
+-- identical uploads reuse the stored vector instead of
+-- being embedded again.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS content_hashes (
+    content_hash TEXT PRIMARY KEY,
+    doc_id UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    embedding VECTOR,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_content_hashes_doc_id ON content_hashes(doc_id);
+
+-- Expose the hash stored in document metadata for joins and audits
+CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents((metadata->>'content_hash'));
@@ -0,0 +1,18 @@
+-- =====================================================
+-- Chunk-level embeddings
+-- =====================================================
+-- Documents are split into content-defined chunks and each
+-- chunk's embedding is stored under its hash, so updating a
+-- document only re-embeds the chunks that actually changed.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS document_chunks (
+    doc_id UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    chunk_index INT NOT NULL,
+    chunk_hash TEXT NOT NULL,
+    embedding VECTOR,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    PRIMARY KEY (doc_id, chunk_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_document_chunks_hash ON document_chunks(doc_id, chunk_hash);
@@ -0,0 +1,45 @@
+-- =====================================================
+-- Quantized embedding columns
+-- =====================================================
+-- Binary (sign-bit) codes are 32x smaller than float
+-- vectors and are scanned by Hamming distance through an
+-- HNSW index to shortlist candidates, which are then
+-- rescored against the full-precision embedding. Codes
+-- are only written when EMBEDDING_QUANTIZATION=binary.
+-- pgvector cannot index int8 codes, so they are not
+-- stored; columns from earlier revisions are dropped.
+-- =====================================================
+
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS embedding_bits BIT(1536);
+ALTER TABLE embeddings DROP COLUMN IF EXISTS embedding_int8;
+ALTER TABLE embeddings DROP COLUMN IF EXISTS embedding_scale;
+
+CREATE INDEX IF NOT EXISTS idx_embeddings_bits_hnsw
+    ON embeddings USING hnsw (embedding_bits bit_hamming_ops);
+
+CREATE OR REPLACE FUNCTION match_documents_quantized(
+    query_bits BIT(1536),
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    candidate_count INT DEFAULT 50,
+    filter JSONB DEFAULT '{}'::jsonb,
+    threshold FLOAT DEFAULT 0
+)
+RETURNS SETOF documents
+LANGUAGE sql STABLE
+AS $$
+    WITH candidates AS (
+        SELECT e.doc_id, e.embedding
+        FROM embeddings e
+        WHERE e.embedding_bits IS NOT NULL
+        ORDER BY e.embedding_bits <~> query_bits
+        LIMIT candidate_count
+    )
+    SELECT d.*
+    FROM candidates c
+    JOIN documents d ON d.id = c.doc_id
+    WHERE d.metadata @> filter
+      AND 1 - (c.embedding <=> query_embedding) >= threshold
+    ORDER BY c.embedding <=> query_embedding
+    LIMIT match_count;
+$$;
@@ -0,0 +1,54 @@
+-- =====================================================
+-- Corpus-fitted embedding projections
+-- =====================================================
+-- A PCA projection per embedding model, fitted from a
+-- sample of stored embeddings. Mean and components are
+-- little-endian float32 arrays. When EMBEDDING_PROJECTION
+-- is enabled, embeddings also carry the projected vector
+-- and searches run against it.
+--
+-- pgvector indexes need a fixed dimension, so index the
+-- reduced column once a cut-off is chosen, e.g. for 256:
+--   CREATE INDEX idx_embeddings_reduced_hnsw ON embeddings
+--     USING hnsw ((embedding_reduced::vector(256)) vector_cosine_ops)
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS embedding_projections (
+    model TEXT PRIMARY KEY,
+    source_dim INT NOT NULL,
+    dims INT NOT NULL,
+    mean BYTEA NOT NULL,
+    components BYTEA NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS embedding_reduced VECTOR;
+
+CREATE OR REPLACE FUNCTION sample_embeddings(sample_size INT DEFAULT 5000)
+RETURNS TABLE (embedding VECTOR)
+LANGUAGE sql VOLATILE
+AS $$
+    SELECT e.embedding
+    FROM embeddings e
+    ORDER BY random()
+    LIMIT sample_size;
+$$;
+
+CREATE OR REPLACE FUNCTION match_documents_reduced(
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    filter JSONB DEFAULT '{}'::jsonb,
+    threshold FLOAT DEFAULT 0
+)
+RETURNS SETOF documents
+LANGUAGE sql STABLE
+AS $$
+    SELECT d.*
+    FROM embeddings e
+    JOIN documents d ON d.id = e.doc_id
+    WHERE e.embedding_reduced IS NOT NULL
+      AND d.metadata @> filter
+      AND 1 - (e.embedding_reduced <=> query_embedding) >= threshold
+    ORDER BY e.embedding_reduced <=> query_embedding
+    LIMIT match_count;
+$$;
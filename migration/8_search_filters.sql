@@ -0,0 +1,196 @@
+-- =====================================================
+-- Typed search filters with pushdown
+-- =====================================================
+-- Search filters are compiled into three arguments shared
+-- by every search function: source ids, project ids and
+-- an SQL/JSON path predicate over document metadata. The
+-- indexes below serve each of them.
+--
+-- With prefilter set, matching documents are selected
+-- through those indexes first and ranked exactly, which is
+-- fastest for selective filters. Otherwise the vector
+-- index is scanned for candidate_count candidates and the
+-- filter is applied to them, the caller sizing
+-- candidate_count from the estimated selectivity.
+-- =====================================================
+
+CREATE INDEX IF NOT EXISTS idx_documents_source_id ON documents(source_id);
+CREATE INDEX IF NOT EXISTS idx_sources_project_id ON sources(project_id);
+CREATE INDEX IF NOT EXISTS idx_documents_metadata_path
+    ON documents USING gin (metadata jsonb_path_ops);
+
+-- Planner statistics: document counts per source
+CREATE OR REPLACE FUNCTION document_filter_stats()
+RETURNS TABLE (source_id UUID, project_id UUID, documents BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT s.id, s.project_id, count(d.id)
+    FROM sources s
+    LEFT JOIN documents d ON d.source_id = s.id
+    GROUP BY s.id, s.project_id;
+$$;
+
+DROP FUNCTION IF EXISTS match_documents(VECTOR, INT, JSONB, FLOAT);
+DROP FUNCTION IF EXISTS match_documents_quantized(BIT, VECTOR, INT, INT, JSONB, FLOAT);
+DROP FUNCTION IF EXISTS match_documents_reduced(VECTOR, INT, JSONB, FLOAT);
+
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    threshold FLOAT DEFAULT 0,
+    source_ids UUID[] DEFAULT NULL,
+    project_ids UUID[] DEFAULT NULL,
+    metadata_match JSONPATH DEFAULT NULL,
+    prefilter BOOLEAN DEFAULT FALSE,
+    candidate_count INT DEFAULT 5
+)
+RETURNS SETOF documents
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    IF prefilter THEN
+        RETURN QUERY
+        WITH filtered AS MATERIALIZED (
+            SELECT d.*
+            FROM documents d
+            WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+              AND (project_ids IS NULL OR d.source_id IN (
+                    SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+              AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+        )
+        SELECT f.*
+        FROM filtered f
+        JOIN embeddings e ON e.doc_id = f.id
+        WHERE 1 - (e.embedding <=> query_embedding) >= threshold
+        ORDER BY e.embedding <=> query_embedding
+        LIMIT match_count;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT e.doc_id, e.embedding <=> query_embedding AS distance
+            FROM embeddings e
+            ORDER BY e.embedding <=> query_embedding
+            LIMIT greatest(candidate_count, match_count)
+        )
+        SELECT d.*
+        FROM candidates c
+        JOIN documents d ON d.id = c.doc_id
+        WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+          AND (project_ids IS NULL OR d.source_id IN (
+                SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+          AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+          AND 1 - c.distance >= threshold
+        ORDER BY c.distance
+        LIMIT match_count;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_documents_quantized(
+    query_bits BIT(1536),
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    candidate_count INT DEFAULT 50,
+    threshold FLOAT DEFAULT 0,
+    source_ids UUID[] DEFAULT NULL,
+    project_ids UUID[] DEFAULT NULL,
+    metadata_match JSONPATH DEFAULT NULL,
+    prefilter BOOLEAN DEFAULT FALSE
+)
+RETURNS SETOF documents
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    IF prefilter THEN
+        -- Few rows match, so rescore all of them in full precision.
+        RETURN QUERY
+        WITH filtered AS MATERIALIZED (
+            SELECT d.*
+            FROM documents d
+            WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+              AND (project_ids IS NULL OR d.source_id IN (
+                    SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+              AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+        )
+        SELECT f.*
+        FROM filtered f
+        JOIN embeddings e ON e.doc_id = f.id
+        WHERE 1 - (e.embedding <=> query_embedding) >= threshold
+        ORDER BY e.embedding <=> query_embedding
+        LIMIT match_count;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT e.doc_id, e.embedding
+            FROM embeddings e
+            WHERE e.embedding_bits IS NOT NULL
+            ORDER BY e.embedding_bits <~> query_bits
+            LIMIT candidate_count
+        )
+        SELECT d.*
+        FROM candidates c
+        JOIN documents d ON d.id = c.doc_id
+        WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+          AND (project_ids IS NULL OR d.source_id IN (
+                SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+          AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+          AND 1 - (c.embedding <=> query_embedding) >= threshold
+        ORDER BY c.embedding <=> query_embedding
+        LIMIT match_count;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_documents_reduced(
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    threshold FLOAT DEFAULT 0,
+    source_ids UUID[] DEFAULT NULL,
+    project_ids UUID[] DEFAULT NULL,
+    metadata_match JSONPATH DEFAULT NULL,
+    prefilter BOOLEAN DEFAULT FALSE,
+    candidate_count INT DEFAULT 5
+)
+RETURNS SETOF documents
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    IF prefilter THEN
+        RETURN QUERY
+        WITH filtered AS MATERIALIZED (
+            SELECT d.*
+            FROM documents d
+            WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+              AND (project_ids IS NULL OR d.source_id IN (
+                    SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+              AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+        )
+        SELECT f.*
+        FROM filtered f
+        JOIN embeddings e ON e.doc_id = f.id
+        WHERE e.embedding_reduced IS NOT NULL
+          AND 1 - (e.embedding_reduced <=> query_embedding) >= threshold
+        ORDER BY e.embedding_reduced <=> query_embedding
+        LIMIT match_count;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT e.doc_id, e.embedding_reduced <=> query_embedding AS distance
+            FROM embeddings e
+            WHERE e.embedding_reduced IS NOT NULL
+            ORDER BY e.embedding_reduced <=> query_embedding
+            LIMIT greatest(candidate_count, match_count)
+        )
+        SELECT d.*
+        FROM candidates c
+        JOIN documents d ON d.id = c.doc_id
+        WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+          AND (project_ids IS NULL OR d.source_id IN (
+                SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+          AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+          AND 1 - c.distance >= threshold
+        ORDER BY c.distance
+        LIMIT match_count;
+    END IF;
+END;
+$$;
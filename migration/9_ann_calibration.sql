@@ -0,0 +1,207 @@
+-- =====================================================
+-- Latency-budget-aware index parameters
+-- =====================================================
+-- Calibration tables map index probe settings to the p95
+-- latency and top-k recall measured by the benchmark
+-- (POST /admin/calibration), one row per search backend.
+--
+-- Search functions take ef_search (HNSW) and probes
+-- (ivfflat) and apply them for the current transaction
+-- only. NULL keeps the server defaults. Setting them makes
+-- the functions VOLATILE.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS ann_calibrations (
+    backend TEXT PRIMARY KEY,
+    k INT NOT NULL,
+    points JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION apply_search_params(ef_search INT, probes INT)
+RETURNS VOID
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+    IF ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+    END IF;
+    IF probes IS NOT NULL THEN
+        PERFORM set_config('ivfflat.probes', probes::text, true);
+    END IF;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS match_documents(VECTOR, INT, FLOAT, UUID[], UUID[], JSONPATH, BOOLEAN, INT);
+DROP FUNCTION IF EXISTS match_documents_quantized(BIT, VECTOR, INT, INT, FLOAT, UUID[], UUID[], JSONPATH, BOOLEAN);
+DROP FUNCTION IF EXISTS match_documents_reduced(VECTOR, INT, FLOAT, UUID[], UUID[], JSONPATH, BOOLEAN, INT);
+
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    threshold FLOAT DEFAULT 0,
+    source_ids UUID[] DEFAULT NULL,
+    project_ids UUID[] DEFAULT NULL,
+    metadata_match JSONPATH DEFAULT NULL,
+    prefilter BOOLEAN DEFAULT FALSE,
+    candidate_count INT DEFAULT 5,
+    ef_search INT DEFAULT NULL,
+    probes INT DEFAULT NULL
+)
+RETURNS SETOF documents
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+    PERFORM apply_search_params(ef_search, probes);
+    IF prefilter THEN
+        RETURN QUERY
+        WITH filtered AS MATERIALIZED (
+            SELECT d.*
+            FROM documents d
+            WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+              AND (project_ids IS NULL OR d.source_id IN (
+                    SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+              AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+        )
+        SELECT f.*
+        FROM filtered f
+        JOIN embeddings e ON e.doc_id = f.id
+        WHERE 1 - (e.embedding <=> query_embedding) >= threshold
+        ORDER BY e.embedding <=> query_embedding
+        LIMIT match_count;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT e.doc_id, e.embedding <=> query_embedding AS distance
+            FROM embeddings e
+            ORDER BY e.embedding <=> query_embedding
+            LIMIT greatest(candidate_count, match_count)
+        )
+        SELECT d.*
+        FROM candidates c
+        JOIN documents d ON d.id = c.doc_id
+        WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+          AND (project_ids IS NULL OR d.source_id IN (
+                SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+          AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+          AND 1 - c.distance >= threshold
+        ORDER BY c.distance
+        LIMIT match_count;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_documents_quantized(
+    query_bits BIT(1536),
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    candidate_count INT DEFAULT 50,
+    threshold FLOAT DEFAULT 0,
+    source_ids UUID[] DEFAULT NULL,
+    project_ids UUID[] DEFAULT NULL,
+    metadata_match JSONPATH DEFAULT NULL,
+    prefilter BOOLEAN DEFAULT FALSE,
+    ef_search INT DEFAULT NULL,
+    probes INT DEFAULT NULL
+)
+RETURNS SETOF documents
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+    PERFORM apply_search_params(ef_search, probes);
+    IF prefilter THEN
+        -- Few rows match, so rescore all of them in full precision.
+        RETURN QUERY
+        WITH filtered AS MATERIALIZED (
+            SELECT d.*
+            FROM documents d
+            WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+              AND (project_ids IS NULL OR d.source_id IN (
+                    SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+              AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+        )
+        SELECT f.*
+        FROM filtered f
+        JOIN embeddings e ON e.doc_id = f.id
+        WHERE 1 - (e.embedding <=> query_embedding) >= threshold
+        ORDER BY e.embedding <=> query_embedding
+        LIMIT match_count;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT e.doc_id, e.embedding
+            FROM embeddings e
+            WHERE e.embedding_bits IS NOT NULL
+            ORDER BY e.embedding_bits <~> query_bits
+            LIMIT candidate_count
+        )
+        SELECT d.*
+        FROM candidates c
+        JOIN documents d ON d.id = c.doc_id
+        WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+          AND (project_ids IS NULL OR d.source_id IN (
+                SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+          AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+          AND 1 - (c.embedding <=> query_embedding) >= threshold
+        ORDER BY c.embedding <=> query_embedding
+        LIMIT match_count;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_documents_reduced(
+    query_embedding VECTOR,
+    match_count INT DEFAULT 5,
+    threshold FLOAT DEFAULT 0,
+    source_ids UUID[] DEFAULT NULL,
+    project_ids UUID[] DEFAULT NULL,
+    metadata_match JSONPATH DEFAULT NULL,
+    prefilter BOOLEAN DEFAULT FALSE,
+    candidate_count INT DEFAULT 5,
+    ef_search INT DEFAULT NULL,
+    probes INT DEFAULT NULL
+)
+RETURNS SETOF documents
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+    PERFORM apply_search_params(ef_search, probes);
+    IF prefilter THEN
+        RETURN QUERY
+        WITH filtered AS MATERIALIZED (
+            SELECT d.*
+            FROM documents d
+            WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+              AND (project_ids IS NULL OR d.source_id IN (
+                    SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+              AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+        )
+        SELECT f.*
+        FROM filtered f
+        JOIN embeddings e ON e.doc_id = f.id
+        WHERE e.embedding_reduced IS NOT NULL
+          AND 1 - (e.embedding_reduced <=> query_embedding) >= threshold
+        ORDER BY e.embedding_reduced <=> query_embedding
+        LIMIT match_count;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT e.doc_id, e.embedding_reduced <=> query_embedding AS distance
+            FROM embeddings e
+            WHERE e.embedding_reduced IS NOT NULL
+            ORDER BY e.embedding_reduced <=> query_embedding
+            LIMIT greatest(candidate_count, match_count)
+        )
+        SELECT d.*
+        FROM candidates c
+        JOIN documents d ON d.id = c.doc_id
+        WHERE (source_ids IS NULL OR d.source_id = ANY(source_ids))
+          AND (project_ids IS NULL OR d.source_id IN (
+                SELECT s.id FROM sources s WHERE s.project_id = ANY(project_ids)))
+          AND (metadata_match IS NULL OR d.metadata @@ metadata_match)
+          AND 1 - c.distance >= threshold
+        ORDER BY c.distance
+        LIMIT match_count;
+    END IF;
+END;
+$$;
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
 import time
-from typing import Awaitable, Callable
+from typing import Any, Awaitable, Callable, Sequence, Type, TypeVar
 
 from fastapi import FastAPI, Request, Response
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
 from starlette.middleware.base import BaseHTTPMiddleware
 
 
@@ -12,6 +19,30 @@ class MetricsError(Exception):
     """Raised when metrics operations fail."""
 
 
+MetricT = TypeVar("MetricT", Counter, Gauge, Histogram)
+
+
+def shared_metric(
+    metric_type: Type[MetricT],
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    **kwargs: Any,
+) -> MetricT:
+    """Create a metric, or return the one already registered under ``name``.
+
+    The server package is importable as both ``src.server`` and ``server``,
+    so a module defining metrics at import time can run twice in one process.
+    """
+    try:
+        return metric_type(name, documentation, labelnames, **kwargs)
+    except ValueError:
+        existing = REGISTRY._names_to_collectors.get(name)  # noqa: SLF001
+        if not isinstance(existing, metric_type):
+            raise
+        return existing
+
+
 REQUEST_COUNT = Counter(
     "http_requests_total",
     "Total HTTP requests",
@@ -0,0 +1,138 @@
+"""Offline hashed n-gram embedder.
+
+Texts are lower-cased and whitespace-normalized, then split into character
+n-grams and word unigrams/bigrams. Every feature is hashed into one of
+``dim`` buckets with a hash-derived sign (the "hashing trick"), term
+frequencies are damped with ``log1p``, optionally weighted by an IDF vector,
+and the result is L2-normalized. Character n-gram hashes are computed for a
+whole text at once with NumPy rolling polynomials, so no per-n-gram Python
+work is done.
+
+Kept free of application imports so it can run in spawned pool processes.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+_WORD = re.compile(r"\w+")
+_MULT = np.uint64(1099511628211)  # FNV prime, a good odd multiplier
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_WORD_SEED = 0x5BD1E995
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """Avalanche 64-bit hashes so every output bit depends on every input bit."""
+    h = h ^ (h >> np.uint64(33))
+    h = h * _MIX
+    return h ^ (h >> np.uint64(29))
+
+
+class HashedNgramEmbedder:
+    """Deterministic bag-of-n-grams embedder with a fixed output dimension."""
+
+    def __init__(
+        self,
+        dim: int = 1536,
+        ngram_sizes: Sequence[int] = (3, 4, 5),
+        idf: Optional[np.ndarray] = None,
+    ) -> None:
+        if dim <= 0:
+            raise ValueError("dim must be positive")
+        if idf is not None and idf.shape != (dim,):
+            raise ValueError("idf must have shape (dim,)")
+        self.dim = dim
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.idf = None if idf is None else idf.astype(np.float32)
+
+    def _char_hashes(self, codes: np.ndarray) -> List[np.ndarray]:
+        out = []
+        for n in self.ngram_sizes:
+            if len(codes) < n:
+                continue
+            windows = len(codes) - n + 1
+            # Seeding with n keeps n-grams of different sizes apart.
+            h = np.full(windows, n, dtype=np.uint64)
+            for k in range(n):
+                # uint64 arithmetic wraps, which is exactly the modulus we want.
+                h = h * _MULT + codes[k : k + windows]
+            out.append(h)
+        return out
+
+    def _word_hashes(self, text: str) -> np.ndarray:
+        words = _WORD.findall(text)
+        feats = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return np.fromiter(
+            (zlib.crc32(w.encode(), _WORD_SEED) for w in feats),
+            dtype=np.uint64,
+            count=len(feats),
+        )
+
+    def _features(self, text: str) -> np.ndarray:
+        padded = f" {_normalize(text)} "
+        codes = np.frombuffer(padded.encode("utf-32-le"), dtype=np.uint32).astype(
+            np.uint64
+        )
+        parts = self._char_hashes(codes)
+        parts.append(self._word_hashes(padded))
+        return _mix(np.concatenate(parts))
+
+    def feature_counts(self, text: str) -> np.ndarray:
+        """Signed bucket counts for ``text`` before damping and weighting."""
+        hashes = self._features(text)
+        buckets = (hashes >> np.uint64(1)) % np.uint64(self.dim)
+        signs = np.where(hashes & np.uint64(1), 1.0, -1.0)
+        return np.bincount(
+            buckets.astype(np.intp), weights=signs, minlength=self.dim
+        ).astype(np.float32)
+
+    def embed_batch(self, texts: Iterable[str]) -> np.ndarray:
+        """Return an ``(n, dim)`` float32 matrix of L2-normalized rows."""
+        rows = [self.feature_counts(text) for text in texts]
+        if not rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        matrix = np.stack(rows)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        if self.idf is not None:
+            matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_batch([text])[0].tolist()
+
+
+def fit_idf(embedder: HashedNgramEmbedder, corpus: Iterable[str]) -> np.ndarray:
+    """Compute smoothed per-bucket IDF weights from a sample corpus."""
+    docs = 0
+    df = np.zeros(embedder.dim, dtype=np.float64)
+    for text in corpus:
+        df += embedder.feature_counts(text) != 0
+        docs += 1
+    return np.log((1 + docs) / (1 + df)).astype(np.float32) + 1.0
+
+
+_embedder: Optional[HashedNgramEmbedder] = None
+
+
+def init_worker(dim: int, idf_path: str = "") -> None:
+    """Build the per-process embedder used by :func:`embed_texts`."""
+    global _embedder
+    idf = np.load(idf_path) if idf_path else None
+    _embedder = HashedNgramEmbedder(dim, idf=idf)
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Pool entry point: embed ``texts`` with the worker's embedder."""
+    assert _embedder is not None, "init_worker was not called"
+    return _embedder.embed_batch(texts)
@@ -0,0 +1,68 @@
+"""Worker-side PDF page extraction.
+
+Kept free of application imports so spawned pool processes start
+quickly; the async orchestration lives in
+``src.server.services.pdf_extraction``.
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+from collections import OrderedDict
+from typing import Tuple
+
+from PyPDF2 import PdfReader
+
+
+# Per-process LRU of parsed readers. Page tasks from concurrent uploads
+# interleave on the same workers, so more than one file is kept.
+READER_CACHE_SIZE = 4
+_readers: "OrderedDict[Tuple[str, float], PdfReader]" = OrderedDict()
+
+
+def init_worker(memory_mb: int) -> None:
+    """Apply the address-space cap inside a freshly started worker."""
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):  # pragma: no cover - platform specific
+        pass
+
+
+def _reader(path: str) -> PdfReader:
+    key = (path, os.path.getmtime(path))
+    reader = _readers.get(key)
+    if reader is None:
+        reader = _readers[key] = PdfReader(path)
+        while len(_readers) > READER_CACHE_SIZE:
+            _readers.popitem(last=False)
+    else:
+        _readers.move_to_end(key)
+    return reader
+
+
+def _on_alarm(*_: object) -> None:
+    raise TimeoutError("page extraction timed out")
+
+
+def count_pages(path: str) -> int:
+    """Return the number of pages in ``path``."""
+    return len(_reader(path).pages)
+
+
+def extract_page(path: str, index: int, timeout: float) -> str:
+    """Extract one page, interrupted by ``SIGALRM`` after ``timeout``."""
+    use_alarm = hasattr(signal, "setitimer") and timeout > 0
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _reader(path).pages[index].extract_text() or ""
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
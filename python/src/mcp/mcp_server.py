@@ -12,8 +12,10 @@ from pydantic import BaseModel, Field
 
 from src.common.logging import logger, log_info, log_error
 from src.common.service import create_service
+from src.server.services.embedding import warm_up_embedding
+from src.server.services.warmup import Readiness, warmup_steps
 
-from . import ToolExecutionError
+from . import ToolExecutionError, deps
 from .tools import TOOLS
 from .transport.sse import SSETransport
 
@@ -40,9 +42,30 @@ class RateLimitError(Exception):
 
 
 app = create_service("mcp")
+app.state.readiness = Readiness("mcp")
 transport = SSETransport()
 
 
+@app.on_event("startup")
+async def _warm_up() -> None:
+    if deps.db_service is None:
+        # Without a database step the service never reports ready.
+        app.state.readiness.start({"embedding": warm_up_embedding}, required=("database",))
+    else:
+        app.state.readiness.start(warmup_steps(deps.db_service), required=("database",))
+
+
+@app.on_event("shutdown")
+async def _stop_warm_up() -> None:
+    await app.state.readiness.stop()
+
+
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    data = app.state.readiness.snapshot()
+    return JSONResponse(status_code=200 if data["ready"] else 503, content=data)
+
+
 @app.exception_handler(AuthenticationError)
 async def _auth_error(_: Request, exc: AuthenticationError) -> JSONResponse:
     return JSONResponse(status_code=401, content={"detail": str(exc)})
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -11,6 +11,11 @@ from .. import ToolExecutionError, deps
 from src.server.models.query import Query
 from src.server.services.database import DatabaseError
 from src.server.services.embedding import generate_embedding
+from src.server.services.search_cursor import (
+    CursorError,
+    cursor_embedding,
+    paginated_search,
+)
 
 
 class SearchRequest(BaseModel):
@@ -18,6 +23,9 @@ class SearchRequest(BaseModel):
 
     query: str = Field(..., min_length=1)
     match_count: int = Field(5, ge=1, le=20)
+    mmr_lambda: Optional[float] = Field(None, ge=0.0, le=1.0)
+    paginate: bool = False
+    cursor: Optional[str] = Field(None, min_length=1, max_length=1024)
 
 
 class DocumentRequest(BaseModel):
@@ -27,16 +35,32 @@ class DocumentRequest(BaseModel):
 
 
 async def search_documents(params: Dict[str, Any]) -> Dict[str, Any]:
-    """Search documents via vector similarity."""
+    """Search documents via vector similarity.
+
+    With ``paginate`` set, ``next_cursor`` is returned for fetching the next
+    page by calling again with the same query and ``cursor``.
+    """
 
     data = SearchRequest(**params)
-    embedding = await generate_embedding(data.query)
-    query = Query(query_text=data.query, match_count=data.match_count)
+    query = Query(
+        query_text=data.query,
+        match_count=data.match_count,
+        mmr_lambda=data.mmr_lambda,
+        paginate=data.paginate,
+        cursor=data.cursor,
+    )
     try:
-        docs = await deps.db_service.vector_search(embedding, query)
+        embedding = cursor_embedding(query) or await generate_embedding(data.query)
+        page = await paginated_search(deps.db_service, embedding, query)
+    except CursorError as exc:
+        raise ToolExecutionError(str(exc)) from exc
     except DatabaseError as exc:
         raise ToolExecutionError("search failed") from exc
-    return {"documents": [d.model_dump(mode="json") for d in docs]}
+    result: Dict[str, Any] = {"documents": [d.model_dump(mode="json") for d in page.documents]}
+    if query.paginate or query.cursor:
+        # ``None`` marks the last page.
+        result["next_cursor"] = page.next_cursor
+    return result
 
 
 async def get_document(params: Dict[str, Any]) -> Dict[str, Any]:
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import re
 from pathlib import Path
-from typing import Awaitable, Callable
+from typing import Awaitable, Callable, List
 
 from opentelemetry import trace
 
@@ -12,6 +13,27 @@ class MigrationError(Exception):
 
 tracer = trace.get_tracer(__name__)
 
+_TOKEN = re.compile(r"\$[A-Za-z_0-9]*\$|;")
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split on semicolons that are not inside ``$tag$`` quoted bodies."""
+    statements: List[str] = []
+    start = 0
+    quote: str | None = None
+    for match in _TOKEN.finditer(sql):
+        token = match.group()
+        if quote is not None:
+            if token == quote:
+                quote = None
+        elif token == ";":
+            statements.append(sql[start : match.start()])
+            start = match.end()
+        else:
+            quote = token
+    statements.append(sql[start:])
+    return [s.strip() for s in statements if s.strip()]
+
 
 async def run_sql(path: str, executor: Callable[[str], Awaitable[None]]) -> None:
     """Execute SQL statements from a file using the provided executor.
@@ -25,7 +47,7 @@ async def run_sql(path: str, executor: Callable[[str], Awaitable[None]]) -> None
     except FileNotFoundError as exc:
         raise MigrationError("migration file not found") from exc
 
-    for statement in [s.strip() for s in sql.split(";") if s.strip()]:
+    for statement in split_statements(sql):
         with tracer.start_as_current_span("sql.execute", {"db.statement": statement}) as span:
             try:
                 await executor(statement)
@@ -8,6 +8,9 @@ application to enable real-time features.
 
 from __future__ import annotations
 
+import asyncio
+from typing import Dict
+
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import socketio
@@ -17,8 +20,23 @@ from src.common.metrics import MetricsError, setup_metrics
 from src.common.tracing import TracingSetupError, setup_tracing
 
 from .config import settings
-from .auth.dependencies import require_role
-from .routes import auth, documents, health, projects, sources, search
+from .auth.dependencies import jwt_service, require_role
+from .middleware import UploadSizeLimitMiddleware
+from .routes import admin, auth, documents, health, projects, sources, search
+from .services.crawler import close_http_client
+from .services.database import DatabaseService
+from .services.embedding import warm_up_embedding
+from .services.embedding_client import close_embedding_client
+from .services.index_maintenance import index_maintenance
+from .services.offline_embedding import shutdown_embedding_pool
+from .services.pdf_extraction import shutdown_pdf_pool
+from .services.search_cursor import NEXT_CURSOR_HEADER
+from .services.supabase_client import (
+    SupabaseClientError,
+    close_shared_client,
+    get_shared_client,
+)
+from .services.warmup import Readiness, Step, warmup_steps
 from .socket import sio
 
 
@@ -28,12 +46,46 @@ class HealthCheckError(Exception):
 
 # FastAPI application
 api = FastAPI()
+api.state.readiness = Readiness("server")
+
+
+def _probe_token() -> None:
+    jwt_service.verify_token(jwt_service.create_token("warm-up", "user"))
+
+
+def _warmup_steps() -> Dict[str, Step]:
+    steps: Dict[str, Step] = {"auth": lambda: asyncio.to_thread(_probe_token)}
+    try:
+        db = DatabaseService(get_shared_client())
+    except SupabaseClientError as exc:
+        # Without a database step the service never reports ready.
+        logger.error("Database client unavailable", error=str(exc))
+        return {**steps, "embedding": warm_up_embedding}
+    return {**warmup_steps(db), **steps}
 
 
 @api.on_event("startup")
 async def _log_startup() -> None:
-    """Log server startup."""
+    """Log server startup and start warming pools and caches."""
     await log_info("Server application started")
+    api.state.readiness.start(_warmup_steps(), required=("database",))
+    if index_maintenance.interval > 0:
+        try:
+            index_maintenance.start(DatabaseService(get_shared_client()))
+        except SupabaseClientError as exc:
+            logger.error("Index maintenance not scheduled", error=str(exc))
+
+
+@api.on_event("shutdown")
+async def _stop_workers() -> None:
+    """Stop background worker pools and pooled clients."""
+    await api.state.readiness.stop()
+    await index_maintenance.stop()
+    shutdown_pdf_pool()
+    shutdown_embedding_pool()
+    await close_http_client()
+    await close_embedding_client()
+    await close_shared_client()
 
 
 try:
@@ -46,12 +98,22 @@ try:
 except MetricsError as exc:  # pragma: no cover - defensive
     logger.error("Metrics setup failed", error=str(exc))
 
+api.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/documents/upload": documents.MAX_FILE_SIZE + documents.MAX_REQUEST_OVERHEAD,
+        "/documents/upload/archive": documents.MAX_ARCHIVE_SIZE
+        + documents.MAX_REQUEST_OVERHEAD,
+    },
+)
+
 api.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -67,6 +129,8 @@ api.include_router(projects.router, dependencies=protected)
 api.include_router(sources.router, dependencies=protected)
 api.include_router(documents.router, dependencies=protected)
 api.include_router(search.router, dependencies=protected)
+admin_only = [Depends(rate_limit), Depends(require_role("admin"))]
+api.include_router(admin.router, dependencies=admin_only)
 
 
 # Mount Socket.IO on the FastAPI app
@@ -1,5 +1,6 @@
 """Server middleware package."""
 
 from .mcp_middleware import MCPMiddleware
+from .upload_limit import UploadSizeLimitMiddleware
 
-__all__ = ["MCPMiddleware"]
+__all__ = ["MCPMiddleware", "UploadSizeLimitMiddleware"]
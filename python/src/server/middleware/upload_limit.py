@@ -0,0 +1,34 @@
+"""Middleware rejecting oversized uploads before the body is read."""
+
+from __future__ import annotations
+
+from typing import Awaitable, Callable, Dict
+
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp
+
+
+class UploadSizeLimitMiddleware(BaseHTTPMiddleware):
+    """Answer 413 when ``Content-Length`` exceeds a path's upload limit.
+
+    Multipart parsing happens before route dependencies run, so the check
+    has to live here to avoid spooling a body that will be rejected anyway.
+    Requests without a ``Content-Length`` header are passed through and
+    bounded by the streaming reader in the upload routes.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]) -> None:
+        super().__init__(app)
+        self.limits = {path.rstrip("/"): size for path, size in limits.items()}
+
+    async def dispatch(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        limit = self.limits.get(request.url.path.rstrip("/"))
+        if request.method == "POST" and limit is not None:
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > limit:
+                return JSONResponse({"detail": "file too large"}, status_code=413)
+        return await call_next(request)
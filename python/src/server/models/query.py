@@ -1,11 +1,110 @@
 from __future__ import annotations
 
-from typing import Any, Dict
-from pydantic import BaseModel, Field
+import math
+from typing import Any, Dict, List, Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field, field_validator
+
+
+FILTER_COLUMNS = ("source_id", "project_id")
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+FilterOperator = Literal["eq", "in", "gt", "gte", "lt", "lte"]
+
+
+class FilterCondition(BaseModel):
+    """One typed predicate parsed from ``Query.filters``."""
+
+    field: str
+    op: FilterOperator
+    value: Any
+
+    @property
+    def is_column(self) -> bool:
+        return self.field in FILTER_COLUMNS
+
+    @property
+    def path(self) -> List[str]:
+        """Key segments below ``metadata`` for metadata conditions."""
+        return self.field.split(".")[1:]
+
+
+def _scalar(field: str, value: Any, ordered: bool = False) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"{field}: non-finite numbers are not supported")
+    if ordered and (isinstance(value, bool) or not isinstance(value, (int, float, str))):
+        raise ValueError(f"{field}: range bounds must be numbers or strings")
+    if value is not None and not isinstance(value, (str, int, float, bool)):
+        raise ValueError(f"{field}: values must be scalars")
+    return value
+
+
+def _condition(field: str, op: str, value: Any) -> FilterCondition:
+    if field in FILTER_COLUMNS:
+        if op not in ("eq", "in"):
+            raise ValueError(f"{field}: only eq and in are supported")
+        try:
+            value = [str(UUID(str(v))) for v in value] if op == "in" else str(UUID(str(value)))
+        except ValueError as exc:
+            raise ValueError(f"{field}: expected UUIDs") from exc
+    elif op == "in":
+        value = [_scalar(field, v) for v in value]
+    else:
+        value = _scalar(field, value, ordered=op in RANGE_OPERATORS)
+    if op == "in" and not value:
+        raise ValueError(f"{field}: in needs at least one value")
+    return FilterCondition(field=field, op=op, value=value)
+
+
+def parse_filters(filters: Dict[str, Any]) -> List[FilterCondition]:
+    """Parse the search filter language into conditions, all of which must hold.
+
+    Keys are ``source_id``, ``project_id`` or a metadata path such as
+    ``metadata.lang`` or ``metadata.author.name``; any other key names a
+    top-level metadata key. A scalar value tests equality and a list tests
+    membership. An object applies operators, e.g. ``{"in": ["en", "fr"]}``
+    or ``{"gte": 2020, "lt": 2024}``.
+    """
+    conditions: List[FilterCondition] = []
+    for key, spec in filters.items():
+        field = key if key in FILTER_COLUMNS or key.startswith("metadata.") else f"metadata.{key}"
+        if "" in field.split("."):
+            raise ValueError(f"{key}: invalid field path")
+        if isinstance(spec, dict):
+            if not spec:
+                raise ValueError(f"{key}: empty operator object")
+            unknown = set(spec) - {"eq", "in", *RANGE_OPERATORS}
+            if unknown:
+                raise ValueError(f"{key}: unknown operators {sorted(unknown)}")
+            for op, value in spec.items():
+                if op == "in" and not isinstance(value, list):
+                    raise ValueError(f"{key}: in expects a list")
+                conditions.append(_condition(field, op, value))
+        elif isinstance(spec, list):
+            conditions.append(_condition(field, "in", spec))
+        else:
+            conditions.append(_condition(field, "eq", spec))
+    return conditions
 
 
 class Query(BaseModel):
     query_text: str = Field(..., min_length=1)
     match_count: int = Field(default=5, ge=1, le=100)
+    # Filter language: see ``parse_filters``.
     filters: Dict[str, Any] = Field(default_factory=dict)
     threshold: float = Field(default=0.5, ge=0.0, le=1.0)
+    # Enables MMR re-ranking: 1.0 is pure relevance, lower values favour diversity.
+    mmr_lambda: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    # Index probe depth is chosen from the calibration table to meet these.
+    latency_budget_ms: Optional[float] = Field(default=None, gt=0)
+    recall_target: Optional[float] = Field(default=None, gt=0.0, le=1.0)
+    # Cursor pagination: ``paginate`` asks for a next-page cursor, and
+    # ``cursor`` continues a previous page of the same query.
+    paginate: bool = False
+    cursor: Optional[str] = Field(default=None, min_length=1, max_length=1024)
+
+    @field_validator("filters")
+    @classmethod
+    def validate_filters(cls, value: Dict[str, Any]) -> Dict[str, Any]:
+        parse_filters(value)
+        return value
@@ -2,20 +2,19 @@
 from __future__ import annotations
 
 from collections.abc import AsyncGenerator
-from fastapi import Depends
 
 from ..services.database import DatabaseService
-from ..services.supabase_client import SupabaseClient
+from ..services.embedding import embedding_model
+from ..services.reduction import EMBEDDING_PROJECTION, projections
+from ..services.supabase_client import get_shared_client
 
 
 async def get_database_service() -> AsyncGenerator[DatabaseService, None]:
-    """Provide a DatabaseService instance per request."""
-    client = SupabaseClient()
-    service = DatabaseService(client)
-    try:
-        yield service
-    finally:
-        await client.close()
+    """Provide a DatabaseService per request over the shared client pool."""
+    service = DatabaseService(get_shared_client())
+    if EMBEDDING_PROJECTION:
+        service.projection = await projections.get(service, embedding_model())
+    yield service
 
 
 __all__ = ["get_database_service"]
@@ -0,0 +1,167 @@
+"""Administrative diagnostics routes."""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query as QueryParam,
+    status,
+)
+from pydantic import BaseModel, Field
+
+from ..models.base import ResponseModel, ResponseStatus
+from ..services.ann_tuning import (
+    CALIBRATION_SAMPLE_SIZE,
+    CalibrationError,
+    calibrate_database,
+)
+from ..services.database import DatabaseError, DatabaseService
+from ..services.embedding import embedding_model
+from ..services.index_maintenance import index_maintenance
+from ..services.reduction import (
+    PROJECTION_MAX_SAMPLE_SIZE,
+    PROJECTION_SAMPLE_SIZE,
+    ProjectionError,
+    fit_projection,
+    projection_rollout,
+)
+from ..services.slow_log import slow_operations
+from . import get_database_service
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+class CalibrationRequest(BaseModel):
+    k: int = Field(default=10, ge=1, le=100)
+    sample_size: int = Field(default=CALIBRATION_SAMPLE_SIZE, ge=1, le=10000)
+
+
+class ProjectionRequest(BaseModel):
+    dims: int = Field(..., ge=1)
+    sample_size: int = Field(
+        default=PROJECTION_SAMPLE_SIZE, ge=10, le=PROJECTION_MAX_SAMPLE_SIZE
+    )
+    candidate_dims: List[int] = Field(default_factory=list, max_length=32)
+    k: int = Field(default=10, ge=1, le=100)
+
+
+@router.get("/slow-operations", response_model=ResponseModel[Dict[str, Any]])
+async def list_slow_operations(
+    limit: Optional[int] = QueryParam(default=50, ge=1, le=1000),
+) -> ResponseModel[Dict[str, Any]]:
+    """Return recent slow database operations, newest first."""
+    entries: List[Dict[str, Any]] = slow_operations.snapshot(limit)
+    return ResponseModel(
+        status=ResponseStatus.SUCCESS,
+        data={
+            "threshold_ms": slow_operations.threshold_ms,
+            "sample_rate": slow_operations.sample_rate,
+            "explain": slow_operations.explain,
+            "operations": entries,
+        },
+    )
+
+
+@router.delete("/slow-operations", response_model=ResponseModel[Dict[str, bool]])
+async def clear_slow_operations() -> ResponseModel[Dict[str, bool]]:
+    """Empty the slow-operation log."""
+    slow_operations.clear()
+    return ResponseModel(status=ResponseStatus.SUCCESS, data={"cleared": True})
+
+
+@router.get("/index-maintenance", response_model=ResponseModel[Dict[str, Any]])
+async def get_index_maintenance() -> ResponseModel[Dict[str, Any]]:
+    """Report the schedule and the tasks of the latest maintenance run."""
+    return ResponseModel(status=ResponseStatus.SUCCESS, data=index_maintenance.snapshot())
+
+
+@router.post(
+    "/index-maintenance/run",
+    response_model=ResponseModel[Dict[str, bool]],
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def run_index_maintenance(
+    background: BackgroundTasks, db: DatabaseService = Depends(get_database_service)
+) -> ResponseModel[Dict[str, bool]]:
+    """Start a maintenance run now unless one is already in progress."""
+    started = not index_maintenance.running
+    if started:
+        background.add_task(index_maintenance.run_once, db)
+    return ResponseModel(status=ResponseStatus.SUCCESS, data={"started": started})
+
+
+@router.post(
+    "/calibration",
+    response_model=ResponseModel[Dict[str, Any]],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_calibration(
+    request: CalibrationRequest, db: DatabaseService = Depends(get_database_service)
+) -> ResponseModel[Dict[str, Any]]:
+    """Benchmark the active search backend across index probe settings.
+
+    The stored table maps each setting to p95 latency and recall, and is
+    used for queries with a ``latency_budget_ms`` or ``recall_target``.
+    """
+    try:
+        calibration = await calibrate_database(
+            db, db.search_backend, request.k, request.sample_size
+        )
+    except CalibrationError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except DatabaseError as exc:
+        raise HTTPException(status_code=500, detail="calibration failed") from exc
+    return ResponseModel(status=ResponseStatus.SUCCESS, data=calibration.to_row())
+
+
+@router.post(
+    "/projection",
+    response_model=ResponseModel[Dict[str, Any]],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_projection(
+    request: ProjectionRequest,
+    background: BackgroundTasks,
+    db: DatabaseService = Depends(get_database_service),
+) -> ResponseModel[Dict[str, Any]]:
+    """Fit a PCA projection for the current model and report recall by dimension.
+
+    Stored embeddings are projected in the background and the projection
+    becomes active once they all are; ``GET /admin/projection`` reports
+    progress.
+    """
+    if projection_rollout.running:
+        raise HTTPException(status_code=409, detail="a projection rollout is running")
+    try:
+        projection, report = await fit_projection(
+            db,
+            embedding_model(),
+            request.dims,
+            request.sample_size,
+            request.candidate_dims,
+            request.k,
+        )
+    except ProjectionError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except DatabaseError as exc:
+        raise HTTPException(status_code=500, detail="projection failed") from exc
+    background.add_task(projection_rollout.run, db, projection)
+    return ResponseModel(
+        status=ResponseStatus.SUCCESS,
+        data={
+            "model": projection.model,
+            "dims": projection.dims,
+            "source_dim": projection.source_dim,
+            "report": report,
+        },
+    )
+
+
+@router.get("/projection", response_model=ResponseModel[Dict[str, Any]])
+async def get_projection_rollout() -> ResponseModel[Dict[str, Any]]:
+    """Report the progress of the latest projection rollout."""
+    return ResponseModel(status=ResponseStatus.SUCCESS, data=projection_rollout.snapshot())
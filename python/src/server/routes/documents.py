@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
-import io
+import asyncio
+import codecs
+import os
+import shutil
+from functools import partial
+from tempfile import NamedTemporaryFile, SpooledTemporaryFile
 from uuid import UUID, uuid4
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
 
 from fastapi import (
     APIRouter,
@@ -13,27 +18,47 @@ from fastapi import (
     File,
     HTTPException,
     Path,
+    Response,
     UploadFile,
     Form,
     status,
 )
 from pydantic import BaseModel, UUID4
-from PyPDF2 import PdfReader
 
 from ..models.base import ResponseModel, ResponseStatus
 from ..models.document import Document
 from ..models.query import Query
+from ..models.source import Source, SourceStatus, SourceType
+from ..services.admission import Admission, AdmissionRejectedError, upload_admission
+from ..services.archive_reader import ArchiveEntry, ArchiveError, iter_archive
+from ..services.chunking import reembed_chunks
+from ..services.content_index import content_hash, content_index
+from ..services.crawler import CrawledPage, Crawler, CrawlError
 from ..services.database import DatabaseError, DatabaseService
-from ..services.embedding import (
-    EmbeddingProcessingError,
-    generate_embedding,
+from ..services.embedding import EmbeddingProcessingError
+from ..services.progress import ProgressCoalescer
+from ..services.query_cache import query_cache
+from ..services.search_cursor import NEXT_CURSOR_HEADER, CursorError, paginated_search
+from ..services.pdf_extraction import (
+    PdfExtractionError,
+    ProgressCallback,
+    extract_pdf_text,
 )
 from ..socket import broadcast_upload_progress, BroadcastError
 from . import get_database_service
 from loguru import logger
 
 
-MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
+MAX_FILE_SIZE = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+MAX_ARCHIVE_SIZE = int(os.getenv("MAX_ARCHIVE_BYTES", str(500 * 1024 * 1024)))
+MAX_ARCHIVE_ENTRIES = int(os.getenv("MAX_ARCHIVE_ENTRIES", "10000"))
+ARCHIVE_INSERT_BATCH = 100
+# Flush buffered archive documents once their entries add up to this many bytes.
+ARCHIVE_INSERT_BYTES = 32 * 1024 * 1024
+# Slack for multipart boundaries and form fields on top of the file itself.
+MAX_REQUEST_OVERHEAD = 64 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024  # roll over to disk above 1 MB
 
 
 class FileProcessingError(Exception):
@@ -63,52 +88,148 @@ class SearchRequest(BaseModel):
     query: Query
 
 
+class ArchiveUploadResult(BaseModel):
+    batch_id: UUID
+    document_ids: List[UUID]
+    skipped: List[str]
+
+
 router = APIRouter(prefix="/documents", tags=["documents"])
 
 
 INGESTION_PROGRESS: Dict[UUID, Dict[str, str]] = {}
 
 
-async def _read_file(file: UploadFile) -> str:
-    file.file.seek(0, 2)
-    size = file.file.tell()
-    file.file.seek(0)
-    if size > MAX_FILE_SIZE:
+async def _spool_upload(
+    file: UploadFile, limit: int | None = None
+) -> SpooledTemporaryFile:
+    """Stream an upload into a spooled temp file, enforcing the size limit."""
+    limit = MAX_FILE_SIZE if limit is None else limit
+    declared = getattr(file, "size", None)
+    if declared is not None and declared > limit:
         raise FileProcessingError("file too large")
+    spool = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    size = 0
     try:
-        data = await file.read()
+        while chunk := await file.read(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > limit:
+                raise FileProcessingError("file too large")
+            spool.write(chunk)
+    except FileProcessingError:
+        spool.close()
+        raise
     except Exception as exc:  # noqa: BLE001
+        spool.close()
         raise FileProcessingError("unable to read file") from exc
+    spool.seek(0)
+    return spool
 
-    if file.content_type == "application/pdf":
-        try:
-            reader = PdfReader(io.BytesIO(data))
-            return "\n".join(page.extract_text() or "" for page in reader.pages)
-        except Exception as exc:  # noqa: BLE001
-            raise FileProcessingError("invalid PDF") from exc
 
+def _decode_text(stream: BinaryIO) -> str:
+    """Decode UTF-8 text chunk by chunk without a full bytes copy."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts: List[str] = []
     try:
-        return data.decode()
-    except Exception as exc:  # noqa: BLE001
+        while chunk := stream.read(READ_CHUNK_SIZE):
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+    except UnicodeDecodeError as exc:
         raise FileProcessingError("invalid text") from exc
+    return "".join(parts)
+
+
+async def _extract_pdf(
+    stream: BinaryIO, on_progress: ProgressCallback | None = None
+) -> str:
+    """Hand the spooled PDF to the extraction pool via a named temp file."""
+    with NamedTemporaryFile(suffix=".pdf") as tmp:
+        await asyncio.to_thread(shutil.copyfileobj, stream, tmp, READ_CHUNK_SIZE)
+        tmp.flush()
+        try:
+            return await extract_pdf_text(tmp.name, on_progress=on_progress)
+        except PdfExtractionError as exc:
+            raise FileProcessingError(str(exc)) from exc
+
+
+async def _read_file(
+    file: UploadFile, on_progress: ProgressCallback | None = None
+) -> str:
+    spool = await _spool_upload(file)
+    with spool:
+        if file.content_type == "application/pdf":
+            return await _extract_pdf(spool, on_progress)
+        return _decode_text(spool)
 
 
-async def _validate_upload(file: UploadFile) -> str:
+async def _validate_upload(
+    file: UploadFile, on_progress: ProgressCallback | None = None
+) -> str:
     """Validate uploaded file and return its content."""
     if file.content_type not in {"text/plain", "application/pdf"}:
         raise UploadValidationError("unsupported file type")
     try:
-        return await _read_file(file)
+        return await _read_file(file, on_progress)
     except FileProcessingError as exc:
         raise UploadValidationError(str(exc)) from exc
 
 
+async def _emit_progress(room: str, payload: Dict[str, Any]) -> None:
+    try:
+        await broadcast_upload_progress(room, payload)
+    except BroadcastError:
+        logger.warning(
+            "upload progress broadcast failed",
+            doc_id=payload.get("doc_id"),
+            batch_id=payload.get("batch_id"),
+        )
+
+
+upload_progress = ProgressCoalescer(_emit_progress)
+
+
+def _notify(source_id: UUID4, payload: Dict[str, Any]) -> None:
+    """Publish progress without waiting; only the latest state per job is sent."""
+    key = payload.get("batch_id") or payload.get("crawl_id") or payload["doc_id"]
+    upload_progress.publish(str(source_id), key, payload)
+
+
+async def _report_extraction(
+    doc_id: UUID, source_id: UUID4, done: int, total: int
+) -> None:
+    """Publish page-level extraction progress for a pending upload."""
+    INGESTION_PROGRESS[doc_id] = {"status": "extracting", "pages": f"{done}/{total}"}
+    _notify(
+        source_id,
+        {"doc_id": str(doc_id), "status": "extracting", "pages": done, "total": total},
+    )
+
+
+async def _report_chunks(
+    doc_id: UUID, source_id: UUID4, done: int, total: int
+) -> None:
+    """Publish chunk-level embedding progress for a document update."""
+    INGESTION_PROGRESS[doc_id] = {"status": "embedding", "chunks": f"{done}/{total}"}
+    _notify(
+        source_id,
+        {"doc_id": str(doc_id), "status": "embedding", "chunks": done, "total": total},
+    )
+
+
 async def _create_document_entry(
-    doc_id: UUID, source_id: UUID4, content: str, db: DatabaseService
+    doc_id: UUID,
+    source_id: UUID4,
+    content: str,
+    db: DatabaseService,
+    metadata: Dict[str, Any] | None = None,
 ) -> Document:
     """Store a new document in the database."""
     doc = Document(
-        id=doc_id, source_id=source_id, content=content, embeddings=[], metadata={}
+        id=doc_id,
+        source_id=source_id,
+        content=content,
+        embeddings=[],
+        metadata=metadata or {},
     )
     try:
         return await db.create_document(doc)
@@ -116,36 +237,66 @@ async def _create_document_entry(
         raise DocumentCreationError("database create failed") from exc
 
 
+async def _embed_content(
+    doc_id: UUID, content: str, db: DatabaseService, digest: str
+) -> List[float]:
+    """Reuse the vectors of identical content or embed it chunk by chunk.
+
+    New documents get the same chunk rows and chunk-mean vector that
+    ``_reembed_document`` maintains on updates, so every document in the
+    index has one representation and the first edit is already incremental.
+    """
+    entry = await content_index.lookup_entry(db, digest)
+    if entry is not None:
+        origin, emb = entry
+        if origin is not None and origin != doc_id:
+            await db.upsert_chunk_embeddings(doc_id, await db.list_chunk_embeddings(origin))
+        return emb
+    emb, _ = await reembed_chunks(db, doc_id, content)
+    await content_index.record(db, digest, doc_id, emb)
+    return emb
+
+
 async def _process_embedding(
-    doc_id: UUID, content: str, db: DatabaseService, source_id: UUID4
+    doc_id: UUID,
+    content: str,
+    db: DatabaseService,
+    source_id: UUID4,
+    digest: str | None = None,
+    notify: bool = True,
 ) -> None:
     INGESTION_PROGRESS[doc_id]["status"] = "processing"
+    if notify:
+        _notify(source_id, {"doc_id": str(doc_id), "status": "processing"})
     try:
-        await broadcast_upload_progress(
-            str(source_id), {"doc_id": str(doc_id), "status": "processing"}
-        )
-    except BroadcastError:
-        logger.warning("upload progress broadcast failed", doc_id=str(doc_id))
-    try:
-        emb = await generate_embedding(content)
-        await db.store_embedding(doc_id, emb)
+        emb = await _embed_content(doc_id, content, db, digest or content_hash(content))
+        if not await db.store_embedding(doc_id, emb):
+            raise DatabaseError("store_embedding failed")
         await db.update_document(doc_id, {"embeddings": emb})
+        query_cache.invalidate_source(source_id)
         INGESTION_PROGRESS[doc_id]["status"] = "completed"
-        try:
-            await broadcast_upload_progress(
-                str(source_id), {"doc_id": str(doc_id), "status": "completed"}
-            )
-        except BroadcastError:
-            logger.warning("upload progress broadcast failed", doc_id=str(doc_id))
-    except EmbeddingProcessingError as exc:
+        if notify:
+            _notify(source_id, {"doc_id": str(doc_id), "status": "completed"})
+    except (EmbeddingProcessingError, DatabaseError) as exc:
         INGESTION_PROGRESS[doc_id] = {"status": "failed", "error": str(exc)}
-        try:
-            await broadcast_upload_progress(
-                str(source_id),
+        if notify:
+            _notify(
+                source_id,
                 {"doc_id": str(doc_id), "status": "failed", "error": str(exc)},
             )
-        except BroadcastError:
-            logger.warning("upload progress broadcast failed", doc_id=str(doc_id))
+
+
+async def _process_admitted(
+    admission: Admission,
+    doc_id: UUID,
+    content: str,
+    db: DatabaseService,
+    source_id: UUID4,
+    digest: str | None = None,
+) -> None:
+    """Embed an admitted upload and release its reservation afterwards."""
+    with admission:
+        await _process_embedding(doc_id, content, db, source_id, digest)
 
 
 async def _queue_embedding(
@@ -154,21 +305,303 @@ async def _queue_embedding(
     content: str,
     db: DatabaseService,
     source_id: UUID4,
+    digest: str | None = None,
+    admission: Admission | None = None,
 ) -> None:
     """Queue embedding generation and broadcast status."""
     INGESTION_PROGRESS[doc_id] = {"status": "queued"}
+    _notify(source_id, {"doc_id": str(doc_id), "status": "queued"})
     try:
-        await broadcast_upload_progress(
-            str(source_id), {"doc_id": str(doc_id), "status": "queued"}
+        if admission is None:
+            background.add_task(
+                _process_embedding, doc_id, content, db, source_id, digest
+            )
+        else:
+            background.add_task(
+                _process_admitted, admission, doc_id, content, db, source_id, digest
+            )
+    except Exception as exc:  # noqa: BLE001
+        raise EmbeddingQueueError("failed to queue embedding") from exc
+
+
+async def _reembed_document(
+    doc_id: UUID,
+    content: str,
+    db: DatabaseService,
+    source_id: UUID4,
+    previous: Tuple[str, List[float]] | None = None,
+) -> None:
+    """Re-embed only the chunks of an updated document that changed."""
+    INGESTION_PROGRESS[doc_id]["status"] = "processing"
+    _notify(source_id, {"doc_id": str(doc_id), "status": "processing"})
+    try:
+        emb, diff = await reembed_chunks(
+            db,
+            doc_id,
+            content,
+            previous,
+            on_progress=partial(_report_chunks, doc_id, source_id),
         )
-    except BroadcastError:
-        logger.warning("upload progress broadcast failed", doc_id=str(doc_id))
+        if not await db.replace_embedding(doc_id, emb):
+            raise DatabaseError("replace_embedding failed")
+        await db.update_document(doc_id, {"embeddings": emb})
+        query_cache.invalidate_source(source_id)
+    except (EmbeddingProcessingError, DatabaseError) as exc:
+        INGESTION_PROGRESS[doc_id] = {"status": "failed", "error": str(exc)}
+        _notify(
+            source_id, {"doc_id": str(doc_id), "status": "failed", "error": str(exc)}
+        )
+        return
+    INGESTION_PROGRESS[doc_id] = {
+        "status": "completed",
+        "reused": str(diff.reused),
+        "embedded": str(diff.embedded),
+    }
+    _notify(
+        source_id,
+        {
+            "doc_id": str(doc_id),
+            "status": "completed",
+            "reused": diff.reused,
+            "embedded": diff.embedded,
+        },
+    )
+
+
+def _batch_payload(batch_id: UUID, progress: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "batch_id": str(batch_id),
+        "status": progress["status"],
+        "total": int(progress["total"]),
+        "completed": int(progress["completed"]),
+        "failed": int(progress["failed"]),
+    }
+
+
+async def _process_batch(
+    batch_id: UUID,
+    items: List[Tuple[UUID, str]],
+    db: DatabaseService,
+    source_id: UUID4,
+) -> None:
+    """Embed a batch of documents, publishing aggregated progress.
+
+    Content is re-read per document rather than held for the whole batch so
+    large archives do not pin every extracted text in memory.
+    """
+    progress = INGESTION_PROGRESS[batch_id]
+    progress["status"] = "processing"
+    _notify(source_id, _batch_payload(batch_id, progress))
+    completed = failed = 0
+    for doc_id, digest in items:
+        doc = await db.get_document(doc_id)
+        if doc is None:
+            INGESTION_PROGRESS[doc_id] = {"status": "failed", "error": "document not found"}
+        else:
+            try:
+                await _process_embedding(
+                    doc_id, doc.content, db, source_id, digest, notify=False
+                )
+            except Exception as exc:  # noqa: BLE001
+                logger.error("batch embedding failed", doc_id=str(doc_id), error=str(exc))
+                INGESTION_PROGRESS[doc_id] = {"status": "failed", "error": "embedding failed"}
+        if INGESTION_PROGRESS[doc_id]["status"] == "completed":
+            completed += 1
+        else:
+            failed += 1
+        progress.update(completed=str(completed), failed=str(failed))
+        _notify(source_id, _batch_payload(batch_id, progress))
+    progress["status"] = "completed" if not failed else "completed_with_errors"
+    _notify(source_id, _batch_payload(batch_id, progress))
+
+
+async def _process_admitted_batch(
+    admission: Admission,
+    batch_id: UUID,
+    items: List[Tuple[UUID, str]],
+    db: DatabaseService,
+    source_id: UUID4,
+) -> None:
+    """Embed an admitted batch and release its reservation afterwards."""
+    with admission:
+        await _process_batch(batch_id, items, db, source_id)
+
+
+async def _queue_batch(
+    background: BackgroundTasks,
+    batch_id: UUID,
+    items: List[Tuple[UUID, str]],
+    db: DatabaseService,
+    source_id: UUID4,
+    admission: Admission | None = None,
+) -> None:
+    """Queue one tracked embedding batch for many documents."""
+    for doc_id, _ in items:
+        INGESTION_PROGRESS[doc_id] = {"status": "queued"}
+    progress = {"status": "queued", "total": str(len(items)), "completed": "0", "failed": "0"}
+    INGESTION_PROGRESS[batch_id] = progress
+    _notify(source_id, _batch_payload(batch_id, progress))
     try:
-        background.add_task(_process_embedding, doc_id, content, db, source_id)
+        if admission is None:
+            background.add_task(_process_batch, batch_id, items, db, source_id)
+        else:
+            background.add_task(
+                _process_admitted_batch, admission, batch_id, items, db, source_id
+            )
     except Exception as exc:  # noqa: BLE001
         raise EmbeddingQueueError("failed to queue embedding") from exc
 
 
+async def _read_archive_entry(entry: ArchiveEntry) -> str:
+    if entry.content_type == "application/pdf":
+        return await _extract_pdf(entry.stream)
+    return await asyncio.to_thread(_decode_text, entry.stream)
+
+
+async def _ingest_archive(
+    stream: BinaryIO, source_id: UUID4, batch_id: UUID, db: DatabaseService
+) -> Tuple[List[Tuple[UUID, str]], List[str]]:
+    """Create documents for every supported archive entry in bulk inserts.
+
+    A bulk insert is flushed after ``ARCHIVE_INSERT_BATCH`` documents or
+    ``ARCHIVE_INSERT_BYTES`` of entries, whichever comes first.
+    """
+    items: List[Tuple[UUID, str]] = []
+    skipped: List[str] = []
+    pending: List[Document] = []
+    pending_bytes = 0
+
+    async def flush() -> None:
+        nonlocal pending_bytes
+        if not pending:
+            return
+        try:
+            await db.create_documents(pending)
+        except DatabaseError as exc:
+            raise DocumentCreationError("database create failed") from exc
+        items.extend((doc.id, doc.metadata["content_hash"]) for doc in pending)
+        pending.clear()
+        pending_bytes = 0
+
+    entries = iter_archive(
+        stream, max_entries=MAX_ARCHIVE_ENTRIES, max_entry_size=MAX_FILE_SIZE
+    )
+    # Decompression is blocking, so entries are pulled and read off the loop.
+    while (entry := await asyncio.to_thread(next, entries, None)) is not None:
+        try:
+            content = await _read_archive_entry(entry)
+        except (FileProcessingError, ArchiveError, OSError) as exc:
+            skipped.append(f"{entry.name}: {exc}")
+            continue
+        if not content.strip():
+            skipped.append(f"{entry.name}: empty")
+            continue
+        pending.append(
+            Document(
+                id=uuid4(),
+                source_id=source_id,
+                content=content,
+                metadata={
+                    "content_hash": content_hash(content),
+                    "filename": entry.name,
+                    "batch_id": str(batch_id),
+                },
+            )
+        )
+        pending_bytes += entry.size
+        if len(pending) >= ARCHIVE_INSERT_BATCH or pending_bytes >= ARCHIVE_INSERT_BYTES:
+            await flush()
+    await flush()
+    return items, skipped
+
+
+async def _discard_archive(
+    batch_id: UUID, items: List[Tuple[UUID, str]], db: DatabaseService
+) -> None:
+    """Remove documents of an archive upload that failed part way through."""
+    for doc_id, _ in items:
+        INGESTION_PROGRESS.pop(doc_id, None)
+    INGESTION_PROGRESS.pop(batch_id, None)
+    if not await db.delete_batch_documents(batch_id):
+        logger.error("failed to discard archive documents", batch_id=str(batch_id))
+
+
+async def _ingest_pages(
+    pages: List[CrawledPage], source_id: UUID4, crawl_id: UUID, db: DatabaseService
+) -> None:
+    """Store one batch of crawled pages and embed it as a tracked batch."""
+    docs = [
+        Document(
+            id=uuid4(),
+            source_id=source_id,
+            content=page.text,
+            metadata={
+                "content_hash": content_hash(page.text),
+                "url": page.url,
+                "title": page.title,
+                "crawl_id": str(crawl_id),
+            },
+        )
+        for page in pages
+    ]
+    await db.create_documents(docs)
+    batch_id = uuid4()
+    items = [(doc.id, doc.metadata["content_hash"]) for doc in docs]
+    for doc_id, _ in items:
+        INGESTION_PROGRESS[doc_id] = {"status": "queued"}
+    INGESTION_PROGRESS[batch_id] = {
+        "status": "queued",
+        "total": str(len(items)),
+        "completed": "0",
+        "failed": "0",
+    }
+    await _process_batch(batch_id, items, db, source_id)
+
+
+async def _crawl_source(
+    crawl_id: UUID, source: Source, db: DatabaseService, crawler: Crawler | None = None
+) -> None:
+    """Crawl a web source, feeding pages to ingestion in bulk batches.
+
+    Each batch is embedded before more pages are consumed, so a slow
+    ingestion pipeline throttles the crawler instead of buffering pages.
+    """
+    crawler = crawler or Crawler()
+    progress = INGESTION_PROGRESS[crawl_id]
+    progress["status"] = "crawling"
+    pages: List[CrawledPage] = []
+    crawled = 0
+    try:
+        async for page in crawler.crawl(str(source.url)):
+            if not page.text.strip():
+                continue
+            pages.append(page)
+            crawled += 1
+            progress["pages"] = str(crawled)
+            if len(pages) >= ARCHIVE_INSERT_BATCH:
+                await _ingest_pages(pages, source.id, crawl_id, db)
+                pages = []
+                _notify(source.id, {"crawl_id": str(crawl_id), **progress})
+        if pages:
+            await _ingest_pages(pages, source.id, crawl_id, db)
+    except (CrawlError, DatabaseError) as exc:
+        logger.error("crawl failed", source_id=str(source.id), error=str(exc))
+        progress.update(status="failed", error=str(exc))
+        await db.update_source(source.id, {"status": SourceStatus.FAILED.value})
+        _notify(source.id, {"crawl_id": str(crawl_id), **progress})
+        return
+    status_ = SourceStatus.READY if crawled else SourceStatus.FAILED
+    progress["status"] = "completed" if crawled else "failed"
+    await db.update_source(
+        source.id,
+        {
+            "status": status_.value,
+            "metadata": {**source.metadata, "crawled_pages": crawled},
+        },
+    )
+    _notify(source.id, {"crawl_id": str(crawl_id), **progress})
+
+
 @router.post("/", response_model=ResponseModel[Document], status_code=status.HTTP_201_CREATED)
 async def create_document(
     doc: Document, db: DatabaseService = Depends(get_database_service)
@@ -195,15 +628,42 @@ async def get_document(
 
 @router.put("/{doc_id}", response_model=ResponseModel[Document])
 async def update_document(
+    background: BackgroundTasks,
     doc_id: UUID = Path(...),
     data: DocumentUpdate | None = None,
     db: DatabaseService = Depends(get_database_service),
 ) -> ResponseModel[Document]:
-    """Update a document."""
+    """Update a document.
+
+    Changed content without explicit embeddings is re-embedded in the
+    background, reusing the vectors of chunks that did not change.
+    """
     payload = data.model_dump(exclude_none=True) if data else {}
+    previous: Document | None = None
+    if "content" in payload and "embeddings" not in payload:
+        previous = await db.get_document(doc_id)
+        if previous is None:
+            raise HTTPException(status_code=404, detail="document not found")
+        if previous.content == payload["content"]:
+            previous = None
+        else:
+            metadata = {**previous.metadata, **payload.get("metadata", {})}
+            metadata["content_hash"] = content_hash(payload["content"])
+            payload["metadata"] = metadata
     updated = await db.update_document(doc_id, payload)
     if not updated:
         raise HTTPException(status_code=404, detail="document not found")
+    query_cache.invalidate_source(updated.source_id)
+    if previous is not None:
+        INGESTION_PROGRESS[doc_id] = {"status": "queued"}
+        background.add_task(
+            _reembed_document,
+            doc_id,
+            updated.content,
+            db,
+            updated.source_id,
+            (previous.content, previous.embeddings),
+        )
     return ResponseModel(status=ResponseStatus.SUCCESS, data=updated)
 
 
@@ -216,21 +676,52 @@ async def delete_document(
     ok = await db.delete_document(doc_id)
     if not ok:
         raise HTTPException(status_code=404, detail="document not found")
+    query_cache.invalidate_document(doc_id)
     return ResponseModel(status=ResponseStatus.SUCCESS, data={"deleted": True})
 
 
 @router.post("/search", response_model=ResponseModel[List[Document]])
 async def search_documents(
-    req: SearchRequest, db: DatabaseService = Depends(get_database_service)
+    req: SearchRequest,
+    response: Response,
+    db: DatabaseService = Depends(get_database_service),
 ) -> ResponseModel[List[Document]]:
-    """Vector search for documents."""
+    """Vector search for documents.
+
+    Paginated searches return the next-page cursor in ``X-Next-Cursor``;
+    continuing requires the same embedding.
+    """
     try:
-        results = await db.vector_search(req.embedding, req.query)
-        return ResponseModel(status=ResponseStatus.SUCCESS, data=results)
+        page = await paginated_search(db, req.embedding, req.query)
+        if page.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+        return ResponseModel(status=ResponseStatus.SUCCESS, data=page.documents)
+    except CursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except DatabaseError as exc:
         raise HTTPException(status_code=500, detail="search failed") from exc
 
 
+async def _admit_upload(
+    source_id: UUID4,
+    file: UploadFile,
+    db: DatabaseService,
+    max_size: int = MAX_FILE_SIZE,
+) -> Admission:
+    """Reserve upload capacity for the source's project or answer 429/503."""
+    source = await db.get_source(source_id)
+    project = str(source.project_id) if source else str(source_id)
+    size = file.size if file.size is not None else max_size
+    try:
+        return upload_admission.admit(project, size)
+    except AdmissionRejectedError as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+
 @router.post("/upload", response_model=ResponseModel[Dict[str, UUID]], status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
     background: BackgroundTasks,
@@ -238,22 +729,108 @@ async def upload_document(
     file: UploadFile = File(...),
     db: DatabaseService = Depends(get_database_service),
 ) -> ResponseModel[Dict[str, UUID]]:
+    admission = await _admit_upload(source_id, file, db)
+    doc_id = uuid4()
     try:
-        content = await _validate_upload(file)
-        doc_id = uuid4()
-        doc = await _create_document_entry(doc_id, source_id, content, db)
-        await _queue_embedding(background, doc_id, content, db, source_id)
+        content = await _validate_upload(
+            file, partial(_report_extraction, doc_id, source_id)
+        )
+        digest = content_hash(content)
+        doc = await _create_document_entry(
+            doc_id, source_id, content, db, {"content_hash": digest}
+        )
+        await _queue_embedding(
+            background, doc_id, content, db, source_id, digest, admission
+        )
         return ResponseModel(status=ResponseStatus.SUCCESS, data={"id": doc.id})
     except UploadValidationError as exc:
+        admission.release()
+        INGESTION_PROGRESS.pop(doc_id, None)
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except DocumentCreationError as exc:
+        admission.release()
+        INGESTION_PROGRESS.pop(doc_id, None)
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     except EmbeddingQueueError as exc:
+        admission.release()
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     except Exception as exc:  # noqa: BLE001
+        admission.release()
         raise HTTPException(status_code=500, detail="upload failed") from exc
 
 
+@router.post(
+    "/upload/archive",
+    response_model=ResponseModel[ArchiveUploadResult],
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def upload_archive(
+    background: BackgroundTasks,
+    source_id: UUID4 = Form(...),
+    file: UploadFile = File(...),
+    db: DatabaseService = Depends(get_database_service),
+) -> ResponseModel[ArchiveUploadResult]:
+    """Create documents from a zip or tar archive and embed them as one batch."""
+    admission = await _admit_upload(source_id, file, db, MAX_ARCHIVE_SIZE)
+    batch_id = uuid4()
+    try:
+        spool = await _spool_upload(file, MAX_ARCHIVE_SIZE)
+    except FileProcessingError as exc:
+        admission.release()
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    items: List[Tuple[UUID, str]] = []
+    try:
+        with spool:
+            items, skipped = await _ingest_archive(spool, source_id, batch_id, db)
+        if not items:
+            raise HTTPException(status_code=400, detail="no supported files in archive")
+        await _queue_batch(background, batch_id, items, db, source_id, admission)
+    except HTTPException:
+        admission.release()
+        raise
+    # Bulk inserts flushed before a failure are already committed and would
+    # never be embedded, so every failure path discards the batch.
+    except ArchiveError as exc:
+        admission.release()
+        await _discard_archive(batch_id, items, db)
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (DocumentCreationError, EmbeddingQueueError) as exc:
+        admission.release()
+        await _discard_archive(batch_id, items, db)
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    except Exception as exc:  # noqa: BLE001
+        admission.release()
+        await _discard_archive(batch_id, items, db)
+        raise HTTPException(status_code=500, detail="upload failed") from exc
+    result = ArchiveUploadResult(
+        batch_id=batch_id, document_ids=[doc_id for doc_id, _ in items], skipped=skipped
+    )
+    return ResponseModel(status=ResponseStatus.SUCCESS, data=result)
+
+
+@router.post(
+    "/crawl/{source_id}",
+    response_model=ResponseModel[Dict[str, UUID]],
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def crawl_source(
+    background: BackgroundTasks,
+    source_id: UUID = Path(...),
+    db: DatabaseService = Depends(get_database_service),
+) -> ResponseModel[Dict[str, UUID]]:
+    """Crawl a web source in the background and ingest its pages."""
+    source = await db.get_source(source_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail="source not found")
+    if source.type != SourceType.WEB:
+        raise HTTPException(status_code=400, detail="source is not a web source")
+    crawl_id = uuid4()
+    INGESTION_PROGRESS[crawl_id] = {"status": "queued", "pages": "0"}
+    await db.update_source(source_id, {"status": SourceStatus.PENDING.value})
+    background.add_task(_crawl_source, crawl_id, source, db)
+    return ResponseModel(status=ResponseStatus.SUCCESS, data={"crawl_id": crawl_id})
+
+
 @router.get("/status/{doc_id}", response_model=ResponseModel[Dict[str, str]])
 async def ingestion_status(doc_id: UUID) -> ResponseModel[Dict[str, str]]:
     status_info = INGESTION_PROGRESS.get(doc_id)
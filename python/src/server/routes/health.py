@@ -1,7 +1,10 @@
 """Health check route."""
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
 
 from ..models.base import ResponseModel, ResponseStatus
 from ..services.database import DatabaseError, DatabaseService
@@ -20,3 +23,13 @@ async def health(
         return ResponseModel(status=ResponseStatus.SUCCESS, data={"database": "ok"})
     except DatabaseError as exc:
         raise HTTPException(status_code=503, detail="database unavailable") from exc
+
+
+@router.get("/ready")
+async def ready(request: Request) -> JSONResponse:
+    """Report whether the startup warm-up has finished successfully."""
+    readiness = getattr(request.app.state, "readiness", None)
+    data: dict[str, Any] = (
+        readiness.snapshot() if readiness else {"ready": False, "checks": {}}
+    )
+    return JSONResponse(status_code=200 if data["ready"] else 503, content=data)
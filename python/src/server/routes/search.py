@@ -2,15 +2,35 @@
 
 from __future__ import annotations
 
-from typing import List
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 
 from ..models.base import ResponseModel, ResponseStatus
 from ..models.document import Document
 from ..models.query import Query
 from ..services.database import DatabaseError, DatabaseService
 from ..services.embedding import EmbeddingGenerationError, generate_embedding
+from ..services.federated import (
+    FEDERATED_MAX_PROJECTS,
+    FEDERATED_TIMEOUT_MS,
+    Normalization,
+    federated_search,
+)
+from ..services.search_cursor import (
+    NEXT_CURSOR_HEADER,
+    CursorError,
+    cursor_embedding,
+    paginated_search,
+)
+from ..services.search_stream import stream_search
+from ..services.search_summary import search_summary
 from ..socket import broadcast_search_completed, BroadcastError
 from . import get_database_service
 from loguru import logger
@@ -18,22 +38,146 @@ from loguru import logger
 router = APIRouter(tags=["search"])
 
 
+class FederatedSearchRequest(BaseModel):
+    query: Query
+    project_ids: List[UUID] = Field(..., min_length=1, max_length=FEDERATED_MAX_PROJECTS)
+    # Results taken from each project before merging; defaults to match_count.
+    per_project_k: Optional[int] = Field(default=None, ge=1, le=100)
+    timeout_ms: float = Field(default=FEDERATED_TIMEOUT_MS, gt=0, le=60_000)
+    normalization: Normalization = "minmax"
+
+
+async def _broadcast_results(
+    query: Query, results: List[Document], distances: Optional[List[Optional[float]]] = None
+) -> None:
+    project_id = query.filters.get("project_id")
+    # Only single-project searches are broadcast to a project room.
+    if isinstance(project_id, str) and project_id:
+        try:
+            await broadcast_search_completed(
+                project_id, search_summary(query.query_text, results, distances)
+            )
+        except BroadcastError:
+            logger.warning("search broadcast failed", project_id=project_id)
+
+
 @router.post("/search", response_model=ResponseModel[List[Document]], status_code=status.HTTP_200_OK)
 async def search(
-    query: Query, db: DatabaseService = Depends(get_database_service)
+    query: Query,
+    background: BackgroundTasks,
+    response: Response,
+    db: DatabaseService = Depends(get_database_service),
 ) -> ResponseModel[List[Document]]:
+    """Similarity search over all documents.
+
+    With ``paginate`` or ``cursor`` set, the cursor for the next page is
+    returned in the ``X-Next-Cursor`` header; it is absent on the last page.
+    """
     try:
-        embedding = await generate_embedding(query.query_text)
-        results = await db.vector_search(embedding, query)
-        project_id = str(query.filters.get("project_id", ""))
-        if project_id:
-            try:
-                await broadcast_search_completed(
-                    project_id,
-                    {"query": query.query_text, "results": results},
-                )
-            except BroadcastError:
-                logger.warning("search broadcast failed", project_id=project_id)
-        return ResponseModel(status=ResponseStatus.SUCCESS, data=results)
+        embedding = cursor_embedding(query) or await generate_embedding(query.query_text)
+        page = await paginated_search(db, embedding, query)
+        if page.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+        # The room broadcast is sent after the response, not before it.
+        background.add_task(_broadcast_results, query, page.documents, page.distances)
+        return ResponseModel(status=ResponseStatus.SUCCESS, data=page.documents)
+    except CursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except (EmbeddingGenerationError, DatabaseError) as exc:
         raise HTTPException(status_code=500, detail="search failed") from exc
+
+
+@router.post(
+    "/search/federated",
+    response_model=ResponseModel[Dict[str, Any]],
+    status_code=status.HTTP_200_OK,
+)
+async def search_federated(
+    request: FederatedSearchRequest, db: DatabaseService = Depends(get_database_service)
+) -> ResponseModel[Dict[str, Any]]:
+    """Search several projects concurrently and merge their results.
+
+    Projects that fail or exceed ``timeout_ms`` are listed with their status
+    and the response is marked ``partial``; it fails only if every project does.
+    """
+    query = request.query
+    if "project_id" in query.filters:
+        raise HTTPException(status_code=400, detail="project_id is set by project_ids")
+    if query.paginate or query.cursor:
+        raise HTTPException(status_code=400, detail="federated search does not paginate")
+    try:
+        embedding = await generate_embedding(query.query_text)
+    except EmbeddingGenerationError as exc:
+        raise HTTPException(status_code=500, detail="search failed") from exc
+    result = await federated_search(
+        db,
+        embedding,
+        query,
+        request.project_ids,
+        per_project_k=request.per_project_k,
+        timeout_ms=request.timeout_ms,
+        normalization=request.normalization,
+    )
+    if all(p.status == "error" for p in result.projects):
+        raise HTTPException(status_code=500, detail="search failed")
+    return ResponseModel(status=ResponseStatus.SUCCESS, data=result.to_dict())
+
+
+def _frame(payload: Dict[str, Any]) -> bytes:
+    return (json.dumps(payload, default=str) + "\n").encode()
+
+
+@router.post("/search/stream")
+async def search_stream(
+    query: Query, db: DatabaseService = Depends(get_database_service)
+) -> StreamingResponse:
+    """Stream results as NDJSON frames as soon as each search stage returns.
+
+    ``result`` frames carry the stage and document; a final ``summary`` frame
+    lists the ids in final rank order, or an ``error`` frame ends the stream.
+    The search:completed broadcast is sent after the stream closes.
+    """
+    results: List[Document] = []
+
+    async def frames() -> AsyncIterator[bytes]:
+        start = time.perf_counter()
+        sent: set[str] = set()
+        try:
+            embedding = await generate_embedding(query.query_text)
+            async for stage, docs in stream_search(db, embedding, query):
+                for doc in docs:
+                    if str(doc.id) in sent:
+                        continue
+                    sent.add(str(doc.id))
+                    yield _frame(
+                        {
+                            "type": "result",
+                            "stage": stage,
+                            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+                            "document": doc.model_dump(mode="json"),
+                        }
+                    )
+                if stage == "full":
+                    results.extend(docs)
+        except (EmbeddingGenerationError, DatabaseError):
+            logger.warning("streaming search failed", query=query.query_text)
+            yield _frame({"type": "error", "detail": "search failed"})
+            return
+        yield _frame(
+            {
+                "type": "summary",
+                "count": len(results),
+                "order": [str(doc.id) for doc in results],
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            }
+        )
+
+    async def broadcast() -> None:
+        if results:
+            await _broadcast_results(query, results)
+
+    return StreamingResponse(
+        frames(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(broadcast),
+    )
@@ -10,6 +10,7 @@ from pydantic import BaseModel
 from ..models.base import ResponseModel, ResponseStatus
 from ..models.source import Source, SourceStatus, SourceType
 from ..services.database import DatabaseError, DatabaseService
+from ..services.query_cache import query_cache
 from . import get_database_service
 
 
@@ -80,4 +81,5 @@ async def delete_source(
     ok = await db.delete_source(source_id)
     if not ok:
         raise HTTPException(status_code=404, detail="source not found")
+    query_cache.invalidate_source(source_id)
     return ResponseModel(status=ResponseStatus.SUCCESS, data={"deleted": True})
@@ -0,0 +1,172 @@
+"""Admission control for upload processing.
+
+Uploads reserve their size and a job slot before any extraction starts and
+hold them until embedding finishes. Reservations are bounded globally and
+per project, so a burst from one tenant is rejected instead of queueing
+unbounded background work for everyone.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from collections import defaultdict
+from typing import Dict
+
+from prometheus_client import Counter, Gauge
+
+from src.common.metrics import shared_metric
+
+
+UPLOAD_MAX_INFLIGHT_BYTES = int(
+    os.getenv("UPLOAD_MAX_INFLIGHT_BYTES", str(512 * 1024 * 1024))
+)
+UPLOAD_MAX_PENDING_JOBS = int(os.getenv("UPLOAD_MAX_PENDING_JOBS", "64"))
+UPLOAD_PROJECT_MAX_BYTES = int(
+    os.getenv("UPLOAD_PROJECT_MAX_BYTES", str(128 * 1024 * 1024))
+)
+UPLOAD_PROJECT_MAX_JOBS = int(os.getenv("UPLOAD_PROJECT_MAX_JOBS", "16"))
+RETRY_AFTER_MAX = 60
+
+INFLIGHT_JOBS = shared_metric(
+    Gauge, "upload_inflight_jobs", "Uploads admitted and not yet finished"
+)
+INFLIGHT_BYTES = shared_metric(
+    Gauge, "upload_inflight_bytes", "Bytes reserved by admitted uploads"
+)
+ADMISSION_REJECTIONS = shared_metric(
+    Counter,
+    "upload_admission_rejections_total",
+    "Uploads rejected by admission control",
+    ["reason"],
+)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when an upload cannot be admitted right now."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class Admission:
+    """Reservation held by an admitted upload until it is released."""
+
+    def __init__(
+        self, controller: "AdmissionController", project: str, size: int
+    ) -> None:
+        self._controller = controller
+        self.project = project
+        self.size = size
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        """Return the reservation; calling it more than once is harmless."""
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self, time.monotonic() - self._started)
+
+    def __enter__(self) -> "Admission":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """Bound in-flight upload bytes and jobs, globally and per project.
+
+    All bookkeeping is synchronous, so it is consistent within one event
+    loop without locking. Exceeding a project quota answers 429; exceeding
+    global capacity answers 503. ``Retry-After`` is derived from a moving
+    average of job duration and how far over capacity the request is.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int,
+        max_jobs: int,
+        project_max_bytes: int,
+        project_max_jobs: int,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_jobs = max_jobs
+        self.project_max_bytes = project_max_bytes
+        self.project_max_jobs = project_max_jobs
+        self.jobs = 0
+        self.bytes = 0
+        self._project_jobs: Dict[str, int] = defaultdict(int)
+        self._project_bytes: Dict[str, int] = defaultdict(int)
+        self._avg_seconds = 1.0
+
+    def _retry_after(self, waiting_jobs: int, running_jobs: int) -> int:
+        # Roughly the time for enough running jobs to finish to free a slot.
+        seconds = self._avg_seconds * max(1, waiting_jobs) / max(1, running_jobs)
+        return max(1, min(RETRY_AFTER_MAX, math.ceil(seconds)))
+
+    def _reject(
+        self, reason: str, status_code: int, waiting: int, running: int
+    ) -> None:
+        ADMISSION_REJECTIONS.labels(reason).inc()
+        message = "upload quota exceeded"
+        if status_code == 503:
+            message = "too many uploads in progress"
+        raise AdmissionRejectedError(
+            message, status_code, self._retry_after(waiting, running)
+        )
+
+    def admit(self, project: str, size: int) -> Admission:
+        """Reserve capacity for an upload of ``size`` bytes or raise."""
+        project_jobs = self._project_jobs.get(project, 0)
+        project_bytes = self._project_bytes.get(project, 0)
+        if project_jobs >= self.project_max_jobs:
+            waiting = project_jobs + 1 - self.project_max_jobs
+            self._reject("project_jobs", 429, waiting, project_jobs)
+        if project_jobs and project_bytes + size > self.project_max_bytes:
+            self._reject("project_bytes", 429, 1, project_jobs)
+        if self.jobs >= self.max_jobs:
+            self._reject("jobs", 503, self.jobs + 1 - self.max_jobs, self.jobs)
+        # A single upload larger than the budget is still admitted when idle.
+        if self.jobs and self.bytes + size > self.max_bytes:
+            self._reject("bytes", 503, 1, self.jobs)
+        self.jobs += 1
+        self.bytes += size
+        self._project_jobs[project] += 1
+        self._project_bytes[project] += size
+        INFLIGHT_JOBS.set(self.jobs)
+        INFLIGHT_BYTES.set(self.bytes)
+        return Admission(self, project, size)
+
+    def _release(self, admission: Admission, duration: float) -> None:
+        self.jobs -= 1
+        self.bytes -= admission.size
+        self._project_jobs[admission.project] -= 1
+        self._project_bytes[admission.project] -= admission.size
+        if not self._project_jobs[admission.project]:
+            del self._project_jobs[admission.project]
+            del self._project_bytes[admission.project]
+        self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * duration
+        INFLIGHT_JOBS.set(self.jobs)
+        INFLIGHT_BYTES.set(self.bytes)
+
+
+upload_admission = AdmissionController(
+    max_bytes=UPLOAD_MAX_INFLIGHT_BYTES,
+    max_jobs=UPLOAD_MAX_PENDING_JOBS,
+    project_max_bytes=UPLOAD_PROJECT_MAX_BYTES,
+    project_max_jobs=UPLOAD_PROJECT_MAX_JOBS,
+)
+
+
+__all__ = [
+    "Admission",
+    "AdmissionController",
+    "AdmissionRejectedError",
+    "upload_admission",
+]
@@ -0,0 +1,225 @@
+"""Latency-budget-aware ANN search parameters.
+
+Approximate indexes trade recall for speed through a probe depth: HNSW
+``ef_search`` and ivfflat ``probes`` in pgvector, and the shortlist
+``oversample`` of the in-process ``QuantizedIndex``. A calibration table
+records, for each setting on a ladder, the p95 latency and the top-k recall
+against exact search measured on a sample of stored embeddings. Queries
+carrying ``latency_budget_ms`` or ``recall_target`` get the cheapest
+setting that reaches the recall target, or the deepest one that fits the
+budget. When both are set and conflict, the budget wins.
+
+Tables are built by running the benchmark (``POST /admin/calibration``)
+and stored per backend, so each search RPC and the in-process index are
+calibrated separately.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.query import Query
+
+
+CALIBRATION_SAMPLE_SIZE = int(os.getenv("CALIBRATION_SAMPLE_SIZE", "100"))
+# Seconds a loaded calibration is trusted before it is re-read.
+CALIBRATION_REFRESH_SECONDS = float(os.getenv("CALIBRATION_REFRESH_SECONDS", "300"))
+
+SearchParams = Dict[str, int]
+
+# ``probes`` assumes ivfflat lists of roughly sqrt(rows); HNSW ignores it.
+PGVECTOR_LADDER: List[SearchParams] = [
+    {"ef_search": 16, "probes": 1},
+    {"ef_search": 40, "probes": 4},
+    {"ef_search": 100, "probes": 10},
+    {"ef_search": 200, "probes": 20},
+    {"ef_search": 400, "probes": 40},
+]
+IN_PROCESS_LADDER: List[SearchParams] = [{"oversample": n} for n in (2, 4, 10, 20, 50)]
+
+
+class CalibrationError(Exception):
+    """Raised when a calibration benchmark cannot run."""
+
+
+@dataclass
+class CalibrationPoint:
+    params: SearchParams
+    latency_ms: float  # p95 over the benchmark queries
+    recall: float  # mean top-k recall against exact search
+
+
+@dataclass
+class Calibration:
+    backend: str
+    k: int
+    points: List[CalibrationPoint] = field(default_factory=list)
+
+    def choose(
+        self, latency_budget_ms: Optional[float] = None, recall_target: Optional[float] = None
+    ) -> Optional[SearchParams]:
+        """Pick ladder parameters for a budget and/or recall target."""
+        if not self.points or (latency_budget_ms is None and recall_target is None):
+            return None
+        # Points are in ladder order: probe depth, latency and recall all rise.
+        pick: Optional[CalibrationPoint] = None
+        if recall_target is not None:
+            reaching = [p for p in self.points if p.recall >= recall_target]
+            pick = reaching[0] if reaching else self.points[-1]
+        if latency_budget_ms is not None:
+            fitting = [p for p in self.points if p.latency_ms <= latency_budget_ms]
+            within = fitting[-1] if fitting else self.points[0]
+            if pick is None or pick.latency_ms > latency_budget_ms:
+                pick = within
+        return dict(pick.params) if pick is not None else None
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "k": self.k,
+            "points": [asdict(p) for p in self.points],
+        }
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Calibration":
+        return cls(
+            backend=row["backend"],
+            k=int(row["k"]),
+            points=[CalibrationPoint(**p) for p in row["points"]],
+        )
+
+
+def _recall(found: Sequence[Any], truth: Sequence[Any]) -> float:
+    return len(set(found) & set(truth)) / len(truth) if truth else 1.0
+
+
+async def run_benchmark(
+    backend: str,
+    queries: Sequence[Any],
+    exact: Callable[[Any], Awaitable[Sequence[Any]]],
+    search: Callable[[Any, SearchParams], Awaitable[Sequence[Any]]],
+    ladder: Sequence[SearchParams],
+    k: int,
+) -> Calibration:
+    """Time ``search`` at every ladder step and score it against ``exact``."""
+    if not queries:
+        raise CalibrationError("no benchmark queries")
+    truths = [await exact(q) for q in queries]
+    calibration = Calibration(backend=backend, k=k)
+    for params in ladder:
+        latencies: List[float] = []
+        recalls: List[float] = []
+        for query, truth in zip(queries, truths):
+            start = time.perf_counter()
+            found = await search(query, params)
+            latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(_recall(found, truth))
+        calibration.points.append(
+            CalibrationPoint(
+                params=dict(params),
+                latency_ms=round(float(np.percentile(latencies, 95)), 3),
+                recall=round(float(np.mean(recalls)), 4),
+            )
+        )
+    return calibration
+
+
+async def calibrate_database(
+    db: Any,
+    backend: str,
+    k: int = 10,
+    sample_size: int = CALIBRATION_SAMPLE_SIZE,
+    ladder: Sequence[SearchParams] = PGVECTOR_LADDER,
+) -> Calibration:
+    """Benchmark ``db.vector_search`` on sampled embeddings and store the table."""
+    queries = await db.sample_embeddings(sample_size)
+    probe = Query(query_text="calibration", match_count=k, threshold=0.0)
+
+    async def exact(embedding: List[float]) -> List[str]:
+        return [str(d.id) for d in await db.vector_search(embedding, probe, exact=True)]
+
+    async def search(embedding: List[float], params: SearchParams) -> List[str]:
+        docs = await db.vector_search(embedding, probe, search_params=params)
+        return [str(d.id) for d in docs]
+
+    calibration = await run_benchmark(backend, queries, exact, search, ladder, k)
+    if not await db.store_calibration(calibration.to_row()):
+        raise CalibrationError("calibration could not be stored")
+    calibrations.set(calibration)
+    return calibration
+
+
+async def calibrate_index(
+    index: Any,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    ladder: Sequence[SearchParams] = IN_PROCESS_LADDER,
+) -> Calibration:
+    """Benchmark a ``QuantizedIndex`` built over ``vectors``."""
+    norms = np.linalg.norm(vectors, axis=1)
+    unit = vectors / np.where(norms == 0, 1.0, norms)[:, None]
+
+    async def exact(query: np.ndarray) -> List[int]:
+        return np.argsort(-(unit @ query))[:k].tolist()
+
+    async def search(query: np.ndarray, params: SearchParams) -> List[int]:
+        return [row for row, _ in index.search(query, k, oversample=params["oversample"])]
+
+    calibration = await run_benchmark("in_process", list(queries), exact, search, ladder, k)
+    calibrations.set(calibration)
+    return calibration
+
+
+class CalibrationRegistry:
+    """Per-process cache of the calibration table for each backend."""
+
+    def __init__(self, refresh: float = CALIBRATION_REFRESH_SECONDS) -> None:
+        self.refresh = refresh
+        self._entries: Dict[str, Tuple[float, Optional[Calibration]]] = {}
+
+    def set(self, calibration: Calibration) -> None:
+        self._entries[calibration.backend] = (time.monotonic(), calibration)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get(self, db: Any, backend: str) -> Optional[Calibration]:
+        entry = self._entries.get(backend)
+        if entry is not None and time.monotonic() - entry[0] < self.refresh:
+            return entry[1]
+        row = await db.get_calibration(backend)
+        calibration = Calibration.from_row(row) if row else None
+        self._entries[backend] = (time.monotonic(), calibration)
+        return calibration
+
+    async def search_params(self, db: Any, backend: str, query: Query) -> Optional[SearchParams]:
+        """Parameters for ``query`` on ``backend``; ``None`` keeps the defaults."""
+        if query.latency_budget_ms is None and query.recall_target is None:
+            return None
+        calibration = await self.get(db, backend)
+        if calibration is None:
+            return None
+        return calibration.choose(query.latency_budget_ms, query.recall_target)
+
+
+calibrations = CalibrationRegistry()
+
+
+__all__ = [
+    "Calibration",
+    "CalibrationError",
+    "CalibrationPoint",
+    "CalibrationRegistry",
+    "IN_PROCESS_LADDER",
+    "PGVECTOR_LADDER",
+    "calibrate_database",
+    "calibrate_index",
+    "calibrations",
+    "run_benchmark",
+]
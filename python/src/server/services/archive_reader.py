@@ -0,0 +1,157 @@
+"""Stream document entries out of zip and tar archives.
+
+Entries are read straight from the archive stream; nothing is extracted to
+disk. Only supported document types are yielded and every entry is bounded
+in size so compressed bombs cannot exhaust memory.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import tarfile
+import zipfile
+from dataclasses import dataclass
+from typing import BinaryIO, Generator, Iterator, Optional
+
+
+ENTRY_TYPES = {
+    ".txt": "text/plain",
+    ".md": "text/plain",
+    ".markdown": "text/plain",
+    ".rst": "text/plain",
+    ".pdf": "application/pdf",
+}
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be read."""
+
+
+class EntryTooLargeError(ArchiveError):
+    """Raised when an entry exceeds the per-entry size limit."""
+
+
+@dataclass
+class ArchiveEntry:
+    """A supported file inside an archive."""
+
+    name: str
+    content_type: str
+    size: int
+    stream: BinaryIO
+
+
+class BoundedReader:
+    """File-like wrapper that refuses to read past ``limit`` bytes."""
+
+    def __init__(self, raw: BinaryIO, limit: int) -> None:
+        self._raw = raw
+        self._remaining = limit
+
+    def read(self, size: int = -1) -> bytes:
+        want = self._remaining + 1 if size < 0 else min(size, self._remaining + 1)
+        data = self._raw.read(want)
+        self._remaining -= len(data)
+        if self._remaining < 0:
+            raise EntryTooLargeError("archive entry too large")
+        return data
+
+
+def entry_content_type(name: str) -> Optional[str]:
+    """Return the document type for ``name`` or ``None`` if unsupported."""
+    base = posixpath.basename(name)
+    if not base or base.startswith(".") or "__MACOSX/" in name:
+        return None
+    return ENTRY_TYPES.get(posixpath.splitext(base)[1].lower())
+
+
+def _iter_zip(stream: BinaryIO, max_entry_size: int) -> Iterator[ArchiveEntry]:
+    with zipfile.ZipFile(stream) as zf:
+        for info in zf.infolist():
+            ctype = None if info.is_dir() else entry_content_type(info.filename)
+            if ctype is None:
+                continue
+            with zf.open(info) as raw:
+                yield ArchiveEntry(
+                    info.filename,
+                    ctype,
+                    info.file_size,
+                    BoundedReader(raw, max_entry_size),  # type: ignore[arg-type]
+                )
+
+
+def _iter_tar(stream: BinaryIO, max_entry_size: int) -> Iterator[ArchiveEntry]:
+    # Stream mode reads members sequentially without seeking back.
+    with tarfile.open(fileobj=stream, mode="r|*") as tf:
+        for member in tf:
+            ctype = entry_content_type(member.name) if member.isfile() else None
+            if ctype is None:
+                continue
+            raw = tf.extractfile(member)
+            if raw is None:
+                continue
+            yield ArchiveEntry(
+                member.name,
+                ctype,
+                member.size,
+                BoundedReader(raw, max_entry_size),  # type: ignore[arg-type]
+            )
+
+
+def _entry_names(stream: BinaryIO, zipped: bool) -> Generator[str, None, None]:
+    if zipped:
+        with zipfile.ZipFile(stream) as zf:
+            yield from (info.filename for info in zf.infolist() if not info.is_dir())
+    else:
+        # Headers only; member data is skipped, not buffered.
+        with tarfile.open(fileobj=stream, mode="r|*") as tf:
+            yield from (member.name for member in tf if member.isfile())
+
+
+def _too_many_entries(stream: BinaryIO, zipped: bool, limit: int) -> bool:
+    names = _entry_names(stream, zipped)
+    try:
+        count = 0
+        for name in names:
+            if entry_content_type(name) is not None:
+                count += 1
+                if count > limit:
+                    return True
+        return False
+    finally:
+        names.close()
+
+
+def iter_archive(
+    stream: BinaryIO, *, max_entries: int, max_entry_size: int
+) -> Iterator[ArchiveEntry]:
+    """Yield supported entries from a zip or (optionally compressed) tar.
+
+    ``stream`` must be seekable so the format can be sniffed. Supported
+    entries are counted before the first is yielded, so an archive with more
+    than ``max_entries`` is rejected before anything is read from it. Each
+    entry's stream is only valid until the next entry is requested and
+    raises :class:`EntryTooLargeError` once more than ``max_entry_size``
+    bytes have been read from it.
+    """
+    zipped = zipfile.is_zipfile(stream)
+    try:
+        stream.seek(0)
+        if _too_many_entries(stream, zipped, max_entries):
+            raise ArchiveError("too many files in archive")
+        stream.seek(0)
+        if zipped:
+            yield from _iter_zip(stream, max_entry_size)
+        else:
+            yield from _iter_tar(stream, max_entry_size)
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError, OSError) as exc:
+        raise ArchiveError("invalid archive") from exc
+
+__all__ = [
+    "ArchiveEntry",
+    "ArchiveError",
+    "BoundedReader",
+    "EntryTooLargeError",
+    "entry_content_type",
+    "iter_archive",
+]
@@ -0,0 +1,172 @@
+"""Content-defined chunking and chunk-level re-embedding.
+
+Chunk boundaries are chosen from the content itself (a paragraph whose hash
+hits a fixed residue closes the chunk), so an edit only changes the chunks
+around it instead of shifting every later boundary. Each chunk is keyed by
+its hash, which lets document updates reuse the stored vectors of unchanged
+chunks and embed only what was edited.
+
+A document's vector is the normalized mean of its chunk vectors, both when
+it is first embedded and after every update, so all documents in the index
+share one representation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from .database import DatabaseService
+from .embedding import generate_embedding
+
+
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "4000"))
+# On average one paragraph in CHUNK_BOUNDARY_DIVISOR closes a chunk.
+CHUNK_BOUNDARY_DIVISOR = int(os.getenv("CHUNK_BOUNDARY_DIVISOR", "4"))
+# Changed chunks of one document embedded at the same time.
+CHUNK_EMBED_CONCURRENCY = int(os.getenv("CHUNK_EMBED_CONCURRENCY", "8"))
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A contiguous piece of document content."""
+
+    index: int
+    text: str
+    hash: str
+
+
+@dataclass
+class ChunkDiff:
+    """Outcome of re-embedding a document at chunk granularity."""
+
+    total: int
+    reused: int
+    embedded: int
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _pieces(paragraph: str, max_chars: int) -> List[str]:
+    return [paragraph[i : i + max_chars] for i in range(0, len(paragraph), max_chars)]
+
+
+def chunk_text(
+    text: str,
+    *,
+    max_chars: int | None = None,
+    divisor: int | None = None,
+) -> List[Chunk]:
+    """Split ``text`` into content-defined chunks."""
+    max_chars = max_chars or CHUNK_MAX_CHARS
+    divisor = divisor or CHUNK_BOUNDARY_DIVISOR
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for paragraph in _PARAGRAPH_SPLIT.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        for piece in _pieces(paragraph, max_chars):
+            if current and size + len(piece) > max_chars:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece)
+            if int(_digest(piece)[:8], 16) % divisor == 0:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+    if current:
+        chunks.append("\n\n".join(current))
+    return [Chunk(i, c, _digest(c)) for i, c in enumerate(chunks)]
+
+
+def mean_vector(vectors: Sequence[Sequence[float]]) -> List[float]:
+    """Return the L2-normalized mean of ``vectors``."""
+    if not len(vectors):
+        return []
+    summed = np.asarray(vectors, dtype=np.float64).sum(axis=0)
+    norm = float(np.linalg.norm(summed)) or 1.0
+    return (summed / norm).tolist()
+
+
+async def reembed_chunks(
+    db: DatabaseService,
+    doc_id: UUID,
+    content: str,
+    previous: Optional[Tuple[str, Sequence[float]]] = None,
+    *,
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+) -> Tuple[List[float], ChunkDiff]:
+    """Embed only the chunks of ``content`` that are not stored yet.
+
+    New documents have no stored chunks, so every chunk is embedded.
+    ``previous`` is the document's prior ``(content, embedding)``. Documents
+    that predate chunk storage and fit in one chunk seed the diff with their
+    whole-document vector, so their first edit is incremental too.
+
+    At most ``CHUNK_EMBED_CONCURRENCY`` changed chunks are embedded at once.
+    ``on_progress`` is awaited with ``(done, total)`` as each changed chunk
+    finishes embedding. Returns the document-level vector (mean of chunk
+    vectors) and diff stats.
+    """
+    chunks = chunk_text(content)
+    stored_rows = await db.list_chunk_embeddings(doc_id)
+    by_hash: Dict[str, List[float]] = {
+        row["chunk_hash"]: list(row["embedding"]) for row in stored_rows
+    }
+    by_index = {row["chunk_index"]: row["chunk_hash"] for row in stored_rows}
+    if not stored_rows and previous and previous[1]:
+        old_chunks = chunk_text(previous[0])
+        if len(old_chunks) == 1:
+            by_hash[old_chunks[0].hash] = list(previous[1])
+
+    reused = sum(1 for c in chunks if c.hash in by_hash)
+    missing = list({c.hash: c for c in chunks if c.hash not in by_hash}.values())
+    done = 0
+    semaphore = asyncio.Semaphore(max(CHUNK_EMBED_CONCURRENCY, 1))
+
+    async def _embed(chunk: Chunk) -> List[float]:
+        nonlocal done
+        async with semaphore:
+            vector = await generate_embedding(chunk.text)
+        done += 1
+        if on_progress is not None:
+            await on_progress(done, len(missing))
+        return vector
+
+    vectors = await asyncio.gather(*(_embed(c) for c in missing))
+    by_hash.update({c.hash: v for c, v in zip(missing, vectors)})
+
+    changed = [
+        {"chunk_index": c.index, "chunk_hash": c.hash, "embedding": by_hash[c.hash]}
+        for c in chunks
+        if by_index.get(c.index) != c.hash
+    ]
+    await db.upsert_chunk_embeddings(doc_id, changed)
+    if len(by_index) > len(chunks):
+        await db.delete_chunk_embeddings(doc_id, from_index=len(chunks))
+
+    doc_vector = mean_vector([by_hash[c.hash] for c in chunks])
+    diff = ChunkDiff(total=len(chunks), reused=reused, embedded=len(missing))
+    return doc_vector, diff
+
+
+__all__ = [
+    "Chunk",
+    "ChunkDiff",
+    "chunk_text",
+    "mean_vector",
+    "reembed_chunks",
+]
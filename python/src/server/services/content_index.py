@@ -0,0 +1,164 @@
+"""Content-addressed index for deduplicating documents and embeddings.
+
+Document content is normalized and hashed; the ``content_hashes`` table maps
+each hash to the document that first produced it and that document's
+embedding. A per-process Bloom filter answers "definitely unseen" without a
+database round trip once it has been seeded from the table. Hashes that
+other workers record after seeding are only missed until restart, which
+costs a recomputed embedding rather than a wrong answer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from loguru import logger
+from prometheus_client import Counter
+
+from src.common.metrics import shared_metric
+
+from .database import DatabaseError, DatabaseService
+
+
+BLOOM_CAPACITY = int(os.getenv("CONTENT_BLOOM_CAPACITY", "1000000"))
+BLOOM_ERROR_RATE = float(os.getenv("CONTENT_BLOOM_ERROR_RATE", "0.01"))
+# Hashes read per page while seeding; PostgREST caps responses at max-rows.
+SEED_PAGE_SIZE = 1000
+
+DEDUP_LOOKUPS = shared_metric(
+    Counter,
+    "content_dedup_lookups_total",
+    "Content hash lookups by outcome",
+    ["result"],
+)
+
+
+def normalize_content(text: str) -> str:
+    """Normalize text so trivially different copies hash identically."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of the normalized text."""
+    return hashlib.sha256(normalize_content(text).encode()).hexdigest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over hex digests."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("invalid bloom filter parameters")
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self._size = bits
+        self._hashes = max(1, round(bits / capacity * math.log(2)))
+        self._bits = bytearray((bits + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        # Keys are already uniform digests, so double hashing over two
+        # 64-bit slices gives independent enough probe positions.
+        h1 = int(key[:16], 16)
+        h2 = int(key[16:32], 16) | 1
+        return [(h1 + i * h2) % self._size for i in range(self._hashes)]
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class ContentIndex:
+    """Look up and record embeddings by normalized content hash."""
+
+    def __init__(self, bloom: BloomFilter) -> None:
+        self._bloom = bloom
+        self._seeded = False
+        self._lock = asyncio.Lock()
+
+    async def _seed(self, db: DatabaseService) -> None:
+        if self._seeded:
+            return
+        async with self._lock:
+            if self._seeded:
+                return
+            after: Optional[str] = None
+            try:
+                while True:
+                    page = await db.list_content_hashes(after, SEED_PAGE_SIZE)
+                    for digest in page:
+                        self._bloom.add(digest)
+                    if len(page) < SEED_PAGE_SIZE:
+                        break
+                    after = page[-1]
+                self._seeded = True
+            except DatabaseError as exc:
+                # Unseeded filters would yield false negatives; keep querying.
+                logger.warning("content hash seeding failed", error=str(exc))
+
+    async def preload(self, db: DatabaseService) -> bool:
+        """Seed the Bloom filter ahead of the first lookup."""
+        await self._seed(db)
+        return self._seeded
+
+    async def lookup(self, db: DatabaseService, digest: str) -> Optional[Dict[str, Any]]:
+        """Return the indexed row for ``digest`` or ``None``."""
+        await self._seed(db)
+        if self._seeded and digest not in self._bloom:
+            DEDUP_LOOKUPS.labels("bloom_miss").inc()
+            return None
+        row = await db.get_content_hash(digest)
+        DEDUP_LOOKUPS.labels("hit" if row else "miss").inc()
+        return row
+
+    async def lookup_entry(
+        self, db: DatabaseService, digest: str
+    ) -> Optional[Tuple[Optional[UUID], List[float]]]:
+        """Return the document that first produced ``digest`` and its embedding."""
+        row = await self.lookup(db, digest)
+        if not row or not row.get("embedding"):
+            return None
+        embedding = row["embedding"]
+        if isinstance(embedding, str):
+            # pgvector columns come back from PostgREST as "[x,y,...]" text.
+            embedding = json.loads(embedding)
+        origin = UUID(str(row["doc_id"])) if row.get("doc_id") else None
+        return origin, [float(x) for x in embedding]
+
+    async def lookup_embedding(
+        self, db: DatabaseService, digest: str
+    ) -> Optional[List[float]]:
+        """Return a previously computed embedding for ``digest``."""
+        entry = await self.lookup_entry(db, digest)
+        return entry[1] if entry else None
+
+    async def record(
+        self,
+        db: DatabaseService,
+        digest: str,
+        doc_id: UUID,
+        embedding: Sequence[float],
+    ) -> None:
+        """Index ``digest`` once its embedding has been computed."""
+        if await db.store_content_hash(digest, doc_id, embedding):
+            self._bloom.add(digest)
+
+
+content_index = ContentIndex(BloomFilter(BLOOM_CAPACITY, BLOOM_ERROR_RATE))
+
+
+__all__ = [
+    "BloomFilter",
+    "ContentIndex",
+    "content_hash",
+    "content_index",
+    "normalize_content",
+]
@@ -0,0 +1,487 @@
+"""Asynchronous web crawler for ``web`` sources.
+
+A fixed pool of worker tasks pulls URLs from a frontier queue and fetches
+them through one pooled HTTP client. Concurrency is bounded globally by the
+worker count and per host by a semaphore. ``robots.txt`` is honoured and its
+sitemaps (or ``/sitemap.xml``) seed the frontier. Responses are decoded and
+fed to an incremental HTML parser as they stream in, so page text and links
+are extracted without buffering the raw body.
+
+Start URLs come from users, so every request, including each redirect hop,
+is checked before it is sent: the host must resolve only to public
+addresses unless ``CRAWL_ALLOW_PRIVATE`` is set. Redirects are followed
+here rather than by the client so each hop gets that check. Sitemaps are
+only read from the origin of the start URL.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import hashlib
+import ipaddress
+import os
+import posixpath
+import socket
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from loguru import logger
+
+
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "64"))
+CRAWL_PER_HOST = int(os.getenv("CRAWL_PER_HOST", "8"))
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "1000"))
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "3"))
+CRAWL_MAX_PAGE_BYTES = int(os.getenv("CRAWL_MAX_PAGE_BYTES", str(5 * 1024 * 1024)))
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "15"))
+CRAWL_USER_AGENT = os.getenv("CRAWL_USER_AGENT", "ArchonCrawler/1.0")
+CRAWL_MAX_REDIRECTS = int(os.getenv("CRAWL_MAX_REDIRECTS", "5"))
+# Allow loopback, private and link-local targets, e.g. for intranet docs.
+CRAWL_ALLOW_PRIVATE = os.getenv("CRAWL_ALLOW_PRIVATE", "false").lower() == "true"
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+_BLOCK_TAGS = {
+    "article",
+    "blockquote",
+    "br",
+    "div",
+    "footer",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "header",
+    "li",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "tr",
+}
+_SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+class CrawlError(Exception):
+    """Raised when a crawl cannot start."""
+
+
+@dataclass
+class CrawlConfig:
+    """Limits for a single crawl."""
+
+    max_pages: int = CRAWL_MAX_PAGES
+    max_depth: int = CRAWL_MAX_DEPTH
+    concurrency: int = CRAWL_CONCURRENCY
+    per_host: int = CRAWL_PER_HOST
+    max_page_bytes: int = CRAWL_MAX_PAGE_BYTES
+    same_host: bool = True
+    use_sitemaps: bool = True
+    allow_private: bool = CRAWL_ALLOW_PRIVATE
+
+
+@dataclass
+class CrawledPage:
+    """Text extracted from one fetched page."""
+
+    url: str
+    title: str
+    text: str
+    links: List[str] = field(default_factory=list)
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for deduplication (no fragment, default ports)."""
+    url, _ = urldefrag(url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and (scheme, port) not in {("http", 80), ("https", 443)}:
+        host = f"{host}:{port}"
+    path = posixpath.normpath(parts.path) if parts.path else "/"
+    if parts.path.endswith("/") and path != "/":
+        path += "/"
+    return urlunsplit((scheme, host, path, parts.query, ""))
+
+
+class VisitedIndex:
+    """Set of seen URLs stored as 16-byte digests of their normalized form."""
+
+    def __init__(self) -> None:
+        self._seen: Set[bytes] = set()
+
+    @staticmethod
+    def _key(url: str) -> bytes:
+        return hashlib.blake2b(normalize_url(url).encode(), digest_size=16).digest()
+
+    def add(self, url: str) -> bool:
+        """Record ``url``; return ``False`` if it was already seen."""
+        key = self._key(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        return self._key(url) in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+class HtmlTextExtractor(HTMLParser):
+    """Incremental HTML parser collecting visible text, title and links."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._title: List[str] = []
+        self._skip = 0
+        self._in_title = False
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+        if tag in _BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+        elif tag == "title":
+            self._in_title = False
+        if tag in _BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if self._skip:
+            return
+        if self._in_title:
+            self._title.append(data)
+        else:
+            self._parts.append(data)
+
+    @property
+    def title(self) -> str:
+        return " ".join("".join(self._title).split())
+
+    @property
+    def text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self._parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def parse_sitemap(body: str) -> Tuple[List[str], List[str]]:
+    """Return ``(page_urls, nested_sitemap_urls)`` from a sitemap document."""
+    pages: List[str] = []
+    nested: List[str] = []
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError:
+        return pages, nested
+    target = nested if root.tag.endswith("sitemapindex") else pages
+    for loc in root.iter(f"{_SITEMAP_NS}loc"):
+        if loc.text:
+            target.append(loc.text.strip())
+    if not pages and not nested:
+        # Sitemaps without the namespace declaration.
+        for loc in root.iter("loc"):
+            if loc.text:
+                target.append(loc.text.strip())
+    return pages, nested
+
+
+Resolver = Callable[[str], Awaitable[List[str]]]
+
+
+async def resolve_host(host: str) -> List[str]:
+    """Return every address ``host`` resolves to."""
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        host, None, type=socket.SOCK_STREAM
+    )
+    return [str(info[4][0]) for info in infos]
+
+
+def is_public_address(address: str) -> bool:
+    """Whether ``address`` is globally routable (not private, loopback, ...)."""
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return False
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled client used for crawling."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=CRAWL_TIMEOUT,
+            # Crawler follows redirects itself to vet each target.
+            follow_redirects=False,
+            headers={"User-Agent": CRAWL_USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=CRAWL_CONCURRENCY,
+                max_keepalive_connections=CRAWL_CONCURRENCY,
+            ),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the pooled client, e.g. on application shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+class Crawler:
+    """Breadth-first crawler bounded by page count, depth and concurrency."""
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        config: Optional[CrawlConfig] = None,
+        resolver: Resolver = resolve_host,
+    ) -> None:
+        self._client = client or get_http_client()
+        self.config = config or CrawlConfig()
+        self._resolver = resolver
+        self.visited = VisitedIndex()
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._robots: Dict[str, Optional[RobotFileParser]] = {}
+        self._robots_lock = asyncio.Lock()
+        self._scheduled = 0
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.config.per_host)
+        return self._hosts[host]
+
+    async def _permitted(self, url: str) -> bool:
+        parts = urlsplit(url)
+        if parts.scheme not in {"http", "https"} or not parts.hostname:
+            return False
+        if self.config.allow_private:
+            return True
+        try:
+            addresses = [str(ipaddress.ip_address(parts.hostname))]
+        except ValueError:
+            try:
+                addresses = await self._resolver(parts.hostname)
+            except OSError:
+                return False
+        return bool(addresses) and all(is_public_address(a) for a in addresses)
+
+    async def _open(self, url: str) -> Optional[httpx.Response]:
+        """Send a streaming GET, vetting the target of every redirect hop.
+
+        The caller must close the returned response.
+        """
+        for _ in range(CRAWL_MAX_REDIRECTS + 1):
+            if not await self._permitted(url):
+                logger.warning("crawl target rejected", url=url)
+                return None
+            res = await self._client.send(self._client.build_request("GET", url), stream=True)
+            if not res.is_redirect:
+                return res
+            await res.aclose()
+            url = urljoin(str(res.url), res.headers["location"])
+        return None
+
+    async def _get_text(self, url: str) -> Optional[str]:
+        """Fetch a small text resource (robots.txt, sitemaps) under the byte cap."""
+        res: Optional[httpx.Response] = None
+        async with self._host_limit(url):
+            try:
+                res = await self._open(url)
+                if res is None or res.status_code != 200:
+                    return None
+                body = bytearray()
+                async for chunk in res.aiter_bytes():
+                    body += chunk
+                    if len(body) > self.config.max_page_bytes:
+                        return None
+                return body.decode(res.encoding or "utf-8", errors="replace")
+            except httpx.HTTPError:
+                return None
+            finally:
+                if res is not None:
+                    await res.aclose()
+
+    async def _robots_for(self, url: str) -> Optional[RobotFileParser]:
+        origin = _origin(url)
+        if origin in self._robots:
+            return self._robots[origin]
+        async with self._robots_lock:
+            if origin not in self._robots:
+                body = await self._get_text(f"{origin}/robots.txt")
+                parser: Optional[RobotFileParser] = None
+                if body is not None:
+                    parser = RobotFileParser()
+                    parser.parse(body.splitlines())
+                self._robots[origin] = parser
+        return self._robots[origin]
+
+    async def _allowed(self, url: str) -> bool:
+        robots = await self._robots_for(url)
+        return robots is None or robots.can_fetch(CRAWL_USER_AGENT, url)
+
+    async def _sitemap_urls(self, start: str) -> List[str]:
+        origin = _origin(start)
+        robots = await self._robots_for(start)
+        listed = robots.site_maps() if robots else None
+        todo = list(listed or [f"{origin}/sitemap.xml"])
+        seen: Set[str] = set()
+        pages: List[str] = []
+        while todo and len(pages) < self.config.max_pages:
+            sitemap = todo.pop()
+            if sitemap in seen or _origin(sitemap) != origin:
+                continue
+            seen.add(sitemap)
+            body = await self._get_text(sitemap)
+            if body is None:
+                continue
+            found, nested = parse_sitemap(body)
+            pages.extend(found)
+            todo.extend(nested)
+        return pages
+
+    def _in_scope(self, url: str, start_host: str) -> bool:
+        parts = urlsplit(url)
+        if parts.scheme not in {"http", "https"}:
+            return False
+        return not self.config.same_host or parts.netloc.lower() == start_host
+
+    def _schedule(self, frontier: asyncio.Queue, url: str, depth: int) -> None:
+        if self._scheduled >= self.config.max_pages:
+            return
+        if self.visited.add(url):
+            self._scheduled += 1
+            frontier.put_nowait((normalize_url(url), depth))
+
+    async def _fetch_page(self, url: str) -> Optional[CrawledPage]:
+        res: Optional[httpx.Response] = None
+        async with self._host_limit(url):
+            try:
+                res = await self._open(url)
+                if res is None:
+                    return None
+                ctype = res.headers.get("content-type", "")
+                if res.status_code != 200 or "html" not in ctype:
+                    return None
+                extractor = HtmlTextExtractor()
+                decoder = codecs.getincrementaldecoder(res.encoding or "utf-8")(
+                    errors="replace"
+                )
+                size = 0
+                async for chunk in res.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.config.max_page_bytes:
+                        break
+                    extractor.feed(decoder.decode(chunk))
+                extractor.feed(decoder.decode(b"", final=True))
+                extractor.close()
+                final_url = str(res.url)
+            except httpx.HTTPError as exc:
+                logger.debug("crawl fetch failed", url=url, error=str(exc))
+                return None
+            finally:
+                if res is not None:
+                    await res.aclose()
+        links = [urljoin(final_url, link) for link in extractor.links]
+        return CrawledPage(final_url, extractor.title, extractor.text, links)
+
+    async def crawl(self, start_url: str) -> AsyncIterator[CrawledPage]:
+        """Yield pages reachable from ``start_url`` as they are fetched."""
+        start_host = urlsplit(start_url).netloc.lower()
+        if not start_host:
+            raise CrawlError("invalid start url")
+        frontier: asyncio.Queue[Tuple[str, int]] = asyncio.Queue()
+        results: asyncio.Queue[Optional[CrawledPage]] = asyncio.Queue(
+            maxsize=self.config.concurrency * 2
+        )
+        self._schedule(frontier, start_url, 0)
+        if self.config.use_sitemaps:
+            for url in await self._sitemap_urls(start_url):
+                if self._in_scope(url, start_host):
+                    self._schedule(frontier, url, 1)
+
+        async def worker() -> None:
+            while True:
+                url, depth = await frontier.get()
+                try:
+                    if not await self._allowed(url):
+                        continue
+                    page = await self._fetch_page(url)
+                    if page is None:
+                        continue
+                    if depth < self.config.max_depth:
+                        for link in page.links:
+                            if self._in_scope(link, start_host):
+                                self._schedule(frontier, link, depth + 1)
+                    # Bounded, so a slow consumer throttles fetching.
+                    await results.put(page)
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("crawl worker error", url=url, error=str(exc))
+                finally:
+                    frontier.task_done()
+
+        async def finish() -> None:
+            await frontier.join()
+            await results.put(None)
+
+        workers = [
+            asyncio.create_task(worker()) for _ in range(self.config.concurrency)
+        ]
+        done = asyncio.create_task(finish())
+        try:
+            while (page := await results.get()) is not None:
+                yield page
+        finally:
+            for task in [*workers, done]:
+                task.cancel()
+            await asyncio.gather(*workers, done, return_exceptions=True)
+
+
+__all__ = [
+    "CrawlConfig",
+    "CrawlError",
+    "CrawledPage",
+    "Crawler",
+    "HtmlTextExtractor",
+    "VisitedIndex",
+    "close_http_client",
+    "get_http_client",
+    "is_public_address",
+    "normalize_url",
+    "parse_sitemap",
+    "resolve_host",
+]
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 from uuid import UUID
 
 from opentelemetry import trace
+from postgrest._async.request_builder import AsyncExplainRequestBuilder
 from supabase import AsyncClient
 from typing import cast
 
@@ -11,6 +13,16 @@ from ..models.document import Document
 from ..models.project import Project
 from ..models.query import Query
 from ..models.source import Source
+from .ann_tuning import calibrations
+from .filters import filter_stats, plan_filters
+from .quantization import (
+    EMBEDDING_QUANTIZATION,
+    QUANTIZATION_MODES,
+    QUANTIZED_OVERSAMPLE,
+    bit_string,
+)
+from .reduction import Projection
+from .slow_log import OperationSpan, slow_operations
 from .supabase_client import SupabaseClient
 
 
@@ -18,19 +30,70 @@ class DatabaseError(Exception):
     """Raised when database operations fail."""
 
 
+def embedding_row(
+    doc_id: UUID,
+    embedding: Sequence[float],
+    quantization: str = "none",
+    projection: Optional[Projection] = None,
+) -> Dict[str, Any]:
+    """Build an ``embeddings`` row, adding quantized codes and the reduced
+    vector when enabled."""
+    row: Dict[str, Any] = {"doc_id": str(doc_id), "embedding": list(embedding)}
+    if projection is not None:
+        row["embedding_reduced"] = projection.project(embedding)
+        row["projection_version"] = projection.version
+    if quantization == "binary":
+        row["embedding_bits"] = bit_string(embedding)
+    return row
+
+
+def _as_floats(embedding: Any) -> List[float]:
+    # PostgREST returns pgvector values as "[0.1,0.2,...]" strings.
+    if isinstance(embedding, str):
+        embedding = embedding.strip("[]").split(",")
+    return [float(x) for x in embedding]
+
+
 class DatabaseService:
     """Service layer providing CRUD and vector operations."""
 
-    def __init__(self, client: SupabaseClient) -> None:
+    def __init__(
+        self,
+        client: SupabaseClient,
+        quantization: str = EMBEDDING_QUANTIZATION,
+        projection: Optional[Projection] = None,
+    ) -> None:
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"unsupported quantization mode: {quantization}")
         self._client = client
         self._tracer = trace.get_tracer(__name__)
+        self._quantization = quantization
+        self.projection = projection
+
+    @contextmanager
+    def _span(self, name: str, **params: Any) -> Iterator[OperationSpan]:
+        """Trace an operation and report it to the slow-operation log."""
+        with self._tracer.start_as_current_span(name) as span:
+            with slow_operations.track(name, span, params) as op:
+                yield op
 
     async def _table(self, name: str):
         sb = await self._client.get_client()
         return sb.table(name)
 
+    async def ping(self) -> bool:
+        """Run a minimal query, opening a pooled connection if none is idle."""
+        with self._span("db.ping") as span:
+            try:
+                tbl = await self._table("projects")
+                await tbl.select("id").limit(1).execute()
+                return True
+            except Exception as exc:
+                span.record_exception(exc)
+                return False
+
     async def create_project(self, project: Project) -> Project:
-        with self._tracer.start_as_current_span("db.create_project") as span:
+        with self._span("db.create_project") as span:
             try:
                 tbl = await self._table("projects")
                 res = await tbl.insert(project.model_dump()).execute()
@@ -40,7 +103,7 @@ class DatabaseService:
                 raise DatabaseError("create_project failed") from exc
 
     async def get_project(self, project_id: UUID) -> Optional[Project]:
-        with self._tracer.start_as_current_span("db.get_project") as span:
+        with self._span("db.get_project") as span:
             try:
                 tbl = await self._table("projects")
                 res = await tbl.select("*").eq("id", str(project_id)).single().execute()
@@ -52,7 +115,7 @@ class DatabaseService:
     async def update_project(
         self, project_id: UUID, data: Dict[str, Any]
     ) -> Optional[Project]:
-        with self._tracer.start_as_current_span("db.update_project") as span:
+        with self._span("db.update_project") as span:
             try:
                 tbl = cast(Any, await self._table("projects"))
                 res = (
@@ -68,7 +131,7 @@ class DatabaseService:
                 return None
 
     async def delete_project(self, project_id: UUID) -> bool:
-        with self._tracer.start_as_current_span("db.delete_project") as span:
+        with self._span("db.delete_project") as span:
             try:
                 tbl = await self._table("projects")
                 await tbl.delete().eq("id", str(project_id)).execute()
@@ -78,17 +141,18 @@ class DatabaseService:
                 return False
 
     async def list_projects(self) -> List[Project]:
-        with self._tracer.start_as_current_span("db.list_projects") as span:
+        with self._span("db.list_projects") as span:
             try:
                 tbl = await self._table("projects")
                 res = await tbl.select("*").execute()
+                span.set_attribute("db.rows", len(res.data))
                 return [Project(**row) for row in res.data]
             except Exception as exc:
                 span.record_exception(exc)
                 raise DatabaseError("list_projects failed") from exc
 
     async def create_source(self, source: Source) -> Source:
-        with self._tracer.start_as_current_span("db.create_source") as span:
+        with self._span("db.create_source") as span:
             try:
                 tbl = await self._table("sources")
                 res = await tbl.insert(source.model_dump()).execute()
@@ -98,7 +162,7 @@ class DatabaseService:
                 raise DatabaseError("create_source failed") from exc
 
     async def get_source(self, source_id: UUID) -> Optional[Source]:
-        with self._tracer.start_as_current_span("db.get_source") as span:
+        with self._span("db.get_source") as span:
             try:
                 tbl = await self._table("sources")
                 res = await tbl.select("*").eq("id", str(source_id)).single().execute()
@@ -110,7 +174,7 @@ class DatabaseService:
     async def update_source(
         self, source_id: UUID, data: Dict[str, Any]
     ) -> Optional[Source]:
-        with self._tracer.start_as_current_span("db.update_source") as span:
+        with self._span("db.update_source") as span:
             try:
                 tbl = cast(Any, await self._table("sources"))
                 res = (
@@ -126,7 +190,7 @@ class DatabaseService:
                 return None
 
     async def delete_source(self, source_id: UUID) -> bool:
-        with self._tracer.start_as_current_span("db.delete_source") as span:
+        with self._span("db.delete_source") as span:
             try:
                 tbl = await self._table("sources")
                 await tbl.delete().eq("id", str(source_id)).execute()
@@ -136,17 +200,18 @@ class DatabaseService:
                 return False
 
     async def list_sources(self, project_id: UUID) -> List[Source]:
-        with self._tracer.start_as_current_span("db.list_sources") as span:
+        with self._span("db.list_sources", project_id=str(project_id)) as span:
             try:
                 tbl = await self._table("sources")
                 res = await tbl.select("*").eq("project_id", str(project_id)).execute()
+                span.set_attribute("db.rows", len(res.data))
                 return [Source(**row) for row in res.data]
             except Exception as exc:
                 span.record_exception(exc)
                 raise DatabaseError("list_sources failed") from exc
 
     async def create_document(self, doc: Document) -> Document:
-        with self._tracer.start_as_current_span("db.create_document") as span:
+        with self._span("db.create_document") as span:
             try:
                 tbl = await self._table("documents")
                 res = await tbl.insert(doc.model_dump()).execute()
@@ -155,8 +220,19 @@ class DatabaseService:
                 span.record_exception(exc)
                 raise DatabaseError("create_document failed") from exc
 
+    async def create_documents(self, docs: Sequence[Document]) -> List[Document]:
+        with self._span("db.create_documents") as span:
+            span.set_attribute("db.rows", len(docs))
+            try:
+                tbl = await self._table("documents")
+                res = await tbl.insert([doc.model_dump() for doc in docs]).execute()
+                return [Document(**row) for row in res.data]
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("create_documents failed") from exc
+
     async def get_document(self, doc_id: UUID) -> Optional[Document]:
-        with self._tracer.start_as_current_span("db.get_document") as span:
+        with self._span("db.get_document") as span:
             try:
                 tbl = await self._table("documents")
                 res = await tbl.select("*").eq("id", str(doc_id)).single().execute()
@@ -168,7 +244,7 @@ class DatabaseService:
     async def update_document(
         self, doc_id: UUID, data: Dict[str, Any]
     ) -> Optional[Document]:
-        with self._tracer.start_as_current_span("db.update_document") as span:
+        with self._span("db.update_document") as span:
             try:
                 tbl = cast(Any, await self._table("documents"))
                 res = (
@@ -184,7 +260,7 @@ class DatabaseService:
                 return None
 
     async def delete_document(self, doc_id: UUID) -> bool:
-        with self._tracer.start_as_current_span("db.delete_document") as span:
+        with self._span("db.delete_document") as span:
             try:
                 tbl = await self._table("documents")
                 await tbl.delete().eq("id", str(doc_id)).execute()
@@ -193,56 +269,482 @@ class DatabaseService:
                 span.record_exception(exc)
                 return False
 
+    async def delete_batch_documents(self, batch_id: UUID) -> bool:
+        """Delete every document created under an upload ``batch_id``."""
+        with self._span("db.delete_batch_documents") as span:
+            try:
+                tbl = await self._table("documents")
+                await tbl.delete().eq("metadata->>batch_id", str(batch_id)).execute()
+                return True
+            except Exception as exc:
+                span.record_exception(exc)
+                return False
+
+    @property
+    def search_backend(self) -> str:
+        """The RPC ``vector_search`` calls."""
+        if self.projection is not None:
+            # Reduced vectors take precedence over quantized codes.
+            return "match_documents_reduced"
+        if self._quantization != "none":
+            return "match_documents_quantized"
+        return "match_documents"
+
     async def vector_search(
-        self, embedding: Sequence[float], query: Query
+        self,
+        embedding: Sequence[float],
+        query: Query,
+        search_params: Optional[Dict[str, int]] = None,
+        exact: bool = False,
     ) -> List[Document]:
+        """Search with the active backend's RPC.
+
+        ``search_params`` sets the index probe depth; by default it comes
+        from the calibration table when the query has a latency budget or
+        recall target. ``exact`` ranks every matching row without the index.
+        """
+        scored = await self.vector_search_scored(embedding, query, search_params, exact)
+        return [doc for doc, _ in scored]
+
+    async def vector_search_scored(
+        self,
+        embedding: Sequence[float],
+        query: Query,
+        search_params: Optional[Dict[str, int]] = None,
+        exact: bool = False,
+        after: Optional[Tuple[float, UUID]] = None,
+        depth: int = 0,
+    ) -> List[Tuple[Document, Optional[float]]]:
+        """``vector_search`` returning each document with its cosine distance.
+
+        ``after`` is the ``(distance, id)`` of the last result already seen;
+        the RPC continues after it in ``(distance, id)`` order. ``depth`` is
+        how many results precede the page, which sizes the quantized shortlist.
+        """
         sb = await self._client.get_client()
-        with self._tracer.start_as_current_span("db.vector_search") as span:
+        stats = await filter_stats.get(self) if query.filters else None
+        plan = plan_filters(query.filters, stats)
+        rpc = self.search_backend
+        if search_params is None and not exact:
+            search_params = await calibrations.search_params(self, rpc, query)
+        with self._span("db.vector_search") as span:
+            params: Dict[str, Any] = {
+                "query_embedding": list(embedding),
+                "match_count": query.match_count,
+                "threshold": query.threshold,
+                **plan.params(query.match_count),
+                "ef_search": (search_params or {}).get("ef_search"),
+                "probes": (search_params or {}).get("probes"),
+                "after_distance": after[0] if after else None,
+                "after_id": str(after[1]) if after else None,
+            }
+            if exact:
+                params["prefilter"] = True
+            if rpc == "match_documents_reduced":
+                assert self.projection is not None
+                params["query_embedding"] = self.projection.project(embedding)
+            elif rpc == "match_documents_quantized":
+                # Shortlist by Hamming distance, rescore in full precision.
+                params["query_bits"] = bit_string(embedding)
+                params["candidate_count"] = plan.candidates(
+                    (depth + query.match_count) * QUANTIZED_OVERSAMPLE
+                )
+            span.set_attribute("db.filter.prefilter", plan.prefilter)
+            span.set_attribute("db.filter.selectivity", plan.selectivity)
+            span.set_attribute("db.rpc", rpc)
+            span.params = {"rpc": rpc, **params}
+            span.explain = lambda: self.explain_rpc(rpc, params)
             try:
-                res = await sb.rpc(
-                    "match_documents",
-                    {
-                        "query_embedding": list(embedding),
-                        "match_count": query.match_count,
-                        "filter": query.filters,
-                        "threshold": query.threshold,
-                    },
-                ).execute()
-                return [Document(**row) for row in res.data]
+                res = await sb.rpc(rpc, params).execute()
+                span.set_attribute("db.rows", len(res.data))
+                return [
+                    (
+                        Document(**row),
+                        float(row["distance"]) if row.get("distance") is not None else None,
+                    )
+                    for row in res.data
+                ]
             except Exception as exc:
                 span.record_exception(exc)
                 raise DatabaseError("vector_search failed") from exc
 
+    async def filter_stats(self) -> Optional[List[Dict[str, Any]]]:
+        """Return document counts per source for the filter planner."""
+        with self._span("db.filter_stats") as span:
+            try:
+                sb = await self._client.get_client()
+                res = await sb.rpc("document_filter_stats", {}).execute()
+                return list(res.data)
+            except Exception as exc:
+                span.record_exception(exc)
+                return None
+
     async def store_embedding(self, doc_id: UUID, embedding: Sequence[float]) -> bool:
-        with self._tracer.start_as_current_span("db.store_embedding") as span:
+        with self._span("db.store_embedding") as span:
             try:
                 tbl = await self._table("embeddings")
                 await tbl.insert(
-                    {"doc_id": str(doc_id), "embedding": list(embedding)}
+                    embedding_row(
+                        doc_id, embedding, self._quantization, self.projection
+                    )
                 ).execute()
                 return True
             except Exception as exc:
                 span.record_exception(exc)
                 return False
 
-    async def similarity_query(
-        self, embedding: Sequence[float], top_k: int
+    async def replace_embedding(self, doc_id: UUID, embedding: Sequence[float]) -> bool:
+        """Swap a document's embedding row in one transaction."""
+        with self._span("db.replace_embedding") as span:
+            try:
+                sb = await self._client.get_client()
+                row = embedding_row(doc_id, embedding, self._quantization, self.projection)
+                await sb.rpc("replace_embedding", {"embedding_row": row}).execute()
+                return True
+            except Exception as exc:
+                span.record_exception(exc)
+                return False
+
+    async def get_embeddings(self, doc_ids: Sequence[UUID]) -> Dict[str, List[float]]:
+        """Return stored embeddings keyed by document id string."""
+        if not doc_ids:
+            return {}
+        with self._span("db.get_embeddings") as span:
+            span.set_attribute("db.rows", len(doc_ids))
+            try:
+                tbl = await self._table("embeddings")
+                res = (
+                    await tbl.select("doc_id,embedding")
+                    .in_("doc_id", [str(d) for d in doc_ids])
+                    .execute()
+                )
+                return {
+                    str(row["doc_id"]): _as_floats(row["embedding"]) for row in res.data
+                }
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("get_embeddings failed") from exc
+
+    async def sample_embeddings(self, count: int) -> List[List[float]]:
+        sb = await self._client.get_client()
+        with self._span("db.sample_embeddings", sample_size=count) as span:
+            try:
+                res = await sb.rpc("sample_embeddings", {"sample_size": count}).execute()
+                span.set_attribute("db.rows", len(res.data))
+                return [_as_floats(row["embedding"]) for row in res.data]
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("sample_embeddings failed") from exc
+
+    async def list_embeddings(
+        self, after: Optional[str] = None, limit: int = 500, stale_for: Optional[int] = None
     ) -> List[Dict[str, Any]]:
+        """Page through stored embeddings in ``doc_id`` order.
+
+        With ``stale_for``, only rows whose reduced vector was not computed
+        with that projection version are returned.
+        """
+        with self._span("db.list_embeddings", after=after, limit=limit) as span:
+            try:
+                tbl = await self._table("embeddings")
+                req = tbl.select("doc_id,embedding")
+                if after is not None:
+                    req = req.gt("doc_id", after)
+                if stale_for is not None:
+                    req = req.or_(
+                        f"projection_version.is.null,projection_version.neq.{stale_for}"
+                    )
+                res = await req.order("doc_id").limit(limit).execute()
+                span.set_attribute("db.rows", len(res.data))
+                return [
+                    {"doc_id": row["doc_id"], "embedding": _as_floats(row["embedding"])}
+                    for row in res.data
+                ]
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("list_embeddings failed") from exc
+
+    async def update_reduced_embeddings(
+        self, updates: Sequence[Tuple[UUID | str, Sequence[float]]], version: int
+    ) -> int:
+        """Set ``embedding_reduced`` for many rows in one call; return rows updated.
+
+        ``version`` is the projection version recorded on each updated row.
+        """
         sb = await self._client.get_client()
-        with self._tracer.start_as_current_span("db.similarity_query") as span:
+        with self._span("db.update_reduced_embeddings", rows=len(updates)) as span:
             try:
+                payload = [
+                    {"doc_id": str(doc_id), "embedding": list(reduced)}
+                    for doc_id, reduced in updates
+                ]
                 res = await sb.rpc(
-                    "match_embeddings",
-                    {"query_embedding": list(embedding), "match_count": top_k},
+                    "update_reduced_embeddings",
+                    {"updates": payload, "reduced_version": version},
+                ).execute()
+                return int(res.data or 0)
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("update_reduced_embeddings failed") from exc
+
+    async def get_projection(
+        self, model: str, active: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        with self._span("db.get_projection") as span:
+            try:
+                tbl = await self._table("embedding_projections")
+                res = await (
+                    tbl.select("*").eq("model", model).eq("active", active).limit(1).execute()
+                )
+                return res.data[0] if res.data else None
+            except Exception as exc:
+                span.record_exception(exc)
+                return None
+
+    async def get_projection_version(self, model: str) -> Optional[int]:
+        """The version of the active projection of ``model``, if there is one."""
+        with self._span("db.get_projection_version") as span:
+            try:
+                tbl = await self._table("embedding_projections")
+                res = await (
+                    tbl.select("version").eq("model", model).eq("active", True).limit(1).execute()
+                )
+                return int(res.data[0]["version"]) if res.data else None
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("get_projection_version failed") from exc
+
+    async def store_projection(self, projection: Projection, active: bool = True) -> bool:
+        with self._span("db.store_projection") as span:
+            try:
+                tbl = await self._table("embedding_projections")
+                row = {**projection.to_row(), "active": active}
+                await tbl.upsert(row, on_conflict="model,active").execute()
+                return True
+            except Exception as exc:
+                span.record_exception(exc)
+                return False
+
+    async def activate_projection(self, model: str) -> bool:
+        """Replace the active projection of ``model`` with its inactive one."""
+        sb = await self._client.get_client()
+        with self._span("db.activate_projection") as span:
+            try:
+                res = await sb.rpc("activate_projection", {"projection_model": model}).execute()
+                return bool(res.data)
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("activate_projection failed") from exc
+
+    async def get_calibration(self, backend: str) -> Optional[Dict[str, Any]]:
+        with self._span("db.get_calibration") as span:
+            try:
+                tbl = await self._table("ann_calibrations")
+                res = await tbl.select("*").eq("backend", backend).limit(1).execute()
+                return res.data[0] if res.data else None
+            except Exception as exc:
+                span.record_exception(exc)
+                return None
+
+    async def store_calibration(self, row: Dict[str, Any]) -> bool:
+        with self._span("db.store_calibration") as span:
+            try:
+                tbl = await self._table("ann_calibrations")
+                await tbl.upsert(row, on_conflict="backend").execute()
+                return True
+            except Exception as exc:
+                span.record_exception(exc)
+                return False
+
+    async def list_chunk_embeddings(self, doc_id: UUID) -> List[Dict[str, Any]]:
+        """Return the stored chunk rows of ``doc_id`` with float vectors."""
+        with self._span("db.list_chunk_embeddings") as span:
+            try:
+                tbl = await self._table("document_chunks")
+                res = (
+                    await tbl.select("chunk_index,chunk_hash,embedding")
+                    .eq("doc_id", str(doc_id))
+                    .execute()
+                )
+                return [{**row, "embedding": _as_floats(row["embedding"])} for row in res.data]
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("list_chunk_embeddings failed") from exc
+
+    async def upsert_chunk_embeddings(
+        self, doc_id: UUID, rows: Sequence[Dict[str, Any]]
+    ) -> None:
+        if not rows:
+            return
+        with self._span("db.upsert_chunk_embeddings") as span:
+            span.set_attribute("db.rows", len(rows))
+            try:
+                tbl = await self._table("document_chunks")
+                await tbl.upsert(
+                    [
+                        {**row, "doc_id": str(doc_id), "embedding": list(row["embedding"])}
+                        for row in rows
+                    ],
+                    on_conflict="doc_id,chunk_index",
                 ).execute()
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("upsert_chunk_embeddings failed") from exc
+
+    async def delete_chunk_embeddings(self, doc_id: UUID, from_index: int = 0) -> None:
+        with self._span("db.delete_chunk_embeddings") as span:
+            try:
+                tbl = await self._table("document_chunks")
+                await (
+                    tbl.delete()
+                    .eq("doc_id", str(doc_id))
+                    .gte("chunk_index", from_index)
+                    .execute()
+                )
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("delete_chunk_embeddings failed") from exc
+
+    async def get_content_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        with self._span("db.get_content_hash") as span:
+            try:
+                tbl = await self._table("content_hashes")
+                res = (
+                    await tbl.select("*")
+                    .eq("content_hash", content_hash)
+                    .limit(1)
+                    .execute()
+                )
+                return res.data[0] if res.data else None
+            except Exception as exc:
+                span.record_exception(exc)
+                return None
+
+    async def store_content_hash(
+        self, content_hash: str, doc_id: UUID, embedding: Sequence[float]
+    ) -> bool:
+        with self._span("db.store_content_hash") as span:
+            try:
+                tbl = await self._table("content_hashes")
+                await tbl.upsert(
+                    {
+                        "content_hash": content_hash,
+                        "doc_id": str(doc_id),
+                        "embedding": list(embedding),
+                    },
+                    on_conflict="content_hash",
+                    ignore_duplicates=True,
+                ).execute()
+                return True
+            except Exception as exc:
+                span.record_exception(exc)
+                return False
+
+    async def list_content_hashes(
+        self, after: Optional[str] = None, limit: int = 1000
+    ) -> List[str]:
+        """Page through indexed content hashes in hash order."""
+        with self._span("db.list_content_hashes", after=after, limit=limit) as span:
+            try:
+                tbl = await self._table("content_hashes")
+                req = tbl.select("content_hash")
+                if after is not None:
+                    req = req.gt("content_hash", after)
+                res = await req.order("content_hash").limit(limit).execute()
+                span.set_attribute("db.rows", len(res.data))
+                return [row["content_hash"] for row in res.data]
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("list_content_hashes failed") from exc
+
+    async def similarity_query(
+        self, embedding: Sequence[float], top_k: int
+    ) -> List[Dict[str, Any]]:
+        sb = await self._client.get_client()
+        params = {"query_embedding": list(embedding), "match_count": top_k}
+        with self._span("db.similarity_query", **params) as span:
+            span.explain = lambda: self.explain_rpc("match_embeddings", params)
+            try:
+                res = await sb.rpc("match_embeddings", params).execute()
+                span.set_attribute("db.rows", len(res.data))
                 return res.data
             except Exception as exc:
                 span.record_exception(exc)
                 raise DatabaseError("similarity_query failed") from exc
 
+    async def vector_index_stats(self) -> List[Dict[str, Any]]:
+        """Return ivfflat and HNSW indexes with their options and table sizes."""
+        with self._span("db.vector_index_stats") as span:
+            try:
+                sb = await self._client.get_client()
+                res = await sb.rpc("vector_index_stats", {}).execute()
+                span.set_attribute("db.rows", len(res.data))
+                return list(res.data)
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("vector_index_stats failed") from exc
+
+    async def index_build_progress(self) -> List[Dict[str, Any]]:
+        """Return progress rows for index builds currently running."""
+        with self._span("db.index_build_progress") as span:
+            try:
+                sb = await self._client.get_client()
+                res = await sb.rpc("vector_index_build_progress", {}).execute()
+                return list(res.data)
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("index_build_progress failed") from exc
+
+    async def run_index_maintenance(self, operation: Dict[str, Any]) -> None:
+        """Run one index maintenance operation outside a transaction block.
+
+        ``operation`` holds the action and index names; the database function
+        builds and validates the DDL statement.
+        """
+        with self._span(
+            "db.run_index_maintenance",
+            action=operation["action"],
+            index=operation["index_name"],
+        ) as span:
+            try:
+                sb = await self._client.get_client()
+                await sb.rpc("run_index_maintenance", operation).execute()
+            except Exception as exc:
+                span.record_exception(exc)
+                raise DatabaseError("run_index_maintenance failed") from exc
+
+    async def record_index_build(self, index_name: str, table_rows: int) -> bool:
+        with self._span("db.record_index_build") as span:
+            try:
+                tbl = await self._table("vector_index_builds")
+                await tbl.upsert(
+                    {"index_name": index_name, "table_rows": table_rows},
+                    on_conflict="index_name",
+                ).execute()
+                return True
+            except Exception as exc:
+                span.record_exception(exc)
+                return False
+
+    async def explain_rpc(self, name: str, params: Dict[str, Any]) -> Optional[str]:
+        """Return ``EXPLAIN (ANALYZE, BUFFERS)`` output for an RPC call.
+
+        The call is executed again. PostgREST must run with
+        ``db-plan-enabled``; returns None when the plan is unavailable.
+        """
+        try:
+            sb = await self._client.get_client()
+            builder = sb.rpc(name, params)
+            builder.request.headers["Accept"] = (
+                "application/vnd.pgrst.plan+text; options=analyze|buffers"
+            )
+            return await AsyncExplainRequestBuilder(builder.request).execute()
+        except Exception:  # noqa: BLE001
+            return None
+
     async def transaction(self, func: Callable[[AsyncClient], Awaitable[Any]]) -> Any:
         sb = await self._client.get_client()
-        with self._tracer.start_as_current_span("db.transaction") as span:
+        with self._span("db.transaction") as span:
             async with sb.postgrest.transaction() as tx:  # type: ignore[attr-defined]
                 try:
                     return await func(tx)
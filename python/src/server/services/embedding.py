@@ -1,14 +1,32 @@
 from __future__ import annotations
 
 import asyncio
-import hashlib
 import os
-from typing import List
-
-from tenacity import AsyncRetrying, stop_after_attempt, wait_fixed
+from typing import Dict, List, Optional
 
+from .embedding_cache import (
+    EMBEDDING_CACHE_MEMORY_SIZE,
+    EMBEDDING_CACHE_PATH,
+    EmbeddingCache,
+)
+from .embedding_client import (
+    EMBEDDING_API_URL,
+    EMBEDDING_MODEL,
+    EmbeddingClientError,
+    get_embedding_client,
+)
+from .offline_embedding import (
+    embed_offline,
+    offline_model_name,
+    warm_offline_embedding,
+)
 
 EMBEDDING_API_KEY = os.getenv("EMBEDDING_API_KEY", "")
+# "remote" uses the TEI/vLLM server at EMBEDDING_API_URL, "ngram" the
+# offline hashed n-gram model.
+EMBEDDING_PROVIDER = os.getenv(
+    "EMBEDDING_PROVIDER", "remote" if EMBEDDING_API_URL else "ngram"
+)
 
 
 class EmbeddingProcessingError(Exception):
@@ -19,17 +37,68 @@ class EmbeddingGenerationError(EmbeddingProcessingError):
     """Raised when embedding generation fails."""
 
 
-async def _hash_text(text: str) -> List[float]:
-    digest = hashlib.sha256(text.encode()).digest()
-    return [b / 255 for b in digest[:8]]
+_cache: Optional[EmbeddingCache] = None
+
+
+def embedding_model() -> str:
+    """Name of the model producing vectors; cache entries are scoped to it."""
+    if EMBEDDING_PROVIDER == "remote":
+        return EMBEDDING_MODEL
+    return offline_model_name()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache(
+            embedding_model(), EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MEMORY_SIZE
+        )
+    return _cache
+
+
+async def warm_up_embedding() -> None:
+    """Open the cache and embed a probe, bypassing the cache, so the first
+    real request finds connections and workers already running."""
+    await asyncio.to_thread(get_embedding_cache)
+    if EMBEDDING_PROVIDER == "ngram":
+        await warm_offline_embedding()
+    await _compute_embeddings(["warm-up probe"])
 
 
 async def generate_embedding(text: str) -> List[float]:
-    if not text:
+    return (await generate_embeddings([text]))[0]
+
+
+async def generate_embeddings(texts: List[str]) -> List[List[float]]:
+    """Embed ``texts`` in one call, computing only uncached entries."""
+    if not texts or not all(texts):
         raise EmbeddingProcessingError("text must not be empty")
-    async for attempt in AsyncRetrying(stop=stop_after_attempt(3), wait=wait_fixed(1)):
-        with attempt:
-            try:
-                return await asyncio.wait_for(_hash_text(text), timeout=5.0)
-            except Exception as exc:  # noqa: BLE001
-                raise EmbeddingGenerationError("embedding failed") from exc
+    cache = get_embedding_cache()
+    found = await asyncio.gather(*(cache.get(text) for text in texts))
+    missing: Dict[str, List[int]] = {}
+    for i, vector in enumerate(found):
+        if vector is None:
+            missing.setdefault(texts[i], []).append(i)
+    if missing:
+        computed = await _compute_embeddings(list(missing))
+        for text, vector in zip(missing, computed):
+            await cache.put(text, vector)
+            for i in missing[text]:
+                found[i] = vector
+    return [vector for vector in found if vector is not None]
+
+
+async def _compute_embeddings(texts: List[str]) -> List[List[float]]:
+    if EMBEDDING_PROVIDER == "ngram":
+        try:
+            return await embed_offline(texts)
+        except Exception as exc:  # noqa: BLE001
+            raise EmbeddingGenerationError("embedding failed") from exc
+    client = get_embedding_client()
+    if client is None:
+        raise EmbeddingGenerationError("EMBEDDING_API_URL is not configured")
+    # The batching client groups these calls and retries transient failures.
+    try:
+        return list(await asyncio.gather(*(client.embed(text) for text in texts)))
+    except EmbeddingClientError as exc:
+        raise EmbeddingGenerationError("embedding failed") from exc
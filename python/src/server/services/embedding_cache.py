@@ -0,0 +1,180 @@
+"""Two-tier cache of embeddings keyed by model and normalized text hash.
+
+The first tier is an in-process LRU of float32 arrays. The second is a SQLite
+file in WAL mode holding float32 vectors, so entries survive restarts and are
+shared by all workers on a node. The disk tier keeps at most
+``EMBEDDING_CACHE_DISK_ROWS`` rows and evicts the oldest writes first. The
+model is part of every key, so processes configured with different models
+can share the file; rows of a model nobody uses any more age out through
+that eviction.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+from prometheus_client import Counter
+
+from src.common.metrics import shared_metric
+
+from .content_index import content_hash
+
+
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "archon-embedding-cache.sqlite"),
+)
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "10000"))
+EMBEDDING_CACHE_DISK_ROWS = int(os.getenv("EMBEDDING_CACHE_DISK_ROWS", "100000"))
+# Eviction trims the disk tier to this fraction of its limit, so it does not
+# run again on the very next write.
+DISK_TRIM_RATIO = 0.9
+
+CACHE_LOOKUPS = shared_metric(
+    Counter,
+    "embedding_cache_lookups_total",
+    "Embedding cache lookups by tier and outcome",
+    ["tier", "result"],
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model TEXT NOT NULL,
+    key TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (model, key)
+)
+"""
+
+
+class EmbeddingCache:
+    """LRU in memory in front of an optional SQLite store."""
+
+    def __init__(
+        self,
+        model: str,
+        path: str = "",
+        memory_size: int = 10000,
+        disk_rows: int = EMBEDDING_CACHE_DISK_ROWS,
+    ) -> None:
+        self.model = model
+        self.memory_size = memory_size
+        self.disk_rows = disk_rows
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        # Rows on disk as last counted plus this worker's inserts since.
+        self._disk_count = 0
+        self._lock = threading.Lock()
+        if path:
+            try:
+                self._db = self._open(path)
+            except sqlite3.Error as exc:
+                logger.warning("embedding disk cache unavailable", error=str(exc))
+
+    def _open(self, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(_SCHEMA)
+        conn.commit()
+        self._disk_count = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        return conn
+
+    @staticmethod
+    def key(text: str) -> str:
+        return content_hash(text)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[np.ndarray]:
+        assert self._db is not None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT vector FROM embedding_cache WHERE model = ? AND key = ?",
+                (self.model, key),
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def _write(self, key: str, vector: np.ndarray) -> None:
+        assert self._db is not None
+        with self._lock:
+            # A key maps to one vector per model, so an existing row is kept.
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO embedding_cache (model, key, vector) "
+                "VALUES (?, ?, ?)",
+                (self.model, key, vector.tobytes()),
+            ).rowcount
+            self._disk_count += inserted
+            if self._disk_count > self.disk_rows:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        """Delete the oldest rows down to ``DISK_TRIM_RATIO`` of the limit."""
+        assert self._db is not None
+        count = self._db.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        excess = count - int(self.disk_rows * DISK_TRIM_RATIO)
+        if count > self.disk_rows and excess > 0:
+            self._db.execute(
+                "DELETE FROM embedding_cache WHERE rowid IN "
+                "(SELECT rowid FROM embedding_cache ORDER BY rowid LIMIT ?)",
+                (excess,),
+            )
+            count -= excess
+        self._disk_count = count
+
+    async def get(self, text: str) -> Optional[List[float]]:
+        """Return a copy of the cached vector for ``text`` or ``None``."""
+        key = self.key(text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            CACHE_LOOKUPS.labels("memory", "hit").inc()
+            return vector.tolist()
+        CACHE_LOOKUPS.labels("memory", "miss").inc()
+        if self._db is None:
+            return None
+        try:
+            vector = await asyncio.to_thread(self._read, key)
+        except sqlite3.Error as exc:
+            logger.warning("embedding disk cache read failed", error=str(exc))
+            return None
+        CACHE_LOOKUPS.labels("disk", "hit" if vector is not None else "miss").inc()
+        if vector is None:
+            return None
+        self._remember(key, vector)
+        return vector.tolist()
+
+    async def put(self, text: str, vector: Sequence[float]) -> None:
+        """Store ``vector`` for ``text`` in both tiers."""
+        key = self.key(text)
+        stored = np.array(vector, dtype=np.float32)
+        self._remember(key, stored)
+        if self._db is None:
+            return
+        try:
+            await asyncio.to_thread(self._write, key, stored)
+        except sqlite3.Error as exc:
+            logger.warning("embedding disk cache write failed", error=str(exc))
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+__all__ = ["EmbeddingCache"]
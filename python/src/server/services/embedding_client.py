@@ -0,0 +1,249 @@
+"""Micro-batching client for OpenAI/TEI-compatible embedding servers.
+
+Concurrent :meth:`EmbeddingClient.embed` calls are queued and sent as one
+``POST /v1/embeddings`` request once ``max_batch`` texts are waiting or the
+oldest has waited ``max_wait`` seconds. Results are matched back to callers
+by index. A batch the server rejects as invalid input (400/413/422) is
+bisected so that one bad input only fails its own caller; any other failure
+fails the whole batch. Requests pass through a shared
+:class:`~.rate_limiter.ProviderRateLimiter`; retries honour ``Retry-After``
+and back off with jitter so workers do not retry in lockstep.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+from .rate_limiter import ProviderRateLimiter, bucket_store, estimate_tokens
+
+
+EMBEDDING_API_URL = os.getenv("EMBEDDING_API_URL", "")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "default-model")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_BATCH_WAIT = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5")) / 1000
+EMBEDDING_MAX_INFLIGHT = int(os.getenv("EMBEDDING_MAX_INFLIGHT", "4"))
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "30"))
+# Used for a 429 without a usable Retry-After header.
+DEFAULT_RETRY_AFTER = 1.0
+MAX_RETRY_AFTER = 60.0
+# Statuses blamed on the inputs of a batch rather than the server.
+INPUT_ERROR_STATUSES = frozenset({400, 413, 422})
+
+
+class EmbeddingClientError(Exception):
+    """Raised when the embedding server cannot embed an input."""
+
+
+@dataclass
+class _Pending:
+    text: str
+    future: asyncio.Future[List[float]]
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code == 429 or code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+def _input_error(exc: BaseException) -> bool:
+    return (
+        isinstance(exc, httpx.HTTPStatusError)
+        and exc.response.status_code in INPUT_ERROR_STATUSES
+    )
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds requested by a 429 response, or ``None`` for other errors."""
+    if not isinstance(exc, httpx.HTTPStatusError) or exc.response.status_code != 429:
+        return None
+    value = exc.response.headers.get("Retry-After", "")
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+            seconds = (when - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            seconds = DEFAULT_RETRY_AFTER
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class EmbeddingClient:
+    """Gather concurrent embedding requests into size/time bounded batches."""
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        model: str = EMBEDDING_MODEL,
+        api_key: str = "",
+        max_batch: int = EMBEDDING_BATCH_SIZE,
+        max_wait: float = EMBEDDING_BATCH_WAIT,
+        max_inflight: int = EMBEDDING_MAX_INFLIGHT,
+        timeout: float = EMBEDDING_TIMEOUT,
+        attempts: int = 3,
+        client: Optional[httpx.AsyncClient] = None,
+        limiter: Optional[ProviderRateLimiter] = None,
+    ) -> None:
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._http = client or httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_inflight, max_keepalive_connections=max_inflight
+            ),
+        )
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.attempts = attempts
+        self.limiter = limiter or ProviderRateLimiter(bucket_store())
+        self._queue: asyncio.Queue[_Pending] = asyncio.Queue()
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self._batcher: Optional[asyncio.Task[None]] = None
+        self._sends: set[asyncio.Task[None]] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """Return the embedding for ``text``, batched with concurrent calls."""
+        if self._batcher is None or self._batcher.done():
+            self._batcher = asyncio.get_running_loop().create_task(self._run())
+        future: asyncio.Future[List[float]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        await self._queue.put(_Pending(text, future))
+        return await future
+
+    async def _collect(self) -> List[_Pending]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            await self._inflight.acquire()
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _send(self, batch: List[_Pending]) -> None:
+        try:
+            await self._resolve([p for p in batch if not p.future.done()])
+        finally:
+            self._inflight.release()
+
+    async def _post(self, texts: List[str]) -> List[List[float]]:
+        tokens = sum(estimate_tokens(text) for text in texts)
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.limiter.acquire(tokens)
+            try:
+                res = await self._http.post(
+                    "/v1/embeddings", json={"input": texts, "model": self.model}
+                )
+                res.raise_for_status()
+                break
+            except Exception as exc:
+                if (
+                    not _retryable(exc)
+                    or attempt >= self.attempts
+                    or not await self.limiter.allow_retry()
+                ):
+                    raise
+                retry_after = _retry_after(exc)
+                if retry_after is not None:
+                    # Pauses every caller sharing the limiter, not just this one.
+                    await self.limiter.throttled(retry_after)
+                else:
+                    await asyncio.sleep(random.uniform(0, min(2.0, 0.1 * 2**attempt)))
+        body: Dict[str, Any] = res.json()
+        rows = sorted(body["data"], key=lambda row: row.get("index", 0))
+        if len(rows) != len(texts):
+            raise EmbeddingClientError("embedding response size mismatch")
+        return [[float(x) for x in row["embedding"]] for row in rows]
+
+    async def _resolve(self, batch: List[_Pending]) -> None:
+        if not batch:
+            return
+        try:
+            vectors = await self._post([p.text for p in batch])
+        except Exception as exc:  # noqa: BLE001
+            if len(batch) == 1 or not _input_error(exc):
+                logger.warning(
+                    "embedding request failed", size=len(batch), error=str(exc)
+                )
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(
+                            EmbeddingClientError("embedding request failed")
+                        )
+                return
+            # Bisect so a single bad input does not fail the whole batch.
+            mid = len(batch) // 2
+            await asyncio.gather(self._resolve(batch[:mid]), self._resolve(batch[mid:]))
+            return
+        for pending, vector in zip(batch, vectors):
+            if not pending.future.done():
+                pending.future.set_result(vector)
+
+    async def aclose(self) -> None:
+        """Stop batching, fail queued callers and close the HTTP pool."""
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+        await asyncio.gather(*self._sends, return_exceptions=True)
+        while not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if not pending.future.done():
+                pending.future.set_exception(EmbeddingClientError("client closed"))
+        await self._http.aclose()
+
+
+_client: Optional[EmbeddingClient] = None
+
+
+def get_embedding_client() -> Optional[EmbeddingClient]:
+    """Return the shared client, or ``None`` when no server is configured."""
+    global _client
+    if _client is None and EMBEDDING_API_URL:
+        _client = EmbeddingClient(
+            EMBEDDING_API_URL, api_key=os.getenv("EMBEDDING_API_KEY", "")
+        )
+    return _client
+
+
+async def close_embedding_client() -> None:
+    """Close the shared client, e.g. on application shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+__all__ = [
+    "EmbeddingClient",
+    "EmbeddingClientError",
+    "close_embedding_client",
+    "get_embedding_client",
+]
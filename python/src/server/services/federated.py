@@ -0,0 +1,184 @@
+"""Federated search across several projects.
+
+One query is run against each project's filter scope concurrently, at most
+``FEDERATED_CONCURRENCY`` at a time, each returning its own top-k. A
+project that errors or exceeds its timeout is reported and left out, so
+the merged results are partial rather than failing the whole search.
+
+Similarity ranges differ between projects (a small, focused project scores
+higher across the board), so scores are normalized per project before
+merging: ``minmax`` maps each project's results onto [0, 1], ``zscore``
+standardizes them, and ``none`` keeps raw cosine similarity. Each project's
+list is already in score order, so merging is a k-way heap merge.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+from uuid import UUID
+
+from loguru import logger
+
+from ..models.document import Document
+from ..models.query import Query
+from .database import DatabaseService
+from .mmr import diversified_search
+
+
+FEDERATED_CONCURRENCY = int(os.getenv("FEDERATED_CONCURRENCY", "4"))
+FEDERATED_TIMEOUT_MS = float(os.getenv("FEDERATED_TIMEOUT_MS", "2000"))
+FEDERATED_MAX_PROJECTS = int(os.getenv("FEDERATED_MAX_PROJECTS", "50"))
+
+Normalization = Literal["minmax", "zscore", "none"]
+
+
+@dataclass
+class FederatedHit:
+    project_id: str
+    score: float  # normalized, comparable across projects
+    similarity: Optional[float]  # raw cosine similarity when the backend reports it
+    document: Document
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "project_id": self.project_id,
+            "score": round(self.score, 6),
+            "similarity": self.similarity,
+            "document": self.document.model_dump(mode="json"),
+        }
+
+
+@dataclass
+class ProjectOutcome:
+    project_id: str
+    status: Literal["ok", "timeout", "error"]
+    count: int = 0
+    elapsed_ms: float = 0.0
+
+
+@dataclass
+class FederatedResult:
+    hits: List[FederatedHit] = field(default_factory=list)
+    projects: List[ProjectOutcome] = field(default_factory=list)
+
+    @property
+    def partial(self) -> bool:
+        return any(p.status != "ok" for p in self.projects)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "results": [hit.to_dict() for hit in self.hits],
+            "projects": [vars(p) for p in self.projects],
+            "partial": self.partial,
+        }
+
+
+def normalize(raw: Sequence[float], method: Normalization) -> List[float]:
+    """Normalize one project's scores."""
+    if method == "none" or not raw:
+        return list(raw)
+    if method == "minmax":
+        low, high = min(raw), max(raw)
+        span = high - low
+        return [(s - low) / span if span else 1.0 for s in raw]
+    mean = statistics.fmean(raw)
+    spread = statistics.pstdev(raw)
+    return [(s - mean) / spread if spread else 0.0 for s in raw]
+
+
+async def _project_search(
+    db: DatabaseService, embedding: Sequence[float], query: Query
+) -> List[Tuple[Document, Optional[float]]]:
+    if query.mmr_lambda is not None:
+        # MMR order is not by similarity, so there is no distance to report.
+        return [(doc, None) for doc in await diversified_search(db, embedding, query)]
+    return await db.vector_search_scored(embedding, query)
+
+
+def _hits(
+    project_id: str,
+    scored: List[Tuple[Document, Optional[float]]],
+    method: Normalization,
+) -> List[FederatedHit]:
+    distances = [distance for _, distance in scored]
+    similarities: List[Optional[float]] = [None] * len(scored)
+    if all(d is not None for d in distances):
+        raw = [1 - float(d) for d in distances]  # type: ignore[arg-type]
+        similarities = list(raw)
+    else:
+        # Without similarities, score by rank within the project.
+        raw = [1 - rank / len(scored) for rank in range(len(scored))]
+    scores = normalize(raw, method)
+    return [
+        FederatedHit(project_id, score, similarity, doc)
+        for (doc, _), score, similarity in zip(scored, scores, similarities)
+    ]
+
+
+async def federated_search(
+    db: DatabaseService,
+    embedding: Sequence[float],
+    query: Query,
+    project_ids: Sequence[UUID],
+    per_project_k: Optional[int] = None,
+    timeout_ms: float = FEDERATED_TIMEOUT_MS,
+    concurrency: int = FEDERATED_CONCURRENCY,
+    normalization: Normalization = "minmax",
+) -> FederatedResult:
+    """Search every project and merge the top ``query.match_count`` hits."""
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    per_query = query.model_copy(update={"match_count": per_project_k or query.match_count})
+
+    async def run(project_id: str) -> Tuple[ProjectOutcome, List[FederatedHit]]:
+        scoped = per_query.model_copy(
+            update={"filters": {**query.filters, "project_id": project_id}}
+        )
+        async with semaphore:
+            # The timeout covers the search itself, not the wait for a slot.
+            start = time.perf_counter()
+            try:
+                scored = await asyncio.wait_for(
+                    _project_search(db, embedding, scoped), timeout_ms / 1000
+                )
+                status: Literal["ok", "timeout", "error"] = "ok"
+            except asyncio.TimeoutError:
+                scored, status = [], "timeout"
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(
+                    "federated project search failed", project_id=project_id, error=str(exc)
+                )
+                scored, status = [], "error"
+            elapsed = round((time.perf_counter() - start) * 1000, 1)
+        if status == "timeout":
+            logger.warning("federated project search timed out", project_id=project_id)
+        outcome = ProjectOutcome(project_id, status, len(scored), elapsed)
+        return outcome, _hits(project_id, scored, normalization)
+
+    unique = list(dict.fromkeys(str(pid) for pid in project_ids))
+    runs = await asyncio.gather(*(run(pid) for pid in unique))
+    # Each list is in descending score order; ties keep project order.
+    merged = heapq.merge(*(hits for _, hits in runs), key=lambda hit: -hit.score)
+    return FederatedResult(
+        hits=list(itertools.islice(merged, query.match_count)),
+        projects=[outcome for outcome, _ in runs],
+    )
+
+
+__all__ = [
+    "FEDERATED_CONCURRENCY",
+    "FEDERATED_MAX_PROJECTS",
+    "FEDERATED_TIMEOUT_MS",
+    "FederatedHit",
+    "FederatedResult",
+    "Normalization",
+    "ProjectOutcome",
+    "federated_search",
+    "normalize",
+]
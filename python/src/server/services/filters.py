@@ -0,0 +1,205 @@
+"""Compile search filters into indexed predicates and plan how to apply them.
+
+``source_id`` and ``project_id`` conditions become UUID arrays matched
+against ``documents.source_id`` (b-tree) and ``sources.project_id``.
+Metadata conditions become one SQL/JSON path predicate tested with ``@@``,
+which the ``jsonb_path_ops`` GIN index on ``documents.metadata`` serves for
+equality and membership.
+
+Every search RPC supports two strategies. Pre-filtering narrows documents
+through those indexes and ranks the survivors exactly; it wins when few
+rows match. Post-filtering scans the vector index and drops non-matching
+candidates, so it over-fetches by the inverse of the estimated selectivity
+to still return ``match_count`` rows. Selectivity comes from per-source
+document counts for column conditions and fixed planner defaults for
+metadata conditions.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from ..models.query import RANGE_OPERATORS, FilterCondition, parse_filters
+
+
+FILTER_PREFILTER_ROWS = int(os.getenv("FILTER_PREFILTER_ROWS", "20000"))
+FILTER_MAX_CANDIDATES = int(os.getenv("FILTER_MAX_CANDIDATES", "2000"))
+FILTER_STATS_REFRESH_SECONDS = float(os.getenv("FILTER_STATS_REFRESH_SECONDS", "300"))
+
+# Planner defaults for metadata conditions, which have no statistics.
+EQ_SELECTIVITY = 0.1
+RANGE_SELECTIVITY = 1 / 3
+
+_JSONPATH_OPS = {"eq": "==", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _jsonpath(condition: FilterCondition) -> str:
+    # JSON string and number literals are valid SQL/JSON path literals.
+    path = "$" + "".join(f".{json.dumps(key)}" for key in condition.path)
+    if condition.op == "in":
+        return "(" + " || ".join(f"{path} == {json.dumps(v)}" for v in condition.value) + ")"
+    return f"{path} {_JSONPATH_OPS[condition.op]} {json.dumps(condition.value)}"
+
+
+@dataclass
+class CompiledFilter:
+    """RPC arguments for a parsed filter; ``None`` leaves a dimension open."""
+
+    source_ids: Optional[List[str]] = None
+    project_ids: Optional[List[str]] = None
+    metadata_match: Optional[str] = None
+
+    def params(self) -> Dict[str, Any]:
+        return {
+            "source_ids": self.source_ids,
+            "project_ids": self.project_ids,
+            "metadata_match": self.metadata_match,
+        }
+
+
+def compile_filters(conditions: Sequence[FilterCondition]) -> CompiledFilter:
+    """Turn conditions into RPC arguments; repeated columns intersect."""
+    columns: Dict[str, Optional[Set[str]]] = {"source_id": None, "project_id": None}
+    predicates: List[str] = []
+    for condition in conditions:
+        if condition.is_column:
+            ids = set(condition.value) if condition.op == "in" else {condition.value}
+            current = columns[condition.field]
+            columns[condition.field] = ids if current is None else current & ids
+        else:
+            predicates.append(_jsonpath(condition))
+    sources, projects = columns["source_id"], columns["project_id"]
+    return CompiledFilter(
+        source_ids=None if sources is None else sorted(sources),
+        project_ids=None if projects is None else sorted(projects),
+        metadata_match=" && ".join(predicates) or None,
+    )
+
+
+@dataclass
+class FilterStats:
+    """Document counts per source, with the project each source belongs to."""
+
+    sources: Dict[str, int] = field(default_factory=dict)
+    projects: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.sources.values())
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]]) -> "FilterStats":
+        stats = cls()
+        for row in rows:
+            source = str(row["source_id"])
+            stats.sources[source] = int(row["documents"])
+            stats.projects[source] = str(row["project_id"])
+        return stats
+
+
+def estimate_selectivity(
+    conditions: Sequence[FilterCondition], stats: Optional[FilterStats]
+) -> float:
+    """Estimated fraction of documents matching all conditions."""
+    compiled = compile_filters(conditions)
+    exact = stats is not None and stats.total > 0
+    selectivity = 1.0
+    if exact and (compiled.source_ids is not None or compiled.project_ids is not None):
+        assert stats is not None
+        matching = sum(
+            count
+            for source, count in stats.sources.items()
+            if (compiled.source_ids is None or source in compiled.source_ids)
+            and (compiled.project_ids is None or stats.projects[source] in compiled.project_ids)
+        )
+        selectivity = matching / stats.total
+    for condition in conditions:
+        if condition.is_column and exact:
+            continue
+        if condition.op in RANGE_OPERATORS:
+            selectivity *= RANGE_SELECTIVITY
+        else:
+            count = len(condition.value) if condition.op == "in" else 1
+            selectivity *= min(1.0, count * EQ_SELECTIVITY)
+    return selectivity
+
+
+@dataclass
+class FilterPlan:
+    compiled: CompiledFilter
+    selectivity: float
+    prefilter: bool
+
+    def candidates(self, base: int) -> int:
+        """Vector-index candidates needed for ``base`` rows after filtering."""
+        if self.prefilter or self.selectivity >= 1:
+            return base
+        if self.selectivity <= 0:
+            return max(base, FILTER_MAX_CANDIDATES)
+        return min(math.ceil(base / self.selectivity), max(base, FILTER_MAX_CANDIDATES))
+
+    def params(self, base: int) -> Dict[str, Any]:
+        return {
+            **self.compiled.params(),
+            "prefilter": self.prefilter,
+            "candidate_count": self.candidates(base),
+        }
+
+
+def plan_filters(
+    filters: Dict[str, Any],
+    stats: Optional[FilterStats],
+    prefilter_rows: int = FILTER_PREFILTER_ROWS,
+) -> FilterPlan:
+    """Choose pre- or post-filtering for ``filters``.
+
+    Without statistics the table size is unknown, so the plan post-filters
+    with over-fetching from the default selectivities.
+    """
+    conditions = parse_filters(filters)
+    compiled = compile_filters(conditions)
+    if not conditions:
+        return FilterPlan(compiled, 1.0, prefilter=False)
+    selectivity = estimate_selectivity(conditions, stats)
+    prefilter = stats is not None and selectivity * stats.total <= prefilter_rows
+    return FilterPlan(compiled, selectivity, prefilter)
+
+
+class FilterStatsRegistry:
+    """Per-process cache of the planner statistics."""
+
+    def __init__(self, refresh: float = FILTER_STATS_REFRESH_SECONDS) -> None:
+        self.refresh = refresh
+        self._entry: Optional[Tuple[float, Optional[FilterStats]]] = None
+
+    def clear(self) -> None:
+        self._entry = None
+
+    async def get(self, db: Any) -> Optional[FilterStats]:
+        """Return statistics, reloading when stale; ``None`` if unavailable."""
+        if self._entry is not None and time.monotonic() - self._entry[0] < self.refresh:
+            return self._entry[1]
+        rows = await db.filter_stats()
+        stats = FilterStats.from_rows(rows) if rows is not None else None
+        self._entry = (time.monotonic(), stats)
+        return stats
+
+
+filter_stats = FilterStatsRegistry()
+
+
+__all__ = [
+    "CompiledFilter",
+    "FilterPlan",
+    "FilterStats",
+    "FilterStatsRegistry",
+    "compile_filters",
+    "estimate_selectivity",
+    "filter_stats",
+    "plan_filters",
+]
@@ -0,0 +1,383 @@
+"""Scheduled maintenance of ivfflat and HNSW indexes.
+
+An ivfflat index partitions rows around ``lists`` centroids trained on the
+rows present when it is built. Indexes created during setup, on empty
+tables, keep the default 100 lists and untrained centroids however large
+the table grows, so recall and latency degrade. The job compares each
+vector index with its table and plans one task per index that needs work:
+
+- ``resize``: rebuild an ivfflat index with ``lists`` sized for the table
+  (rows / 1000 up to a million rows, sqrt(rows) beyond). This happens when
+  the current value is off by more than ``INDEX_LISTS_TOLERANCE``, the
+  index was never built by this job, or the table has grown by
+  ``INDEX_REBUILD_GROWTH`` since the last rebuild.
+- ``migrate``: replace an ivfflat index with HNSW when
+  ``INDEX_TARGET_METHOD=hnsw``.
+- ``reindex``: ``REINDEX INDEX CONCURRENTLY`` an invalid index.
+- ``drop``: remove an index left behind by an interrupted rebuild.
+- ``rename``: finish a rebuild that stopped after dropping the old index,
+  when the new one is the only index left.
+
+Rebuilds build a new index with ``CREATE INDEX CONCURRENTLY`` next to the
+old one, then drop the old index concurrently and rename the new one into
+place. Reads keep using the old index until the new one is valid, and
+writes are never blocked. Tables with a build already in progress are
+skipped. Progress of the running build is polled from
+``pg_stat_progress_create_index``.
+
+Steps are sent to ``run_index_maintenance`` as an ``IndexOperation``: an
+action and index names from which the database builds the statement.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Literal, Optional, Set
+
+from loguru import logger
+from prometheus_client import Counter
+
+from src.common.metrics import shared_metric
+
+from .database import DatabaseError, DatabaseService
+
+
+# Seconds between scheduled runs; 0 disables the schedule.
+INDEX_MAINTENANCE_INTERVAL = float(os.getenv("INDEX_MAINTENANCE_INTERVAL", "0"))
+INDEX_TARGET_METHOD = os.getenv("INDEX_TARGET_METHOD", "ivfflat").lower()
+INDEX_LISTS_TOLERANCE = float(os.getenv("INDEX_LISTS_TOLERANCE", "2.0"))
+INDEX_REBUILD_GROWTH = float(os.getenv("INDEX_REBUILD_GROWTH", "2.0"))
+INDEX_MIN_ROWS = int(os.getenv("INDEX_MIN_ROWS", "1000"))
+INDEX_HNSW_M = int(os.getenv("INDEX_HNSW_M", "16"))
+INDEX_HNSW_EF_CONSTRUCTION = int(os.getenv("INDEX_HNSW_EF_CONSTRUCTION", "64"))
+INDEX_PROGRESS_POLL_SECONDS = float(os.getenv("INDEX_PROGRESS_POLL_SECONDS", "5"))
+
+IVFFLAT_DEFAULT_LISTS = 100
+REBUILD_SUFFIX = "_rebuild"
+MAX_IDENTIFIER = 63
+
+INDEX_MAINTENANCE_TASKS = shared_metric(
+    Counter,
+    "vector_index_maintenance_tasks_total",
+    "Vector index maintenance tasks by kind and outcome",
+    ["kind", "status"],
+)
+
+TaskKind = Literal["resize", "migrate", "reindex", "drop", "rename"]
+IndexAction = Literal["create", "drop", "reindex", "rename"]
+TaskStatus = Literal["pending", "running", "done", "failed"]
+
+
+def recommended_lists(rows: int) -> int:
+    """pgvector's guidance for ``lists``: rows / 1000, then sqrt(rows) past 1M."""
+    if rows <= 1_000_000:
+        return max(1, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+@dataclass
+class IndexStats:
+    table_name: str
+    column_name: str
+    index_name: str
+    method: str
+    opclass: str
+    lists: Optional[int]
+    is_valid: bool
+    table_rows: int
+    index_bytes: int
+    built_rows: Optional[int] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "IndexStats":
+        return cls(
+            table_name=row["table_name"],
+            column_name=row["column_name"],
+            index_name=row["index_name"],
+            method=row["method"],
+            opclass=row["opclass"],
+            lists=row.get("lists"),
+            is_valid=bool(row.get("is_valid", True)),
+            table_rows=int(row.get("table_rows") or 0),
+            index_bytes=int(row.get("index_bytes") or 0),
+            built_rows=row.get("built_rows"),
+        )
+
+
+@dataclass
+class IndexOperation:
+    """One DDL step; ``create`` builds ``new_name`` on the column of ``index_name``."""
+
+    action: IndexAction
+    index_name: str
+    new_name: Optional[str] = None
+    method: Optional[str] = None
+    lists: Optional[int] = None
+    m: Optional[int] = None
+    ef_construction: Optional[int] = None
+
+
+@dataclass
+class MaintenanceTask:
+    kind: TaskKind
+    index_name: str
+    table_name: str
+    table_rows: int
+    reason: str
+    operations: List[IndexOperation]
+    status: TaskStatus = "pending"
+    step: int = 0
+    error: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None
+
+
+def rebuild_name(index_name: str) -> str:
+    """Name of the replacement index built next to ``index_name``."""
+    return index_name[: MAX_IDENTIFIER - len(REBUILD_SUFFIX)] + REBUILD_SUFFIX
+
+
+def swap_operations(stats: IndexStats, create: IndexOperation) -> List[IndexOperation]:
+    """Build a replacement index concurrently and swap it in by name."""
+    temp = rebuild_name(stats.index_name)
+    return [
+        IndexOperation("drop", temp),
+        create,
+        IndexOperation("drop", stats.index_name),
+        IndexOperation("rename", temp, new_name=stats.index_name),
+    ]
+
+
+def _task(
+    stats: IndexStats, kind: TaskKind, reason: str, operations: List[IndexOperation]
+) -> MaintenanceTask:
+    return MaintenanceTask(
+        kind=kind,
+        index_name=stats.index_name,
+        table_name=stats.table_name,
+        table_rows=stats.table_rows,
+        reason=reason,
+        operations=operations,
+    )
+
+
+def _leftover_task(stats: IndexStats, names: Set[str]) -> MaintenanceTask:
+    """Drop a ``_rebuild`` index, or rename it if its old index is already gone."""
+    if not stats.is_valid or any(rebuild_name(name) == stats.index_name for name in names):
+        return _task(
+            stats,
+            "drop",
+            "left behind by an interrupted rebuild",
+            [IndexOperation("drop", stats.index_name)],
+        )
+    # The old index was dropped before the rename; this is the only index left.
+    base = stats.index_name[: -len(REBUILD_SUFFIX)]
+    task = _task(
+        stats,
+        "rename",
+        "rebuild stopped before the rename",
+        [IndexOperation("rename", stats.index_name, new_name=base)],
+    )
+    task.index_name = base
+    return task
+
+
+def _resize_reason(stats: IndexStats, tolerance: float, growth: float) -> Optional[str]:
+    lists = stats.lists or IVFFLAT_DEFAULT_LISTS
+    wanted = recommended_lists(stats.table_rows)
+    if not 1 / tolerance <= lists / wanted <= tolerance:
+        return f"lists={lists} for {stats.table_rows} rows, recommended {wanted}"
+    if stats.built_rows is None:
+        return "never rebuilt since its table was filled"
+    if stats.table_rows > stats.built_rows * growth:
+        return f"table grew from {stats.built_rows} to {stats.table_rows} rows"
+    return None
+
+
+def plan_maintenance(
+    stats: Iterable[IndexStats],
+    target_method: str = INDEX_TARGET_METHOD,
+    tolerance: float = INDEX_LISTS_TOLERANCE,
+    growth: float = INDEX_REBUILD_GROWTH,
+    min_rows: int = INDEX_MIN_ROWS,
+    building: Optional[Set[str]] = None,
+) -> List[MaintenanceTask]:
+    """Decide which vector indexes to rebuild, migrate, reindex, drop or rename.
+
+    ``building`` names tables with an index build in progress; they are skipped.
+    """
+    stats = list(stats)
+    names = {s.index_name for s in stats}
+    tasks: List[MaintenanceTask] = []
+    for s in stats:
+        if s.table_name in (building or set()):
+            continue
+        if s.index_name.endswith(REBUILD_SUFFIX):
+            tasks.append(_leftover_task(s, names))
+            continue
+        if not s.is_valid:
+            operation = IndexOperation("reindex", s.index_name)
+            tasks.append(_task(s, "reindex", "index is invalid", [operation]))
+            continue
+        if s.method != "ivfflat" or s.table_rows < max(min_rows, 1):
+            continue
+        temp = rebuild_name(s.index_name)
+        if target_method == "hnsw":
+            create = IndexOperation(
+                "create",
+                s.index_name,
+                new_name=temp,
+                method="hnsw",
+                m=INDEX_HNSW_M,
+                ef_construction=INDEX_HNSW_EF_CONSTRUCTION,
+            )
+            tasks.append(_task(s, "migrate", "ivfflat to hnsw", swap_operations(s, create)))
+            continue
+        reason = _resize_reason(s, tolerance, growth)
+        if reason is not None:
+            create = IndexOperation(
+                "create",
+                s.index_name,
+                new_name=temp,
+                method="ivfflat",
+                lists=recommended_lists(s.table_rows),
+            )
+            tasks.append(_task(s, "resize", reason, swap_operations(s, create)))
+    return tasks
+
+
+def _progress(row: Dict[str, Any]) -> Dict[str, Any]:
+    done, total = row.get("blocks_done") or 0, row.get("blocks_total") or 0
+    if not total:
+        done, total = row.get("tuples_done") or 0, row.get("tuples_total") or 0
+    return {
+        "phase": row.get("phase"),
+        "percent": round(100 * done / total, 1) if total else None,
+    }
+
+
+class IndexMaintenance:
+    """Runs planned index maintenance on a schedule, one run at a time."""
+
+    def __init__(
+        self,
+        interval: float = INDEX_MAINTENANCE_INTERVAL,
+        target_method: str = INDEX_TARGET_METHOD,
+        poll: float = INDEX_PROGRESS_POLL_SECONDS,
+    ) -> None:
+        if target_method not in ("ivfflat", "hnsw"):
+            raise ValueError(f"unsupported index method: {target_method}")
+        self.interval = interval
+        self.target_method = target_method
+        self.poll = poll
+        self.tasks: List[MaintenanceTask] = []
+        self.last_run: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._loop_task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "target_method": self.target_method,
+            "running": self.running,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+            "tasks": [asdict(task) for task in self.tasks],
+        }
+
+    async def run_once(self, db: DatabaseService) -> List[MaintenanceTask]:
+        """Plan and execute one round; a no-op while another round runs."""
+        if self._lock.locked():
+            return self.tasks
+        async with self._lock:
+            try:
+                stats = [IndexStats.from_row(row) for row in await db.vector_index_stats()]
+                building = {row["table_name"] for row in await db.index_build_progress()}
+            except DatabaseError as exc:
+                self.last_error = str(exc)
+                logger.warning("index maintenance planning failed", error=str(exc))
+                return self.tasks
+            self.tasks = plan_maintenance(stats, self.target_method, building=building)
+            self.last_error = None
+            for task in self.tasks:
+                await self._execute(db, task)
+            self.last_run = datetime.now(timezone.utc).isoformat()
+            return self.tasks
+
+    async def _execute(self, db: DatabaseService, task: MaintenanceTask) -> None:
+        task.status = "running"
+        logger.info(
+            "index maintenance started", index=task.index_name, kind=task.kind, reason=task.reason
+        )
+        watcher = asyncio.get_running_loop().create_task(self._watch(db, task))
+        try:
+            for step, operation in enumerate(task.operations, 1):
+                task.step = step
+                await db.run_index_maintenance(asdict(operation))
+            if task.kind in ("resize", "migrate", "rename"):
+                await db.record_index_build(task.index_name, task.table_rows)
+            task.status = "done"
+        except DatabaseError as exc:
+            task.status = "failed"
+            task.error = str(exc)
+            logger.warning(
+                "index maintenance failed", index=task.index_name, step=task.step, error=str(exc)
+            )
+        finally:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+        INDEX_MAINTENANCE_TASKS.labels(task.kind, task.status).inc()
+        logger.info("index maintenance finished", index=task.index_name, status=task.status)
+
+    async def _watch(self, db: DatabaseService, task: MaintenanceTask) -> None:
+        while True:
+            await asyncio.sleep(self.poll)
+            try:
+                rows = await db.index_build_progress()
+            except DatabaseError:
+                continue
+            for row in rows:
+                if row.get("table_name") == task.table_name:
+                    task.progress = _progress(row)
+
+    def start(self, db: DatabaseService) -> None:
+        """Run on ``interval`` in the background; does nothing when it is 0."""
+        if self.interval <= 0 or self._loop_task is not None:
+            return
+
+        async def schedule() -> None:
+            while True:
+                await self.run_once(db)
+                await asyncio.sleep(self.interval)
+
+        self._loop_task = asyncio.get_running_loop().create_task(schedule())
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+
+
+index_maintenance = IndexMaintenance()
+
+
+__all__ = [
+    "IndexMaintenance",
+    "IndexOperation",
+    "IndexStats",
+    "MaintenanceTask",
+    "index_maintenance",
+    "plan_maintenance",
+    "rebuild_name",
+    "recommended_lists",
+    "swap_operations",
+]
@@ -0,0 +1,103 @@
+"""Maximal Marginal Relevance re-ranking of search results.
+
+Search over-fetches candidates, then greedily picks the candidate that
+maximizes ``lambda * relevance - (1 - lambda) * redundancy``, where
+redundancy is the highest cosine similarity to anything already picked.
+Similarities are computed with NumPy: one mat-vec for relevance and one per
+pick for the row of the similarity matrix it needs. Filling only those k
+rows instead of the full candidate Gram matrix keeps 200 candidates with
+1536 dimensions well under a millisecond on one core.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.document import Document
+from ..models.query import Query
+from .database import DatabaseService
+from .query_cache import query_cache
+
+
+MMR_OVERSAMPLE = int(os.getenv("MMR_OVERSAMPLE", "4"))
+MMR_MAX_CANDIDATES = int(os.getenv("MMR_MAX_CANDIDATES", "200"))
+
+
+def mmr_select(
+    query: Sequence[float], candidates: np.ndarray, k: int, lambda_: float
+) -> List[int]:
+    """Return the indices of ``k`` rows of ``candidates`` in MMR order."""
+    matrix = np.asarray(candidates, dtype=np.float32)
+    if matrix.ndim != 2 or len(matrix) == 0 or k <= 0:
+        return []
+    q = np.asarray(query, dtype=np.float32)
+    norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+    norms[norms == 0] = 1.0
+    relevance = (matrix @ q) / (norms * (float(np.linalg.norm(q)) or 1.0))
+    redundancy = np.full(len(matrix), -np.inf, dtype=np.float32)
+    score = relevance.copy()
+    chosen: List[int] = []
+    for _ in range(min(k, len(matrix))):
+        pick = int(np.argmax(score))
+        chosen.append(pick)
+        np.maximum(redundancy, (matrix @ matrix[pick]) / (norms * norms[pick]), out=redundancy)
+        score = lambda_ * relevance - (1 - lambda_) * redundancy
+        score[chosen] = -np.inf
+    return chosen
+
+
+async def diversified_search(
+    db: DatabaseService, embedding: Sequence[float], query: Query
+) -> List[Document]:
+    """Run ``vector_search``, re-ranked with MMR when ``query.mmr_lambda`` is set.
+
+    Results for near-duplicate queries are served from the semantic query cache.
+    """
+    return [doc for doc, _ in await scored_search(db, embedding, query)]
+
+
+async def scored_search(
+    db: DatabaseService, embedding: Sequence[float], query: Query
+) -> List[Tuple[Document, Optional[float]]]:
+    """``diversified_search`` with each document's cosine distance.
+
+    MMR order is not by similarity, so MMR results carry no distance.
+    """
+    cached = query_cache.lookup_scored(embedding, query)
+    if cached is not None:
+        return cached
+    scored = await _search(db, embedding, query)
+    query_cache.store(
+        embedding, query, [doc for doc, _ in scored], [distance for _, distance in scored]
+    )
+    return scored
+
+
+async def _search(
+    db: DatabaseService, embedding: Sequence[float], query: Query
+) -> List[Tuple[Document, Optional[float]]]:
+    if query.mmr_lambda is None:
+        return await db.vector_search_scored(embedding, query)
+    fetch = min(query.match_count * MMR_OVERSAMPLE, MMR_MAX_CANDIDATES)
+    docs = await db.vector_search(
+        embedding, query.model_copy(update={"match_count": max(fetch, query.match_count)})
+    )
+    if len(docs) <= query.match_count:
+        return [(doc, None) for doc in docs]
+    vectors = await db.get_embeddings([doc.id for doc in docs])
+    ranked = [doc for doc in docs if str(doc.id) in vectors]
+    if not ranked:
+        return [(doc, None) for doc in docs[: query.match_count]]
+    order = mmr_select(
+        embedding,
+        np.array([vectors[str(doc.id)] for doc in ranked], dtype=np.float32),
+        query.match_count,
+        query.mmr_lambda,
+    )
+    return [(ranked[i], None) for i in order]
+
+
+__all__ = ["diversified_search", "mmr_select", "scored_search"]
@@ -0,0 +1,102 @@
+"""Offline n-gram embedding provider.
+
+Small batches run on a thread so the event loop stays responsive; batches of
+at least ``OFFLINE_EMBEDDING_POOL_MIN`` texts are split across a process
+pool so hashing uses every core.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from src.common.ngram_embedding import HashedNgramEmbedder, embed_texts, init_worker
+
+
+OFFLINE_EMBEDDING_DIM = int(os.getenv("OFFLINE_EMBEDDING_DIM", "1536"))
+OFFLINE_EMBEDDING_IDF_PATH = os.getenv("OFFLINE_EMBEDDING_IDF_PATH", "")
+OFFLINE_EMBEDDING_WORKERS = int(
+    os.getenv("OFFLINE_EMBEDDING_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+OFFLINE_EMBEDDING_POOL_MIN = int(os.getenv("OFFLINE_EMBEDDING_POOL_MIN", "256"))
+
+_embedder: Optional[HashedNgramEmbedder] = None
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def offline_model_name() -> str:
+    """Identify the embedder configuration so caches are scoped to it."""
+    name = f"ngram-{OFFLINE_EMBEDDING_DIM}"
+    if OFFLINE_EMBEDDING_IDF_PATH:
+        name += f"-{os.path.basename(OFFLINE_EMBEDDING_IDF_PATH)}"
+    return name
+
+
+def _get_embedder() -> HashedNgramEmbedder:
+    global _embedder
+    if _embedder is None:
+        idf = np.load(OFFLINE_EMBEDDING_IDF_PATH) if OFFLINE_EMBEDDING_IDF_PATH else None
+        _embedder = HashedNgramEmbedder(OFFLINE_EMBEDDING_DIM, idf=idf)
+    return _embedder
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=OFFLINE_EMBEDDING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(OFFLINE_EMBEDDING_DIM, OFFLINE_EMBEDDING_IDF_PATH),
+        )
+    return _pool
+
+
+def shutdown_embedding_pool() -> None:
+    """Stop the worker processes, e.g. on application shutdown."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def warm_offline_embedding() -> None:
+    """Build the in-process embedder and start every pool worker."""
+    await asyncio.to_thread(_get_embedder)
+    loop = asyncio.get_running_loop()
+    # Each submission to a pool without idle workers spawns another process.
+    await asyncio.gather(
+        *(
+            loop.run_in_executor(_get_pool(), embed_texts, ["warm-up"])
+            for _ in range(OFFLINE_EMBEDDING_WORKERS)
+        )
+    )
+
+
+async def embed_offline(texts: List[str]) -> List[List[float]]:
+    """Embed ``texts`` with the hashed n-gram model."""
+    if len(texts) < OFFLINE_EMBEDDING_POOL_MIN:
+        matrix = await asyncio.to_thread(_get_embedder().embed_batch, texts)
+        return matrix.tolist()
+    loop = asyncio.get_running_loop()
+    step = -(-len(texts) // OFFLINE_EMBEDDING_WORKERS)
+    parts = await asyncio.gather(
+        *(
+            loop.run_in_executor(_get_pool(), embed_texts, texts[i : i + step])
+            for i in range(0, len(texts), step)
+        )
+    )
+    return np.concatenate(parts).tolist()
+
+
+__all__ = [
+    "embed_offline",
+    "offline_model_name",
+    "shutdown_embedding_pool",
+    "warm_offline_embedding",
+]
@@ -0,0 +1,124 @@
+"""PDF text extraction in a worker process pool.
+
+Pages are extracted in separate processes so large or pathological PDFs
+never block the event loop. Each worker caps its address space and every
+page runs under a wall-clock timer; results stream back as pages finish
+and are reassembled in page order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.common.pdf_worker import count_pages, extract_page, init_worker
+
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT", "10"))
+PDF_WORKER_MEMORY_MB = int(os.getenv("PDF_WORKER_MEMORY_MB", "1024"))
+
+
+class PdfExtractionError(Exception):
+    """Raised when a PDF cannot be extracted."""
+
+
+class PdfPageTimeoutError(PdfExtractionError):
+    """Raised when a single page exceeds the extraction timeout."""
+
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(PDF_WORKER_MEMORY_MB,),
+        )
+    return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the worker processes, e.g. on application shutdown."""
+    _reset_pool()
+
+
+async def _run(func: Callable[..., object], *args: object) -> object:
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_pool(), func, *args)
+    except BrokenProcessPool as exc:
+        # A worker died, typically from the memory cap; start fresh next time.
+        _reset_pool()
+        raise PdfExtractionError("PDF exceeds resource limits") from exc
+    except MemoryError as exc:
+        raise PdfExtractionError("PDF exceeds resource limits") from exc
+    except TimeoutError as exc:
+        raise PdfPageTimeoutError("PDF page extraction timed out") from exc
+    except Exception as exc:  # noqa: BLE001
+        raise PdfExtractionError("invalid PDF") from exc
+
+
+async def iter_pdf_pages(
+    path: str, *, page_timeout: float | None = None
+) -> AsyncIterator[Tuple[int, int, str]]:
+    """Yield ``(index, total, text)`` for each page as soon as it finishes."""
+    timeout = PDF_PAGE_TIMEOUT if page_timeout is None else page_timeout
+    total = int(await _run(count_pages, path))  # type: ignore[arg-type]
+    tasks = [
+        asyncio.ensure_future(_indexed(i, _run(extract_page, path, i, timeout)))
+        for i in range(total)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, text = await next_done
+            yield index, total, text
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _indexed(index: int, pending: Awaitable[object]) -> Tuple[int, str]:
+    return index, str(await pending)
+
+
+async def extract_pdf_text(
+    path: str,
+    *,
+    on_progress: ProgressCallback | None = None,
+    page_timeout: float | None = None,
+) -> str:
+    """Extract all pages of ``path`` and join them in page order."""
+    pages: Dict[int, str] = {}
+    async for index, total, text in iter_pdf_pages(path, page_timeout=page_timeout):
+        pages[index] = text
+        if on_progress is not None:
+            await on_progress(len(pages), total)
+    return "\n".join(pages[i] for i in sorted(pages))
+
+
+__all__ = [
+    "PdfExtractionError",
+    "PdfPageTimeoutError",
+    "ProgressCallback",
+    "extract_pdf_text",
+    "iter_pdf_pages",
+    "shutdown_pdf_pool",
+]
@@ -0,0 +1,76 @@
+"""Coalesced, rate-limited progress publishing.
+
+Producers record the latest state of each job without waiting on the
+transport. A drain task per room emits at most ``rate`` updates per second;
+updates to a job that has not been emitted yet replace the pending one, so
+intermediate states are dropped but the latest state is always delivered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from loguru import logger
+
+
+PROGRESS_EMIT_RATE = float(os.getenv("PROGRESS_EMIT_RATE", "10"))
+
+Emitter = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class ProgressCoalescer:
+    """Publish the latest payload per key, rate-limited per room."""
+
+    def __init__(self, emit: Emitter, *, rate: float = PROGRESS_EMIT_RATE) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self._emit = emit
+        self._interval = 1.0 / rate
+        self._pending: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._drains: Dict[str, asyncio.Task[None]] = {}
+        self._last_emit: Dict[str, float] = {}
+
+    def publish(self, room: str, key: str, payload: Dict[str, Any]) -> None:
+        """Record ``payload`` as the latest state of ``key`` in ``room``."""
+        self._pending.setdefault(room, {})[key] = payload
+        if room not in self._drains:
+            self._drains[room] = asyncio.get_running_loop().create_task(
+                self._drain(room)
+            )
+
+    async def _drain(self, room: str) -> None:
+        pending = self._pending[room]
+        try:
+            while pending:
+                last = self._last_emit.get(room, -math.inf)
+                delay = last + self._interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Oldest pending key first; a newer update keeps its place.
+                key = next(iter(pending))
+                payload = pending.pop(key)
+                self._last_emit[room] = time.monotonic()
+                try:
+                    await self._emit(room, payload)
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("progress emit failed", room=room, error=str(exc))
+        finally:
+            self._drains.pop(room, None)
+            if not pending:
+                self._pending.pop(room, None)
+
+    def pending(self, room: str) -> int:
+        """Return how many keys in ``room`` are waiting to be emitted."""
+        return len(self._pending.get(room, {}))
+
+    async def flush(self) -> None:
+        """Wait until every pending update has been emitted."""
+        while self._drains:
+            await asyncio.gather(*list(self._drains.values()))
+
+
+__all__ = ["Emitter", "ProgressCoalescer"]
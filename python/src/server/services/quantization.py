@@ -0,0 +1,140 @@
+"""Scalar (int8) and binary quantization of embeddings.
+
+int8 codes keep one byte per dimension plus a per-vector scale (4x smaller
+than float32); binary codes keep only the sign bit (32x smaller). Both are
+used to shortlist candidates cheaply, after which the shortlist is rescored
+against the full-precision vectors.
+
+Only binary codes are stored in Postgres, where an HNSW index over
+``bit_hamming_ops`` shortlists candidates. pgvector has no int8 vector type
+or index, so int8 distance could only be computed by scanning every row;
+int8 codes are therefore limited to the in-process ``QuantizedIndex``.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# "none" or "binary": codes written to the embeddings table for search.
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "none")
+# Shortlist size as a multiple of the requested result count.
+QUANTIZED_OVERSAMPLE = int(os.getenv("QUANTIZED_OVERSAMPLE", "10"))
+
+QUANTIZATION_MODES = ("none", "binary")
+
+
+def quantize_int8(vector: Sequence[float]) -> Tuple[np.ndarray, float]:
+    """Symmetric per-vector int8 codes and the scale to dequantize them."""
+    arr = np.asarray(vector, dtype=np.float32)
+    peak = float(np.abs(arr).max()) if arr.size else 0.0
+    scale = peak / 127 if peak else 1.0
+    codes = np.clip(np.rint(arr / scale), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def dequantize_int8(codes: np.ndarray, scale: float) -> np.ndarray:
+    return codes.astype(np.float32) * scale
+
+
+def quantize_binary(vector: Sequence[float]) -> np.ndarray:
+    """Pack the sign bits of ``vector`` (positive -> 1) into bytes."""
+    return np.packbits(np.asarray(vector, dtype=np.float32) > 0)
+
+
+def bit_string(vector: Sequence[float]) -> str:
+    """Sign bits as a ``'0101…'`` literal accepted by Postgres ``bit`` columns."""
+    return "".join("1" if x > 0 else "0" for x in vector)
+
+
+def hamming_distances(query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Hamming distance between packed ``query`` bits and each row of ``codes``."""
+    return np.bitwise_count(np.bitwise_xor(codes, query)).sum(axis=1)
+
+
+def _normalized(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class QuantizedIndex:
+    """In-memory index scanning quantized codes and rescoring a shortlist.
+
+    Only the codes are scanned; full-precision vectors are touched for the
+    ``k * oversample`` shortlisted rows alone, so they can live in a
+    memory-mapped array rather than RAM.
+    """
+
+    def __init__(self, mode: str = "binary", oversample: int = QUANTIZED_OVERSAMPLE):
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"unsupported quantization mode: {mode}")
+        self.mode = mode
+        self.oversample = oversample
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._vectors: Optional[np.ndarray] = None
+
+    def build(self, vectors: np.ndarray) -> None:
+        """Index the rows of ``vectors`` (kept by reference for rescoring)."""
+        self._vectors = vectors
+        unit = _normalized(np.asarray(vectors, dtype=np.float32))
+        if self.mode == "binary":
+            self._codes = np.packbits(unit > 0, axis=1)
+        else:
+            peaks = np.abs(unit).max(axis=1, keepdims=True)
+            scales = np.where(peaks == 0, 1.0, peaks / 127).astype(np.float32)
+            self._codes = np.clip(np.rint(unit / scales), -127, 127).astype(np.int8)
+            self._scales = scales[:, 0]
+
+    @property
+    def nbytes(self) -> int:
+        size = 0 if self._codes is None else self._codes.nbytes
+        return size + (0 if self._scales is None else self._scales.nbytes)
+
+    def candidates(self, query: Sequence[float], count: int) -> np.ndarray:
+        """Row ids of the ``count`` nearest codes to ``query``."""
+        if self._codes is None:
+            return np.zeros(0, dtype=np.intp)
+        unit = _normalized(np.asarray(query, dtype=np.float32))
+        if self.mode == "binary":
+            # Lower Hamming distance means higher similarity.
+            scores = -hamming_distances(np.packbits(unit > 0), self._codes)
+        else:
+            codes, scale = quantize_int8(unit)
+            dots = self._codes.astype(np.int32) @ codes.astype(np.int32)
+            scores = dots * self._scales * scale
+        count = min(count, len(scores))
+        top = np.argpartition(-scores, count - 1)[:count]
+        return top[np.argsort(-scores[top])]
+
+    def search(
+        self, query: Sequence[float], k: int, oversample: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Top ``k`` ``(row, cosine)`` pairs after full-precision rescoring.
+
+        ``oversample`` overrides the shortlist depth for this call.
+        """
+        if self._vectors is None or k <= 0:
+            return []
+        shortlist = self.candidates(query, k * (oversample or self.oversample))
+        full = _normalized(np.asarray(self._vectors[shortlist], dtype=np.float32))
+        unit = _normalized(np.asarray(query, dtype=np.float32))
+        sims = full @ unit
+        order = np.argsort(-sims)[:k]
+        return [(int(shortlist[i]), float(sims[i])) for i in order]
+
+
+__all__ = [
+    "EMBEDDING_QUANTIZATION",
+    "QUANTIZATION_MODES",
+    "QUANTIZED_OVERSAMPLE",
+    "QuantizedIndex",
+    "bit_string",
+    "dequantize_int8",
+    "hamming_distances",
+    "quantize_binary",
+    "quantize_int8",
+]
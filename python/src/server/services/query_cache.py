@@ -0,0 +1,208 @@
+"""Semantic cache of search results keyed by query embedding.
+
+A lookup returns the results of a cached query whose embedding lies within
+``max_distance`` cosine distance of the new one and whose other parameters
+(match count, filters, threshold, MMR lambda) are identical. Unit vectors
+are kept in one preallocated matrix, so a lookup is a single mat-vec over
+the live slots. Entries expire after ``ttl`` seconds and the least recently
+used entry is evicted when the cache is full. Each entry keeps the
+distances its documents were ranked with, when the search reported them.
+
+Invalidation is per source: when a source's documents change, entries that
+returned any of its documents are dropped, as are entries whose filters do
+not pin them to other sources (new documents could now match them).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+
+from src.common.metrics import shared_metric
+
+from ..models.document import Document
+from ..models.query import Query, parse_filters
+from .filters import compile_filters
+
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1000"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+QUERY_CACHE_MAX_DISTANCE = float(os.getenv("QUERY_CACHE_MAX_DISTANCE", "0.05"))
+
+QUERY_CACHE_LOOKUPS = shared_metric(
+    Counter,
+    "query_cache_lookups_total", "Semantic query cache lookups by outcome", ["result"]
+)
+QUERY_CACHE_SIMILARITY = shared_metric(
+    Histogram,
+    "query_cache_nearest_similarity",
+    "Cosine similarity of the nearest cached query at lookup",
+    buckets=(0.5, 0.7, 0.8, 0.85, 0.9, 0.93, 0.95, 0.97, 0.98, 0.99, 0.995, 1.0),
+)
+
+
+def _scope(query: Query) -> str:
+    """Everything except the text that changes which results come back."""
+    return json.dumps(
+        query.model_dump(exclude={"query_text"}, mode="json"), sort_keys=True
+    )
+
+
+@dataclass
+class _Entry:
+    scope: str
+    documents: List[Document]
+    distances: List[Optional[float]]
+    sources: Set[str]
+    doc_ids: Set[str]
+    pinned_sources: Optional[Set[str]]
+    expires: float
+
+
+class SemanticQueryCache:
+    """LRU/TTL cache answering near-duplicate queries by cosine distance."""
+
+    def __init__(
+        self,
+        size: int = QUERY_CACHE_SIZE,
+        ttl: float = QUERY_CACHE_TTL,
+        max_distance: float = QUERY_CACHE_MAX_DISTANCE,
+    ) -> None:
+        self.size = size
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._free: List[int] = list(range(size - 1, -1, -1))
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _unit(self, embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0:
+            return None
+        if self._vectors is None or self._vectors.shape[1] != len(vector):
+            # First use, or the embedding model changed dimension.
+            self.clear()
+            self._vectors = np.zeros((self.size, len(vector)), dtype=np.float32)
+        return vector / norm
+
+    def _drop(self, slot: int) -> None:
+        del self._entries[slot]
+        self._free.append(slot)
+
+    def _evict_expired(self, scope: str) -> bool:
+        """Drop every expired entry; report whether one was in ``scope``."""
+        now = time.monotonic()
+        expired = [(s, e.scope) for s, e in self._entries.items() if e.expires <= now]
+        for slot, _ in expired:
+            self._drop(slot)
+        return any(entry_scope == scope for _, entry_scope in expired)
+
+    def lookup(self, embedding: Sequence[float], query: Query) -> Optional[List[Document]]:
+        """Return cached results for a near-identical query, or ``None``."""
+        scored = self.lookup_scored(embedding, query)
+        return None if scored is None else [doc for doc, _ in scored]
+
+    def lookup_scored(
+        self, embedding: Sequence[float], query: Query
+    ) -> Optional[List[Tuple[Document, Optional[float]]]]:
+        """``lookup`` with the stored distance of each document."""
+        if not self.enabled:
+            return None
+        unit = self._unit(embedding)
+        scope = _scope(query)
+        # Evict before ranking so an expired nearest entry cannot shadow a
+        # live one that is also within range.
+        miss = "expired" if self._evict_expired(scope) else "miss"
+        slots = [s for s, e in self._entries.items() if e.scope == scope]
+        if unit is None or not slots:
+            QUERY_CACHE_LOOKUPS.labels(miss).inc()
+            return None
+        assert self._vectors is not None
+        sims = self._vectors[slots] @ unit
+        best = int(np.argmax(sims))
+        similarity = float(sims[best])
+        QUERY_CACHE_SIMILARITY.observe(similarity)
+        if 1 - similarity > self.max_distance:
+            QUERY_CACHE_LOOKUPS.labels(miss).inc()
+            return None
+        slot = slots[best]
+        entry = self._entries[slot]
+        self._entries.move_to_end(slot)
+        QUERY_CACHE_LOOKUPS.labels("hit").inc()
+        return list(zip(entry.documents, entry.distances))
+
+    def store(
+        self,
+        embedding: Sequence[float],
+        query: Query,
+        documents: List[Document],
+        distances: Optional[Sequence[Optional[float]]] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        unit = self._unit(embedding)
+        if unit is None:
+            return
+        if not self._free:
+            self._drop(next(iter(self._entries)))
+        slot = self._free.pop()
+        assert self._vectors is not None
+        self._vectors[slot] = unit
+        pinned = compile_filters(parse_filters(query.filters)).source_ids
+        self._entries[slot] = _Entry(
+            scope=_scope(query),
+            documents=list(documents),
+            distances=list(distances) if distances is not None else [None] * len(documents),
+            sources={str(doc.source_id) for doc in documents},
+            doc_ids={str(doc.id) for doc in documents},
+            pinned_sources=None if pinned is None else set(pinned),
+            expires=time.monotonic() + self.ttl,
+        )
+
+    def invalidate_source(self, source_id: UUID | str) -> int:
+        """Drop entries that may change now that ``source_id``'s documents did."""
+        source = str(source_id)
+        stale = [
+            slot
+            for slot, entry in self._entries.items()
+            if source in entry.sources
+            or entry.pinned_sources is None
+            or source in entry.pinned_sources
+        ]
+        for slot in stale:
+            self._drop(slot)
+        return len(stale)
+
+    def invalidate_document(self, doc_id: UUID | str) -> int:
+        """Drop entries that returned ``doc_id``, e.g. after it was deleted."""
+        doc = str(doc_id)
+        stale = [slot for slot, entry in self._entries.items() if doc in entry.doc_ids]
+        for slot in stale:
+            self._drop(slot)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._free = list(range(self.size - 1, -1, -1))
+
+
+query_cache = SemanticQueryCache()
+
+
+__all__ = ["SemanticQueryCache", "query_cache"]
@@ -0,0 +1,267 @@
+"""Token-bucket rate limiting for the embedding provider.
+
+Requests-per-minute and tokens-per-minute buckets live in a
+:class:`BucketStore`. The in-memory store is shared by every coroutine in a
+process; the SQLite store keeps buckets in a file so all workers on a node
+draw from the same budget. Callers reserve capacity up front and sleep for
+the returned wait, so queued callers are released in order instead of
+retrying in lockstep. A provider ``429`` opens a cooldown for the
+``Retry-After`` period, pausing every caller that shares the store, and
+retries draw from a separate budget so an outage cannot multiply load.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+from src.common.metrics import shared_metric
+
+
+EMBEDDING_REQUESTS_PER_MINUTE = float(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "0"))
+EMBEDDING_TOKENS_PER_MINUTE = float(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "0"))
+EMBEDDING_RETRY_BUDGET = float(os.getenv("EMBEDDING_RETRY_BUDGET", "60"))
+# Empty keeps buckets in process memory.
+EMBEDDING_RATE_LIMIT_PATH = os.getenv("EMBEDDING_RATE_LIMIT_PATH", "")
+
+QUEUE_SECONDS = shared_metric(
+    Histogram,
+    "embedding_rate_limit_wait_seconds",
+    "Time embedding requests waited for rate limit capacity",
+)
+THROTTLE_EVENTS = shared_metric(
+    Counter,
+    "embedding_throttle_events_total",
+    "Embedding rate limit events by reason",
+    ["reason"],
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for budgeting."""
+    return max(1, len(text) // 4)
+
+
+def _take(
+    state: Optional[Tuple[float, float]],
+    now: float,
+    amount: float,
+    rate: float,
+    capacity: float,
+    reserve: bool,
+) -> Tuple[float, float]:
+    """Apply one take to ``(tokens, updated)`` and return ``(tokens, wait)``."""
+    if state is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, state[0] + (now - state[1]) * rate)
+    amount = min(amount, capacity)
+    wait = max(0.0, (amount - tokens) / rate)
+    if reserve or wait == 0:
+        tokens -= amount
+    return tokens, wait
+
+
+class BucketStore(ABC):
+    """Storage for token buckets; subclasses must update atomically."""
+
+    @abstractmethod
+    async def take(
+        self,
+        key: str,
+        amount: float,
+        rate: float,
+        capacity: float,
+        reserve: bool = True,
+    ) -> float:
+        """Take ``amount`` tokens and return the seconds until they are available.
+
+        With ``reserve`` the tokens are taken even when the caller must wait
+        (the bucket goes negative); without it nothing is taken unless the
+        tokens are available now.
+        """
+
+    @abstractmethod
+    async def drain(self, key: str, seconds: float, rate: float) -> None:
+        """Empty the bucket so it stays empty for ``seconds``."""
+
+
+class MemoryBucketStore(BucketStore):
+    """Buckets shared by the coroutines of one process."""
+
+    def __init__(self) -> None:
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def take(
+        self,
+        key: str,
+        amount: float,
+        rate: float,
+        capacity: float,
+        reserve: bool = True,
+    ) -> float:
+        now = time.time()
+        tokens, wait = _take(self._buckets.get(key), now, amount, rate, capacity, reserve)
+        self._buckets[key] = (tokens, now)
+        return wait
+
+    async def drain(self, key: str, seconds: float, rate: float) -> None:
+        now = time.time()
+        tokens = self._buckets.get(key, (0.0, now))[0]
+        self._buckets[key] = (min(tokens, -seconds * rate), now)
+
+
+class SqliteBucketStore(BucketStore):
+    """Buckets in a SQLite file, shared by all workers on a node."""
+
+    def __init__(self, path: str) -> None:
+        self._db = sqlite3.connect(
+            path, timeout=5, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def _update(self, key: str, apply) -> float:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so concurrent workers
+            # serialize on the read-modify-write.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                now = time.time()
+                tokens, result = apply(row, now)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) "
+                    "VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return result
+
+    async def take(
+        self,
+        key: str,
+        amount: float,
+        rate: float,
+        capacity: float,
+        reserve: bool = True,
+    ) -> float:
+        return await asyncio.to_thread(
+            self._update,
+            key,
+            lambda row, now: _take(row, now, amount, rate, capacity, reserve),
+        )
+
+    async def drain(self, key: str, seconds: float, rate: float) -> None:
+        def apply(row, now):
+            tokens = row[0] if row else 0.0
+            return min(tokens, -seconds * rate), 0.0
+
+        await asyncio.to_thread(self._update, key, apply)
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class ProviderRateLimiter:
+    """Request, token and retry budgets for one provider.
+
+    A rate of ``0`` disables that bucket.
+    """
+
+    def __init__(
+        self,
+        store: BucketStore,
+        name: str = "embedding",
+        requests_per_minute: float = EMBEDDING_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = EMBEDDING_TOKENS_PER_MINUTE,
+        retries_per_minute: float = EMBEDDING_RETRY_BUDGET,
+    ) -> None:
+        self.store = store
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.retries_per_minute = retries_per_minute
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait for capacity for one request of ``tokens``; return the wait."""
+        # A zero-capacity bucket that only goes negative while the provider
+        # has asked us to back off; taking nothing from it reads the pause.
+        wait = await self.store.take(f"{self.name}:cooldown", 0, 1.0, 0.0)
+        if self.requests_per_minute:
+            wait = max(
+                wait,
+                await self.store.take(
+                    f"{self.name}:requests",
+                    1,
+                    self.requests_per_minute / 60,
+                    self.requests_per_minute,
+                ),
+            )
+        if self.tokens_per_minute:
+            wait = max(
+                wait,
+                await self.store.take(
+                    f"{self.name}:tokens",
+                    tokens,
+                    self.tokens_per_minute / 60,
+                    self.tokens_per_minute,
+                ),
+            )
+        QUEUE_SECONDS.observe(wait)
+        if wait > 0:
+            THROTTLE_EVENTS.labels("queued").inc()
+            await asyncio.sleep(wait)
+        return wait
+
+    async def throttled(self, retry_after: float) -> None:
+        """Record a provider rate limit and pause all callers for ``retry_after``."""
+        THROTTLE_EVENTS.labels("provider").inc()
+        await self.store.drain(f"{self.name}:cooldown", retry_after, 1.0)
+
+    async def allow_retry(self) -> bool:
+        """Spend one retry from the shared budget, without waiting."""
+        if not self.retries_per_minute:
+            return True
+        wait = await self.store.take(
+            f"{self.name}:retries",
+            1,
+            self.retries_per_minute / 60,
+            self.retries_per_minute,
+            reserve=False,
+        )
+        if wait > 0:
+            THROTTLE_EVENTS.labels("retry_budget").inc()
+            return False
+        return True
+
+
+def bucket_store(path: str = EMBEDDING_RATE_LIMIT_PATH) -> BucketStore:
+    """Return the SQLite store for ``path`` or the in-memory store."""
+    return SqliteBucketStore(path) if path else MemoryBucketStore()
+
+
+__all__ = [
+    "BucketStore",
+    "MemoryBucketStore",
+    "ProviderRateLimiter",
+    "SqliteBucketStore",
+    "bucket_store",
+    "estimate_tokens",
+]
@@ -0,0 +1,386 @@
+"""Corpus-fitted PCA projections for stored embeddings.
+
+A projection is fitted per embedding model from a sample of the
+``embeddings`` table. When ``EMBEDDING_PROJECTION`` is enabled, new vectors
+are projected before they are stored and queries before they are searched,
+so the reduced column and its index are a fraction of the full size. The
+fitting job also reports top-k recall against full-precision search for a
+range of candidate dimensions, which is what the cut-off should be chosen
+from.
+
+A fitted projection is stored inactive. :class:`ProjectionRollout` projects
+every stored embedding with it in batches and only then activates it, so
+searches never run against a half-filled reduced column. The reduced column
+holds one width, so a refit must keep the active projection's ``dims``.
+
+Each row records the :attr:`Projection.version` its reduced vector came
+from. Writes continue during a rollout, so rows inserted behind the backfill
+cursor or stored with the previous basis are re-projected in a catch-up pass
+before activation and in a sweep once every worker has seen the new version.
+Workers check the active version every ``PROJECTION_REFRESH_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+
+EMBEDDING_PROJECTION = os.getenv("EMBEDDING_PROJECTION", "false").lower() == "true"
+PROJECTION_SAMPLE_SIZE = int(os.getenv("PROJECTION_SAMPLE_SIZE", "5000"))
+# Upper bound on the sample a fit may request; the SVD runs in process.
+PROJECTION_MAX_SAMPLE_SIZE = 20_000
+PROJECTION_BACKFILL_BATCH = int(os.getenv("PROJECTION_BACKFILL_BATCH", "500"))
+# Seconds between checks of the active projection's version; a rollout waits
+# this long after activation before sweeping rows stored with the old basis.
+PROJECTION_REFRESH_SECONDS = float(os.getenv("PROJECTION_REFRESH_SECONDS", "5"))
+
+
+class ProjectionError(Exception):
+    """Raised when a projection cannot be fitted."""
+
+
+def _to_bytea(matrix: np.ndarray) -> str:
+    return "\\x" + np.ascontiguousarray(matrix, dtype="<f4").tobytes().hex()
+
+
+def _from_bytea(value: str) -> np.ndarray:
+    return np.frombuffer(bytes.fromhex(value.removeprefix("\\x")), dtype="<f4")
+
+
+def _normalized(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+@dataclass
+class Projection:
+    """Mean-centred projection onto the top principal components."""
+
+    model: str
+    mean: np.ndarray
+    components: np.ndarray  # (dims, source_dim)
+
+    @property
+    def dims(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def source_dim(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def version(self) -> int:
+        """Fingerprint of the basis, recorded on every row projected with it."""
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(np.ascontiguousarray(self.mean, dtype="<f4").tobytes())
+        digest.update(np.ascontiguousarray(self.components, dtype="<f4").tobytes())
+        return int.from_bytes(digest.digest(), "little", signed=True)
+
+    def truncate(self, dims: int) -> "Projection":
+        return Projection(self.model, self.mean, self.components[:dims])
+
+    def project_batch(self, vectors: np.ndarray) -> np.ndarray:
+        """Project unit rows and re-normalize so cosine distance stays meaningful."""
+        unit = _normalized(np.asarray(vectors, dtype=np.float32))
+        return _normalized((unit - self.mean) @ self.components.T)
+
+    def project(self, vector: Sequence[float]) -> List[float]:
+        if len(vector) != self.source_dim:
+            raise ValueError(
+                f"expected {self.source_dim} dimensions, got {len(vector)}"
+            )
+        return self.project_batch(np.asarray(vector)[None, :])[0].tolist()
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "source_dim": self.source_dim,
+            "dims": self.dims,
+            "version": self.version,
+            "mean": _to_bytea(self.mean),
+            "components": _to_bytea(self.components),
+        }
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Projection":
+        source_dim, dims = int(row["source_dim"]), int(row["dims"])
+        return cls(
+            model=row["model"],
+            mean=_from_bytea(row["mean"]),
+            components=_from_bytea(row["components"]).reshape(dims, source_dim),
+        )
+
+
+def fit_pca(model: str, sample: np.ndarray, dims: int) -> Projection:
+    """Fit a ``dims``-component PCA projection to the rows of ``sample``.
+
+    Rows are unit-normalized first, as search compares them by cosine.
+    """
+    sample = np.asarray(sample, dtype=np.float32)
+    if sample.ndim != 2 or len(sample) < 2:
+        raise ProjectionError("need at least two sample vectors")
+    if not 0 < dims <= min(sample.shape):
+        raise ProjectionError(
+            f"dims must be between 1 and {min(sample.shape)} for this sample"
+        )
+    sample = _normalized(sample)
+    mean = sample.mean(axis=0)
+    # Rows of vt are the principal axes ordered by explained variance.
+    _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+    return Projection(model, mean, np.ascontiguousarray(vt[:dims]))
+
+
+def _top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> Tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    sims = queries @ corpus.T
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    return top, time.perf_counter() - start
+
+
+def recall_report(
+    projection: Projection,
+    sample: np.ndarray,
+    candidate_dims: Sequence[int],
+    k: int = 10,
+    queries: int = 100,
+) -> List[Dict[str, float]]:
+    """Recall@k of reduced search against full search for each dimension.
+
+    A slice of ``sample`` is held out as queries against the rest. Each row
+    reports recall, the stored size relative to the full vectors, and the
+    brute-force scan time relative to full precision.
+    """
+    sample = _normalized(np.asarray(sample, dtype=np.float32))
+    queries = min(queries, len(sample) // 5)
+    k = min(k, len(sample) - queries)
+    if queries < 1 or k < 1:
+        raise ProjectionError("sample too small for a recall report")
+    held_out, corpus = sample[:queries], sample[queries:]
+    truth, full_time = _top_k(corpus, held_out, k)
+    report = []
+    for dims in sorted({d for d in candidate_dims if 0 < d <= projection.dims}):
+        reduced = projection.truncate(dims)
+        found, reduced_time = _top_k(
+            reduced.project_batch(corpus), reduced.project_batch(held_out), k
+        )
+        hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+        report.append(
+            {
+                "dims": dims,
+                "recall": hits / (k * queries),
+                "size_ratio": dims / projection.source_dim,
+                "time_ratio": reduced_time / full_time if full_time else 0.0,
+            }
+        )
+    return report
+
+
+class ProjectionRegistry:
+    """Per-process cache of the active projection for each model.
+
+    The cached projection is reused until the active version stored in the
+    database changes; the version is checked at most every ``refresh`` seconds.
+    """
+
+    def __init__(self, refresh: float = PROJECTION_REFRESH_SECONDS) -> None:
+        self.refresh = refresh
+        self._entries: Dict[str, Tuple[float, Optional[int], Optional[Projection]]] = {}
+
+    def set(self, projection: Projection) -> None:
+        self._entries[projection.model] = (time.monotonic(), projection.version, projection)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get(self, db: Any, model: str) -> Optional[Projection]:
+        """Return the active projection for ``model``, reloading when it changed."""
+        entry = self._entries.get(model)
+        if entry is not None and time.monotonic() - entry[0] < self.refresh:
+            return entry[2]
+        if entry is not None:
+            try:
+                version = await db.get_projection_version(model)
+            except Exception:  # noqa: BLE001
+                # Keep serving the cached projection until a check succeeds.
+                return entry[2]
+            if version == entry[1]:
+                self._entries[model] = (time.monotonic(), version, entry[2])
+                return entry[2]
+        row = await db.get_projection(model)
+        projection = Projection.from_row(row) if row else None
+        version = int(row.get("version", 0)) if row else None
+        self._entries[model] = (time.monotonic(), version, projection)
+        return projection
+
+
+projections = ProjectionRegistry()
+
+
+async def fit_projection(
+    db: Any,
+    model: str,
+    dims: int,
+    sample_size: int = PROJECTION_SAMPLE_SIZE,
+    candidate_dims: Sequence[int] = (),
+    k: int = 10,
+) -> Tuple[Projection, List[Dict[str, float]]]:
+    """Fit and store an inactive projection; return it with its recall report.
+
+    The PCA is fitted once at the largest requested dimension and truncated
+    for each candidate, since principal axes are nested. Searches keep using
+    the active projection until :class:`ProjectionRollout` activates this one.
+    """
+    active = await db.get_projection(model)
+    if active is not None and int(active["dims"]) != dims:
+        raise ProjectionError(
+            f"the active projection has {active['dims']} dimensions, "
+            "a refit must keep them"
+        )
+    sample = np.asarray(await db.sample_embeddings(sample_size), dtype=np.float32)
+    widest = max([dims, *candidate_dims])
+    full = await asyncio.to_thread(fit_pca, model, sample, widest)
+    report = await asyncio.to_thread(
+        recall_report, full, sample, [*candidate_dims, dims], k
+    )
+    projection = full.truncate(dims)
+    if not await db.store_projection(projection, active=False):
+        raise ProjectionError("failed to store projection")
+    return projection, report
+
+
+async def backfill_reduced(
+    db: Any,
+    projection: Projection,
+    batch: int = PROJECTION_BACKFILL_BATCH,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Project every row not yet at ``projection.version``, a page per call."""
+    done = 0
+    after: Optional[str] = None
+    while True:
+        rows = await db.list_embeddings(after, batch, stale_for=projection.version)
+        if not rows:
+            return done
+        reduced = projection.project_batch(np.array([r["embedding"] for r in rows]))
+        done += await db.update_reduced_embeddings(
+            [(row["doc_id"], vector.tolist()) for row, vector in zip(rows, reduced)],
+            projection.version,
+        )
+        if on_progress is not None:
+            on_progress(done)
+        after = str(rows[-1]["doc_id"])
+
+
+class ProjectionRollout:
+    """Backfills a stored projection, then activates it; one rollout at a time.
+
+    The backfill walks rows in ``doc_id`` order while writes continue, so a
+    catch-up pass runs before activation. Workers still holding the previous
+    projection may store rows with it until their next version check, so a
+    final sweep runs ``settle`` seconds after activation.
+    """
+
+    def __init__(
+        self,
+        batch: int = PROJECTION_BACKFILL_BATCH,
+        settle: float = PROJECTION_REFRESH_SECONDS,
+    ) -> None:
+        self.batch = batch
+        self.settle = settle
+        self.model: Optional[str] = None
+        self.dims: Optional[int] = None
+        self.status = "idle"
+        self.backfilled = 0
+        self.error: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "dims": self.dims,
+            "status": self.status,
+            "backfilled": self.backfilled,
+            "error": self.error,
+            "finished_at": self.finished_at,
+        }
+
+    async def _backfill(self, db: Any, projection: Projection) -> None:
+        base = self.backfilled
+
+        def progress(done: int) -> None:
+            self.backfilled = base + done
+
+        await backfill_reduced(db, projection, self.batch, progress)
+
+    async def run(self, db: Any, projection: Projection) -> bool:
+        """Backfill and activate ``projection``; return whether it is now active."""
+        async with self._lock:
+            self.model, self.dims = projection.model, projection.dims
+            self.status, self.backfilled, self.error = "backfilling", 0, None
+            self.finished_at = None
+            activated = False
+            try:
+                await self._backfill(db, projection)
+                # Rows inserted behind the cursor while the backfill ran.
+                await self._backfill(db, projection)
+                if not await db.activate_projection(projection.model):
+                    raise ProjectionError("no stored projection to activate")
+                activated = True
+                projections.set(projection)
+                self.status = "sweeping"
+                await asyncio.sleep(self.settle)
+                await self._backfill(db, projection)
+            except Exception as exc:  # noqa: BLE001
+                self.status, self.error = "failed", str(exc)
+                logger.error(
+                    "projection rollout failed",
+                    model=projection.model,
+                    activated=activated,
+                    backfilled=self.backfilled,
+                    error=str(exc),
+                )
+                return False
+            finally:
+                self.finished_at = datetime.now(timezone.utc).isoformat()
+            self.status = "active"
+            logger.info(
+                "projection activated",
+                model=projection.model,
+                dims=projection.dims,
+                backfilled=self.backfilled,
+            )
+            return True
+
+
+projection_rollout = ProjectionRollout()
+
+
+__all__ = [
+    "EMBEDDING_PROJECTION",
+    "PROJECTION_MAX_SAMPLE_SIZE",
+    "PROJECTION_SAMPLE_SIZE",
+    "Projection",
+    "ProjectionError",
+    "ProjectionRegistry",
+    "ProjectionRollout",
+    "backfill_reduced",
+    "fit_pca",
+    "fit_projection",
+    "projection_rollout",
+    "projections",
+    "recall_report",
+]
@@ -0,0 +1,223 @@
+"""Cursor pagination for search results.
+
+A query with ``paginate`` set returns a cursor along with its first page.
+The cursor is an opaque URL-safe token holding:
+
+- a reference to the query vector (a digest of its float32 bytes)
+- a fingerprint of the query's result-shaping parameters
+- how many results have been returned so far
+- the ``(distance, id)`` of the last result
+
+Passing it back as ``Query.cursor`` returns the next page. Plain vector
+search continues with keyset pagination: the search RPC starts after the
+last ``(distance, id)`` instead of re-ranking the earlier pages. MMR
+selection depends on every earlier pick, so MMR pages are cut from a deeper
+re-ranking and end at ``MMR_MAX_CANDIDATES`` results.
+
+Query vectors are kept per process for ``SEARCH_CURSOR_TTL`` seconds so that
+text searches can continue without embedding the query again.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from ..models.document import Document
+from ..models.query import Query
+from .database import DatabaseService
+from .mmr import MMR_MAX_CANDIDATES, diversified_search, scored_search
+
+
+SEARCH_CURSOR_TTL = float(os.getenv("SEARCH_CURSOR_TTL", "600"))
+SEARCH_CURSOR_VECTORS = int(os.getenv("SEARCH_CURSOR_VECTORS", "1000"))
+
+CURSOR_VERSION = 1
+# HTTP response header carrying the cursor for the next page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class CursorError(Exception):
+    """Raised when a search cursor is malformed or belongs to another query."""
+
+
+def vector_ref(embedding: Sequence[float]) -> str:
+    """Short digest identifying a query vector."""
+    data = np.asarray(embedding, dtype=np.float32).tobytes()
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def query_fingerprint(query: Query) -> str:
+    """Digest of everything except the page size that decides the result order."""
+    scope = query.model_dump(
+        exclude={"match_count", "paginate", "cursor", "latency_budget_ms", "recall_target"},
+        mode="json",
+    )
+    return hashlib.sha256(json.dumps(scope, sort_keys=True).encode()).hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class SearchCursor:
+    ref: str
+    fingerprint: str
+    offset: int
+    distance: Optional[float] = None
+    last_id: Optional[str] = None
+
+    @property
+    def after(self) -> Optional[Tuple[float, UUID]]:
+        if self.distance is None or self.last_id is None:
+            return None
+        return self.distance, UUID(self.last_id)
+
+    def encode(self) -> str:
+        payload = json.dumps({"v": CURSOR_VERSION, **asdict(self)}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "SearchCursor":
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+            if payload.pop("v") != CURSOR_VERSION:
+                raise ValueError("unsupported cursor version")
+            cursor = cls(**payload)
+            if not isinstance(cursor.offset, int) or cursor.offset < 0:
+                raise ValueError("invalid cursor offset")
+            if cursor.distance is not None and not isinstance(cursor.distance, (int, float)):
+                raise ValueError("invalid cursor distance")
+            if cursor.last_id is not None:
+                UUID(cursor.last_id)
+            return cursor
+        except (ValueError, TypeError, KeyError, AttributeError) as exc:
+            raise CursorError("invalid search cursor") from exc
+
+
+@dataclass
+class SearchPage:
+    documents: List[Document]
+    next_cursor: Optional[str] = None
+    # Cosine distance per document, None where the search did not report one.
+    distances: List[Optional[float]] = field(default_factory=list)
+
+
+class CursorVectorStore:
+    """LRU/TTL map from vector reference to query vector."""
+
+    def __init__(self, size: int = SEARCH_CURSOR_VECTORS, ttl: float = SEARCH_CURSOR_TTL) -> None:
+        self.size = size
+        self.ttl = ttl
+        self._vectors: OrderedDict[str, Tuple[float, List[float]]] = OrderedDict()
+
+    def put(self, ref: str, embedding: Sequence[float]) -> None:
+        if self.size <= 0:
+            return
+        self._vectors[ref] = (time.monotonic() + self.ttl, list(embedding))
+        self._vectors.move_to_end(ref)
+        while len(self._vectors) > self.size:
+            self._vectors.popitem(last=False)
+
+    def get(self, ref: str) -> Optional[List[float]]:
+        entry = self._vectors.get(ref)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._vectors[ref]
+            return None
+        self._vectors.move_to_end(ref)
+        return entry[1]
+
+    def clear(self) -> None:
+        self._vectors.clear()
+
+
+cursor_vectors = CursorVectorStore()
+
+
+def cursor_embedding(query: Query) -> Optional[List[float]]:
+    """The stored query vector for ``query.cursor``, if it is still held."""
+    if query.cursor is None:
+        return None
+    return cursor_vectors.get(SearchCursor.decode(query.cursor).ref)
+
+
+async def paginated_search(
+    db: DatabaseService, embedding: Sequence[float], query: Query
+) -> SearchPage:
+    """Return one page of results and the cursor for the next one.
+
+    Without ``paginate`` or ``cursor`` this is ``scored_search`` and no
+    cursor is returned. A cursor issued for a different query or vector
+    raises ``CursorError``.
+    """
+    if query.cursor is None and not query.paginate:
+        scored = await scored_search(db, embedding, query)
+        return SearchPage([doc for doc, _ in scored], distances=[d for _, d in scored])
+    ref = vector_ref(embedding)
+    fingerprint = query_fingerprint(query)
+    start = SearchCursor(ref, fingerprint, 0)
+    if query.cursor is not None:
+        start = SearchCursor.decode(query.cursor)
+        if start.ref != ref or start.fingerprint != fingerprint:
+            raise CursorError("search cursor does not match this query")
+    cursor_vectors.put(ref, embedding)
+
+    page = query.model_copy(update={"paginate": False, "cursor": None})
+    scored: List[Tuple[Document, Optional[float]]]
+    if query.mmr_lambda is not None:
+        depth = min(start.offset + query.match_count, MMR_MAX_CANDIDATES)
+        docs = await diversified_search(
+            db, embedding, page.model_copy(update={"match_count": depth})
+        )
+        scored = [(doc, None) for doc in docs[start.offset :]]
+        exhausted = len(docs) < depth or depth >= MMR_MAX_CANDIDATES
+    elif start.offset and start.after is None:
+        # No distance to continue from: cut the page from a deeper search.
+        depth = start.offset + query.match_count
+        deeper = await db.vector_search_scored(
+            embedding, page.model_copy(update={"match_count": depth})
+        )
+        scored = deeper[start.offset :]
+        exhausted = len(deeper) < depth
+    else:
+        scored = await db.vector_search_scored(
+            embedding, page, after=start.after, depth=start.offset
+        )
+        exhausted = len(scored) < query.match_count
+
+    documents = [doc for doc, _ in scored]
+    distances = [distance for _, distance in scored]
+    if exhausted or not scored:
+        return SearchPage(documents, distances=distances)
+    last, distance = scored[-1]
+    next_cursor = SearchCursor(
+        ref=ref,
+        fingerprint=fingerprint,
+        offset=start.offset + len(scored),
+        distance=distance,
+        last_id=str(last.id) if distance is not None else None,
+    )
+    return SearchPage(documents, next_cursor.encode(), distances)
+
+
+__all__ = [
+    "CursorError",
+    "CursorVectorStore",
+    "NEXT_CURSOR_HEADER",
+    "SearchCursor",
+    "SearchPage",
+    "cursor_embedding",
+    "cursor_vectors",
+    "paginated_search",
+    "query_fingerprint",
+    "vector_ref",
+]
@@ -0,0 +1,66 @@
+"""Progressive search that yields results as each stage produces them.
+
+A small high-confidence query runs alongside the full search. If it
+finishes first its hits are yielded straight away, followed by the full
+ranking once it arrives. Clients get useful results after the fastest
+backend round trip instead of the slowest.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import AsyncIterator, List, Sequence, Tuple
+
+from ..models.document import Document
+from ..models.query import Query
+from .database import DatabaseService
+from .mmr import diversified_search
+
+
+SEARCH_STREAM_EARLY_COUNT = int(os.getenv("SEARCH_STREAM_EARLY_COUNT", "3"))
+SEARCH_STREAM_EARLY_THRESHOLD = float(os.getenv("SEARCH_STREAM_EARLY_THRESHOLD", "0.8"))
+
+
+async def stream_search(
+    db: DatabaseService,
+    embedding: Sequence[float],
+    query: Query,
+    early_count: int = SEARCH_STREAM_EARLY_COUNT,
+    early_threshold: float = SEARCH_STREAM_EARLY_THRESHOLD,
+) -> AsyncIterator[Tuple[str, List[Document]]]:
+    """Yield ``("early", hits)`` when the early stage wins, then ``("full", ranking)``.
+
+    The full ranking is complete, so it may repeat early hits. The early
+    stage is skipped for MMR queries, whose final set may drop documents
+    that are individually the most relevant.
+    """
+    full = asyncio.ensure_future(diversified_search(db, embedding, query))
+    early = None
+    try:
+        if query.mmr_lambda is None and 0 < early_count < query.match_count:
+            early = asyncio.ensure_future(
+                db.vector_search(
+                    embedding,
+                    query.model_copy(
+                        update={
+                            "match_count": early_count,
+                            "threshold": max(query.threshold, early_threshold),
+                        }
+                    ),
+                )
+            )
+            await asyncio.wait({early, full}, return_when=asyncio.FIRST_COMPLETED)
+            if early.done() and not full.done() and early.exception() is None:
+                yield "early", early.result()
+        yield "full", await full
+    finally:
+        # Also reached when the client disconnects mid-stream.
+        for task in (early, full):
+            if task is not None and not task.done():
+                task.cancel()
+        if early is not None and early.done() and not early.cancelled():
+            early.exception()  # mark retrieved so failures are not logged
+
+
+__all__ = ["stream_search"]
@@ -0,0 +1,93 @@
+"""Compact search summaries for room broadcasts.
+
+``search:completed`` goes to every client in a project room, so it carries
+one small entry per result (id, rank, score, title, snippet) rather than
+whole documents with their content and embeddings. The score is the cosine
+similarity ``1 - distance`` that ``threshold`` is compared against; it is
+omitted when the search did not report a distance (MMR re-ranking). Clients fetch a document from
+``GET /documents/{id}`` when they need it. The summary keeps at most
+``SEARCH_BROADCAST_MAX_RESULTS`` entries and stops adding entries once the
+serialized payload would exceed ``SEARCH_BROADCAST_MAX_BYTES``. The query
+text is clipped to ``QUERY_CHARS``, as ``Query`` does not bound its length.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..models.document import Document
+
+
+SEARCH_BROADCAST_MAX_RESULTS = int(os.getenv("SEARCH_BROADCAST_MAX_RESULTS", "20"))
+SEARCH_BROADCAST_SNIPPET_CHARS = int(os.getenv("SEARCH_BROADCAST_SNIPPET_CHARS", "200"))
+SEARCH_BROADCAST_MAX_BYTES = int(os.getenv("SEARCH_BROADCAST_MAX_BYTES", "16384"))
+
+TITLE_CHARS = 120
+QUERY_CHARS = 200
+# Raw characters read per clipped character; leaves room for collapsed whitespace.
+CLIP_WINDOW = 8
+
+
+def _clip(text: str, limit: int) -> str:
+    # Collapse whitespace in a bounded prefix only, as content can be megabytes.
+    head = text[: limit * CLIP_WINDOW + 1]
+    clipped = " ".join(head.split())
+    if len(clipped) <= limit and len(head) == len(text):
+        return clipped
+    return clipped[: max(limit - 1, 0)].rstrip() + "…"
+
+
+def result_summary(
+    doc: Document, rank: int, snippet_chars: int, distance: Optional[float] = None
+) -> Dict[str, Any]:
+    """Summarize one result; the title falls back to the filename, URL or text."""
+    meta = doc.metadata
+    title = meta.get("title") or meta.get("filename") or meta.get("url") or doc.content
+    entry: Dict[str, Any] = {
+        "id": str(doc.id),
+        "source_id": str(doc.source_id),
+        "rank": rank,
+        "title": _clip(str(title), TITLE_CHARS),
+        "snippet": _clip(doc.content, snippet_chars),
+    }
+    if distance is not None:
+        entry["score"] = round(1 - distance, 4)
+    return entry
+
+
+def search_summary(
+    query_text: str,
+    results: Sequence[Document],
+    distances: Optional[Sequence[Optional[float]]] = None,
+    max_results: int = SEARCH_BROADCAST_MAX_RESULTS,
+    snippet_chars: int = SEARCH_BROADCAST_SNIPPET_CHARS,
+    max_bytes: int = SEARCH_BROADCAST_MAX_BYTES,
+) -> Dict[str, Any]:
+    """Build the ``search:completed`` payload for ``results`` in rank order.
+
+    ``distances``, when given, holds the cosine distance of each result.
+    """
+    payload: Dict[str, Any] = {
+        "query": _clip(query_text, QUERY_CHARS),
+        "total": len(results),
+        "results": [],
+        "truncated": False,
+    }
+    entries: List[Dict[str, Any]] = payload["results"]
+    size = len(json.dumps(payload, ensure_ascii=False).encode())
+    for rank, doc in enumerate(results[:max_results], start=1):
+        distance = distances[rank - 1] if distances else None
+        entry = result_summary(doc, rank, snippet_chars, distance)
+        # Each entry adds its own length plus a separating comma.
+        entry_size = len(json.dumps(entry, ensure_ascii=False).encode()) + 1
+        if size + entry_size > max_bytes:
+            break
+        entries.append(entry)
+        size += entry_size
+    payload["truncated"] = len(entries) < len(results)
+    return payload
+
+
+__all__ = ["result_summary", "search_summary"]
@@ -0,0 +1,217 @@
+"""Sampling log of slow database operations.
+
+Every ``DatabaseService`` call is timed. When one takes at least
+``SLOW_OP_THRESHOLD_MS`` and passes the ``SLOW_OP_SAMPLE_RATE`` draw, its
+name, redacted parameters, duration, row count and error are kept in a
+bounded in-memory log and emitted as a structured warning. For RPC calls
+the service can also capture the query plan with
+``EXPLAIN (ANALYZE, BUFFERS)``. That runs the query a second time in the
+background, so it is opt-in through ``SLOW_OP_EXPLAIN``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Set
+
+from loguru import logger
+from prometheus_client import Counter
+
+from src.common.metrics import shared_metric
+
+
+SLOW_OP_THRESHOLD_MS = float(os.getenv("SLOW_OP_THRESHOLD_MS", "500"))
+SLOW_OP_SAMPLE_RATE = float(os.getenv("SLOW_OP_SAMPLE_RATE", "1.0"))
+SLOW_OP_LOG_SIZE = int(os.getenv("SLOW_OP_LOG_SIZE", "200"))
+SLOW_OP_EXPLAIN = os.getenv("SLOW_OP_EXPLAIN", "false").lower() == "true"
+
+SLOW_OPERATIONS = shared_metric(
+    Counter,
+    "db_slow_operations_total",
+    "Database operations over the slow threshold",
+    ["operation"],
+)
+
+# Parameters whose values may hold user text or credentials.
+REDACTED_KEYS = {"query_text", "content", "password", "token", "secret", "api_key"}
+MAX_VALUE_CHARS = 64
+_UUID = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+
+Explain = Callable[[], Awaitable[Optional[str]]]
+
+
+def redact(value: Any, key: str = "") -> Any:
+    """Make a parameter safe to log: hide text, summarize vectors and bulk data."""
+    if key in REDACTED_KEYS:
+        return "<redacted>"
+    if isinstance(value, dict):
+        return {k: redact(v, str(k)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if len(value) > 8 and all(isinstance(v, (int, float)) for v in value):
+            return f"<{len(value)} numbers>"
+        items = [redact(v, key) for v in value[:20]]
+        if len(value) > 20:
+            items.append(f"<{len(value) - 20} more>")
+        return items
+    if isinstance(value, str) and len(value) > MAX_VALUE_CHARS and not _UUID.match(value):
+        return f"<{len(value)} chars>"
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+@dataclass
+class SlowOperation:
+    id: int
+    operation: str
+    started_at: str
+    duration_ms: float
+    rows: Optional[int]
+    params: Dict[str, Any]
+    error: Optional[str] = None
+    plan: Optional[str] = None
+
+
+class OperationSpan:
+    """Span wrapper that also keeps what the slow-operation log reports."""
+
+    def __init__(self, span: Any, params: Dict[str, Any]) -> None:
+        self._span = span
+        self.params = params
+        self.rows: Optional[int] = None
+        self.error: Optional[str] = None
+        # Set by RPC paths to allow plan capture when the call is slow.
+        self.explain: Optional[Explain] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if key == "db.rows":
+            self.rows = int(value)
+        self._span.set_attribute(key, value)
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.error = type(exc).__name__
+        self._span.record_exception(exc)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._span, name)
+
+
+class SlowOperationLog:
+    """Bounded, sampled record of operations slower than ``threshold_ms``."""
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_OP_THRESHOLD_MS,
+        sample_rate: float = SLOW_OP_SAMPLE_RATE,
+        size: int = SLOW_OP_LOG_SIZE,
+        explain: bool = SLOW_OP_EXPLAIN,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.explain = explain
+        self._rng = rng
+        self._entries: Deque[SlowOperation] = deque(maxlen=max(size, 1))
+        self._ids = itertools.count(1)
+        self._pending: Set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def should_record(self, duration_ms: float) -> bool:
+        return duration_ms >= self.threshold_ms and self._rng() < self.sample_rate
+
+    def record(
+        self, operation: str, started: float, duration_ms: float, span: OperationSpan
+    ) -> SlowOperation:
+        entry = SlowOperation(
+            id=next(self._ids),
+            operation=operation,
+            started_at=datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            duration_ms=round(duration_ms, 2),
+            rows=span.rows,
+            params=redact(span.params),
+            error=span.error,
+        )
+        self._entries.append(entry)
+        SLOW_OPERATIONS.labels(operation).inc()
+        logger.warning(
+            "slow database operation",
+            operation=entry.operation,
+            duration_ms=entry.duration_ms,
+            rows=entry.rows,
+            params=entry.params,
+            error=entry.error,
+        )
+        return entry
+
+    @contextmanager
+    def track(
+        self, operation: str, span: Any, params: Optional[Dict[str, Any]] = None
+    ) -> Iterator[OperationSpan]:
+        """Time the enclosed block and log it when it is slow."""
+        op = OperationSpan(span, dict(params or {}))
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            yield op
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if self.should_record(duration_ms):
+                entry = self.record(operation, started, duration_ms, op)
+                if self.explain and op.explain is not None:
+                    self._capture_plan(entry, op.explain)
+
+    def _capture_plan(self, entry: SlowOperation, explain: Explain) -> None:
+        async def capture() -> None:
+            try:
+                entry.plan = await explain()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(
+                    "query plan capture failed", operation=entry.operation, error=str(exc)
+                )
+                return
+            if entry.plan:
+                logger.info(
+                    "slow operation plan",
+                    id=entry.id,
+                    operation=entry.operation,
+                    plan=entry.plan,
+                )
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(capture())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def snapshot(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Logged operations, newest first."""
+        entries = list(reversed(self._entries))
+        return [asdict(e) for e in entries[:limit]]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+slow_operations = SlowOperationLog()
+
+
+__all__ = [
+    "OperationSpan",
+    "SlowOperation",
+    "SlowOperationLog",
+    "redact",
+    "slow_operations",
+]
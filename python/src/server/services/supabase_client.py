@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from typing import Optional
 
@@ -34,12 +35,19 @@ class SupabaseClient:
             timeout=timeout, limits=httpx.Limits(max_connections=pool)
         )
         self._client: Optional[AsyncClient] = None
+        self._connect_lock = asyncio.Lock()
         self._tracer = trace.get_tracer(__name__)
 
     async def get_client(self) -> AsyncClient:
         """Get or create a connected Supabase client with retry logic."""
         if self._client is not None:
             return self._client
+        async with self._connect_lock:
+            if self._client is not None:
+                return self._client
+            return await self._connect()
+
+    async def _connect(self) -> AsyncClient:
         with self._tracer.start_as_current_span("supabase.connect") as span:
             try:
                 async for attempt in AsyncRetrying(
@@ -62,3 +70,22 @@ class SupabaseClient:
     async def close(self) -> None:
         """Close the underlying HTTP session."""
         await self._session.aclose()
+
+
+_shared: Optional[SupabaseClient] = None
+
+
+def get_shared_client() -> SupabaseClient:
+    """Return the process-wide client so requests reuse its connection pool."""
+    global _shared
+    if _shared is None:
+        _shared = SupabaseClient()
+    return _shared
+
+
+async def close_shared_client() -> None:
+    """Close the process-wide client, e.g. on application shutdown."""
+    global _shared
+    if _shared is not None:
+        await _shared.close()
+        _shared = None
@@ -0,0 +1,135 @@
+"""Startup warm-up and readiness tracking.
+
+Warm-up steps open pooled connections, run a probe embedding and preload
+per-process caches so the first requests after a deploy do not pay for
+them. Steps run concurrently, each under ``WARMUP_TIMEOUT``; the service
+reports ready once they have finished and every required step succeeded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+from prometheus_client import Gauge
+
+from src.common.metrics import shared_metric
+
+from .content_index import content_index
+from .database import DatabaseService
+from .embedding import embedding_model, warm_up_embedding
+from .reduction import EMBEDDING_PROJECTION, projections
+
+
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "60"))
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "4"))
+
+WARMUP_SECONDS = shared_metric(
+    Gauge,
+    "warmup_duration_seconds", "Time taken by the startup warm-up", ["service"]
+)
+
+Step = Callable[[], Awaitable[Any]]
+
+
+class WarmupError(Exception):
+    """Raised when a warm-up step cannot complete."""
+
+
+class Readiness:
+    """Outcome of the warm-up, as reported by the readiness endpoint."""
+
+    def __init__(self, service: str) -> None:
+        self.service = service
+        self.ready = False
+        self.checks: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "checks": dict(self.checks)}
+
+    def start(self, steps: Dict[str, Step], required: Iterable[str] = ()) -> None:
+        """Run ``steps`` in the background so startup itself is not delayed."""
+        self.checks = {name: "pending" for name in steps}
+        self._task = asyncio.get_running_loop().create_task(
+            run_warmup(self, steps, required)
+        )
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+async def _run_step(readiness: Readiness, name: str, step: Step, timeout: float) -> None:
+    readiness.checks[name] = "pending"
+    try:
+        await asyncio.wait_for(step(), timeout)
+        readiness.checks[name] = "ok"
+    except asyncio.TimeoutError:
+        readiness.checks[name] = "timeout"
+    except Exception as exc:  # noqa: BLE001
+        readiness.checks[name] = "failed"
+        logger.warning("warm-up step failed", step=name, error=str(exc))
+
+
+async def run_warmup(
+    readiness: Readiness,
+    steps: Dict[str, Step],
+    required: Iterable[str] = (),
+    timeout: float = WARMUP_TIMEOUT,
+) -> None:
+    """Run every step, then mark ``readiness`` ready if required ones passed."""
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(_run_step(readiness, name, step, timeout) for name, step in steps.items())
+    )
+    elapsed = time.perf_counter() - start
+    WARMUP_SECONDS.labels(readiness.service).set(elapsed)
+    readiness.ready = all(readiness.checks.get(name) == "ok" for name in required)
+    logger.info(
+        "warm-up finished",
+        service=readiness.service,
+        ready=readiness.ready,
+        seconds=round(elapsed, 3),
+        checks=readiness.checks,
+    )
+
+
+async def warm_database(db: DatabaseService, connections: int = WARMUP_CONNECTIONS) -> None:
+    """Connect and open ``connections`` pooled connections with concurrent pings."""
+    results = await asyncio.gather(*(db.ping() for _ in range(max(1, connections))))
+    if not all(results):
+        raise WarmupError("database ping failed")
+
+
+async def warm_caches(db: DatabaseService) -> None:
+    """Seed the content-hash filter and load the active projection."""
+    if not await content_index.preload(db):
+        raise WarmupError("content index seeding failed")
+    if EMBEDDING_PROJECTION:
+        await projections.get(db, embedding_model())
+
+
+def warmup_steps(db: DatabaseService) -> Dict[str, Step]:
+    """Warm-up shared by the API server and the MCP server."""
+    return {
+        "database": lambda: warm_database(db),
+        "embedding": warm_up_embedding,
+        "caches": lambda: warm_caches(db),
+    }
+
+
+__all__ = [
+    "Readiness",
+    "Step",
+    "WarmupError",
+    "run_warmup",
+    "warm_caches",
+    "warm_database",
+    "warmup_steps",
+]
@@ -1,9 +1,51 @@
 import os
 import sys
 from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
 
 os.environ.setdefault("JWT_SECRET", "s" * 32)
 os.environ.setdefault("SUPABASE_URL", "http://test")
 os.environ.setdefault("SUPABASE_KEY", "test")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault("QUERY_CACHE_SIZE", "0")
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+
+class RecordingSupabase:
+    """Supabase client fake that records RPC calls and returns canned rows per RPC name."""
+
+    def __init__(self, data: Optional[Dict[str, List[Dict[str, Any]]]] = None, fail: bool = False):
+        self.data = data or {}
+        self.fail = fail
+        self.calls: List[tuple[str, Dict[str, Any]]] = []
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> Any:
+        self.calls.append((name, params))
+        rows = self.data.get(name, [])
+        fail = self.fail
+
+        class _Result:
+            async def execute(self) -> Any:
+                if fail:
+                    raise RuntimeError("timeout")
+                return SimpleNamespace(data=rows)
+
+        return _Result()
+
+
+class RecordingProvider:
+    def __init__(self, data: Optional[Dict[str, List[Dict[str, Any]]]] = None, fail: bool = False):
+        self.client = RecordingSupabase(data, fail)
+
+    async def get_client(self) -> RecordingSupabase:
+        return self.client
+
+
+@pytest.fixture
+def recording_provider() -> Callable[..., RecordingProvider]:
+    """Factory for client providers whose RPC calls land in ``provider.client.calls``."""
+    return RecordingProvider
@@ -0,0 +1,76 @@
+import pytest
+
+from src.server.services import admission
+from src.server.services.admission import AdmissionController, AdmissionRejectedError
+
+
+def _controller(**overrides) -> AdmissionController:
+    limits = {
+        "max_bytes": 100,
+        "max_jobs": 3,
+        "project_max_bytes": 60,
+        "project_max_jobs": 2,
+    }
+    limits.update(overrides)
+    return AdmissionController(**limits)
+
+
+def test_admit_and_release_tracks_reservations() -> None:
+    ctrl = _controller()
+    first = ctrl.admit("p", 10)
+    second = ctrl.admit("q", 20)
+    assert (ctrl.jobs, ctrl.bytes) == (2, 30)
+    first.release()
+    first.release()
+    with second:
+        pass
+    assert (ctrl.jobs, ctrl.bytes) == (0, 0)
+
+
+def test_project_quota_answers_429() -> None:
+    ctrl = _controller()
+    ctrl.admit("p", 10)
+    ctrl.admit("p", 10)
+    with pytest.raises(AdmissionRejectedError) as exc:
+        ctrl.admit("p", 10)
+    assert exc.value.status_code == 429
+    assert exc.value.retry_after >= 1
+    # Other projects are unaffected by one tenant's quota.
+    ctrl.admit("q", 10)
+
+
+def test_project_byte_quota_answers_429() -> None:
+    ctrl = _controller()
+    ctrl.admit("p", 50)
+    with pytest.raises(AdmissionRejectedError) as exc:
+        ctrl.admit("p", 20)
+    assert exc.value.status_code == 429
+
+
+def test_global_capacity_answers_503() -> None:
+    ctrl = _controller()
+    for project in "abc":
+        ctrl.admit(project, 10)
+    with pytest.raises(AdmissionRejectedError) as exc:
+        ctrl.admit("d", 10)
+    assert exc.value.status_code == 503
+
+
+def test_global_byte_budget_allows_single_oversized_upload() -> None:
+    ctrl = _controller(project_max_bytes=1000)
+    big = ctrl.admit("a", 500)
+    with pytest.raises(AdmissionRejectedError):
+        ctrl.admit("b", 1)
+    big.release()
+    ctrl.admit("b", 1)
+
+
+def test_retry_after_grows_with_job_duration(monkeypatch) -> None:
+    ctrl = _controller(max_jobs=1)
+    clock = iter([0.0, 30.0, 30.0])
+    monkeypatch.setattr(admission.time, "monotonic", lambda: next(clock))
+    ctrl.admit("a", 1).release()
+    ctrl.admit("a", 1)
+    with pytest.raises(AdmissionRejectedError) as exc:
+        ctrl.admit("b", 1)
+    assert exc.value.retry_after > 1
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.server.auth.dependencies import jwt_service
+from src.server.database.migrations import split_statements
+from src.server.main import api
+from src.server.models.document import Document
+from src.server.models.query import Query
+from src.server.routes import get_database_service
+from src.server.services import ann_tuning, database
+from src.server.services.ann_tuning import (
+    Calibration,
+    CalibrationPoint,
+    CalibrationRegistry,
+    calibrate_database,
+    calibrate_index,
+    run_benchmark,
+)
+from src.server.services.database import DatabaseService
+from src.server.services.quantization import QuantizedIndex
+
+
+def table() -> Calibration:
+    return Calibration(
+        backend="match_documents",
+        k=10,
+        points=[
+            CalibrationPoint({"ef_search": 16}, latency_ms=5, recall=0.80),
+            CalibrationPoint({"ef_search": 40}, latency_ms=12, recall=0.92),
+            CalibrationPoint({"ef_search": 100}, latency_ms=25, recall=0.97),
+            CalibrationPoint({"ef_search": 400}, latency_ms=80, recall=0.995),
+        ],
+    )
+
+
+def test_choose_by_budget_and_recall_target() -> None:
+    cal = table()
+    assert cal.choose() is None
+    assert cal.choose(latency_budget_ms=20) == {"ef_search": 40}
+    assert cal.choose(latency_budget_ms=1) == {"ef_search": 16}
+    assert cal.choose(recall_target=0.95) == {"ef_search": 100}
+    assert cal.choose(recall_target=0.999) == {"ef_search": 400}
+    # The budget is a hard limit when both are given.
+    assert cal.choose(latency_budget_ms=20, recall_target=0.95) == {"ef_search": 40}
+    assert cal.choose(latency_budget_ms=100, recall_target=0.95) == {"ef_search": 100}
+
+
+def test_calibration_row_round_trip() -> None:
+    cal = table()
+    assert Calibration.from_row(cal.to_row()) == cal
+
+
+@pytest.mark.asyncio
+async def test_run_benchmark_scores_recall_per_step() -> None:
+    async def exact(q: int) -> List[int]:
+        return [q, q + 1, q + 2, q + 3]
+
+    async def search(q: int, params: Dict[str, int]) -> List[int]:
+        return [q, q + 1, q + 2, q + 3][: params["depth"]]
+
+    cal = await run_benchmark("b", [0, 10], exact, search, [{"depth": 1}, {"depth": 4}], k=4)
+    assert [p.recall for p in cal.points] == [0.25, 1.0]
+    assert all(p.latency_ms >= 0 for p in cal.points)
+
+
+@pytest.mark.asyncio
+async def test_in_process_index_calibration(monkeypatch) -> None:
+    monkeypatch.setattr(ann_tuning, "calibrations", CalibrationRegistry())
+    rng = np.random.default_rng(3)
+    centers = rng.standard_normal((20, 64)).astype(np.float32)
+    vectors = centers[rng.integers(0, 20, 2000)] + 0.4 * rng.standard_normal((2000, 64)).astype(
+        np.float32
+    )
+    index = QuantizedIndex("binary")
+    index.build(vectors)
+    cal = await calibrate_index(index, vectors, vectors[:30], k=10)
+    recalls = [p.recall for p in cal.points]
+    assert recalls == sorted(recalls)
+    assert recalls[-1] > recalls[0]
+    chosen = cal.choose(recall_target=recalls[-1])
+    assert chosen is not None and chosen["oversample"] <= 50
+
+
+class _CalibratedService(DatabaseService):
+    async def get_calibration(self, backend: str) -> Optional[Dict[str, Any]]:
+        return table().to_row() if backend == "match_documents" else None
+
+
+@pytest.mark.asyncio
+async def test_vector_search_applies_calibrated_params(monkeypatch, recording_provider) -> None:
+    monkeypatch.setattr(database, "calibrations", CalibrationRegistry(refresh=60))
+    provider = recording_provider()
+    service = _CalibratedService(provider)
+
+    await service.vector_search([0.1, 0.2], Query(query_text="x"))
+    await service.vector_search([0.1, 0.2], Query(query_text="x", latency_budget_ms=20))
+    await service.vector_search([0.1, 0.2], Query(query_text="x", recall_target=0.99))
+    await service.vector_search(
+        [0.1, 0.2], Query(query_text="x"), search_params={"ef_search": 7, "probes": 2}
+    )
+    await service.vector_search([0.1, 0.2], Query(query_text="x"), exact=True)
+
+    probes = [(p["ef_search"], p["probes"], p["prefilter"]) for _, p in provider.client.calls]
+    assert probes == [
+        (None, None, False),
+        (40, None, False),
+        (400, None, False),
+        (7, 2, False),
+        (None, None, True),
+    ]
+
+
+class _BenchDB:
+    def __init__(self) -> None:
+        self.docs = [Document(id=uuid4(), source_id=uuid4(), content=str(i)) for i in range(5)]
+        self.stored: Optional[Dict[str, Any]] = None
+
+    async def sample_embeddings(self, count: int) -> List[List[float]]:
+        return [[1.0, 0.0]] * 3
+
+    async def vector_search(self, embedding, query, search_params=None, exact=False):
+        if exact:
+            return self.docs[: query.match_count]
+        return self.docs[: min(search_params["ef_search"] // 10, query.match_count)]
+
+    async def store_calibration(self, row: Dict[str, Any]) -> bool:
+        self.stored = row
+        return True
+
+
+@pytest.mark.asyncio
+async def test_calibrate_database_stores_table(monkeypatch) -> None:
+    monkeypatch.setattr(ann_tuning, "calibrations", CalibrationRegistry())
+    db = _BenchDB()
+    cal = await calibrate_database(db, "match_documents", k=4, sample_size=3)
+    assert db.stored == cal.to_row()
+    assert [p.recall for p in cal.points] == [0.25, 1.0, 1.0, 1.0, 1.0]
+
+
+@pytest.mark.asyncio
+async def test_calibration_route_is_admin_only(monkeypatch) -> None:
+    monkeypatch.setattr(ann_tuning, "calibrations", CalibrationRegistry())
+    db = _BenchDB()
+    db.search_backend = "match_documents"
+
+    async def _get_db():
+        return db
+
+    api.dependency_overrides[get_database_service] = _get_db
+    user = {"Authorization": f"Bearer {jwt_service.create_token('u', 'user')}"}
+    admin = {"Authorization": f"Bearer {jwt_service.create_token('a', 'admin')}"}
+    body = {"k": 4, "sample_size": 3}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=api), base_url="http://test") as client:
+            res = await client.post("/admin/calibration", json=body, headers=user)
+            assert res.status_code == 403
+            assert db.stored is None
+
+            res = await client.post("/admin/calibration", json=body, headers=admin)
+            assert res.status_code == 201
+            assert res.json()["data"] == db.stored
+
+            res = await client.post("/search/calibration", json=body, headers=admin)
+            assert res.status_code in (404, 405)
+    finally:
+        api.dependency_overrides.clear()
+
+
+def test_calibration_migration_splits_into_statements() -> None:
+    path = Path(__file__).resolve().parents[2] / "migration" / "9_ann_calibration.sql"
+    statements = split_statements(path.read_text())
+    functions = [s for s in statements if "CREATE OR REPLACE FUNCTION" in s]
+    assert len(functions) == 4
+    assert sum("apply_search_params(ef_search, probes)" in s for s in functions) == 3
@@ -0,0 +1,86 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from src.server.services.archive_reader import (
+    ArchiveError,
+    EntryTooLargeError,
+    entry_content_type,
+    iter_archive,
+)
+
+
+def _zip(files: dict) -> io.BytesIO:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+
+def _tar(files: dict) -> io.BytesIO:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    buf.seek(0)
+    return buf
+
+
+FILES = {
+    "docs/a.txt": b"alpha",
+    "docs/b.md": b"beta",
+    "docs/c.pdf": b"%PDF",
+    "docs/image.png": b"\x89PNG",
+    "docs/.hidden.txt": b"secret",
+    "__MACOSX/docs/._a.txt": b"junk",
+}
+
+
+def test_entry_content_type() -> None:
+    assert entry_content_type("x/README.MD") == "text/plain"
+    assert entry_content_type("x/y.pdf") == "application/pdf"
+    assert entry_content_type("x/y.exe") is None
+    assert entry_content_type("x/") is None
+
+
+@pytest.mark.parametrize("build", [_zip, _tar])
+def test_iter_archive_filters_supported_entries(build) -> None:
+    entries = {
+        e.name: (e.content_type, e.stream.read())
+        for e in iter_archive(build(FILES), max_entries=10, max_entry_size=100)
+    }
+    assert entries == {
+        "docs/a.txt": ("text/plain", b"alpha"),
+        "docs/b.md": ("text/plain", b"beta"),
+        "docs/c.pdf": ("application/pdf", b"%PDF"),
+    }
+
+
+@pytest.mark.parametrize("build", [_zip, _tar])
+def test_iter_archive_bounds_entry_size(build) -> None:
+    entries = iter_archive(build({"big.txt": b"x" * 50}), max_entries=10, max_entry_size=10)
+    entry = next(entries)
+    with pytest.raises(EntryTooLargeError):
+        while entry.stream.read(4):
+            pass
+
+
+@pytest.mark.parametrize("build", [_zip, _tar])
+def test_iter_archive_limits_entry_count(build) -> None:
+    archive = build({f"{i}.txt": b"x" for i in range(5)})
+    # Rejected before the first entry is yielded.
+    with pytest.raises(ArchiveError, match="too many files"):
+        next(iter_archive(archive, max_entries=3, max_entry_size=10))
+    archive = build({f"{i}.png": b"x" for i in range(5)} | {"a.txt": b"x"})
+    assert len(list(iter_archive(archive, max_entries=3, max_entry_size=10))) == 1
+
+
+def test_iter_archive_rejects_garbage() -> None:
+    with pytest.raises(ArchiveError, match="invalid archive"):
+        list(iter_archive(io.BytesIO(b"plain text"), max_entries=3, max_entry_size=10))
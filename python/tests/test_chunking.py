@@ -0,0 +1,131 @@
+import asyncio
+import math
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from src.server.database.migrations import split_statements
+from src.server.services import chunking
+from src.server.services.chunking import chunk_text, mean_vector, reembed_chunks
+
+
+PARAGRAPHS = [f"paragraph number {i} " * 5 for i in range(40)]
+
+
+def _hashes(text: str) -> list[str]:
+    return [c.hash for c in chunk_text(text, max_chars=400)]
+
+
+def test_chunk_text_covers_all_paragraphs() -> None:
+    chunks = chunk_text("\n\n".join(PARAGRAPHS), max_chars=400)
+    assert len(chunks) > 1
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+    joined = "\n\n".join(c.text for c in chunks)
+    assert all(p.strip() in joined for p in PARAGRAPHS)
+    assert all(len(c.text) <= 400 + 2 * len(PARAGRAPHS) for c in chunks)
+
+
+def test_chunk_text_edit_is_local() -> None:
+    before = _hashes("\n\n".join(PARAGRAPHS))
+    edited = list(PARAGRAPHS)
+    edited[20] = "an edited paragraph"
+    after = _hashes("\n\n".join(edited))
+    assert len(set(after) - set(before)) <= 2
+
+
+def test_chunk_text_splits_long_paragraphs() -> None:
+    chunks = chunk_text("x" * 1000, max_chars=300)
+    assert "".join(c.text.replace("\n\n", "") for c in chunks) == "x" * 1000
+    assert all(len(c.text) <= 300 for c in chunks)
+
+
+def test_mean_vector_is_normalized() -> None:
+    vec = mean_vector([[1.0, 0.0], [0.0, 1.0]])
+    assert math.isclose(math.sqrt(sum(x * x for x in vec)), 1.0)
+    assert mean_vector([]) == []
+
+
+class ChunkDB:
+    def __init__(self) -> None:
+        self.rows = {}
+
+    async def list_chunk_embeddings(self, doc_id):
+        return list(self.rows.values())
+
+    async def upsert_chunk_embeddings(self, doc_id, rows):
+        for row in rows:
+            self.rows[row["chunk_index"]] = row
+
+    async def delete_chunk_embeddings(self, doc_id, from_index=0):
+        for index in [i for i in self.rows if i >= from_index]:
+            del self.rows[index]
+
+
+@pytest.mark.asyncio
+async def test_reembed_chunks_reuses_stored_vectors(monkeypatch) -> None:
+    calls = []
+
+    async def fake_generate(text: str):
+        calls.append(text)
+        return [1.0, float(len(text))]
+
+    monkeypatch.setattr(chunking, "generate_embedding", fake_generate)
+    monkeypatch.setattr(chunking, "CHUNK_BOUNDARY_DIVISOR", 1)
+    db, doc_id = ChunkDB(), uuid4()
+
+    _, diff = await reembed_chunks(db, doc_id, "one\n\ntwo\n\nthree")
+    assert (diff.total, diff.reused, diff.embedded) == (3, 0, 3)
+
+    calls.clear()
+    _, diff = await reembed_chunks(db, doc_id, "one\n\nthree")
+    assert calls == []
+    assert (diff.total, diff.reused, diff.embedded) == (2, 2, 0)
+    assert sorted(db.rows) == [0, 1]
+    assert db.rows[1]["chunk_hash"] == chunk_text("three", divisor=1)[0].hash
+
+
+@pytest.mark.asyncio
+async def test_reembed_chunks_seeds_from_document_embedding(monkeypatch) -> None:
+    calls = []
+
+    async def fake_generate(text: str):
+        calls.append(text)
+        return [0.0, 1.0]
+
+    monkeypatch.setattr(chunking, "generate_embedding", fake_generate)
+    monkeypatch.setattr(chunking, "CHUNK_BOUNDARY_DIVISOR", 1)
+
+    _, diff = await reembed_chunks(
+        ChunkDB(), uuid4(), "intro\n\nmore", previous=("intro", [1.0, 0.0])
+    )
+    assert calls == ["more"]
+    assert diff.reused == 1
+
+
+@pytest.mark.asyncio
+async def test_reembed_chunks_caps_concurrent_embeddings(monkeypatch) -> None:
+    active = peak = 0
+
+    async def fake_generate(text: str):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return [1.0, 0.0]
+
+    monkeypatch.setattr(chunking, "generate_embedding", fake_generate)
+    monkeypatch.setattr(chunking, "CHUNK_BOUNDARY_DIVISOR", 1)
+    monkeypatch.setattr(chunking, "CHUNK_EMBED_CONCURRENCY", 2)
+    content = "\n\n".join(f"paragraph {i}" for i in range(6))
+    _, diff = await reembed_chunks(ChunkDB(), uuid4(), content)
+    assert diff.embedded == 6
+    assert peak == 2
+
+
+def test_replace_embedding_migration_is_one_function() -> None:
+    path = Path(__file__).resolve().parents[2] / "migration" / "13_replace_embedding.sql"
+    [statement] = split_statements(path.read_text())
+    assert "CREATE OR REPLACE FUNCTION replace_embedding(embedding_row JSONB)" in statement
+    assert "DELETE FROM embeddings" in statement and "INSERT INTO embeddings" in statement
@@ -0,0 +1,107 @@
+from uuid import uuid4
+
+import pytest
+
+from src.server.services import content_index
+from src.server.services.content_index import (
+    BloomFilter,
+    ContentIndex,
+    content_hash,
+    normalize_content,
+)
+from src.server.services.database import DatabaseError
+
+
+class FakeHashDB:
+    def __init__(self, rows=None, fail_list: bool = False, fail_after: int = -1) -> None:
+        self.rows = dict(rows or {})
+        self.fail_list = fail_list
+        self.fail_after = fail_after
+        self.pages = 0
+        self.lookups = 0
+
+    async def list_content_hashes(self, after=None, limit=1000):
+        self.pages += 1
+        if self.fail_list or 0 <= self.fail_after < self.pages:
+            raise DatabaseError("down")
+        hashes = sorted(h for h in self.rows if after is None or h > after)
+        return hashes[:limit]
+
+    async def get_content_hash(self, digest):
+        self.lookups += 1
+        return self.rows.get(digest)
+
+    async def store_content_hash(self, digest, doc_id, embedding):
+        self.rows.setdefault(digest, {"doc_id": str(doc_id), "embedding": list(embedding)})
+        return True
+
+
+def test_content_hash_ignores_whitespace_and_unicode_form() -> None:
+    assert normalize_content("  a \n\tb  ") == "a b"
+    assert content_hash("café  bar") == content_hash("café bar\n")
+    assert content_hash("a") != content_hash("b")
+
+
+def test_bloom_filter_membership() -> None:
+    bloom = BloomFilter(1000, 0.01)
+    keys = [content_hash(str(i)) for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    others = [content_hash(f"x{i}") for i in range(2000)]
+    assert sum(key in bloom for key in others) < 100
+
+
+@pytest.mark.asyncio
+async def test_index_skips_database_on_bloom_miss() -> None:
+    known = content_hash("known")
+    db = FakeHashDB({known: {"embedding": "[0.5,0.25]"}})
+    index = ContentIndex(BloomFilter(100, 0.01))
+    assert await index.lookup_embedding(db, known) == [0.5, 0.25]
+    assert db.lookups == 1
+    assert await index.lookup_embedding(db, content_hash("unknown")) is None
+    assert db.lookups == 1
+
+
+@pytest.mark.asyncio
+async def test_index_records_and_reuses() -> None:
+    db = FakeHashDB()
+    index = ContentIndex(BloomFilter(100, 0.01))
+    digest = content_hash("text")
+    assert await index.lookup_embedding(db, digest) is None
+    await index.record(db, digest, uuid4(), [0.1, 0.2])
+    assert await index.lookup_embedding(db, digest) == [0.1, 0.2]
+
+
+@pytest.mark.asyncio
+async def test_unseeded_index_always_queries() -> None:
+    digest = content_hash("text")
+    db = FakeHashDB({digest: {"embedding": [1.0]}}, fail_list=True)
+    index = ContentIndex(BloomFilter(100, 0.01))
+    assert await index.lookup_embedding(db, digest) == [1.0]
+    assert db.lookups == 1
+    assert await index.lookup_embedding(db, content_hash("other")) is None
+    assert db.lookups == 2
+
+
+@pytest.mark.asyncio
+async def test_seeding_reads_every_page(monkeypatch) -> None:
+    monkeypatch.setattr(content_index, "SEED_PAGE_SIZE", 3)
+    digests = [content_hash(str(i)) for i in range(7)]
+    db = FakeHashDB({d: {"embedding": [1.0]} for d in digests})
+    index = ContentIndex(BloomFilter(100, 0.01))
+    assert await index.preload(db) is True
+    assert db.pages == 3
+    assert all(d in index._bloom for d in digests)
+
+
+@pytest.mark.asyncio
+async def test_seeding_failure_on_a_later_page_leaves_index_unseeded(monkeypatch) -> None:
+    monkeypatch.setattr(content_index, "SEED_PAGE_SIZE", 3)
+    digest = max(content_hash(str(i)) for i in range(7))
+    db = FakeHashDB({content_hash(str(i)): {"embedding": [1.0]} for i in range(7)}, fail_after=1)
+    index = ContentIndex(BloomFilter(100, 0.01))
+    assert await index.preload(db) is False
+    # The last hash was never read, so it must still be looked up.
+    assert await index.lookup_embedding(db, digest) == [1.0]
+    assert db.lookups == 1
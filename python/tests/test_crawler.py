@@ -0,0 +1,265 @@
+import asyncio
+import threading
+from contextlib import aclosing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from src.server.services.crawler import (
+    CrawlConfig,
+    Crawler,
+    HtmlTextExtractor,
+    VisitedIndex,
+    is_public_address,
+    normalize_url,
+    parse_sitemap,
+)
+
+
+PAGE_COUNT = 50
+
+
+def _page(n: int) -> str:
+    links = "".join(f'<a href="/page/{m}#top">p{m}</a>' for m in (n + 1, n + 2, 0))
+    return (
+        f"<html><head><title>Page {n}</title><style>.x{{}}</style></head>"
+        f"<body><h1>Heading {n}</h1><script>var x;</script><p>Body &amp; text {n}</p>"
+        f"{links}</body></html>"
+    )
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def log_message(self, *_args) -> None:
+        pass
+
+    def _send(self, status: int, body: str, ctype: str = "text/html") -> None:
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(0.005)
+            self._route()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _route(self) -> None:
+        host = f"http://{self.headers['Host']}"
+        if self.path == "/robots.txt":
+            self._send(
+                200,
+                f"User-agent: *\nDisallow: /private\nSitemap: {host}/sitemap.xml\n",
+                "text/plain",
+            )
+        elif self.path == "/sitemap.xml":
+            self._send(
+                200,
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f"<url><loc>{host}/private/secret</loc></url>"
+                f"<url><loc>{host}/orphan</loc></url></urlset>",
+                "application/xml",
+            )
+        elif self.path == "/orphan":
+            self._send(200, "<p>only in sitemap</p>")
+        elif self.path.startswith("/page/"):
+            n = int(self.path.rsplit("/", 1)[1])
+            if n >= PAGE_COUNT:
+                self._send(404, "missing")
+            else:
+                self._send(200, _page(n))
+        else:
+            self._send(404, "missing")
+
+
+@pytest.fixture
+def site():
+    FixtureHandler.active = FixtureHandler.peak = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+async def _crawl(start: str, **config) -> list:
+    # The fixture site listens on loopback.
+    config.setdefault("allow_private", True)
+    async with httpx.AsyncClient() as client:
+        crawler = Crawler(client, CrawlConfig(**config))
+        return [page async for page in crawler.crawl(start)]
+
+
+def test_html_text_extractor_streams_chunks() -> None:
+    html = _page(3)
+    parser = HtmlTextExtractor()
+    for i in range(0, len(html), 7):
+        parser.feed(html[i : i + 7])
+    parser.close()
+    assert parser.title == "Page 3"
+    assert parser.text == "Heading 3\nBody & text 3\np4p5p0"
+    assert parser.links == ["/page/4#top", "/page/5#top", "/page/0#top"]
+
+
+def test_visited_index_normalizes_urls() -> None:
+    index = VisitedIndex()
+    assert index.add("HTTP://Example.com:80/a/../b#frag")
+    assert not index.add("http://example.com/b")
+    assert "http://example.com/b" in index
+    assert normalize_url("https://x.org:8443/p/") == "https://x.org:8443/p/"
+
+
+def test_parse_sitemap_index_and_urlset() -> None:
+    index = "<sitemapindex><sitemap><loc> http://a/s1.xml </loc></sitemap></sitemapindex>"
+    assert parse_sitemap(index) == ([], ["http://a/s1.xml"])
+    assert parse_sitemap("not xml") == ([], [])
+
+
+@pytest.mark.asyncio
+async def test_crawl_follows_links_respecting_robots_and_dedup(site: str) -> None:
+    pages = await _crawl(f"{site}/page/0", max_depth=100, max_pages=500)
+    urls = sorted(p.url for p in pages)
+    expected = sorted([f"{site}/page/{n}" for n in range(PAGE_COUNT)] + [f"{site}/orphan"])
+    assert urls == expected
+    assert not any("private" in url for url in urls)
+    first = next(p for p in pages if p.url.endswith("/page/0"))
+    assert first.title == "Page 0" and "Body & text 0" in first.text
+
+
+@pytest.mark.asyncio
+async def test_crawl_respects_limits(site: str) -> None:
+    pages = await _crawl(
+        f"{site}/page/0", max_depth=100, max_pages=10, per_host=2, use_sitemaps=False
+    )
+    assert len(pages) <= 10
+    assert FixtureHandler.peak <= 2
+
+
+@pytest.mark.asyncio
+async def test_crawl_depth_limit(site: str) -> None:
+    pages = await _crawl(f"{site}/page/0", max_depth=1, use_sitemaps=False)
+    assert sorted(p.url for p in pages) == [f"{site}/page/{n}" for n in (0, 1, 2)]
+
+
+@pytest.mark.asyncio
+async def test_crawl_stops_cleanly_when_consumer_exits(site: str) -> None:
+    async with httpx.AsyncClient() as client:
+        crawler = Crawler(client, CrawlConfig(max_depth=100, allow_private=True))
+        async with aclosing(crawler.crawl(f"{site}/page/0")) as pages:
+            async for _page in pages:
+                break
+    current = asyncio.current_task()
+    assert [t for t in asyncio.all_tasks() if t is not current] == []
+
+
+def test_is_public_address() -> None:
+    assert is_public_address("93.184.216.34")
+    assert is_public_address("2606:2800:220:1::1")
+    for address in (
+        "127.0.0.1",
+        "10.1.2.3",
+        "192.168.0.1",
+        "169.254.169.254",
+        "100.64.0.1",
+        "::1",
+        "fe80::1%eth0",
+        "::ffff:127.0.0.1",
+        "not an ip",
+    ):
+        assert not is_public_address(address), address
+
+
+@pytest.mark.asyncio
+async def test_crawl_rejects_private_start_url(site: str) -> None:
+    assert await _crawl(f"{site}/page/0", allow_private=False) == []
+    assert FixtureHandler.peak == 0
+
+
+def _mock_crawler(handler, hosts, **config) -> Crawler:
+    async def resolver(host: str):
+        return hosts[host]
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return Crawler(client, CrawlConfig(allow_private=False, **config), resolver=resolver)
+
+
+@pytest.mark.asyncio
+async def test_crawl_vets_every_redirect_hop() -> None:
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        if request.url.path == "/start":
+            return httpx.Response(302, headers={"location": "http://internal.test/admin"})
+        if request.url.path == "/hop":
+            return httpx.Response(301, headers={"location": "/page"})
+        return httpx.Response(
+            200, headers={"content-type": "text/html"}, text="<p>public</p>"
+        )
+
+    hosts = {"public.test": ["93.184.216.34"], "internal.test": ["10.0.0.5"]}
+    crawler = _mock_crawler(handler, hosts, use_sitemaps=False)
+    assert [p async for p in crawler.crawl("http://public.test/start")] == []
+    assert "http://internal.test/admin" not in requested
+
+    crawler = _mock_crawler(handler, hosts, use_sitemaps=False)
+    pages = [p async for p in crawler.crawl("http://public.test/hop")]
+    assert [p.url for p in pages] == ["http://public.test/page"]
+
+
+@pytest.mark.asyncio
+async def test_sitemaps_stay_on_origin_and_bodies_are_capped() -> None:
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        if request.url.path == "/robots.txt":
+            return httpx.Response(
+                200,
+                text="Sitemap: http://other.test/sitemap.xml\n"
+                "Sitemap: http://public.test/big.xml\n",
+            )
+        if request.url.path == "/big.xml":
+            loc = "<url><loc>http://public.test/listed</loc></url>"
+            return httpx.Response(200, text=f"<urlset>{loc * 100}</urlset>")
+        return httpx.Response(404)
+
+    hosts = {"public.test": ["93.184.216.34"], "other.test": ["93.184.216.35"]}
+    crawler = _mock_crawler(handler, hosts, max_page_bytes=1000)
+    assert await crawler._sitemap_urls("http://public.test/") == []
+    assert "http://other.test/sitemap.xml" not in requested
+    assert "http://public.test/big.xml" in requested
+
+
+@pytest.mark.asyncio
+async def test_page_size_cap_counts_bytes() -> None:
+    # 300 characters, but 600 bytes once encoded.
+    body = "<p>" + "é" * 300 + "</p><a href='/next'>n</a>"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, headers={"content-type": "text/html; charset=utf-8"}, text=body
+        )
+
+    hosts = {"public.test": ["93.184.216.34"]}
+    small = _mock_crawler(handler, hosts, max_page_bytes=500)
+    page = await small._fetch_page("http://public.test/")
+    assert page is not None and page.links == []
+    large = _mock_crawler(handler, hosts, max_page_bytes=1000)
+    page = await large._fetch_page("http://public.test/")
+    assert page is not None and page.links == ["http://public.test/next"]
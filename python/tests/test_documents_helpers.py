@@ -12,6 +12,12 @@ from pathlib import Path
 PACKAGE_ROOT = Path(__file__).resolve().parents[1] / "src"
 sys.path.insert(0, str(PACKAGE_ROOT))
 
+# The stubs below only stand in while the documents module is imported.
+_real_modules = {
+    name: module
+    for name, module in sys.modules.items()
+    if name == "src" or name.startswith("src.")
+}
 src_pkg = sys.modules.setdefault("src", types.ModuleType("src"))
 src_pkg.__path__ = [str(PACKAGE_ROOT)]
 server_pkg = types.ModuleType("src.server")
@@ -27,7 +33,7 @@ async def _dummy_get_db():  # pragma: no cover - placeholder
 routes_pkg.get_database_service = _dummy_get_db
 sys.modules["src.server.routes"] = routes_pkg
 services_pkg = types.ModuleType("src.server.services")
-services_pkg.__path__ = []
+services_pkg.__path__ = [str(PACKAGE_ROOT / "server" / "services")]
 sys.modules["src.server.services"] = services_pkg
 database_module = types.ModuleType("src.server.services.database")
 
@@ -51,6 +57,11 @@ async def generate_embedding(text: str):  # pragma: no cover - placeholder
     return []
 
 
+class EmbeddingProcessingError(Exception):
+    pass
+
+
+embedding_module.EmbeddingProcessingError = EmbeddingProcessingError
 embedding_module.generate_embedding = generate_embedding
 sys.modules["src.server.services.embedding"] = embedding_module
 
@@ -71,9 +82,18 @@ sys.modules["src.server.socket"] = socket_module
 
 documents = importlib.import_module("src.server.routes.documents")
 
+# Put the real packages back so test modules collected after this one do not
+# import the stubs.
+for _name in [n for n in sys.modules if n == "src" or n.startswith("src.")]:
+    del sys.modules[_name]
+sys.modules.update(_real_modules)
+if "src.server" in _real_modules:
+    src_pkg.server = _real_modules["src.server"]
+
 INGESTION_PROGRESS = documents.INGESTION_PROGRESS
 _create_document_entry = documents._create_document_entry
 _queue_embedding = documents._queue_embedding
+_process_batch = documents._process_batch
 _validate_upload = documents._validate_upload
 DocumentCreationError = documents.DocumentCreationError
 EmbeddingQueueError = documents.EmbeddingQueueError
@@ -88,8 +108,8 @@ class DummyUploadFile:
         self.content_type = content_type
         self.file = io.BytesIO(data)
 
-    async def read(self) -> bytes:  # pragma: no cover - simple read
-        return self.file.read()
+    async def read(self, size: int = -1) -> bytes:  # pragma: no cover - simple read
+        return self.file.read(size)
 
 
 class DummyDB:
@@ -130,6 +150,41 @@ async def test_validate_upload_bad_type() -> None:
         await _validate_upload(file)
 
 
+@pytest.mark.asyncio
+async def test_validate_upload_decodes_split_multibyte(monkeypatch) -> None:
+    monkeypatch.setattr(documents, "READ_CHUNK_SIZE", 3)
+    text = "h\u00e9llo w\u00f6rld \u2603"
+    file = DummyUploadFile("doc.txt", text.encode(), "text/plain")
+    assert await _validate_upload(file) == text
+
+
+@pytest.mark.asyncio
+async def test_validate_upload_invalid_utf8() -> None:
+    file = DummyUploadFile("doc.txt", b"ok \xff\xfe", "text/plain")
+    with pytest.raises(UploadValidationError, match="invalid text"):
+        await _validate_upload(file)
+
+
+@pytest.mark.asyncio
+async def test_validate_upload_stops_reading_past_limit(monkeypatch) -> None:
+    monkeypatch.setattr(documents, "MAX_FILE_SIZE", 10)
+    monkeypatch.setattr(documents, "READ_CHUNK_SIZE", 4)
+    file = DummyUploadFile("doc.txt", b"x" * 100, "text/plain")
+    with pytest.raises(UploadValidationError, match="file too large"):
+        await _validate_upload(file)
+    assert file.file.tell() < 100
+
+
+@pytest.mark.asyncio
+async def test_validate_upload_rejects_declared_size(monkeypatch) -> None:
+    monkeypatch.setattr(documents, "MAX_FILE_SIZE", 10)
+    file = DummyUploadFile("doc.txt", b"tiny", "text/plain")
+    file.size = 11
+    with pytest.raises(UploadValidationError, match="file too large"):
+        await _validate_upload(file)
+    assert file.file.tell() == 0
+
+
 @pytest.mark.asyncio
 async def test_create_document_entry() -> None:
     db = DummyDB()
@@ -151,15 +206,14 @@ async def test_queue_embedding(monkeypatch) -> None:
         fake_broadcast.called = True
 
     fake_broadcast.called = False
-    monkeypatch.setattr(
-        "src.server.routes.documents.broadcast_upload_progress", fake_broadcast
-    )
+    monkeypatch.setattr(documents, "broadcast_upload_progress", fake_broadcast)
     db = DummyDB()
     bg = DummyBackground()
     doc_id, source_id = uuid4(), uuid4()
     INGESTION_PROGRESS.clear()
     await _queue_embedding(bg, doc_id, "hi", db, source_id)
     assert INGESTION_PROGRESS[doc_id]["status"] == "queued"
+    await documents.upload_progress.flush()
     assert fake_broadcast.called is True
     assert bg.tasks and bg.tasks[0][0].__name__ == "_process_embedding"
 
@@ -169,11 +223,55 @@ async def test_queue_embedding_failure(monkeypatch) -> None:
     async def fake_broadcast(channel: str, message: Dict[str, str]) -> None:
         pass
 
-    monkeypatch.setattr(
-        "src.server.routes.documents.broadcast_upload_progress", fake_broadcast
-    )
+    monkeypatch.setattr(documents, "broadcast_upload_progress", fake_broadcast)
     bg = FailingBackground()
     db = DummyDB()
     INGESTION_PROGRESS.clear()
     with pytest.raises(EmbeddingQueueError):
         await _queue_embedding(bg, uuid4(), "hi", db, uuid4())
+
+
+@pytest.mark.asyncio
+async def test_process_batch_aggregates_progress(monkeypatch) -> None:
+    events = []
+
+    async def fake_broadcast(channel: str, message: Dict[str, str]) -> None:
+        events.append(message)
+
+    async def fake_process(doc_id, content, db, source_id, digest=None, notify=True):
+        assert notify is False
+        ok = content != "bad"
+        INGESTION_PROGRESS[doc_id] = {"status": "completed" if ok else "failed"}
+
+    class BatchDB:
+        def __init__(self, docs) -> None:
+            self.docs = docs
+
+        async def get_document(self, doc_id):
+            return self.docs.get(doc_id)
+
+    monkeypatch.setattr(documents, "broadcast_upload_progress", fake_broadcast)
+    monkeypatch.setattr(documents, "_process_embedding", fake_process)
+    ids = [uuid4() for _ in range(3)]
+    db = BatchDB(
+        {
+            ids[0]: types.SimpleNamespace(content="ok"),
+            ids[1]: types.SimpleNamespace(content="bad"),
+        }
+    )
+    batch_id = uuid4()
+    INGESTION_PROGRESS.clear()
+    INGESTION_PROGRESS[batch_id] = {
+        "status": "queued",
+        "total": "3",
+        "completed": "0",
+        "failed": "0",
+    }
+    await _process_batch(batch_id, [(i, "h") for i in ids], db, uuid4())
+    await documents.upload_progress.flush()
+    assert INGESTION_PROGRESS[batch_id]["status"] == "completed_with_errors"
+    assert INGESTION_PROGRESS[batch_id]["completed"] == "1"
+    assert INGESTION_PROGRESS[batch_id]["failed"] == "2"
+    assert INGESTION_PROGRESS[ids[2]]["status"] == "failed"
+    assert all("batch_id" in e and "doc_id" not in e for e in events)
+    assert events[-1]["completed"] == 1 and events[-1]["total"] == 3
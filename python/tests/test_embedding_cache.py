@@ -0,0 +1,84 @@
+import pytest
+
+from src.server.services import embedding
+from src.server.services.embedding_cache import EmbeddingCache
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_is_lru() -> None:
+    cache = EmbeddingCache("m", memory_size=2)
+    await cache.put("a", [1.0])
+    await cache.put("b", [2.0])
+    assert await cache.get("a") == [1.0]
+    await cache.put("c", [3.0])
+    assert await cache.get("b") is None
+    assert await cache.get("a") == [1.0]
+
+
+@pytest.mark.asyncio
+async def test_get_returns_a_copy() -> None:
+    cache = EmbeddingCache("m")
+    vector = [0.5, 0.25]
+    await cache.put("a", vector)
+    vector.append(1.0)
+    first = await cache.get("a")
+    first[0] = 9.0
+    assert await cache.get("a") == [0.5, 0.25]
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_evicts_oldest_rows(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    cache = EmbeddingCache("m", path, memory_size=1, disk_rows=10)
+    for n in range(11):
+        await cache.put(f"text {n}", [float(n)])
+    # Over the limit, the disk tier is trimmed to 90% of it, oldest first.
+    assert await cache.get("text 1") is None
+    assert await cache.get("text 2") == [2.0]
+    assert cache._disk_count == 9
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart_and_normalizes(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    first = EmbeddingCache("m", path)
+    await first.put("hello   world", [0.5, 0.25])
+    first.close()
+
+    second = EmbeddingCache("m", path, memory_size=1)
+    assert await second.get("hello world") == [0.5, 0.25]
+    second.close()
+
+
+@pytest.mark.asyncio
+async def test_models_share_the_disk_tier_without_clobbering(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    old = EmbeddingCache("old-model", path)
+    await old.put("text", [1.0])
+
+    # Another process on the node opening the file with a different model.
+    new = EmbeddingCache("new-model", path)
+    assert await new.get("text") is None
+    await new.put("text", [2.0])
+    new.close()
+
+    old.close()
+    reopened = EmbeddingCache("old-model", path)
+    assert await reopened.get("text") == [1.0]
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_generate_embedding_reuses_cached_vectors(monkeypatch) -> None:
+    calls = []
+
+    async def fake_compute(texts):
+        calls.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+    monkeypatch.setattr(embedding, "_cache", EmbeddingCache("m"))
+    monkeypatch.setattr(embedding, "_compute_embeddings", fake_compute)
+    assert await embedding.generate_embedding("query") == [5.0]
+    assert await embedding.generate_embedding(" query ") == [5.0]
+    assert calls == ["query"]
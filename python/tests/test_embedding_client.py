@@ -0,0 +1,160 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.server.services import embedding
+from src.server.services.embedding_cache import EmbeddingCache
+from src.server.services.embedding_client import EmbeddingClient, EmbeddingClientError
+from src.server.services.rate_limiter import MemoryBucketStore, ProviderRateLimiter
+
+
+class StubEmbeddingServer(BaseHTTPRequestHandler):
+    batches = []
+    fail_next = 0
+    throttle_next = 0
+
+    def log_message(self, *_args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        texts = body["input"]
+        cls = type(self)
+        cls.batches.append(list(texts))
+        if cls.throttle_next:
+            cls.throttle_next -= 1
+            return self._send(429, {"error": "slow down"}, {"Retry-After": "0.2"})
+        if cls.fail_next:
+            cls.fail_next -= 1
+            return self._send(503, {"error": "busy"})
+        if any(t == "bad" for t in texts):
+            return self._send(422, {"error": "bad input"})
+        data = [
+            {"index": i, "embedding": [float(len(t)), float(i)]}
+            for i, t in reversed(list(enumerate(texts)))
+        ]
+        self._send(200, {"data": data, "model": body["model"]})
+
+    def _send(self, status: int, payload: dict, headers: dict | None = None) -> None:
+        raw = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+@pytest.fixture
+def server_url():
+    StubEmbeddingServer.batches = []
+    StubEmbeddingServer.fail_next = 0
+    StubEmbeddingServer.throttle_next = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubEmbeddingServer)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_batched(server_url: str) -> None:
+    client = EmbeddingClient(server_url, max_batch=8, max_wait=0.05)
+    texts = [f"text-{'x' * n}" for n in range(20)]
+    try:
+        vectors = await asyncio.gather(*(client.embed(t) for t in texts))
+    finally:
+        await client.aclose()
+    assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+    sizes = [len(b) for b in StubEmbeddingServer.batches]
+    assert sum(sizes) == 20 and max(sizes) <= 8 and len(sizes) <= 4
+
+
+@pytest.mark.asyncio
+async def test_bad_input_only_fails_its_caller(server_url: str) -> None:
+    client = EmbeddingClient(server_url, max_batch=8, max_wait=0.05, attempts=1)
+    texts = ["a", "bb", "bad", "dddd"]
+    try:
+        results = await asyncio.gather(
+            *(client.embed(t) for t in texts), return_exceptions=True
+        )
+    finally:
+        await client.aclose()
+    assert isinstance(results[2], EmbeddingClientError)
+    assert [r[0] for i, r in enumerate(results) if i != 2] == [1.0, 2.0, 4.0]
+
+
+@pytest.mark.asyncio
+async def test_server_errors_fail_the_whole_batch(server_url: str) -> None:
+    StubEmbeddingServer.fail_next = 10
+    client = EmbeddingClient(server_url, max_batch=8, max_wait=0.05, attempts=1)
+    try:
+        results = await asyncio.gather(
+            *(client.embed(t) for t in ["a", "bb", "ccc", "dddd"]), return_exceptions=True
+        )
+    finally:
+        await client.aclose()
+    assert all(isinstance(r, EmbeddingClientError) for r in results)
+    # A 503 is not bisected into per-input requests.
+    assert len(StubEmbeddingServer.batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(server_url: str) -> None:
+    StubEmbeddingServer.fail_next = 1
+    client = EmbeddingClient(server_url, max_wait=0.01)
+    try:
+        assert await client.embed("abc") == [3.0, 0.0]
+    finally:
+        await client.aclose()
+    assert len(StubEmbeddingServer.batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured(server_url: str) -> None:
+    StubEmbeddingServer.throttle_next = 1
+    limiter = ProviderRateLimiter(MemoryBucketStore())
+    client = EmbeddingClient(server_url, max_batch=1, max_wait=0, limiter=limiter)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    try:
+        assert await client.embed("abc") == [3.0, 0.0]
+        # Later callers wait out the same cooldown.
+        assert await limiter.acquire(1) == 0
+    finally:
+        await client.aclose()
+    assert loop.time() - start >= 0.2
+    assert len(StubEmbeddingServer.batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_stops_retries(server_url: str) -> None:
+    StubEmbeddingServer.fail_next = 5
+    limiter = ProviderRateLimiter(MemoryBucketStore(), retries_per_minute=1)
+    client = EmbeddingClient(server_url, max_wait=0, attempts=5, limiter=limiter)
+    try:
+        with pytest.raises(EmbeddingClientError):
+            await client.embed("abc")
+    finally:
+        await client.aclose()
+    # One retry from the budget, then the error surfaces.
+    assert len(StubEmbeddingServer.batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_embedding_uses_configured_client(server_url, monkeypatch) -> None:
+    client = EmbeddingClient(server_url, max_wait=0.01, attempts=1)
+    monkeypatch.setattr(embedding, "EMBEDDING_PROVIDER", "remote")
+    monkeypatch.setattr(embedding, "get_embedding_client", lambda: client)
+    monkeypatch.setattr(embedding, "_cache", EmbeddingCache("stub"))
+    try:
+        assert await embedding.generate_embedding("abcd") == [4.0, 0.0]
+        with pytest.raises(embedding.EmbeddingGenerationError):
+            await embedding.generate_embedding("bad")
+    finally:
+        await client.aclose()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.server.auth.dependencies import jwt_service
+from src.server.main import api
+from src.server.models.document import Document
+from src.server.models.query import Query
+from src.server.routes import get_database_service
+from src.server.services.federated import federated_search, normalize
+
+P1, P2, P3 = (str(uuid4()) for _ in range(3))
+
+
+class ProjectDB:
+    """Fake database with per-project distances, delays and failures."""
+
+    def __init__(
+        self,
+        distances: Dict[str, List[float]],
+        delays: Optional[Dict[str, float]] = None,
+        failing: Tuple[str, ...] = (),
+    ) -> None:
+        self.docs = {
+            pid: [(Document(id=uuid4(), source_id=uuid4(), content=pid), d) for d in ds]
+            for pid, ds in distances.items()
+        }
+        self.delays = delays or {}
+        self.failing = failing
+        self.active = 0
+        self.peak = 0
+        self.queries: List[Query] = []
+
+    async def vector_search_scored(self, embedding, query: Query, **kwargs):
+        pid = query.filters["project_id"]
+        self.queries.append(query)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(pid, 0.01))
+            if pid in self.failing:
+                raise RuntimeError("boom")
+            return self.docs[pid][: query.match_count]
+        finally:
+            self.active -= 1
+
+
+def test_normalize_methods() -> None:
+    assert normalize([0.9, 0.7, 0.5], "minmax") == pytest.approx([1.0, 0.5, 0.0])
+    assert normalize([0.8, 0.8], "minmax") == [1.0, 1.0]
+    assert normalize([3.0, 1.0], "zscore") == pytest.approx([1.0, -1.0])
+    assert normalize([0.4], "none") == [0.4]
+    assert normalize([], "zscore") == []
+
+
+@pytest.mark.asyncio
+async def test_merges_normalized_scores_across_projects() -> None:
+    # P1 is uniformly closer; raw similarity would bury P2's best match.
+    db = ProjectDB({P1: [0.05, 0.06, 0.07], P2: [0.40, 0.60, 0.80]})
+    query = Query(query_text="x", match_count=4, filters={"lang": "en"})
+
+    raw = await federated_search(db, [1.0], query, [P1, P2], normalization="none")
+    assert [h.project_id for h in raw.hits] == [P1, P1, P1, P2]
+
+    result = await federated_search(db, [1.0], query, [P1, P2, P1], per_project_k=2)
+    assert [(h.project_id, h.score) for h in result.hits] == [
+        (P1, 1.0),
+        (P2, 1.0),
+        (P1, 0.0),
+        (P2, 0.0),
+    ]
+    assert result.hits[1].similarity == pytest.approx(0.6)
+    assert {q.match_count for q in db.queries[-2:]} == {2}
+    assert all(q.filters["lang"] == "en" for q in db.queries)
+    assert not result.partial
+
+
+@pytest.mark.asyncio
+async def test_timeouts_and_errors_give_partial_results() -> None:
+    db = ProjectDB(
+        {P1: [0.1, 0.2], P2: [0.1], P3: [0.3]},
+        delays={P2: 1.0},
+        failing=(P3,),
+    )
+    result = await federated_search(
+        db, [1.0], Query(query_text="x"), [P1, P2, P3], timeout_ms=100
+    )
+    assert [h.project_id for h in result.hits] == [P1, P1]
+    assert [(p.project_id, p.status, p.count) for p in result.projects] == [
+        (P1, "ok", 2),
+        (P2, "timeout", 0),
+        (P3, "error", 0),
+    ]
+    assert result.partial and result.to_dict()["partial"] is True
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped() -> None:
+    projects = [str(uuid4()) for _ in range(6)]
+    db = ProjectDB({pid: [0.1] for pid in projects})
+    result = await federated_search(db, [1.0], Query(query_text="x"), projects, concurrency=2)
+    assert db.peak == 2
+    assert len(result.projects) == 6
+
+
+@pytest.mark.asyncio
+async def test_federated_route(monkeypatch) -> None:
+    db = ProjectDB({P1: [0.1, 0.3], P2: [0.2]}, failing=(P3,))
+
+    async def _get_db():
+        return db
+
+    async def embed(text: str) -> List[float]:
+        return [1.0, 0.0]
+
+    monkeypatch.setattr("src.server.routes.search.generate_embedding", embed)
+    api.dependency_overrides[get_database_service] = _get_db
+    headers = {"Authorization": f"Bearer {jwt_service.create_token('u', 'user')}"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=api), base_url="http://test") as client:
+            body = {"query": {"query_text": "x", "match_count": 3}, "project_ids": [P1, P2, P3]}
+            res = await client.post("/search/federated", json=body, headers=headers)
+            assert res.status_code == 200
+            data = res.json()["data"]
+            assert len(data["results"]) == 3 and data["partial"] is True
+
+            body["query"]["filters"] = {"project_id": P1}
+            res = await client.post("/search/federated", json=body, headers=headers)
+            assert res.status_code == 400
+
+            body = {"query": {"query_text": "x"}, "project_ids": [P3]}
+            res = await client.post("/search/federated", json=body, headers=headers)
+            assert res.status_code == 500
+    finally:
+        api.dependency_overrides.clear()
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict
+from uuid import uuid4
+
+import pytest
+from pydantic import ValidationError
+
+from src.server.database.migrations import split_statements
+from src.server.models.query import Query, parse_filters
+from src.server.services import database
+from src.server.services.database import DatabaseService
+from src.server.services.filters import (
+    FilterStats,
+    FilterStatsRegistry,
+    compile_filters,
+    plan_filters,
+)
+
+SOURCE_A, SOURCE_B, SOURCE_C = (str(uuid4()) for _ in range(3))
+PROJECT = str(uuid4())
+
+
+def stats() -> FilterStats:
+    return FilterStats.from_rows(
+        [
+            {"source_id": SOURCE_A, "project_id": PROJECT, "documents": 100},
+            {"source_id": SOURCE_B, "project_id": PROJECT, "documents": 900},
+            {"source_id": SOURCE_C, "project_id": str(uuid4()), "documents": 99_000},
+        ]
+    )
+
+
+def test_parse_filters_forms() -> None:
+    conditions = parse_filters(
+        {
+            "source_id": SOURCE_A,
+            "metadata.lang": ["en", "fr"],
+            "year": {"gte": 2020, "lt": 2024},
+        }
+    )
+    assert [(c.field, c.op, c.value) for c in conditions] == [
+        ("source_id", "eq", SOURCE_A),
+        ("metadata.lang", "in", ["en", "fr"]),
+        ("metadata.year", "gte", 2020),
+        ("metadata.year", "lt", 2024),
+    ]
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"source_id": "not-a-uuid"},
+        {"source_id": {"gt": SOURCE_A}},
+        {"lang": {"like": "e%"}},
+        {"lang": {}},
+        {"lang": []},
+        {"year": {"gte": True}},
+        {"author": {"name": "x"}},
+        {"metadata.": 1},
+    ],
+)
+def test_invalid_filters_rejected(filters: Dict[str, Any]) -> None:
+    with pytest.raises(ValidationError):
+        Query(query_text="x", filters=filters)
+
+
+def test_compile_filters_to_indexed_predicates() -> None:
+    compiled = compile_filters(
+        parse_filters(
+            {
+                "source_id": {"in": [SOURCE_A, SOURCE_B]},
+                "metadata.source_id": SOURCE_C,
+                "metadata.author.name": 'O"Brien',
+                "lang": ["en", "fr"],
+                "year": {"gte": 2020},
+            }
+        )
+    )
+    assert compiled.source_ids == sorted([SOURCE_A, SOURCE_B])
+    assert compiled.project_ids is None
+    assert compiled.metadata_match == (
+        f'$."source_id" == "{SOURCE_C}"'
+        ' && $."author"."name" == "O\\"Brien"'
+        ' && ($."lang" == "en" || $."lang" == "fr")'
+        ' && $."year" >= 2020'
+    )
+
+
+def test_repeated_columns_intersect() -> None:
+    compiled = compile_filters(
+        parse_filters({"source_id": [SOURCE_A, SOURCE_B], "metadata.x": 1})
+        + parse_filters({"source_id": SOURCE_B})
+    )
+    assert compiled.source_ids == [SOURCE_B]
+
+
+def test_plan_prefers_prefilter_for_selective_filters() -> None:
+    plan = plan_filters({"source_id": SOURCE_A}, stats(), prefilter_rows=1000)
+    assert plan.selectivity == pytest.approx(0.001)
+    assert plan.prefilter is True
+    assert plan.candidates(5) == 5
+
+    plan = plan_filters({"project_id": PROJECT, "lang": "en"}, stats(), prefilter_rows=50)
+    assert plan.selectivity == pytest.approx(0.001)
+    assert plan.prefilter is False
+    assert plan.candidates(5) == 2000  # capped at FILTER_MAX_CANDIDATES
+
+    plan = plan_filters({"source_id": SOURCE_C}, stats(), prefilter_rows=1000)
+    assert plan.prefilter is False
+    assert plan.candidates(5) == 6
+
+
+def test_plan_without_filters_or_stats() -> None:
+    plan = plan_filters({}, stats())
+    assert (plan.prefilter, plan.candidates(5)) == (False, 5)
+    plan = plan_filters({"lang": "en"}, None)
+    assert plan.prefilter is False
+    assert plan.candidates(5) == 50
+
+
+@pytest.mark.asyncio
+async def test_vector_search_pushes_filters_to_every_backend(
+    monkeypatch, recording_provider
+) -> None:
+    rows = [
+        {"source_id": SOURCE_A, "project_id": PROJECT, "documents": 10},
+        {"source_id": SOURCE_B, "project_id": PROJECT, "documents": 1_000_000},
+    ]
+    monkeypatch.setattr(database, "filter_stats", FilterStatsRegistry(refresh=60))
+    provider = recording_provider({"document_filter_stats": rows})
+    query = Query(query_text="x", filters={"source_id": SOURCE_A, "lang": "en"})
+    for quantization in ("none", "binary"):
+        await DatabaseService(provider, quantization=quantization).vector_search([0.1, -0.2], query)
+
+    calls = [c for c in provider.client.calls if c[0] != "document_filter_stats"]
+    assert [name for name, _ in calls] == ["match_documents", "match_documents_quantized"]
+    for _, params in calls:
+        assert "filter" not in params
+        assert params["source_ids"] == [SOURCE_A]
+        assert params["metadata_match"] == '$."lang" == "en"'
+        assert params["prefilter"] is True
+    # Statistics are loaded once and cached.
+    assert [c[0] for c in provider.client.calls].count("document_filter_stats") == 1
+
+
+def test_filter_migration_splits_into_statements() -> None:
+    path = Path(__file__).resolve().parents[2] / "migration" / "8_search_filters.sql"
+    statements = split_statements(path.read_text())
+    functions = [s for s in statements if "CREATE OR REPLACE FUNCTION" in s]
+    assert len(functions) == 4
+    assert all(s.endswith("$$") for s in functions)
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.server.auth.dependencies import jwt_service
+from src.server.database.migrations import split_statements
+from src.server.main import api
+from src.server.routes import get_database_service
+from src.server.services.database import DatabaseError
+from src.server.services.index_maintenance import (
+    IndexMaintenance,
+    IndexOperation,
+    IndexStats,
+    plan_maintenance,
+    recommended_lists,
+)
+
+
+def stats(
+    index: str = "archon_crawled_pages_embedding_idx",
+    table: str = "archon_crawled_pages",
+    method: str = "ivfflat",
+    lists: Optional[int] = None,
+    rows: int = 50_000,
+    valid: bool = True,
+    built_rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    return {
+        "table_name": table,
+        "column_name": "embedding",
+        "index_name": index,
+        "method": method,
+        "opclass": "vector_cosine_ops",
+        "lists": lists,
+        "is_valid": valid,
+        "table_rows": rows,
+        "index_bytes": 8192,
+        "built_rows": built_rows,
+    }
+
+
+def plan(*rows: Dict[str, Any], **kwargs: Any):
+    return plan_maintenance([IndexStats.from_row(r) for r in rows], **kwargs)
+
+
+def test_recommended_lists() -> None:
+    assert recommended_lists(0) == 1
+    assert recommended_lists(50_000) == 50
+    assert recommended_lists(1_000_000) == 1000
+    assert recommended_lists(4_000_000) == 2000
+
+
+def test_setup_index_is_resized_by_create_and_swap() -> None:
+    [task] = plan(stats(rows=500_000))
+    assert task.kind == "resize"
+    assert task.reason == "lists=100 for 500000 rows, recommended 500"
+    index, temp = "archon_crawled_pages_embedding_idx", "archon_crawled_pages_embedding_idx_rebuild"
+    assert task.operations == [
+        IndexOperation("drop", temp),
+        IndexOperation("create", index, new_name=temp, method="ivfflat", lists=500),
+        IndexOperation("drop", index),
+        IndexOperation("rename", temp, new_name=index),
+    ]
+
+
+def test_rebuild_triggers() -> None:
+    # Right-sized and rebuilt at the current size: nothing to do.
+    assert plan(stats(lists=50, built_rows=50_000)) == []
+    # Right-sized but trained on an empty table.
+    assert plan(stats(lists=50))[0].reason == "never rebuilt since its table was filled"
+    # The table has doubled since the last rebuild.
+    assert "grew from 20000" in plan(stats(lists=40, rows=50_000, built_rows=20_000))[0].reason
+    # Small tables, HNSW indexes and tables mid-build are left alone.
+    assert plan(stats(rows=500)) == []
+    assert plan(stats(method="hnsw")) == []
+    assert plan(stats(), building={"archon_crawled_pages"}) == []
+
+
+def test_migrate_reindex_and_drop_leftovers() -> None:
+    [migrate] = plan(stats(), target_method="hnsw")
+    assert migrate.kind == "migrate"
+    create = migrate.operations[1]
+    assert (create.action, create.method, create.m) == ("create", "hnsw", 16)
+
+    [reindex] = plan(stats(method="hnsw", valid=False))
+    assert reindex.operations == [
+        IndexOperation("reindex", "archon_crawled_pages_embedding_idx")
+    ]
+    [drop] = plan(stats(index="x_rebuild", valid=False))
+    assert drop.kind == "drop"
+    assert drop.operations == [IndexOperation("drop", "x_rebuild")]
+
+
+def test_rebuild_left_as_the_only_index_is_renamed() -> None:
+    # Valid, and its old index still exists: the swap never happened.
+    tasks = plan(
+        stats(lists=50, built_rows=50_000),
+        stats(index="archon_crawled_pages_embedding_idx_rebuild", lists=50),
+    )
+    assert [t.kind for t in tasks] == ["drop"]
+    # The run stopped after dropping the old index: keep the new one.
+    [rename] = plan(stats(index="archon_crawled_pages_embedding_idx_rebuild", lists=50))
+    assert rename.kind == "rename"
+    assert rename.index_name == "archon_crawled_pages_embedding_idx"
+    assert rename.operations == [
+        IndexOperation(
+            "rename",
+            "archon_crawled_pages_embedding_idx_rebuild",
+            new_name="archon_crawled_pages_embedding_idx",
+        )
+    ]
+
+
+class MaintenanceDB:
+    def __init__(
+        self, rows: List[Dict[str, Any]], fail_on: Optional[tuple[str, str]] = None
+    ) -> None:
+        self.rows = rows
+        self.fail_on = fail_on
+        self.executed: List[Dict[str, Any]] = []
+        self.recorded: List[tuple[str, int]] = []
+        self.building: List[Dict[str, Any]] = []
+
+    async def vector_index_stats(self) -> List[Dict[str, Any]]:
+        return self.rows
+
+    async def index_build_progress(self) -> List[Dict[str, Any]]:
+        return self.building
+
+    async def run_index_maintenance(self, operation: Dict[str, Any]) -> None:
+        if (operation["action"], operation["index_name"]) == self.fail_on:
+            raise DatabaseError("run_index_maintenance failed")
+        if operation["action"] == "create":
+            self.building = [
+                {
+                    "table_name": "archon_crawled_pages",
+                    "phase": "building index",
+                    "blocks_done": 30,
+                    "blocks_total": 120,
+                }
+            ]
+            await asyncio.sleep(0.05)
+            self.building = []
+        self.executed.append(operation)
+
+    async def record_index_build(self, index_name: str, table_rows: int) -> bool:
+        self.recorded.append((index_name, table_rows))
+        return True
+
+
+@pytest.mark.asyncio
+async def test_run_executes_tasks_and_reports_progress() -> None:
+    db = MaintenanceDB(
+        [stats(), stats(index="code_idx", table="code", lists=50, built_rows=50_000)]
+    )
+    job = IndexMaintenance(poll=0.01)
+    [task] = await job.run_once(db)
+    assert task.status == "done" and task.step == 4
+    assert db.executed == [asdict(op) for op in task.operations]
+    assert db.recorded == [("archon_crawled_pages_embedding_idx", 50_000)]
+    assert task.progress == {"phase": "building index", "percent": 25.0}
+    snapshot = job.snapshot()
+    assert snapshot["last_run"] is not None and not snapshot["running"]
+
+
+@pytest.mark.asyncio
+async def test_failed_step_stops_the_task() -> None:
+    db = MaintenanceDB([stats()], fail_on=("drop", "archon_crawled_pages_embedding_idx"))
+    [task] = await IndexMaintenance(poll=0.01).run_once(db)
+    assert task.status == "failed" and task.step == 3
+    assert len(db.executed) == 2 and db.recorded == []
+
+
+def test_unknown_target_method_rejected() -> None:
+    with pytest.raises(ValueError):
+        IndexMaintenance(target_method="diskann")
+
+
+def test_maintenance_migration_splits_into_statements() -> None:
+    path = Path(__file__).resolve().parents[2] / "migration" / "11_vector_index_maintenance.sql"
+    statements = split_statements(path.read_text())
+    functions = [s for s in statements if "CREATE OR REPLACE FUNCTION" in s]
+    assert len(functions) == 3
+    assert "dblink_exec('index_maintenance', statement)" in functions[-1]
+    assert "current_setting" not in functions[-1]
+    revoke, grant = statements[-2:]
+    assert revoke.startswith("REVOKE ALL ON FUNCTION run_index_maintenance")
+    assert revoke.endswith("FROM PUBLIC, anon, authenticated")
+    assert grant.startswith("GRANT EXECUTE ON FUNCTION run_index_maintenance")
+    assert grant.endswith("TO service_role")
+
+
+@pytest.mark.asyncio
+async def test_admin_index_maintenance_routes(monkeypatch) -> None:
+    db = MaintenanceDB([stats(lists=50, built_rows=50_000)])
+
+    async def _get_db():
+        return db
+
+    api.dependency_overrides[get_database_service] = _get_db
+    job = IndexMaintenance()
+    monkeypatch.setattr("src.server.routes.admin.index_maintenance", job)
+    user = {"Authorization": f"Bearer {jwt_service.create_token('u', 'user')}"}
+    admin = {"Authorization": f"Bearer {jwt_service.create_token('a', 'admin')}"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=api), base_url="http://test") as client:
+            res = await client.post("/admin/index-maintenance/run", headers=user)
+            assert res.status_code == 403
+
+            res = await client.post("/admin/index-maintenance/run", headers=admin)
+            assert res.status_code == 202 and res.json()["data"]["started"] is True
+
+            res = await client.get("/admin/index-maintenance", headers=admin)
+            data = res.json()["data"]
+            assert data["last_run"] is not None and data["tasks"] == []
+    finally:
+        api.dependency_overrides.clear()
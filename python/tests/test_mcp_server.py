@@ -39,6 +39,9 @@ class FakeDatabaseService:
     async def vector_search(self, embedding, query):
         return list(self.documents.values())[: query.match_count]
 
+    async def vector_search_scored(self, embedding, query):
+        return [(doc, None) for doc in await self.vector_search(embedding, query)]
+
     async def get_document(self, doc_id):
         return self.documents.get(str(doc_id))
 
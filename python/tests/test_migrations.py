@@ -4,6 +4,7 @@ from typing import List
 import pytest
 
 from src.server.database import MigrationError, run_sql
+from src.server.database.migrations import split_statements
 
 
 @pytest.mark.asyncio
@@ -23,3 +24,23 @@ async def test_run_sql(tmp_path) -> None:
 async def test_run_sql_missing(tmp_path) -> None:
     with pytest.raises(MigrationError):
         await run_sql(str(tmp_path / "missing.sql"), lambda _: None)
+
+
+def test_split_statements_keeps_function_bodies() -> None:
+    sql = (
+        "CREATE TABLE t (a INT);\n"
+        "CREATE FUNCTION f() RETURNS INT LANGUAGE sql AS $$ SELECT 1; $$;\n"
+        "CREATE FUNCTION g() RETURNS VOID AS $body$ BEGIN PERFORM 1; END $body$;"
+    )
+    assert split_statements(sql) == [
+        "CREATE TABLE t (a INT)",
+        "CREATE FUNCTION f() RETURNS INT LANGUAGE sql AS $$ SELECT 1; $$",
+        "CREATE FUNCTION g() RETURNS VOID AS $body$ BEGIN PERFORM 1; END $body$",
+    ]
+
+
+def test_quantized_migration_splits_into_statements() -> None:
+    path = Path(__file__).resolve().parents[2] / "migration" / "6_quantized_embeddings.sql"
+    statements = split_statements(path.read_text())
+    assert statements[-1].startswith("CREATE OR REPLACE FUNCTION match_documents_quantized")
+    assert statements[-1].endswith("$$")
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import timeit
+from typing import Dict, List
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from src.server.models.document import Document
+from src.server.models.query import Query
+from src.server.services.mmr import diversified_search, mmr_select
+
+
+def test_mmr_skips_near_duplicates() -> None:
+    query = np.array([1.0, 0.0, 0.0])
+    candidates = np.array(
+        [
+            [1.0, 0.10, 0.0],
+            [1.0, 0.11, 0.0],  # near-duplicate of the first
+            [0.8, 0.0, 0.6],
+        ]
+    )
+    assert mmr_select(query, candidates, 2, 1.0) == [0, 1]
+    assert mmr_select(query, candidates, 2, 0.5) == [0, 2]
+
+
+def test_mmr_handles_edge_cases() -> None:
+    assert mmr_select([1.0], np.zeros((0, 1)), 3, 0.5) == []
+    assert sorted(mmr_select([1.0, 0.0], np.eye(2), 5, 0.5)) == [0, 1]
+
+
+def test_mmr_latency_for_200_candidates() -> None:
+    rng = np.random.default_rng(0)
+    candidates = rng.standard_normal((200, 1536)).astype(np.float32)
+    query = rng.standard_normal(1536).astype(np.float32)
+    best = min(
+        timeit.repeat(lambda: mmr_select(query, candidates, 10, 0.5), number=10, repeat=5)
+    )
+    assert best / 10 < 0.001
+
+
+class FakeDB:
+    def __init__(self, vectors: List[List[float]]) -> None:
+        self.docs = [
+            Document(id=uuid4(), source_id=uuid4(), content=f"d{i}") for i in range(len(vectors))
+        ]
+        self.vectors = {str(d.id): v for d, v in zip(self.docs, vectors)}
+        self.requested: List[int] = []
+
+    async def vector_search(self, embedding, query: Query) -> List[Document]:
+        self.requested.append(query.match_count)
+        return self.docs[: query.match_count]
+
+    async def vector_search_scored(self, embedding, query: Query):
+        return [(doc, None) for doc in await self.vector_search(embedding, query)]
+
+    async def get_embeddings(self, doc_ids) -> Dict[str, List[float]]:
+        return {str(d): self.vectors[str(d)] for d in doc_ids}
+
+
+@pytest.mark.asyncio
+async def test_diversified_search_over_fetches_and_reranks() -> None:
+    db = FakeDB([[1.0, 0.1], [1.0, 0.1], [1.0, 0.1], [0.6, 0.8]])
+    plain = await diversified_search(db, [1.0, 0.0], Query(query_text="x", match_count=2))
+    assert plain == db.docs[:2]
+
+    diverse = await diversified_search(
+        db, [1.0, 0.0], Query(query_text="x", match_count=2, mmr_lambda=0.3)
+    )
+    assert db.requested == [2, 8]
+    assert diverse == [db.docs[0], db.docs[3]]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.common.ngram_embedding import HashedNgramEmbedder, fit_idf
+from src.server.services import offline_embedding
+
+
+def test_embeddings_are_normalized_and_deterministic() -> None:
+    embedder = HashedNgramEmbedder(dim=256)
+    first = embedder.embed_batch(["Hello world", ""])
+    second = HashedNgramEmbedder(dim=256).embed_batch(["hello   WORLD"])
+    assert first.shape == (2, 256) and first.dtype == np.float32
+    assert np.isclose(np.linalg.norm(first[0]), 1.0)
+    assert not first[1].any()
+    assert np.allclose(first[0], second[0])
+
+
+def test_similar_texts_score_higher_than_unrelated() -> None:
+    embedder = HashedNgramEmbedder()
+    a, b, c = embedder.embed_batch(
+        [
+            "The quick brown fox jumps over the lazy dog",
+            "A quick brown fox jumped over lazy dogs",
+            "Quarterly revenue grew on strong cloud demand",
+        ]
+    )
+    assert a @ b > 0.4
+    assert abs(a @ c) < 0.1
+
+
+def test_idf_downweights_common_features() -> None:
+    embedder = HashedNgramEmbedder(dim=128)
+    corpus = ["the cat", "the dog", "the bird", "the fish"]
+    idf = fit_idf(embedder, corpus)
+    assert idf.shape == (128,)
+    assert idf.min() >= 1.0
+    weighted = HashedNgramEmbedder(dim=128, idf=idf)
+    assert np.isclose(np.linalg.norm(weighted.embed_batch(["the cat"])[0]), 1.0)
+    with pytest.raises(ValueError):
+        HashedNgramEmbedder(dim=64, idf=idf)
+
+
+@pytest.mark.asyncio
+async def test_large_batches_use_process_pool(monkeypatch) -> None:
+    monkeypatch.setattr(offline_embedding, "OFFLINE_EMBEDDING_DIM", 64)
+    monkeypatch.setattr(offline_embedding, "OFFLINE_EMBEDDING_WORKERS", 2)
+    monkeypatch.setattr(offline_embedding, "OFFLINE_EMBEDDING_POOL_MIN", 4)
+    monkeypatch.setattr(offline_embedding, "_embedder", None)
+    texts = [f"document number {i}" for i in range(9)]
+    try:
+        pooled = await offline_embedding.embed_offline(texts)
+    finally:
+        offline_embedding.shutdown_embedding_pool()
+    inline = HashedNgramEmbedder(dim=64).embed_batch(texts)
+    assert np.allclose(np.array(pooled), inline)
+    assert len(await offline_embedding.embed_offline(texts[:2])) == 2
@@ -0,0 +1,121 @@
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Tuple
+
+import pytest
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from src.common import pdf_worker
+from src.server.services import pdf_extraction
+from src.server.services.pdf_extraction import (
+    PdfExtractionError,
+    PdfPageTimeoutError,
+    extract_pdf_text,
+    shutdown_pdf_pool,
+)
+
+
+def _write_pdf(path: Path, texts: List[str]) -> None:
+    writer = PdfWriter()
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    for text in texts:
+        page = PageObject.create_blank_page(width=200, height=200)
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 12 Tf 20 100 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = stream
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+        writer.add_page(page)
+    with path.open("wb") as fh:
+        writer.write(fh)
+
+
+@pytest.fixture(autouse=True)
+def _pool_cleanup():
+    yield
+    shutdown_pdf_pool()
+
+
+@pytest.mark.asyncio
+async def test_extract_pdf_text_reassembles_pages(tmp_path) -> None:
+    path = tmp_path / "doc.pdf"
+    _write_pdf(path, ["alpha", "beta", "gamma"])
+    progress: List[Tuple[int, int]] = []
+
+    async def on_progress(done: int, total: int) -> None:
+        progress.append((done, total))
+
+    text = await extract_pdf_text(str(path), on_progress=on_progress)
+    assert [line.strip() for line in text.split("\n")] == ["alpha", "beta", "gamma"]
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+
+@pytest.mark.asyncio
+async def test_extract_pdf_text_invalid(tmp_path) -> None:
+    path = tmp_path / "bad.pdf"
+    path.write_bytes(b"not a pdf")
+    with pytest.raises(PdfExtractionError, match="invalid PDF"):
+        await extract_pdf_text(str(path))
+
+
+def test_reader_cache_keeps_recent_files(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(pdf_worker, "_readers", pdf_worker.OrderedDict())
+    paths = []
+    for i in range(pdf_worker.READER_CACHE_SIZE + 1):
+        path = tmp_path / f"{i}.pdf"
+        _write_pdf(path, [str(i)])
+        paths.append(str(path))
+    first = pdf_worker._reader(paths[0])
+    for path in paths[1:-1]:
+        pdf_worker._reader(path)
+    # Interleaved pages of the first file reuse its parse.
+    assert pdf_worker._reader(paths[0]) is first
+    pdf_worker._reader(paths[-1])
+    assert len(pdf_worker._readers) == pdf_worker.READER_CACHE_SIZE
+    assert pdf_worker._reader(paths[0]) is first
+    assert paths[1] not in {key[0] for key in pdf_worker._readers}
+
+
+class _SlowPage:
+    def extract_text(self) -> str:
+        time.sleep(2)
+        return "late"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs SIGALRM")
+def test_extract_page_times_out(monkeypatch) -> None:
+    reader = SimpleNamespace(pages=[_SlowPage()])
+    monkeypatch.setattr(pdf_worker, "_reader", lambda path: reader)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pdf_worker.extract_page("slow.pdf", 0, 0.05)
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.asyncio
+async def test_page_timeout_in_worker_is_reported() -> None:
+    with pytest.raises(PdfPageTimeoutError):
+        await pdf_extraction._run(pdf_worker._on_alarm)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs RLIMIT_AS")
+@pytest.mark.asyncio
+async def test_workers_run_under_the_memory_cap(monkeypatch) -> None:
+    import resource
+
+    shutdown_pdf_pool()
+    monkeypatch.setattr(pdf_extraction, "PDF_WORKER_MEMORY_MB", 512)
+    limit = await pdf_extraction._run(resource.getrlimit, resource.RLIMIT_AS)
+    assert tuple(limit) == (512 * 1024 * 1024,) * 2
+    with pytest.raises(PdfExtractionError, match="resource limits"):
+        await pdf_extraction._run(bytearray, 1024 * 1024 * 1024)
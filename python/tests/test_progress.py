@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from src.server.services.progress import ProgressCoalescer
+
+
+@pytest.mark.asyncio
+async def test_latest_state_per_key_wins() -> None:
+    events = []
+
+    async def emit(room, payload):
+        events.append((room, payload))
+
+    progress = ProgressCoalescer(emit, rate=1000)
+    for page in range(5):
+        progress.publish("p1", "doc", {"page": page})
+    await progress.flush()
+    assert events == [("p1", {"page": 4})]
+
+
+@pytest.mark.asyncio
+async def test_emits_are_rate_limited_per_room() -> None:
+    events = []
+
+    async def emit(room, payload):
+        events.append((room, payload["n"]))
+
+    progress = ProgressCoalescer(emit, rate=20)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for n in range(4):
+        progress.publish("p1", f"doc{n}", {"n": n})
+    progress.publish("p2", "doc", {"n": 9})
+    await progress.flush()
+    elapsed = loop.time() - start
+    assert [n for room, n in events if room == "p1"] == [0, 1, 2, 3]
+    assert ("p2", 9) in events
+    # Three intervals between four emits in one room; other rooms run in parallel.
+    assert 0.14 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_publish_does_not_wait_for_emit() -> None:
+    release = asyncio.Event()
+    events = []
+
+    async def emit(room, payload):
+        await release.wait()
+        events.append(payload)
+
+    progress = ProgressCoalescer(emit, rate=1000)
+    progress.publish("p1", "doc", {"status": "queued"})
+    progress.publish("p1", "doc", {"status": "processing"})
+    await asyncio.sleep(0)
+    progress.publish("p1", "doc", {"status": "completed"})
+    assert progress.pending("p1") == 1
+    release.set()
+    await progress.flush()
+    assert events == [{"status": "processing"}, {"status": "completed"}]
+
+
+@pytest.mark.asyncio
+async def test_emit_failures_do_not_stop_draining() -> None:
+    events = []
+
+    async def emit(room, payload):
+        if payload["n"] == 0:
+            raise RuntimeError("socket down")
+        events.append(payload["n"])
+
+    progress = ProgressCoalescer(emit, rate=1000)
+    progress.publish("p1", "a", {"n": 0})
+    progress.publish("p1", "b", {"n": 1})
+    await progress.flush()
+    assert events == [1]
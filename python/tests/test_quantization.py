@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import List
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from src.server.models.query import Query
+from src.server.services.database import DatabaseService, embedding_row
+from src.server.services.quantization import (
+    QuantizedIndex,
+    bit_string,
+    dequantize_int8,
+    hamming_distances,
+    quantize_binary,
+    quantize_int8,
+)
+
+
+def _corpus(n: int = 2000, dim: int = 128, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def _clustered(n: int, dim: int = 256, seed: int = 0) -> np.ndarray:
+    # Real embeddings cluster by topic; iid noise is a pessimistic stand-in.
+    rng = np.random.default_rng(seed)
+    centers = np.random.default_rng(42).standard_normal((50, dim))
+    points = centers[rng.integers(0, 50, n)] + 0.5 * rng.standard_normal((n, dim))
+    return points.astype(np.float32)
+
+
+def _brute_force(vectors: np.ndarray, query: np.ndarray, k: int) -> List[int]:
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    sims = unit @ (query / np.linalg.norm(query))
+    return list(np.argsort(-sims)[:k])
+
+
+def test_int8_round_trip_error_is_small() -> None:
+    vector = _corpus(1, 256)[0]
+    codes, scale = quantize_int8(vector)
+    assert codes.dtype == np.int8
+    error = np.abs(dequantize_int8(codes, scale) - vector).max()
+    assert error <= scale / 2 + 1e-6
+
+
+def test_binary_codes_and_hamming() -> None:
+    a = quantize_binary([1.0, -1.0, 0.5, -0.5, 1.0, 1.0, -1.0, -1.0, 1.0])
+    b = quantize_binary([1.0, 1.0, 0.5, -0.5, -1.0, 1.0, -1.0, -1.0, -1.0])
+    assert a.nbytes == 2
+    assert list(hamming_distances(a, np.stack([a, b]))) == [0, 3]
+    assert bit_string([0.3, -0.1, 0.0, 2.0]) == "1001"
+
+
+@pytest.mark.parametrize("mode", ["binary", "int8"])
+def test_quantized_index_recall(mode: str) -> None:
+    vectors = _clustered(2000)
+    index = QuantizedIndex(mode, oversample=10)
+    index.build(vectors)
+    queries = _clustered(20, seed=1)
+    hits = 0
+    for query in queries:
+        found = [row for row, _ in index.search(query, 10)]
+        hits += len(set(found) & set(_brute_force(vectors, query, 10)))
+    assert hits / (10 * len(queries)) >= 0.9
+
+
+def test_quantized_index_memory() -> None:
+    vectors = _corpus()
+    binary = QuantizedIndex("binary")
+    binary.build(vectors)
+    int8 = QuantizedIndex("int8")
+    int8.build(vectors)
+    assert binary.nbytes * 32 == vectors.nbytes
+    assert int8.nbytes < vectors.nbytes / 3.5
+
+
+def test_embedding_row_columns() -> None:
+    doc_id = uuid4()
+    plain = embedding_row(doc_id, [0.5, -0.25])
+    assert plain == {"doc_id": str(doc_id), "embedding": [0.5, -0.25]}
+    row = embedding_row(doc_id, [0.5, -0.25], "binary")
+    assert row == {**plain, "embedding_bits": "10"}
+
+
+@pytest.mark.asyncio
+async def test_vector_search_uses_quantized_rpc(recording_provider) -> None:
+    provider = recording_provider()
+    service = DatabaseService(provider, quantization="binary")
+    await service.vector_search([0.1, -0.2], Query(query_text="x", match_count=3))
+    name, params = provider.client.calls[0]
+    assert name == "match_documents_quantized"
+    assert params["query_bits"] == "10"
+    assert params["candidate_count"] == 30
+
+    plain = DatabaseService(provider, quantization="none")
+    await plain.vector_search([0.1, -0.2], Query(query_text="x"))
+    assert provider.client.calls[1][0] == "match_documents"
+
+
+def test_unknown_quantization_rejected(recording_provider) -> None:
+    with pytest.raises(ValueError):
+        DatabaseService(recording_provider(), quantization="pq")
+    # int8 codes cannot be indexed in Postgres; they are in-process only.
+    with pytest.raises(ValueError):
+        DatabaseService(recording_provider(), quantization="int8")
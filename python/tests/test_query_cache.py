@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import time
+from typing import List
+from uuid import uuid4
+
+import pytest
+
+from src.server.models.document import Document
+from src.server.models.query import Query
+from src.server.services import mmr
+from src.server.services.query_cache import SemanticQueryCache
+
+
+def docs(count: int = 2, source=None) -> List[Document]:
+    source = source or uuid4()
+    return [Document(id=uuid4(), source_id=source, content=f"d{i}") for i in range(count)]
+
+
+def test_near_duplicate_query_hits() -> None:
+    cache = SemanticQueryCache(size=4, ttl=60, max_distance=0.05)
+    results = docs()
+    cache.store([1.0, 0.0, 0.0], Query(query_text="reset password"), results)
+
+    hit = cache.lookup([0.99, 0.05, 0.0], Query(query_text="password reset"))
+    assert hit == results
+    assert cache.lookup([0.7, 0.7, 0.0], Query(query_text="billing")) is None
+
+
+def test_other_parameters_must_match() -> None:
+    cache = SemanticQueryCache(size=4, ttl=60)
+    cache.store([1.0, 0.0], Query(query_text="a"), docs())
+
+    assert cache.lookup([1.0, 0.0], Query(query_text="a", match_count=10)) is None
+    assert cache.lookup([1.0, 0.0], Query(query_text="a", filters={"k": "v"})) is None
+    assert cache.lookup([1.0, 0.0], Query(query_text="a", mmr_lambda=0.5)) is None
+    assert cache.lookup([1.0, 0.0], Query(query_text="a")) is not None
+
+
+def test_entries_expire(monkeypatch) -> None:
+    cache = SemanticQueryCache(size=4, ttl=10)
+    cache.store([1.0, 0.0], Query(query_text="a"), docs())
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.lookup([1.0, 0.0], Query(query_text="a")) is None
+    assert len(cache) == 0
+
+
+def test_expired_nearest_entry_does_not_hide_a_live_one(monkeypatch) -> None:
+    cache = SemanticQueryCache(size=4, ttl=10, max_distance=0.05)
+    query = Query(query_text="q")
+    cache.store([1.0, 0.0], query, docs())
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 5)
+    live = docs()
+    cache.store([0.99, 0.05], query, live)
+    cache.store([0.0, 1.0], Query(query_text="q", match_count=9), docs())
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+
+    assert cache.lookup([1.0, 0.0], query) == live
+    assert len(cache) == 2
+    monkeypatch.setattr(time, "monotonic", lambda: now + 16)
+    assert cache.lookup([1.0, 0.0], query) is None
+    # Expired entries in other scopes are evicted as well.
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = SemanticQueryCache(size=2, ttl=60)
+    query = Query(query_text="q")
+    cache.store([1.0, 0.0, 0.0], query, docs())
+    cache.store([0.0, 1.0, 0.0], query, docs())
+    assert cache.lookup([1.0, 0.0, 0.0], query) is not None
+    cache.store([0.0, 0.0, 1.0], query, docs())
+
+    assert len(cache) == 2
+    assert cache.lookup([0.0, 1.0, 0.0], query) is None
+    assert cache.lookup([1.0, 0.0, 0.0], query) is not None
+
+
+def test_invalidation_by_source_and_document() -> None:
+    cache = SemanticQueryCache(size=8, ttl=60)
+    source, other = uuid4(), uuid4()
+    mine = docs(source=source)
+    cache.store([1.0, 0.0, 0.0], Query(query_text="a"), mine)
+    cache.store(
+        [0.0, 1.0, 0.0], Query(query_text="b", filters={"source_id": str(other)}), docs(source=other)
+    )
+    cache.store([0.0, 0.0, 1.0], Query(query_text="c"), docs(source=other))
+
+    # Unpinned entries could gain new matches from the source, so they go too.
+    assert cache.invalidate_source(source) == 2
+    assert len(cache) == 1
+
+    cache.store([1.0, 0.0, 0.0], Query(query_text="a"), mine)
+    assert cache.invalidate_document(mine[0].id) == 1
+    assert cache.lookup([1.0, 0.0, 0.0], Query(query_text="a")) is None
+
+
+def test_dimension_change_clears_cache() -> None:
+    cache = SemanticQueryCache(size=4, ttl=60)
+    cache.store([1.0, 0.0], Query(query_text="a"), docs())
+    assert cache.lookup([1.0, 0.0, 0.0], Query(query_text="a")) is None
+    assert len(cache) == 0
+
+
+def test_disabled_cache_stores_nothing() -> None:
+    cache = SemanticQueryCache(size=0)
+    cache.store([1.0], Query(query_text="a"), docs())
+    assert cache.lookup([1.0], Query(query_text="a")) is None
+
+
+class CountingDB:
+    def __init__(self) -> None:
+        self.docs = docs(3)
+        self.calls = 0
+
+    async def vector_search(self, embedding, query: Query) -> List[Document]:
+        self.calls += 1
+        return self.docs[: query.match_count]
+
+    async def vector_search_scored(self, embedding, query: Query):
+        return [(doc, 0.1) for doc in await self.vector_search(embedding, query)]
+
+
+@pytest.mark.asyncio
+async def test_diversified_search_uses_cache(monkeypatch) -> None:
+    monkeypatch.setattr(mmr, "query_cache", SemanticQueryCache(size=4, ttl=60))
+    db = CountingDB()
+    first = await mmr.diversified_search(db, [1.0, 0.0], Query(query_text="a", match_count=2))
+    second = await mmr.diversified_search(db, [1.0, 0.01], Query(query_text="A", match_count=2))
+    assert first == second == db.docs[:2]
+    assert db.calls == 1
+    scored = await mmr.scored_search(db, [1.0, 0.0], Query(query_text="a", match_count=2))
+    assert scored == [(doc, 0.1) for doc in db.docs[:2]]
+    assert db.calls == 1
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.server.services.rate_limiter import (
+    MemoryBucketStore,
+    ProviderRateLimiter,
+    SqliteBucketStore,
+    estimate_tokens,
+)
+
+
+@pytest.mark.asyncio
+async def test_bucket_reserves_in_order() -> None:
+    store = MemoryBucketStore()
+    waits = [await store.take("k", 1, rate=10, capacity=2) for _ in range(5)]
+    assert waits[:2] == [0, 0]
+    # Each reservation queues behind the previous one.
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[4] == pytest.approx(0.3, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_non_reserving_take_leaves_bucket() -> None:
+    store = MemoryBucketStore()
+    assert await store.take("k", 1, rate=1, capacity=1, reserve=False) == 0
+    assert await store.take("k", 1, rate=1, capacity=1, reserve=False) > 0
+    assert await store.take("k", 1, rate=1, capacity=1, reserve=False) <= 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_is_shared(tmp_path) -> None:
+    path = str(tmp_path / "buckets.sqlite")
+    first, second = SqliteBucketStore(path), SqliteBucketStore(path)
+    try:
+        assert await first.take("k", 3, rate=1, capacity=3) == 0
+        assert await second.take("k", 1, rate=1, capacity=3) == pytest.approx(1, abs=0.05)
+    finally:
+        first.close()
+        second.close()
+
+
+@pytest.mark.asyncio
+async def test_limiter_throttles_and_budgets_retries(monkeypatch) -> None:
+    slept = []
+
+    async def fake_sleep(seconds: float) -> None:
+        slept.append(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    limiter = ProviderRateLimiter(
+        MemoryBucketStore(), requests_per_minute=60, tokens_per_minute=600,
+        retries_per_minute=2,
+    )
+    assert await limiter.acquire(600) == 0
+    assert await limiter.acquire(300) == pytest.approx(30, abs=0.1)
+
+    await limiter.throttled(5)
+    assert await limiter.acquire(1) >= 5
+    assert slept[0] == pytest.approx(30, abs=0.1)
+
+    assert [await limiter.allow_retry() for _ in range(3)] == [True, True, False]
+
+
+def test_estimate_tokens() -> None:
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 400) == 100
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.server.auth.dependencies import jwt_service
+from src.server.database.migrations import split_statements
+from src.server.main import api
+from src.server.models.query import Query
+from src.server.routes import get_database_service
+from src.server.services.database import DatabaseError, DatabaseService, embedding_row
+from src.server.services.reduction import (
+    Projection,
+    ProjectionError,
+    ProjectionRegistry,
+    ProjectionRollout,
+    fit_pca,
+    fit_projection,
+    projections,
+    recall_report,
+)
+
+
+def _low_rank(n: int = 1000, dim: int = 128, rank: int = 16, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    basis = rng.standard_normal((rank, dim))
+    points = rng.standard_normal((n, rank)) @ basis
+    return (points + 0.01 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def test_fit_pca_recovers_low_rank_structure() -> None:
+    sample = _low_rank()
+    projection = fit_pca("m", sample, 32)
+    assert projection.components.shape == (32, 128)
+    report = recall_report(projection, sample, [4, 16, 32], k=10)
+    by_dims = {row["dims"]: row for row in report}
+    assert by_dims[16]["recall"] >= 0.95
+    assert by_dims[4]["recall"] < by_dims[16]["recall"]
+    assert by_dims[16]["size_ratio"] == 16 / 128
+
+
+def test_fit_pca_validates_dims() -> None:
+    with pytest.raises(ProjectionError):
+        fit_pca("m", _low_rank(10), 64)
+    with pytest.raises(ProjectionError):
+        fit_pca("m", np.zeros((1, 8)), 1)
+
+
+def test_projection_row_round_trip() -> None:
+    projection = fit_pca("m", _low_rank(), 8)
+    restored = Projection.from_row(projection.to_row())
+    assert restored.dims == 8
+    vector = _low_rank(1, seed=3)[0].tolist()
+    assert np.allclose(restored.project(vector), projection.project(vector), atol=1e-6)
+    assert np.linalg.norm(projection.project(vector)) == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        projection.project([0.1, 0.2])
+
+
+class FakeDB:
+    def __init__(self, vectors: np.ndarray) -> None:
+        self.rows = [
+            {"doc_id": f"{i:04d}", "embedding": v.tolist()} for i, v in enumerate(vectors)
+        ]
+        self.stored: Optional[Dict[str, Any]] = None
+        self.inactive: Optional[Dict[str, Any]] = None
+        self.reduced: Dict[str, List[float]] = {}
+        self.updates: List[int] = []
+        self.fail_updates = False
+        self.fail_version = False
+        self.loads = 0
+        # Called with the page number on each list_embeddings call.
+        self.on_list: Optional[Callable[[int], None]] = None
+        self.pages = 0
+
+    async def sample_embeddings(self, count: int) -> List[List[float]]:
+        return [row["embedding"] for row in self.rows[:count]]
+
+    async def store_projection(self, projection: Projection, active: bool = True) -> bool:
+        if active:
+            self.stored = projection.to_row()
+        else:
+            self.inactive = projection.to_row()
+        return True
+
+    async def get_projection(self, model: str) -> Optional[Dict[str, Any]]:
+        self.loads += 1
+        return self.stored if self.stored and self.stored["model"] == model else None
+
+    async def activate_projection(self, model: str) -> bool:
+        if self.inactive is None or self.inactive["model"] != model:
+            return False
+        self.stored, self.inactive = self.inactive, None
+        return True
+
+    async def get_projection_version(self, model: str) -> Optional[int]:
+        if self.fail_version:
+            raise DatabaseError("get_projection_version failed")
+        return self.stored["version"] if self.stored and self.stored["model"] == model else None
+
+    async def list_embeddings(
+        self, after: Optional[str], limit: int, stale_for: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        if self.on_list is not None:
+            self.on_list(self.pages)
+        self.pages += 1
+        rows = sorted(
+            (r for r in self.rows if after is None or r["doc_id"] > after),
+            key=lambda r: r["doc_id"],
+        )
+        return [r for r in rows if r.get("version") != stale_for][:limit]
+
+    async def update_reduced_embeddings(self, updates, version: int) -> int:
+        if self.fail_updates:
+            raise DatabaseError("update_reduced_embeddings failed")
+        self.updates.append(len(updates))
+        self.reduced.update({doc_id: reduced for doc_id, reduced in updates})
+        ids = {doc_id for doc_id, _ in updates}
+        for row in self.rows:
+            if row["doc_id"] in ids:
+                row["version"] = version
+        return len(updates)
+
+
+@pytest.mark.asyncio
+async def test_projection_is_active_only_after_backfill() -> None:
+    projections.clear()
+    db = FakeDB(_low_rank(300))
+    projection, report = await fit_projection(db, "m", 16, 200, candidate_dims=[8, 32])
+    assert projection.dims == 16
+    assert [row["dims"] for row in report] == [8, 16, 32]
+    # Stored inactive: searches do not see it before the backfill.
+    assert db.stored is None and db.inactive["dims"] == 16
+    assert await projections.get(db, "m") is None
+
+    rollout = ProjectionRollout(batch=64, settle=0)
+    assert await rollout.run(db, projection)
+    assert db.updates == [64, 64, 64, 64, 44]
+    assert len(db.reduced["0299"]) == 16
+    assert db.stored["dims"] == 16 and db.inactive is None
+    assert (await projections.get(db, "m")) is projection
+    assert rollout.snapshot()["status"] == "active"
+    assert rollout.snapshot()["backfilled"] == 300
+    projections.clear()
+
+
+@pytest.mark.asyncio
+async def test_refit_keeps_active_dims_and_failed_backfill_is_reported() -> None:
+    projections.clear()
+    db = FakeDB(_low_rank(300))
+    db.stored = fit_pca("m", _low_rank(), 8).to_row()
+    with pytest.raises(ProjectionError):
+        await fit_projection(db, "m", 16, 200)
+
+    projection, _ = await fit_projection(db, "m", 8, 200)
+    db.fail_updates = True
+    rollout = ProjectionRollout(settle=0)
+    assert not await rollout.run(db, projection)
+    snapshot = rollout.snapshot()
+    assert snapshot["status"] == "failed"
+    assert "update_reduced_embeddings" in snapshot["error"]
+    # The previous projection stays active.
+    assert db.inactive is not None
+    assert (await projections.get(db, "m")).components.shape == (8, 128)
+    assert (await projections.get(db, "m")) is not projection
+    projections.clear()
+
+
+@pytest.mark.asyncio
+async def test_admin_projection_routes(monkeypatch) -> None:
+    db = FakeDB(_low_rank(300))
+
+    async def _get_db():
+        return db
+
+    monkeypatch.setattr("src.server.routes.admin.embedding_model", lambda: "m")
+    rollout = ProjectionRollout(settle=0)
+    monkeypatch.setattr("src.server.routes.admin.projection_rollout", rollout)
+    api.dependency_overrides[get_database_service] = _get_db
+    user = {"Authorization": f"Bearer {jwt_service.create_token('u', 'user')}"}
+    admin = {"Authorization": f"Bearer {jwt_service.create_token('a', 'admin')}"}
+    body = {"dims": 8, "sample_size": 200}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=api), base_url="http://test") as client:
+            res = await client.post("/admin/projection", json=body, headers=user)
+            assert res.status_code == 403
+            res = await client.post(
+                "/admin/projection", json={**body, "sample_size": 10**6}, headers=admin
+            )
+            assert res.status_code == 422
+
+            res = await client.post("/admin/projection", json=body, headers=admin)
+            assert res.status_code == 201 and res.json()["data"]["dims"] == 8
+            res = await client.get("/admin/projection", headers=admin)
+            assert res.json()["data"]["status"] == "active"
+    finally:
+        api.dependency_overrides.clear()
+        projections.clear()
+
+
+@pytest.mark.asyncio
+async def test_registry_caches_until_refresh() -> None:
+    db = FakeDB(_low_rank(50))
+    db.stored = fit_pca("m", _low_rank(), 4).to_row()
+    registry = ProjectionRegistry(refresh=60)
+    assert (await registry.get(db, "m")).dims == 4
+    assert (await registry.get(db, "other")) is None
+    await registry.get(db, "m")
+    assert db.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_registry_reloads_when_the_active_version_changes() -> None:
+    db = FakeDB(_low_rank(50))
+    db.stored = fit_pca("m", _low_rank(), 4).to_row()
+    registry = ProjectionRegistry(refresh=0)
+    first = await registry.get(db, "m")
+    assert await registry.get(db, "m") is first
+    assert db.loads == 1
+
+    db.stored = fit_pca("m", _low_rank(seed=1), 4).to_row()
+    db.fail_version = True
+    assert await registry.get(db, "m") is first
+    db.fail_version = False
+    second = await registry.get(db, "m")
+    assert second is not first and second.version == db.stored["version"]
+    assert db.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_rollout_reprojects_rows_written_while_it_runs() -> None:
+    projections.clear()
+    db = FakeDB(_low_rank(300))
+    old = fit_pca("m", _low_rank(seed=1), 8)
+    db.stored = old.to_row()
+    projection, _ = await fit_projection(db, "m", 8, 200)
+
+    def write(page: int) -> None:
+        if page == 2:
+            # Inserted behind the cursor by a worker on the old basis.
+            db.rows.append({"doc_id": "0000a", "embedding": db.rows[0]["embedding"]})
+            db.rows.append(
+                {"doc_id": "0001a", "embedding": db.rows[1]["embedding"], "version": old.version}
+            )
+
+    async def activate(model: str) -> bool:
+        db.stored, db.inactive = db.inactive, None
+        # A worker that has not seen the new version yet.
+        db.rows.append(
+            {"doc_id": "0002a", "embedding": db.rows[2]["embedding"], "version": old.version}
+        )
+        return True
+
+    db.on_list = write
+    db.activate_projection = activate
+    rollout = ProjectionRollout(batch=64, settle=0)
+    assert await rollout.run(db, projection)
+    assert {r.get("version") for r in db.rows} == {projection.version}
+    assert {"0000a", "0001a", "0002a"} <= set(db.reduced)
+    assert rollout.snapshot()["backfilled"] == 303
+    projections.clear()
+
+
+@pytest.mark.asyncio
+async def test_vector_search_and_rows_use_projection(recording_provider) -> None:
+    projection = fit_pca("m", _low_rank(), 8)
+    vector = _low_rank(1, seed=5)[0].tolist()
+    row = embedding_row(uuid4(), vector, projection=projection)
+    assert len(row["embedding_reduced"]) == 8
+    assert row["projection_version"] == projection.version
+
+    provider = recording_provider()
+    service = DatabaseService(provider, quantization="binary", projection=projection)
+    await service.vector_search(vector, Query(query_text="x"))
+    name, params = provider.client.calls[0]
+    assert name == "match_documents_reduced"
+    assert len(params["query_embedding"]) == 8
+
+
+def test_projection_version_migration_replaces_the_update_function() -> None:
+    path = Path(__file__).resolve().parents[2] / "migration" / "14_projection_versions.sql"
+    statements = split_statements(path.read_text())
+    assert len(statements) == 4
+    assert "DROP FUNCTION IF EXISTS update_reduced_embeddings(JSONB)" in statements[2]
+    assert "projection_version = reduced_version" in statements[3]
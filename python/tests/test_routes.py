@@ -1,5 +1,8 @@
 import pytest
 import asyncio
+import io
+import json
+import zipfile
 from uuid import UUID, uuid4
 
 import pytest_asyncio
@@ -22,6 +25,8 @@ class FakeDB:
         self.sources = {}
         self.documents = {}
         self.embeddings = {}
+        self.content_hashes = {}
+        self.chunks = {}
 
     async def create_project(self, project: Project) -> Project:
         self.projects[project.id] = project
@@ -73,6 +78,11 @@ class FakeDB:
         self.documents[doc.id] = doc
         return doc
 
+    async def create_documents(self, docs):
+        for doc in docs:
+            self.documents[doc.id] = doc
+        return list(docs)
+
     async def get_document(self, did):
         return self.documents.get(did)
 
@@ -89,9 +99,21 @@ class FakeDB:
     async def delete_document(self, did):
         return self.documents.pop(did, None) is not None
 
+    async def delete_batch_documents(self, batch_id):
+        for did, doc in list(self.documents.items()):
+            if doc.metadata.get("batch_id") == str(batch_id):
+                del self.documents[did]
+        return True
+
     async def vector_search(self, embedding, query: Query):
         return list(self.documents.values())[: query.match_count]
 
+    async def vector_search_scored(self, embedding, query: Query):
+        return [(doc, 0.25) for doc in await self.vector_search(embedding, query)]
+
+    async def get_embeddings(self, doc_ids):
+        return {str(d): self.embeddings[d] for d in doc_ids if d in self.embeddings}
+
     async def store_embedding(self, doc_id, embedding):
         self.embeddings[doc_id] = embedding
         doc = self.documents.get(doc_id)
@@ -101,6 +123,36 @@ class FakeDB:
             self.documents[doc_id] = Document(**new_data)
         return True
 
+    async def get_content_hash(self, digest):
+        return self.content_hashes.get(digest)
+
+    async def store_content_hash(self, digest, doc_id, embedding):
+        self.content_hashes.setdefault(
+            digest, {"content_hash": digest, "doc_id": str(doc_id), "embedding": embedding}
+        )
+        return True
+
+    async def list_content_hashes(self, after=None, limit=1000):
+        hashes = sorted(h for h in self.content_hashes if after is None or h > after)
+        return hashes[:limit]
+
+    async def replace_embedding(self, doc_id, embedding):
+        self.embeddings[doc_id] = embedding
+        return True
+
+    async def list_chunk_embeddings(self, doc_id):
+        return list(self.chunks.get(doc_id, {}).values())
+
+    async def upsert_chunk_embeddings(self, doc_id, rows):
+        stored = self.chunks.setdefault(doc_id, {})
+        for row in rows:
+            stored[row["chunk_index"]] = dict(row)
+
+    async def delete_chunk_embeddings(self, doc_id, from_index=0):
+        stored = self.chunks.get(doc_id, {})
+        for index in [i for i in stored if i >= from_index]:
+            del stored[index]
+
 
 @pytest_asyncio.fixture
 async def client():
@@ -254,6 +306,60 @@ async def test_upload_and_search_flow(client: AsyncClient) -> None:
     res = await client.post("/search", json=query)
     assert res.status_code == 200
     assert res.json()["data"][0]["id"] == doc_id
+    res = await client.post("/search", json={**query, "mmr_lambda": 0.5})
+    assert res.status_code == 200
+    assert res.json()["data"][0]["id"] == doc_id
+
+
+@pytest.mark.asyncio
+async def test_search_broadcasts_compact_summary(client: AsyncClient, monkeypatch) -> None:
+    from src.server.routes import search as search_routes
+
+    sent = []
+
+    async def fake_broadcast(project_id, payload):
+        sent.append((project_id, payload))
+
+    monkeypatch.setattr(search_routes, "broadcast_search_completed", fake_broadcast)
+    did, pid = uuid4(), str(uuid4())
+    client.fake_db.documents[did] = Document(
+        id=did, source_id=uuid4(), content="hi there", embeddings=[0.1] * 8
+    )
+    res = await client.post("/search", json={"query_text": "hi", "filters": {"project_id": pid}})
+    assert res.status_code == 200
+    assert sent == [
+        (
+            pid,
+            {
+                "query": "hi",
+                "total": 1,
+                "truncated": False,
+                "results": [
+                    {
+                        "id": str(did),
+                        "source_id": str(client.fake_db.documents[did].source_id),
+                        "rank": 1,
+                        "score": 0.75,
+                        "title": "hi there",
+                        "snippet": "hi there",
+                    }
+                ],
+            },
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_search_stream_ends_with_summary(client: AsyncClient) -> None:
+    did = uuid4()
+    client.fake_db.documents[did] = Document(id=did, source_id=uuid4(), content="hi")
+    res = await client.post("/search/stream", json={"query_text": "hi"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    frames = [json.loads(line) for line in res.text.splitlines()]
+    assert frames[0]["type"] == "result"
+    assert frames[0]["document"]["id"] == str(did)
+    assert frames[-1] == {**frames[-1], "type": "summary", "count": 1, "order": [str(did)]}
 
 
 @pytest.mark.asyncio
@@ -266,6 +372,41 @@ async def test_upload_rejects_large_file(client: AsyncClient) -> None:
     assert res.json()["detail"] == "file too large"
 
 
+@pytest.mark.asyncio
+async def test_upload_rejects_oversized_content_length(client: AsyncClient) -> None:
+    headers = {
+        "Content-Type": "multipart/form-data; boundary=x",
+        "Content-Length": str(MAX_FILE_SIZE * 2),
+    }
+    res = await client.post("/documents/upload", headers=headers, content=b"--x--")
+    assert res.status_code == 413
+    assert res.json()["detail"] == "file too large"
+
+
+@pytest.mark.asyncio
+async def test_upload_rejected_when_project_quota_exhausted(
+    client: AsyncClient, monkeypatch
+) -> None:
+    from src.server.routes import documents
+    from src.server.services.admission import AdmissionController
+
+    ctrl = AdmissionController(
+        max_bytes=1000, max_jobs=10, project_max_bytes=1000, project_max_jobs=1
+    )
+    monkeypatch.setattr(documents, "upload_admission", ctrl)
+    source_id = str(uuid4())
+    held = ctrl.admit(source_id, 1)
+    data = {"source_id": source_id}
+    files = {"file": ("a.txt", b"hello", "text/plain")}
+    res = await client.post("/documents/upload", data=data, files=files)
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) >= 1
+    held.release()
+    res = await client.post("/documents/upload", data=data, files=files)
+    assert res.status_code == 202
+    assert ctrl.jobs == 0
+
+
 @pytest.mark.asyncio
 async def test_upload_rejects_malformed_pdf(client: AsyncClient) -> None:
     data = {"source_id": str(uuid4())}
@@ -275,9 +416,321 @@ async def test_upload_rejects_malformed_pdf(client: AsyncClient) -> None:
     assert res.json()["detail"] == "invalid PDF"
 
 
+@pytest.mark.asyncio
+async def test_archive_upload_flow(client: AsyncClient) -> None:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("docs/a.txt", b"alpha")
+        zf.writestr("docs/b.md", b"beta")
+        zf.writestr("docs/empty.txt", b"   ")
+        zf.writestr("docs/logo.png", b"\x89PNG")
+    data = {"source_id": str(uuid4())}
+    files = {"file": ("docs.zip", buf.getvalue(), "application/zip")}
+    res = await client.post("/documents/upload/archive", data=data, files=files)
+    assert res.status_code == 202
+    body = res.json()["data"]
+    assert len(body["document_ids"]) == 2
+    assert body["skipped"] == ["docs/empty.txt: empty"]
+    for _ in range(5):
+        await asyncio.sleep(0.1)
+        status_res = await client.get(f"/documents/status/{body['batch_id']}")
+        if status_res.json()["data"]["status"] == "completed":
+            break
+    assert status_res.json()["data"]["completed"] == "2"
+    assert {UUID(d) for d in body["document_ids"]} <= set(client.fake_db.embeddings)
+
+
+@pytest.mark.asyncio
+async def test_archive_upload_flushes_on_buffered_bytes(
+    client: AsyncClient, monkeypatch
+) -> None:
+    from src.server.routes import documents
+
+    inserts = []
+    create_documents = client.fake_db.create_documents
+
+    async def counting_create(docs):
+        inserts.append(len(docs))
+        return await create_documents(docs)
+
+    monkeypatch.setattr(client.fake_db, "create_documents", counting_create)
+    monkeypatch.setattr(documents, "ARCHIVE_INSERT_BYTES", 10)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name in ("a", "b", "c"):
+            zf.writestr(f"{name}.txt", b"123456")
+    data = {"source_id": str(uuid4())}
+    files = {"file": ("docs.zip", buf.getvalue(), "application/zip")}
+    res = await client.post("/documents/upload/archive", data=data, files=files)
+    assert res.status_code == 202
+    assert inserts == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_archive_upload_goes_through_admission(
+    client: AsyncClient, monkeypatch
+) -> None:
+    from src.server.routes import documents
+    from src.server.services.admission import AdmissionController
+
+    ctrl = AdmissionController(
+        max_bytes=10_000, max_jobs=10, project_max_bytes=10_000, project_max_jobs=1
+    )
+    monkeypatch.setattr(documents, "upload_admission", ctrl)
+    source_id = str(uuid4())
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("a.txt", b"alpha")
+    data = {"source_id": source_id}
+    files = {"file": ("docs.zip", buf.getvalue(), "application/zip")}
+    held = ctrl.admit(source_id, 1)
+    res = await client.post("/documents/upload/archive", data=data, files=files)
+    assert res.status_code == 429
+    held.release()
+    res = await client.post("/documents/upload/archive", data=data, files=files)
+    assert res.status_code == 202
+    assert ctrl.jobs == 0
+
+    bad = {"file": ("docs.zip", b"not an archive", "application/zip")}
+    res = await client.post("/documents/upload/archive", data=data, files=bad)
+    assert res.status_code == 400
+    assert ctrl.jobs == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_archive_upload_discards_flushed_documents(
+    client: AsyncClient, monkeypatch
+) -> None:
+    from src.server.routes import documents
+
+    monkeypatch.setattr(documents, "ARCHIVE_INSERT_BATCH", 1)
+    reads = 0
+    read_entry = documents._read_archive_entry
+
+    async def failing_read(entry):
+        nonlocal reads
+        reads += 1
+        if reads == 3:
+            raise RuntimeError("boom")
+        return await read_entry(entry)
+
+    monkeypatch.setattr(documents, "_read_archive_entry", failing_read)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name in ("a", "b", "c"):
+            zf.writestr(f"{name}.txt", name.encode())
+    data = {"source_id": str(uuid4())}
+    files = {"file": ("docs.zip", buf.getvalue(), "application/zip")}
+    res = await client.post("/documents/upload/archive", data=data, files=files)
+    assert res.status_code == 500
+    assert client.fake_db.documents == {}
+
+
+@pytest.mark.asyncio
+async def test_archive_entry_limit_is_checked_before_inserting(
+    client: AsyncClient, monkeypatch
+) -> None:
+    from src.server.routes import documents
+
+    monkeypatch.setattr(documents, "MAX_ARCHIVE_ENTRIES", 2)
+    monkeypatch.setattr(documents, "ARCHIVE_INSERT_BATCH", 1)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name in ("a", "b", "c"):
+            zf.writestr(f"{name}.txt", name.encode())
+    data = {"source_id": str(uuid4())}
+    files = {"file": ("docs.zip", buf.getvalue(), "application/zip")}
+    inserts = []
+
+    async def recording_create(docs):
+        inserts.append(len(docs))
+        return list(docs)
+
+    monkeypatch.setattr(client.fake_db, "create_documents", recording_create)
+    res = await client.post("/documents/upload/archive", data=data, files=files)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "too many files in archive"
+    assert inserts == []
+
+
+@pytest.mark.asyncio
+async def test_archive_upload_rejects_invalid_archive(client: AsyncClient) -> None:
+    data = {"source_id": str(uuid4())}
+    files = {"file": ("docs.zip", b"not an archive", "application/zip")}
+    res = await client.post("/documents/upload/archive", data=data, files=files)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "invalid archive"
+
+
+@pytest.mark.asyncio
+async def test_archive_upload_requires_supported_files(client: AsyncClient) -> None:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("image.png", b"\x89PNG")
+    data = {"source_id": str(uuid4())}
+    files = {"file": ("docs.zip", buf.getvalue(), "application/zip")}
+    res = await client.post("/documents/upload/archive", data=data, files=files)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "no supported files in archive"
+
+
+@pytest.mark.asyncio
+async def test_update_document_reembeds_changed_chunks(monkeypatch) -> None:
+    from src.server.routes import documents
+    from src.server.services import chunking
+
+    embedded = []
+
+    async def fake_generate(text: str):
+        embedded.append(text)
+        return [float(len(text)), 1.0]
+
+    async def fake_broadcast(*_args, **_kwargs):
+        return None
+
+    monkeypatch.setattr(chunking, "generate_embedding", fake_generate)
+    monkeypatch.setattr(documents, "broadcast_upload_progress", fake_broadcast)
+    monkeypatch.setattr(chunking, "CHUNK_BOUNDARY_DIVISOR", 1)
+
+    fake_db = FakeDB()
+    doc = Document(id=uuid4(), source_id=uuid4(), content="a\n\nb", embeddings=[])
+    fake_db.documents[doc.id] = doc
+    documents.INGESTION_PROGRESS[doc.id] = {"status": "queued"}
+    await documents._reembed_document(doc.id, doc.content, fake_db, doc.source_id)
+    assert embedded == ["a", "b"]
+
+    embedded.clear()
+    documents.INGESTION_PROGRESS[doc.id] = {"status": "queued"}
+    await documents._reembed_document(doc.id, "a\n\nc", fake_db, doc.source_id)
+    assert embedded == ["c"]
+    assert documents.INGESTION_PROGRESS[doc.id] == {
+        "status": "completed",
+        "reused": "1",
+        "embedded": "1",
+    }
+    assert fake_db.documents[doc.id].embeddings == fake_db.embeddings[doc.id]
+
+
+@pytest.mark.asyncio
+async def test_upload_stores_chunks_so_the_first_edit_is_incremental(monkeypatch) -> None:
+    from src.server.routes import documents
+    from src.server.services import chunking
+
+    embedded = []
+
+    async def fake_generate(text: str):
+        embedded.append(text)
+        return [float(len(text)), 1.0]
+
+    async def fake_broadcast(*_args, **_kwargs):
+        return None
+
+    monkeypatch.setattr(chunking, "generate_embedding", fake_generate)
+    monkeypatch.setattr(documents, "broadcast_upload_progress", fake_broadcast)
+    monkeypatch.setattr(chunking, "CHUNK_BOUNDARY_DIVISOR", 1)
+
+    fake_db = FakeDB()
+    content = f"{uuid4()}\n\nshared"
+    doc = Document(id=uuid4(), source_id=uuid4(), content=content, embeddings=[])
+    fake_db.documents[doc.id] = doc
+    documents.INGESTION_PROGRESS[doc.id] = {"status": "queued"}
+    await documents._process_embedding(doc.id, content, fake_db, doc.source_id)
+    assert len(fake_db.chunks[doc.id]) == 2
+    assert fake_db.embeddings[doc.id] == chunking.mean_vector(
+        [row["embedding"] for row in fake_db.chunks[doc.id].values()]
+    )
+
+    # An identical upload reuses the vector and the chunk rows.
+    embedded.clear()
+    copy = Document(id=uuid4(), source_id=doc.source_id, content=content, embeddings=[])
+    fake_db.documents[copy.id] = copy
+    documents.INGESTION_PROGRESS[copy.id] = {"status": "queued"}
+    await documents._process_embedding(copy.id, content, fake_db, doc.source_id)
+    assert embedded == []
+    assert fake_db.chunks[copy.id] == fake_db.chunks[doc.id]
+
+    documents.INGESTION_PROGRESS[doc.id] = {"status": "queued"}
+    await documents._reembed_document(doc.id, content + "\n\nedit", fake_db, doc.source_id)
+    assert embedded == ["edit"]
+
+
+@pytest.mark.asyncio
+async def test_failed_embedding_swap_fails_the_update(monkeypatch) -> None:
+    from src.server.routes import documents
+    from src.server.services import chunking
+
+    async def fake_generate(text: str):
+        return [1.0, 0.0]
+
+    async def fake_broadcast(*_args, **_kwargs):
+        return None
+
+    async def failed_replace(doc_id, embedding):
+        return False
+
+    monkeypatch.setattr(chunking, "generate_embedding", fake_generate)
+    monkeypatch.setattr(documents, "broadcast_upload_progress", fake_broadcast)
+    fake_db = FakeDB()
+    monkeypatch.setattr(fake_db, "replace_embedding", failed_replace)
+    doc = Document(id=uuid4(), source_id=uuid4(), content="a", embeddings=[])
+    fake_db.documents[doc.id] = doc
+    documents.INGESTION_PROGRESS[doc.id] = {"status": "queued"}
+    await documents._reembed_document(doc.id, "b", fake_db, doc.source_id)
+    assert documents.INGESTION_PROGRESS[doc.id] == {
+        "status": "failed",
+        "error": "replace_embedding failed",
+    }
+    assert fake_db.documents[doc.id].embeddings == []
+
+
+@pytest.mark.asyncio
+async def test_crawl_source_ingests_pages_and_marks_source_ready(monkeypatch) -> None:
+    from src.server.routes import documents
+    from src.server.services.crawler import CrawledPage
+
+    class StubCrawler:
+        async def crawl(self, url):
+            for n in range(3):
+                yield CrawledPage(f"{url}p{n}", f"t{n}", f"text {n}" if n else " ")
+
+    async def fake_broadcast(*_args, **_kwargs):
+        return None
+
+    monkeypatch.setattr(documents, "broadcast_upload_progress", fake_broadcast)
+    fake_db = FakeDB()
+    source = Source(
+        id=uuid4(),
+        project_id=uuid4(),
+        type=SourceType.WEB,
+        url="https://example.com/",
+        status=SourceStatus.PENDING,
+    )
+    fake_db.sources[source.id] = source
+    crawl_id = uuid4()
+    documents.INGESTION_PROGRESS[crawl_id] = {"status": "queued", "pages": "0"}
+    await documents._crawl_source(crawl_id, source, fake_db, StubCrawler())
+
+    assert documents.INGESTION_PROGRESS[crawl_id]["status"] == "completed"
+    assert documents.INGESTION_PROGRESS[crawl_id]["pages"] == "2"
+    assert sorted(d.metadata["url"] for d in fake_db.documents.values()) == [
+        "https://example.com/p1",
+        "https://example.com/p2",
+    ]
+    assert all(d.embeddings for d in fake_db.documents.values())
+    assert fake_db.sources[source.id].status == SourceStatus.READY
+    assert fake_db.sources[source.id].metadata["crawled_pages"] == 2
+
+
+@pytest.mark.asyncio
+async def test_crawl_unknown_source_returns_404(client: AsyncClient) -> None:
+    res = await client.post(f"/documents/crawl/{uuid4()}")
+    assert res.status_code == 404
+
+
 @pytest.mark.asyncio
 async def test_process_embedding_handles_expected_error(monkeypatch) -> None:
     from src.server.routes import documents
+    from src.server.services import chunking
     from src.server.services.embedding import EmbeddingProcessingError
 
     async def fake_generate(_: str):
@@ -286,7 +739,7 @@ async def test_process_embedding_handles_expected_error(monkeypatch) -> None:
     async def fake_broadcast(*_args, **_kwargs):
         return None
 
-    monkeypatch.setattr(documents, "generate_embedding", fake_generate)
+    monkeypatch.setattr(chunking, "generate_embedding", fake_generate)
     monkeypatch.setattr(documents, "broadcast_upload_progress", fake_broadcast)
 
     doc_id, project_id = uuid4(), uuid4()
@@ -300,6 +753,7 @@ async def test_process_embedding_handles_expected_error(monkeypatch) -> None:
 @pytest.mark.asyncio
 async def test_process_embedding_propagates_unexpected_exceptions(monkeypatch) -> None:
     from src.server.routes import documents
+    from src.server.services import chunking
 
     async def fake_generate(_: str):
         return [0.1]
@@ -312,7 +766,7 @@ async def test_process_embedding_propagates_unexpected_exceptions(monkeypatch) -
     async def bad_store(*_args, **_kwargs):
         raise RuntimeError("db down")
 
-    monkeypatch.setattr(documents, "generate_embedding", fake_generate)
+    monkeypatch.setattr(chunking, "generate_embedding", fake_generate)
     monkeypatch.setattr(documents, "broadcast_upload_progress", fake_broadcast)
     monkeypatch.setattr(fake_db, "store_embedding", bad_store)
 
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.mcp import ToolExecutionError, deps
+from src.mcp.tools.document_tools import search_documents
+from src.server.auth.dependencies import jwt_service
+from src.server.database.migrations import split_statements
+from src.server.main import api
+from src.server.models.document import Document
+from src.server.models.query import Query
+from src.server.routes import get_database_service
+from src.server.services import search_cursor
+from src.server.services.database import DatabaseService
+from src.server.services.search_cursor import (
+    CursorError,
+    CursorVectorStore,
+    SearchCursor,
+    paginated_search,
+    vector_ref,
+)
+
+
+class RankedDB:
+    """Fake database ranking documents by a fixed distance, with keyset paging."""
+
+    def __init__(self, count: int = 7) -> None:
+        ids = sorted((uuid4() for _ in range(count)), key=str)
+        self.ranked = [
+            (Document(id=i, source_id=uuid4(), content=f"d{n}"), round(0.1 * (n // 2), 2))
+            for n, i in enumerate(ids)
+        ]
+        self.calls: List[Dict[str, Any]] = []
+
+    async def vector_search_scored(
+        self, embedding, query: Query, search_params=None, exact=False, after=None, depth=0
+    ) -> List[Tuple[Document, Optional[float]]]:
+        self.calls.append({"match_count": query.match_count, "after": after, "depth": depth})
+        rows = self.ranked
+        if after is not None:
+            rows = [(d, s) for d, s in rows if (s, str(d.id)) > (after[0], str(after[1]))]
+        return rows[: query.match_count]
+
+    async def vector_search(self, embedding, query: Query) -> List[Document]:
+        return [d for d, _ in await self.vector_search_scored(embedding, query)]
+
+    async def get_embeddings(self, doc_ids) -> Dict[str, List[float]]:
+        return {str(d): [1.0, 0.1 * n] for n, d in enumerate(doc_ids)}
+
+
+@pytest.fixture(autouse=True)
+def fresh_vectors(monkeypatch) -> None:
+    monkeypatch.setattr(search_cursor, "cursor_vectors", CursorVectorStore())
+
+
+def test_cursor_round_trip_and_rejects_garbage() -> None:
+    cursor = SearchCursor("ref", "fp", 6, 0.25, str(uuid4()))
+    assert SearchCursor.decode(cursor.encode()) == cursor
+    for token in ("not-base64!", SearchCursor("r", "f", -1).encode(), "e30"):
+        with pytest.raises(CursorError):
+            SearchCursor.decode(token)
+
+
+@pytest.mark.asyncio
+async def test_pages_continue_with_keyset_until_exhausted() -> None:
+    db = RankedDB(7)
+    query = Query(query_text="x", match_count=3, paginate=True)
+    seen: List[Document] = []
+    while True:
+        page = await paginated_search(db, [1.0, 0.0], query)
+        seen.extend(page.documents)
+        if page.next_cursor is None:
+            break
+        query = query.model_copy(update={"cursor": page.next_cursor, "paginate": False})
+
+    assert seen == [d for d, _ in db.ranked]
+    # Later pages continue after the last (distance, id) instead of re-ranking.
+    assert [c["match_count"] for c in db.calls] == [3, 3, 3]
+    assert db.calls[0]["after"] is None
+    assert db.calls[1]["after"] == (db.ranked[2][1], db.ranked[2][0].id)
+    assert [c["depth"] for c in db.calls] == [0, 3, 6]
+
+
+@pytest.mark.asyncio
+async def test_unpaginated_search_returns_no_cursor() -> None:
+    page = await paginated_search(RankedDB(), [1.0, 0.0], Query(query_text="x", match_count=3))
+    assert len(page.documents) == 3 and page.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_cursor_is_bound_to_vector_and_query() -> None:
+    db = RankedDB()
+    first = await paginated_search(
+        db, [1.0, 0.0], Query(query_text="x", match_count=2, paginate=True)
+    )
+    cursor = first.next_cursor
+    assert SearchCursor.decode(cursor).ref == vector_ref([1.0, 0.0])
+    assert search_cursor.cursor_embedding(Query(query_text="x", cursor=cursor)) == [1.0, 0.0]
+
+    # The page size may change between pages; the ranking inputs may not.
+    more = await paginated_search(
+        db, [1.0, 0.0], Query(query_text="x", match_count=4, cursor=cursor)
+    )
+    assert len(more.documents) == 4
+    with pytest.raises(CursorError):
+        await paginated_search(db, [0.0, 1.0], Query(query_text="x", cursor=first.next_cursor))
+    with pytest.raises(CursorError):
+        await paginated_search(
+            db, [1.0, 0.0], Query(query_text="x", threshold=0.9, cursor=first.next_cursor)
+        )
+
+
+@pytest.mark.asyncio
+async def test_mmr_pages_are_cut_from_deeper_reranking() -> None:
+    db = RankedDB(5)
+    query = Query(query_text="x", match_count=2, mmr_lambda=0.5, paginate=True)
+    first = await paginated_search(db, [1.0, 0.0], query)
+    second = await paginated_search(
+        db, [1.0, 0.0], query.model_copy(update={"paginate": False, "cursor": first.next_cursor})
+    )
+    assert SearchCursor.decode(first.next_cursor).distance is None
+    assert len(second.documents) == 2
+    assert not {d.id for d in first.documents} & {d.id for d in second.documents}
+
+
+@pytest.mark.asyncio
+async def test_database_service_sends_keyset_and_reads_distance(recording_provider) -> None:
+    doc_id = uuid4()
+    row = {"id": str(doc_id), "source_id": str(uuid4()), "content": "c", "distance": 0.125}
+    provider = recording_provider({"match_documents_quantized": [row]})
+    service = DatabaseService(provider, quantization="binary")
+    after = (0.1, uuid4())
+    [(doc, distance)] = await service.vector_search_scored(
+        [0.1, -0.2], Query(query_text="x", match_count=2), after=after, depth=4
+    )
+    assert doc.id == doc_id and distance == 0.125
+    name, params = provider.client.calls[0]
+    assert name == "match_documents_quantized"
+    assert params["after_distance"] == 0.1
+    assert params["after_id"] == str(after[1])
+    # The Hamming shortlist covers the earlier pages as well.
+    assert params["candidate_count"] == 60
+
+
+def test_cursor_migration_splits_into_statements() -> None:
+    path = Path(__file__).resolve().parents[2] / "migration" / "10_search_cursors.sql"
+    statements = split_statements(path.read_text())
+    functions = [s for s in statements if "CREATE OR REPLACE FUNCTION" in s]
+    assert len(functions) == 3
+    assert all("after_distance FLOAT DEFAULT NULL" in s for s in functions)
+
+
+@pytest.mark.asyncio
+async def test_document_search_route_returns_cursor_header() -> None:
+    db = RankedDB(5)
+
+    async def _get_db():
+        return db
+
+    api.dependency_overrides[get_database_service] = _get_db
+    headers = {"Authorization": f"Bearer {jwt_service.create_token('u', 'user')}"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=api), base_url="http://test") as client:
+            query = {"query_text": "x", "match_count": 3, "paginate": True}
+            body = {"embedding": [1.0, 0.0], "query": query}
+            res = await client.post("/documents/search", json=body, headers=headers)
+            cursor = res.headers["X-Next-Cursor"]
+            assert len(res.json()["data"]) == 3
+
+            body["query"] = {"query_text": "x", "match_count": 3, "cursor": cursor}
+            res = await client.post("/documents/search", json=body, headers=headers)
+            assert len(res.json()["data"]) == 2
+            assert "X-Next-Cursor" not in res.headers
+
+            body["embedding"] = [0.0, 1.0]
+            res = await client.post("/documents/search", json=body, headers=headers)
+            assert res.status_code == 400
+    finally:
+        api.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_mcp_tool_returns_next_cursor(monkeypatch) -> None:
+    async def embed(text: str) -> List[float]:
+        return [1.0, 0.0]
+
+    monkeypatch.setitem(search_documents.__globals__, "generate_embedding", embed)
+    monkeypatch.setattr(deps, "db_service", RankedDB(3))
+    first = await search_documents({"query": "x", "match_count": 2, "paginate": True})
+    assert len(first["documents"]) == 2
+    last = await search_documents(
+        {"query": "x", "match_count": 2, "cursor": first["next_cursor"]}
+    )
+    assert len(last["documents"]) == 1 and last["next_cursor"] is None
+    with pytest.raises(ToolExecutionError):
+        await search_documents({"query": "x", "cursor": "garbage"})
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List
+from uuid import uuid4
+
+import pytest
+
+from src.server.models.document import Document
+from src.server.models.query import Query
+from src.server.services.search_stream import stream_search
+
+
+class SlowDB:
+    def __init__(self, full_delay: float) -> None:
+        self.docs = [
+            Document(id=uuid4(), source_id=uuid4(), content=f"d{i}") for i in range(5)
+        ]
+        self.full_delay = full_delay
+        self.queries: List[Query] = []
+
+    async def vector_search(self, embedding, query: Query) -> List[Document]:
+        self.queries.append(query)
+        if query.match_count > 2:
+            await asyncio.sleep(self.full_delay)
+        return self.docs[: query.match_count]
+
+    async def vector_search_scored(self, embedding, query: Query):
+        return [(doc, None) for doc in await self.vector_search(embedding, query)]
+
+
+async def _collect(db, query, **kwargs):
+    return [(stage, docs) async for stage, docs in stream_search(db, [1.0], query, **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_early_hits_arrive_before_full_ranking() -> None:
+    db = SlowDB(full_delay=0.05)
+    events = await _collect(db, Query(query_text="x", match_count=5), early_count=2)
+    assert [stage for stage, _ in events] == ["early", "full"]
+    assert events[0][1] == db.docs[:2]
+    assert events[1][1] == db.docs
+    assert db.queries[1].threshold >= 0.8
+
+
+@pytest.mark.asyncio
+async def test_fast_full_search_skips_early_stage() -> None:
+    db = SlowDB(full_delay=0)
+    events = await _collect(db, Query(query_text="x", match_count=5), early_count=5)
+    assert [stage for stage, _ in events] == ["full"]
+    events = await _collect(
+        db, Query(query_text="x", match_count=5, mmr_lambda=1.0), early_count=2
+    )
+    assert [stage for stage, _ in events] == ["full"]
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from uuid import uuid4
+
+from src.server.models.document import Document
+from src.server.services.search_summary import result_summary, search_summary
+
+
+def doc(content: str, **metadata) -> Document:
+    return Document(
+        id=uuid4(),
+        source_id=uuid4(),
+        content=content,
+        embeddings=[0.1] * 1536,
+        metadata=metadata,
+    )
+
+
+def test_result_summary_drops_content_and_embeddings() -> None:
+    d = doc("word " * 1000, title="Guide", content_hash="abc")
+    entry = result_summary(d, 1, snippet_chars=50)
+    assert set(entry) == {"id", "source_id", "rank", "title", "snippet"}
+    assert entry["title"] == "Guide"
+    assert len(entry["snippet"]) == 50
+    assert entry["snippet"].endswith("…")
+
+
+def test_title_falls_back_to_filename_then_text() -> None:
+    assert result_summary(doc("x", filename="a.md"), 1, 10)["title"] == "a.md"
+    assert result_summary(doc("first line\nsecond"), 1, 10)["title"] == "first line second"
+
+
+def test_search_summary_caps_results_and_bytes() -> None:
+    results = [doc("text " * 100, title=f"t{i}") for i in range(50)]
+    full = sum(len(d.model_dump_json()) for d in results)
+
+    payload = search_summary("q", results, max_results=10, snippet_chars=100)
+    assert payload["total"] == 50
+    assert [e["rank"] for e in payload["results"]] == list(range(1, 11))
+    assert payload["truncated"] is True
+    assert len(json.dumps(payload)) * 100 < full
+
+    small = search_summary("q", results, max_results=10, snippet_chars=100, max_bytes=700)
+    assert 0 < len(small["results"]) < 10
+    assert len(json.dumps(small, ensure_ascii=False).encode()) <= 700
+
+
+def test_search_summary_not_truncated_when_everything_fits() -> None:
+    payload = search_summary("q", [doc("a"), doc("b")])
+    assert payload["truncated"] is False
+    assert [e["snippet"] for e in payload["results"]] == ["a", "b"]
+
+
+def test_clip_reads_a_bounded_prefix() -> None:
+    spaced = doc("a" + " " * 100_000 + "b")
+    assert result_summary(spaced, 1, snippet_chars=10)["snippet"] == "a…"
+    assert result_summary(doc("a \n\t b"), 1, snippet_chars=10)["snippet"] == "a b"
+
+
+def test_scores_come_from_distances() -> None:
+    payload = search_summary("q", [doc("a"), doc("b"), doc("c")], [0.125, None, 0.5])
+    scores = [e.get("score") for e in payload["results"]]
+    assert scores == [0.875, None, 0.5]
+    assert "score" not in search_summary("q", [doc("a")])["results"][0]
+
+
+def test_query_text_is_clipped() -> None:
+    payload = search_summary("q" * 100_000, [doc("a")])
+    assert len(payload["query"]) == 200
+    assert payload["query"].endswith("…")
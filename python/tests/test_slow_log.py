@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import Counter
+
+from src.common.metrics import shared_metric
+from src.server.auth.dependencies import jwt_service
+from src.server.main import api
+from src.server.models.query import Query
+from src.server.services import database
+from src.server.services.database import DatabaseError, DatabaseService
+from src.server.services.slow_log import SLOW_OPERATIONS, SlowOperationLog, redact
+
+
+class FakeSpan:
+    def __init__(self) -> None:
+        self.attributes: Dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.attributes["exception"] = exc
+
+
+def test_redact_hides_text_and_vectors() -> None:
+    params = {
+        "query_embedding": [0.1] * 1536,
+        "query_text": "secret question",
+        "source_ids": ["3f2504e0-4f89-41d3-9a0c-0305e82c3301"],
+        "query_bits": "1" * 1536,
+        "match_count": 5,
+        "nested": {"content": "body"},
+    }
+    assert redact(params) == {
+        "query_embedding": "<1536 numbers>",
+        "query_text": "<redacted>",
+        "source_ids": ["3f2504e0-4f89-41d3-9a0c-0305e82c3301"],
+        "query_bits": "<1536 chars>",
+        "match_count": 5,
+        "nested": {"content": "<redacted>"},
+    }
+
+
+def test_only_slow_sampled_operations_are_logged() -> None:
+    draws = iter([0.9, 0.1])
+    log = SlowOperationLog(threshold_ms=0, sample_rate=0.5, rng=lambda: next(draws))
+    with log.track("db.a", FakeSpan()):
+        pass
+    with log.track("db.b", FakeSpan(), {"limit": 3}) as span:
+        span.set_attribute("db.rows", 7)
+    assert [(e["operation"], e["rows"], e["params"]) for e in log.snapshot()] == [
+        ("db.b", 7, {"limit": 3})
+    ]
+
+    fast = SlowOperationLog(threshold_ms=10_000)
+    with fast.track("db.c", FakeSpan()):
+        pass
+    assert len(fast) == 0
+
+
+def test_errors_are_recorded_and_log_is_bounded() -> None:
+    log = SlowOperationLog(threshold_ms=0, size=2)
+    for name in ("db.a", "db.b", "db.c"):
+        with pytest.raises(RuntimeError):
+            with log.track(name, FakeSpan()) as span:
+                try:
+                    raise RuntimeError("boom")
+                except RuntimeError as exc:
+                    span.record_exception(exc)
+                    raise
+    entries = log.snapshot()
+    assert [e["operation"] for e in entries] == ["db.c", "db.b"]
+    assert entries[0]["error"] == "RuntimeError"
+    assert log.snapshot(limit=1)[0]["operation"] == "db.c"
+
+
+@pytest.mark.asyncio
+async def test_plan_captured_in_background_when_enabled() -> None:
+    async def explain() -> str:
+        return "Index Scan using idx_documents_source_id"
+
+    log = SlowOperationLog(threshold_ms=0, explain=True)
+    with log.track("db.vector_search", FakeSpan()) as span:
+        span.explain = explain
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert log.snapshot()[0]["plan"] == "Index Scan using idx_documents_source_id"
+
+    disabled = SlowOperationLog(threshold_ms=0, explain=False)
+    with disabled.track("db.vector_search", FakeSpan()) as span:
+        span.explain = explain
+    await asyncio.sleep(0)
+    assert disabled.snapshot()[0]["plan"] is None
+
+
+@pytest.mark.asyncio
+async def test_database_service_reports_slow_rpc(monkeypatch, recording_provider) -> None:
+    log = SlowOperationLog(threshold_ms=0)
+    monkeypatch.setattr(database, "slow_operations", log)
+    service = DatabaseService(recording_provider())
+    await service.vector_search([0.5] * 16, Query(query_text="private"))
+    with pytest.raises(DatabaseError):
+        await DatabaseService(recording_provider(fail=True)).similarity_query([0.5] * 16, 3)
+
+    failed, search = log.snapshot()
+    assert search["operation"] == "db.vector_search"
+    assert search["rows"] == 0
+    assert search["params"]["rpc"] == "match_documents"
+    assert search["params"]["query_embedding"] == "<16 numbers>"
+    assert "private" not in str(search)
+    assert failed["operation"] == "db.similarity_query"
+    assert failed["error"] == "RuntimeError"
+
+
+@pytest.mark.asyncio
+async def test_admin_endpoint_requires_admin_role(monkeypatch) -> None:
+    log = SlowOperationLog(threshold_ms=0)
+    with log.track("db.list_projects", FakeSpan()):
+        pass
+    monkeypatch.setattr("src.server.routes.admin.slow_operations", log)
+    transport = ASGITransport(app=api)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        user = {"Authorization": f"Bearer {jwt_service.create_token('u', 'user')}"}
+        admin = {"Authorization": f"Bearer {jwt_service.create_token('a', 'admin')}"}
+        assert (await client.get("/admin/slow-operations", headers=user)).status_code == 403
+
+        res = await client.get("/admin/slow-operations", headers=admin)
+        assert res.status_code == 200
+        operations: List[Dict[str, Any]] = res.json()["data"]["operations"]
+        assert [op["operation"] for op in operations] == ["db.list_projects"]
+
+        res = await client.delete("/admin/slow-operations", headers=admin)
+        assert res.json()["data"]["cleared"] is True
+        assert len(log) == 0
+
+
+def test_metric_survives_a_second_import() -> None:
+    again = shared_metric(Counter, "db_slow_operations_total", "again", ["operation"])
+    assert again is SLOW_OPERATIONS
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.server.main import api
+from src.server.services import warmup
+from src.server.services.warmup import (
+    Readiness,
+    WarmupError,
+    run_warmup,
+    warm_database,
+)
+
+
+@pytest.mark.asyncio
+async def test_required_steps_gate_readiness() -> None:
+    async def ok() -> None:
+        return None
+
+    async def broken() -> None:
+        raise RuntimeError("down")
+
+    async def slow() -> None:
+        await asyncio.sleep(1)
+
+    readiness = Readiness("test")
+    await run_warmup(
+        readiness,
+        {"database": ok, "embedding": broken, "caches": slow},
+        required=("database",),
+        timeout=0.05,
+    )
+    assert readiness.snapshot() == {
+        "ready": True,
+        "checks": {"database": "ok", "embedding": "failed", "caches": "timeout"},
+    }
+
+    readiness = Readiness("test")
+    await run_warmup(readiness, {"database": broken}, required=("database",))
+    assert readiness.ready is False
+
+
+@pytest.mark.asyncio
+async def test_readiness_runs_in_background() -> None:
+    gate = asyncio.Event()
+
+    async def step() -> None:
+        await gate.wait()
+
+    readiness = Readiness("test")
+    readiness.start({"database": step}, required=("database",))
+    await asyncio.sleep(0)
+    assert readiness.snapshot() == {"ready": False, "checks": {"database": "pending"}}
+    gate.set()
+    await asyncio.sleep(0.01)
+    assert readiness.ready is True
+    await readiness.stop()
+
+
+class PingDB:
+    def __init__(self, healthy: bool = True) -> None:
+        self.healthy = healthy
+        self.pings = 0
+
+    async def ping(self) -> bool:
+        self.pings += 1
+        return self.healthy
+
+
+@pytest.mark.asyncio
+async def test_warm_database_opens_connections() -> None:
+    db = PingDB()
+    await warm_database(db, connections=3)
+    assert db.pings == 3
+    with pytest.raises(WarmupError):
+        await warm_database(PingDB(healthy=False))
+
+
+@pytest.mark.asyncio
+async def test_warmup_steps_include_embedding_probe(monkeypatch) -> None:
+    calls = []
+
+    async def probe() -> None:
+        calls.append("probe")
+
+    monkeypatch.setattr(warmup, "warm_up_embedding", probe)
+    steps = warmup.warmup_steps(PingDB())
+    assert set(steps) == {"database", "embedding", "caches"}
+    await steps["embedding"]()
+    assert calls == ["probe"]
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint_reflects_warmup() -> None:
+    transport = ASGITransport(app=api)
+    previous = api.state.readiness
+    api.state.readiness = Readiness("server")
+    try:
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            res = await client.get("/ready")
+            assert res.status_code == 503
+            api.state.readiness.ready = True
+            res = await client.get("/ready")
+            assert res.status_code == 200
+            assert res.json()["ready"] is True
+    finally:
+        api.state.readiness = previous